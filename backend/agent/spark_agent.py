@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+import websockets
+
+AGENT_VERSION = "1"
+AGENT_PATH = "/api/cluster/agents/ws"
+TOKEN_HEADER = "X-Spark-Agent-Token"
+SECTOR_BYTES = 512
+READ_SIZE = 65536
+MAX_OUTPUT_BYTES = 1024 * 1024
+RECONNECT_MAX_SECONDS = 30.0
+IGNORED_DISKS = ("loop", "ram", "zram", "dm-", "md", "sr")
+IGNORED_INTERFACES = ("lo", "veth")
+
+logger = logging.getLogger("spark-agent")
+
+
+class ProcFile:
+    def __init__(self, path: str):
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self) -> str:
+        chunks, offset = [], 0
+        while True:
+            chunk = os.pread(self.fd, READ_SIZE, offset)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+        return b"".join(chunks).decode()
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _rate(current: int, previous: int, elapsed: float) -> float:
+    return round(max(current - previous, 0) / elapsed, 2)
+
+
+def _whole_disks() -> Optional[set[str]]:
+    try:
+        names = os.listdir("/sys/block")
+    except OSError:
+        return None
+    return {name for name in names if not name.startswith(IGNORED_DISKS)}
+
+
+class HostSampler:
+    def __init__(self):
+        self.stat = ProcFile("/proc/stat")
+        self.meminfo = ProcFile("/proc/meminfo")
+        self.diskstats = ProcFile("/proc/diskstats")
+        self.netdev = ProcFile("/proc/net/dev")
+        self.disks = _whole_disks()
+        self._previous: Optional[tuple[float, dict]] = None
+
+    def close(self):
+        for proc in (self.stat, self.meminfo, self.diskstats, self.netdev):
+            proc.close()
+
+    def reset(self):
+        self._previous = None
+
+    def _cpu_counters(self) -> dict[str, tuple[int, int, int]]:
+        counters = {}
+        for line in self.stat.read().splitlines():
+            if not line.startswith("cpu"):
+                break
+            name, *values = line.split()
+            ticks = [int(value) for value in values[:8]]
+            idle, iowait = ticks[3], ticks[4]
+            counters[name] = (sum(ticks), idle + iowait, iowait)
+        return counters
+
+    def _disk_counters(self) -> tuple[int, int, int, int, dict[str, int]]:
+        reads = writes = read_sectors = write_sectors = 0
+        busy = {}
+        for line in self.diskstats.read().splitlines():
+            fields = line.split()
+            if len(fields) < 13:
+                continue
+            name = fields[2]
+            if self.disks is not None:
+                if name not in self.disks:
+                    continue
+            elif name.startswith(IGNORED_DISKS):
+                continue
+            reads += int(fields[3])
+            read_sectors += int(fields[5])
+            writes += int(fields[7])
+            write_sectors += int(fields[9])
+            busy[name] = int(fields[12])
+        return reads, writes, read_sectors, write_sectors, busy
+
+    def _net_counters(self) -> dict[str, tuple[int, ...]]:
+        counters = {}
+        for line in self.netdev.read().splitlines()[2:]:
+            name, _, values = line.partition(":")
+            name = name.strip()
+            if name.startswith(IGNORED_INTERFACES):
+                continue
+            fields = [int(value) for value in values.split()]
+            # rx bytes, rx packets, rx errs, rx drop, tx bytes, tx packets, tx errs, tx drop
+            counters[name] = (
+                fields[0],
+                fields[1],
+                fields[2],
+                fields[3],
+                fields[8],
+                fields[9],
+                fields[10],
+                fields[11],
+            )
+        return counters
+
+    def _memory(self) -> dict:
+        values = {}
+        for line in self.meminfo.read().splitlines():
+            key, _, rest = line.partition(":")
+            values[key] = int(rest.split()[0]) * 1024
+        total = values.get("MemTotal", 0)
+        available = values.get("MemAvailable", values.get("MemFree", 0))
+        swap_total = values.get("SwapTotal", 0)
+        return {
+            "total_bytes": total,
+            "available_bytes": available,
+            "used_bytes": total - available,
+            "free_bytes": values.get("MemFree", 0),
+            "cached_bytes": values.get("Cached", 0) + values.get("Buffers", 0),
+            "swap_total_bytes": swap_total,
+            "swap_used_bytes": swap_total - values.get("SwapFree", 0),
+            "used_percent": (
+                round((total - available) / total * 100, 2) if total else 0.0
+            ),
+        }
+
+    def sample(self) -> Optional[dict]:
+        now = time.monotonic()
+        counters = {
+            "cpu": self._cpu_counters(),
+            "disk": self._disk_counters(),
+            "net": self._net_counters(),
+        }
+        memory = self._memory()
+        previous, self._previous = self._previous, (now, counters)
+        if previous is None:
+            return None
+        elapsed = now - previous[0]
+        if elapsed <= 0:
+            return None
+        before = previous[1]
+
+        def cpu_percent(name: str) -> tuple[float, float]:
+            total, idle, iowait = counters["cpu"][name]
+            last_total, last_idle, last_iowait = before["cpu"].get(
+                name, (total, idle, iowait)
+            )
+            ticks = total - last_total
+            if ticks <= 0:
+                return 0.0, 0.0
+            return (
+                round((ticks - (idle - last_idle)) / ticks * 100, 2),
+                round((iowait - last_iowait) / ticks * 100, 2),
+            )
+
+        percent, iowait = cpu_percent("cpu")
+        cores = sorted(
+            (name for name in counters["cpu"] if name != "cpu"),
+            key=lambda n: int(n[3:]),
+        )
+
+        reads, writes, read_sectors, write_sectors, busy = counters["disk"]
+        last_reads, last_writes, last_read_sectors, last_write_sectors, last_busy = (
+            before["disk"]
+        )
+        busy_ms = max(
+            (ticks - last_busy.get(name, ticks) for name, ticks in busy.items()),
+            default=0,
+        )
+
+        network = []
+        for name, values in counters["net"].items():
+            last = before["net"].get(name)
+            if last is None:
+                continue
+            network.append(
+                {
+                    "name": name,
+                    "rx_bytes_per_second": _rate(values[0], last[0], elapsed),
+                    "rx_packets_per_second": _rate(values[1], last[1], elapsed),
+                    "tx_bytes_per_second": _rate(values[4], last[4], elapsed),
+                    "tx_packets_per_second": _rate(values[5], last[5], elapsed),
+                    "errors": max(values[2] + values[6] - last[2] - last[6], 0),
+                    "drops": max(values[3] + values[7] - last[3] - last[7], 0),
+                }
+            )
+
+        return {
+            "type": "telemetry",
+            "interval_seconds": round(elapsed, 3),
+            "cpu": {
+                "percent": percent,
+                "iowait_percent": iowait,
+                "cores": len(cores),
+                "per_core_percent": [cpu_percent(name)[0] for name in cores],
+            },
+            "memory": memory,
+            "disk": {
+                "read_bytes_per_second": _rate(
+                    read_sectors * SECTOR_BYTES,
+                    last_read_sectors * SECTOR_BYTES,
+                    elapsed,
+                ),
+                "write_bytes_per_second": _rate(
+                    write_sectors * SECTOR_BYTES,
+                    last_write_sectors * SECTOR_BYTES,
+                    elapsed,
+                ),
+                "reads_per_second": _rate(reads, last_reads, elapsed),
+                "writes_per_second": _rate(writes, last_writes, elapsed),
+                "busy_percent": round(min(busy_ms / (elapsed * 1000) * 100, 100.0), 2),
+            },
+            "network": network,
+        }
+
+
+def _agent_url(dashboard: str) -> str:
+    parsed = urlparse(dashboard if "://" in dashboard else f"ws://{dashboard}")
+    scheme = {"http": "ws", "https": "wss"}.get(parsed.scheme, parsed.scheme)
+    path = parsed.path.rstrip("/")
+    if not path.endswith(AGENT_PATH):
+        path += AGENT_PATH
+    return f"{scheme}://{parsed.netloc}{path}"
+
+
+def _source_address(url: str) -> str:
+    parsed = urlparse(url)
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+            probe.connect((parsed.hostname, parsed.port or 80))
+            return probe.getsockname()[0]
+    except OSError:
+        return socket.gethostname()
+
+
+class Agent:
+    def __init__(
+        self,
+        url: str,
+        node: str,
+        token: Optional[str],
+        interval: float,
+        allow_commands: bool,
+    ):
+        self.url = url
+        self.node = node
+        self.token = token
+        self.interval = interval
+        self.allow_commands = allow_commands
+        self.sampler = HostSampler()
+        self._commands: set[asyncio.Task] = set()
+
+    async def run(self):
+        backoff = 1.0
+        headers = {TOKEN_HEADER: self.token} if self.token else {}
+        while True:
+            try:
+                async with websockets.connect(
+                    self.url, extra_headers=headers, max_size=2**22
+                ) as ws:
+                    logger.info(f"Connected to {self.url} as {self.node}")
+                    backoff = 1.0
+                    await ws.send(json.dumps(self._hello()))
+                    await self._session(ws)
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                logger.warning(
+                    f"Dashboard connection lost ({e}); retrying in {backoff:.0f}s"
+                )
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+
+    def _hello(self) -> dict:
+        return {
+            "type": "hello",
+            "node": self.node,
+            "hostname": socket.gethostname(),
+            "version": AGENT_VERSION,
+            "interval_seconds": self.interval,
+            "commands": self.allow_commands,
+        }
+
+    async def _session(self, ws):
+        self.sampler.reset()
+        tasks = [
+            asyncio.create_task(self._stream(ws)),
+            asyncio.create_task(self._listen(ws)),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks + list(self._commands):
+                task.cancel()
+            await asyncio.gather(*tasks, *self._commands, return_exceptions=True)
+
+    async def _stream(self, ws):
+        deadline = time.monotonic()
+        while True:
+            sample = self.sampler.sample()
+            if sample is not None:
+                await ws.send(json.dumps(sample, separators=(",", ":")))
+            deadline += self.interval
+            delay = deadline - time.monotonic()
+            if delay < 0:
+                deadline, delay = time.monotonic(), 0
+            await asyncio.sleep(delay)
+
+    async def _listen(self, ws):
+        async for raw in ws:
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                continue
+            if message.get("type") == "run":
+                task = asyncio.create_task(self._run_command(ws, message))
+                self._commands.add(task)
+                task.add_done_callback(self._commands.discard)
+
+    async def _run_command(self, ws, message: dict):
+        result = {"type": "result", "id": message.get("id")}
+        argv = message.get("argv")
+        if not self.allow_commands:
+            result["error"] = (
+                "Commands are disabled on this agent (start it with --allow-commands)"
+            )
+        elif not isinstance(argv, list) or not argv:
+            result["error"] = "argv must be a non-empty list"
+        else:
+            result.update(
+                await self._execute([str(arg) for arg in argv], message.get("timeout"))
+            )
+        await ws.send(json.dumps(result))
+
+    async def _execute(self, argv: list[str], timeout: Optional[float]) -> dict:
+        started = time.monotonic()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as e:
+            return {"error": str(e)}
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return {
+                "error": f"Timed out after {timeout}s",
+                "returncode": proc.returncode,
+            }
+        return {
+            "returncode": proc.returncode,
+            "stdout": stdout[:MAX_OUTPUT_BYTES].decode(errors="replace"),
+            "stderr": stderr[:MAX_OUTPUT_BYTES].decode(errors="replace"),
+            "duration_seconds": round(time.monotonic() - started, 3),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream host telemetry from this node to the Spark vLLM Dashboard"
+    )
+    parser.add_argument(
+        "--dashboard",
+        default=os.environ.get("SPARK_AGENT_DASHBOARD", "ws://127.0.0.1:8080"),
+        help="Dashboard URL, e.g. ws://192.168.5.157:8080",
+    )
+    parser.add_argument(
+        "--node",
+        default=os.environ.get("SPARK_AGENT_NODE"),
+        help="Node IP reported to the dashboard (default: source address used to reach it)",
+    )
+    parser.add_argument("--token", default=os.environ.get("SPARK_AGENT_TOKEN"))
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument(
+        "--allow-commands",
+        action="store_true",
+        help="Let the dashboard run commands on this node",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
+    )
+    url = _agent_url(args.dashboard)
+    agent = Agent(
+        url=url,
+        node=args.node or _source_address(url),
+        token=args.token,
+        interval=args.interval,
+        allow_commands=args.allow_commands,
+    )
+    try:
+        asyncio.run(agent.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.sampler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -9,6 +11,61 @@ class Settings(BaseSettings):
     vllm_port: int = 8000
     api_port: int = 8080
     hf_cache_dir: str = "/root/.cache/huggingface/hub"
+    hf_endpoint: str = "https://huggingface.co"
+    hf_token: Optional[str] = None
+    download_progress_interval_seconds: float = 1.0
+    download_backend: str = "native"
+    download_connections: int = 16
+    download_connections_per_file: int = 4
+    download_parallel_files: int = 4
+    download_chunk_bytes: int = 8 * 1024 * 1024
+    download_retries: int = 5
+    download_max_concurrent: int = 2
+    download_bandwidth_limit_mbps: float = 0.0
+    distribution_fanout: int = 2
+    distribution_streams_per_node: int = 2
+    verify_workers: int = 4
+    verify_read_bytes: int = 16 * 1024 * 1024
+    docker_socket_path: str = "/var/run/docker.sock"
+    exec_session_enabled: bool = False
+    inventory_watch_enabled: bool = True
+    inventory_watch_debounce_seconds: float = 1.0
+    inventory_poll_interval_seconds: float = 10.0
+    warm_io_concurrency: int = 8
+    warm_before_launch: bool = False
+    warm_favorites_interval_minutes: int = 0
+    switch_drain_timeout_seconds: int = 120
+    node_probe_timeout_seconds: float = 1.0
+    node_probe_deadline_seconds: float = 2.5
+    node_status_cache_seconds: float = 3.0
+    node_ssh_port: int = 22
+    ray_port: int = 6379
+    network_monitor_enabled: bool = True
+    network_probe_interval_seconds: float = 1.0
+    network_window_seconds: int = 60
+    network_monitor_node_pairs: bool = False
+    network_history_hours: int = 24
+    network_throughput_port: int = 0
+    agent_token: Optional[str] = None
+    agent_history_minutes: int = 10
+    agent_stale_seconds: float = 5.0
+    gateway_enabled: bool = False
+    gateway_upstream_host: Optional[str] = None
+    gateway_max_connections: int = 256
+    gateway_history_size: int = 2000
+    gateway_default_priority: str = "interactive"
+    gateway_max_inflight: int = 64
+    gateway_max_queue: int = 256
+    gateway_queue_timeout_seconds: float = 30.0
+    gateway_client_concurrency: int = 16
+    gateway_max_upstream_waiting: int = 16
+    gateway_max_kv_cache_usage: float = 0.95
+    response_cache_enabled: bool = False
+    response_cache_max_bytes: int = 256 * 1024 * 1024
+    response_cache_max_entry_bytes: int = 8 * 1024 * 1024
+    response_cache_disk_max_bytes: int = 0
+    launch_sample_interval_seconds: float = 5.0
+    launch_regression_threshold: float = 0.1
 
     class Config:
         env_prefix = "SPARK_"
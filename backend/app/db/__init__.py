@@ -4,7 +4,7 @@ from app.db.database import (
     init_database,
     DATABASE_PATH,
 )
-from app.db.models import Profile, Base
+from app.db.models import Profile, Launch, Base
 
 __all__ = [
     "get_async_session",
@@ -12,5 +12,6 @@ __all__ = [
     "init_database",
     "DATABASE_PATH",
     "Profile",
+    "Launch",
     "Base",
 ]
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, Float
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -63,3 +63,84 @@ class Config(Base):
             if self.updated_at is not None
             else None,
         }
+
+
+class Launch(Base):
+    __tablename__ = "launches"
+
+    id = Column(String(36), primary_key=True)
+    instance_id = Column(String(32), nullable=False, default="default")
+    profile_id = Column(String(36), nullable=True, index=True)
+    model_id = Column(String(255), nullable=False)
+    config_hash = Column(String(16), nullable=False, index=True)
+    config_json = Column(Text, nullable=True)
+    port = Column(Integer, nullable=False)
+    state = Column(String(20), nullable=False)
+    phases_json = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    exit_reason = Column(String(20), nullable=True)
+    started_at = Column(DateTime, nullable=False, index=True)
+    ready_at = Column(DateTime, nullable=True)
+    stopped_at = Column(DateTime, nullable=True)
+    time_to_ready_seconds = Column(Float, nullable=True)
+    peak_tokens_per_second = Column(Float, nullable=True)
+    median_tokens_per_second = Column(Float, nullable=True)
+    p95_latency_seconds = Column(Float, nullable=True)
+    p95_ttft_seconds = Column(Float, nullable=True)
+    max_kv_cache_usage = Column(Float, nullable=True)
+    requests = Column(Integer, nullable=True)
+    generation_tokens = Column(Integer, nullable=True)
+    samples = Column(Integer, default=0)
+
+
+class NetworkSample(Base):
+    __tablename__ = "network_samples"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(255), nullable=False, index=True)
+    target = Column(String(255), nullable=False, index=True)
+    method = Column(String(10), nullable=False)
+    window_start = Column(DateTime, nullable=False)
+    window_end = Column(DateTime, nullable=False, index=True)
+    samples = Column(Integer, nullable=False)
+    lost = Column(Integer, nullable=False)
+    loss_pct = Column(Float, nullable=False)
+    rtt_min_ms = Column(Float, nullable=True)
+    rtt_p50_ms = Column(Float, nullable=True)
+    rtt_p95_ms = Column(Float, nullable=True)
+    rtt_p99_ms = Column(Float, nullable=True)
+    rtt_max_ms = Column(Float, nullable=True)
+    jitter_ms = Column(Float, nullable=True)
+
+
+class Download(Base):
+    __tablename__ = "downloads"
+
+    id = Column(String(36), primary_key=True)
+    model_id = Column(String(255), nullable=False, index=True)
+    revision = Column(String(255), nullable=True)
+    distribute = Column(Boolean, default=False)
+    priority = Column(Integer, nullable=False, default=0)
+    status = Column(String(20), nullable=False, index=True)
+    progress = Column(Float, default=0.0)
+    downloaded_bytes = Column(Integer, default=0)
+    total_bytes = Column(Integer, nullable=True)
+    files_done = Column(Integer, default=0)
+    files_total = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class BlobHash(Base):
+    __tablename__ = "blob_hashes"
+
+    path = Column(Text, primary_key=True)
+    repo = Column(Text, nullable=False, index=True)
+    filename = Column(Text, nullable=True)
+    size = Column(Integer, nullable=False)
+    mtime_ns = Column(Integer, nullable=False)
+    digest = Column(String(64), nullable=False)
+    ok = Column(Boolean, nullable=False)
+    verified_at = Column(DateTime, nullable=False)
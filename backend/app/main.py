@@ -5,9 +5,32 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.routers import cluster, model, metrics, logs, profiles, inventory, config
+from app.routers import (
+    cluster,
+    model,
+    metrics,
+    logs,
+    profiles,
+    inventory,
+    config,
+    events,
+    gateway,
+)
 from app.db.database import init_database
+from app.services.blob_verifier import blob_verifier
+from app.services.docker_client import docker_client
+from app.services.distribution import distribution_service
+from app.services.download_queue import download_queue
+from app.services.download_tracker import download_tracker
+from app.services.admission_service import admission_controller
+from app.services.exec_session import exec_sessions
+from app.services.gateway_service import gateway_service
+from app.services.inventory_service import inventory_service
+from app.services.inventory_watcher import inventory_watcher
+from app.services.launch_history import launch_history
+from app.services.network_monitor import network_monitor
 from app.services.profile_service import seed_default_profiles
+from app.services.state_service import state_service
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,10 +46,32 @@ async def lifespan(app: FastAPI):
 
     async with async_session_maker() as session:
         await seed_default_profiles(session)
+    await launch_history.import_legacy_history()
+    await blob_verifier.load()
+
+    logger.info("Starting state reconciler...")
+    state_service.start()
+    inventory_service.start_warm_scheduler()
+    inventory_watcher.start()
+    inventory_service.resume_download_tracking()
+    await download_queue.start()
+    network_monitor.start()
 
     logger.info("Startup complete!")
     yield
     logger.info("Shutting down...")
+    await state_service.stop()
+    await inventory_service.stop_warm_scheduler()
+    await inventory_watcher.stop()
+    await download_tracker.stop()
+    await download_queue.stop()
+    await distribution_service.stop()
+    await blob_verifier.stop()
+    await network_monitor.stop()
+    await gateway_service.close()
+    await admission_controller.close()
+    await exec_sessions.close()
+    await docker_client.close()
 
 
 app = FastAPI(
@@ -50,6 +95,10 @@ app.include_router(logs.router, prefix="/api")
 app.include_router(profiles.router, prefix="/api")
 app.include_router(inventory.router, prefix="/api")
 app.include_router(config.router, prefix="/api")
+app.include_router(events.router, prefix="/api")
+
+if settings.gateway_enabled:
+    app.include_router(gateway.router)
 
 
 @app.get("/")
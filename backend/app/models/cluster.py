@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Literal
 
 
@@ -15,12 +16,142 @@ class ClusterAction(BaseModel):
     action: Literal["start", "stop"]
 
 
+class PortProbe(BaseModel):
+    name: str
+    port: int
+    open: bool
+    latency_ms: Optional[float] = None
+
+
 class NodeHealth(BaseModel):
     ip: str
+    role: Literal["head", "worker"] = "worker"
     healthy: bool
     latency_ms: Optional[float] = None
+    icmp: Optional[bool] = None
+    ports: list[PortProbe] = []
+    agent: bool = False
+    error: Optional[str] = None
 
 
 class NodeStatus(BaseModel):
-    head: NodeHealth
-    worker: NodeHealth
+    nodes: list[NodeHealth]
+    healthy: int = 0
+    total: int = 0
+    checked_at: datetime
+    duration_ms: float = 0.0
+
+
+class NetworkLinkStats(BaseModel):
+    source: str
+    target: str
+    method: Literal["icmp", "tcp"] = "icmp"
+    window_start: datetime
+    window_end: datetime
+    samples: int = 0
+    lost: int = 0
+    loss_pct: float = 0.0
+    rtt_min_ms: Optional[float] = None
+    rtt_p50_ms: Optional[float] = None
+    rtt_p95_ms: Optional[float] = None
+    rtt_p99_ms: Optional[float] = None
+    rtt_max_ms: Optional[float] = None
+    jitter_ms: Optional[float] = None
+
+
+class NetworkQuality(BaseModel):
+    enabled: bool
+    window_seconds: int
+    links: list[NetworkLinkStats] = []
+
+
+class ThroughputRequest(BaseModel):
+    source: str
+    target: str
+    duration_seconds: float = Field(5.0, ge=1.0, le=60.0)
+    streams: int = Field(4, ge=1, le=32)
+
+
+class ThroughputResult(BaseModel):
+    source: str
+    target: str
+    success: bool
+    streams: int
+    duration_seconds: float = 0.0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    gbps: Optional[float] = None
+    error: Optional[str] = None
+
+
+class CpuTelemetry(BaseModel):
+    percent: float = 0.0
+    iowait_percent: float = 0.0
+    cores: int = 0
+    per_core_percent: list[float] = []
+
+
+class MemoryTelemetry(BaseModel):
+    total_bytes: int = 0
+    available_bytes: int = 0
+    used_bytes: int = 0
+    free_bytes: int = 0
+    cached_bytes: int = 0
+    swap_total_bytes: int = 0
+    swap_used_bytes: int = 0
+    used_percent: float = 0.0
+
+
+class DiskTelemetry(BaseModel):
+    read_bytes_per_second: float = 0.0
+    write_bytes_per_second: float = 0.0
+    reads_per_second: float = 0.0
+    writes_per_second: float = 0.0
+    busy_percent: float = 0.0
+
+
+class InterfaceTelemetry(BaseModel):
+    name: str
+    rx_bytes_per_second: float = 0.0
+    rx_packets_per_second: float = 0.0
+    tx_bytes_per_second: float = 0.0
+    tx_packets_per_second: float = 0.0
+    errors: int = 0
+    drops: int = 0
+
+
+class HostTelemetry(BaseModel):
+    timestamp: datetime
+    interval_seconds: float = 1.0
+    cpu: CpuTelemetry
+    memory: MemoryTelemetry
+    disk: DiskTelemetry
+    network: list[InterfaceTelemetry] = []
+
+
+class NodeTelemetry(BaseModel):
+    node: str
+    role: Optional[Literal["head", "worker"]] = None
+    connected: bool = False
+    stale: bool = False
+    hostname: Optional[str] = None
+    agent_version: Optional[str] = None
+    commands: bool = False
+    connected_at: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    latest: Optional[HostTelemetry] = None
+
+
+class AgentCommandRequest(BaseModel):
+    argv: list[str] = Field(..., min_length=1)
+    timeout_seconds: float = Field(60.0, gt=0, le=3600)
+
+
+class AgentCommandResult(BaseModel):
+    node: str
+    argv: list[str]
+    returncode: Optional[int] = None
+    stdout: str = ""
+    stderr: str = ""
+    duration_seconds: Optional[float] = None
+    error: Optional[str] = None
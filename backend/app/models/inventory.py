@@ -3,6 +3,51 @@ from typing import Optional, Literal
 from pydantic import BaseModel, Field
 
 
+class CachedRevision(BaseModel):
+    commit: str
+    refs: list[str] = Field(default_factory=list)
+    size_bytes: int = Field(default=0, ge=0)
+    files: int = Field(default=0, ge=0)
+    last_modified: Optional[datetime] = None
+
+
+class IncompleteBlob(BaseModel):
+    name: str
+    size_bytes: int = Field(default=0, ge=0)
+    modified_at: Optional[datetime] = None
+
+
+class ModelVerification(BaseModel):
+    status: Literal["verifying", "verified", "corrupt", "incomplete", "failed"]
+    blobs_total: int = 0
+    blobs_checked: int = 0
+    blobs_cached: int = Field(
+        default=0, description="Blobs skipped because size and mtime were unchanged"
+    )
+    blobs_unverifiable: int = 0
+    bytes_hashed: int = 0
+    corrupt: list[str] = Field(default_factory=list)
+    throughput_mbps: Optional[float] = None
+    error: Optional[str] = None
+    verified_at: Optional[datetime] = None
+
+
+class WeightMetadata(BaseModel):
+    parameters: int = Field(
+        ..., description="Parameter count from the safetensors headers"
+    )
+    weight_bytes: int = Field(
+        ..., description="Bytes of tensor data that will be resident in memory"
+    )
+    dtypes: dict[str, int] = Field(
+        default_factory=dict, description="Weight bytes per stored dtype"
+    )
+    quantization: Optional[str] = None
+    quant_bits: Optional[int] = None
+    torch_dtype: Optional[str] = None
+    shards: int = 0
+
+
 class LocalModel(BaseModel):
     id: str = Field(..., description="Model ID (HuggingFace path or local name)")
     name: str = Field(..., description="Human-readable model name")
@@ -21,6 +66,22 @@ class LocalModel(BaseModel):
         default=None, description="Current download status"
     )
     local_path: Optional[str] = Field(default=None, description="Local filesystem path")
+    size_bytes: int = Field(default=0, ge=0, description="Model size in bytes")
+    refs: dict[str, str] = Field(
+        default_factory=dict, description="Cached refs and the commit each points to"
+    )
+    revisions: list[CachedRevision] = Field(
+        default_factory=list, description="Revisions present under snapshots/"
+    )
+    incomplete: list[IncompleteBlob] = Field(
+        default_factory=list, description="Partially downloaded blobs"
+    )
+    weights: Optional[WeightMetadata] = Field(
+        default=None, description="Read from the safetensors headers and config.json"
+    )
+    verification: Optional[ModelVerification] = Field(
+        default=None, description="Result of the last blob hash verification"
+    )
 
 
 class DownloadStatus(BaseModel):
@@ -28,27 +89,61 @@ class DownloadStatus(BaseModel):
     progress: float = Field(
         default=0.0, ge=0.0, le=100.0, description="Download progress percentage"
     )
-    status: Literal["idle", "downloading", "completed", "failed", "cancelled"]
+    status: Literal["idle", "queued", "downloading", "completed", "failed", "cancelled"]
     downloaded_bytes: int = Field(default=0, ge=0)
     total_bytes: Optional[int] = Field(default=None, ge=0)
     speed_mbps: Optional[float] = Field(
         default=None, ge=0, description="Download speed in MB/s"
     )
+    eta_seconds: Optional[float] = Field(
+        default=None, ge=0, description="Estimated time remaining"
+    )
+    files_done: int = Field(default=0, ge=0)
+    files_total: Optional[int] = Field(default=None, ge=0)
+    revision: Optional[str] = Field(default=None)
     error_message: Optional[str] = Field(default=None)
     started_at: Optional[datetime] = Field(default=None)
     updated_at: Optional[datetime] = Field(default=None)
 
 
+class DownloadJob(DownloadStatus):
+    job_id: str
+    priority: int = Field(default=0, description="Higher priorities start first")
+    distribute: bool = False
+    created_at: datetime
+    finished_at: Optional[datetime] = Field(default=None)
+
+
+class DownloadQueueStatus(BaseModel):
+    jobs: list[DownloadJob]
+    active: int
+    max_concurrent: int
+    bandwidth_limit_mbps: float
+
+
+class DownloadJobUpdate(BaseModel):
+    priority: int
+
+
+class DownloadLimits(BaseModel):
+    max_concurrent: Optional[int] = Field(None, ge=1, le=16)
+    bandwidth_limit_mbps: Optional[float] = Field(
+        None, ge=0, description="Global download cap in MB/s, 0 for unlimited"
+    )
+
+
 class DownloadRequest(BaseModel):
     model_id: str = Field(..., description="HuggingFace model ID to download")
     revision: Optional[str] = Field(None, description="Git revision/commit to download")
     distribute: bool = Field(False, description="Whether to distribute to worker nodes")
+    priority: int = Field(0, description="Queue priority, higher starts first")
 
 
 class DownloadResponse(BaseModel):
     success: bool
     message: str
     model_id: str
+    job_id: Optional[str] = None
 
 
 class DeleteResponse(BaseModel):
@@ -57,10 +152,74 @@ class DeleteResponse(BaseModel):
     freed_space_gb: Optional[float] = Field(None)
 
 
+class DistributeRequest(BaseModel):
+    nodes: Optional[list[str]] = Field(
+        None,
+        description="Target worker node IPs from the cluster config; defaults to all workers",
+    )
+    fanout: Optional[int] = Field(
+        None, ge=1, description="Children per node, 1 for a relay chain"
+    )
+
+
 class DistributeResponse(BaseModel):
     success: bool
     message: str
     distributed_to: list[str]
+    job_id: Optional[str] = None
+
+
+class NodeDistribution(BaseModel):
+    node: str
+    source: str
+    status: Literal[
+        "pending", "comparing", "copying", "completed", "failed", "cancelled"
+    ] = "pending"
+    files_total: int = 0
+    files_done: int = 0
+    bytes_total: int = 0
+    bytes_done: int = 0
+    bytes_skipped: int = 0
+    throughput_mbps: Optional[float] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class DistributionJob(BaseModel):
+    job_id: str
+    model_id: str
+    status: Literal["running", "completed", "failed", "cancelled"] = "running"
+    fanout: int
+    bytes_total: int = 0
+    nodes: list[NodeDistribution]
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class DistributionStatus(BaseModel):
+    jobs: list[DistributionJob]
+
+
+class NodeWarmResult(BaseModel):
+    node: str
+    success: bool
+    files: int = 0
+    bytes_warmed: int = 0
+    duration_seconds: float = 0.0
+    throughput_mbps: Optional[float] = Field(
+        default=None, ge=0, description="Achieved read throughput in MB/s"
+    )
+    error: Optional[str] = None
+
+
+class WarmResponse(BaseModel):
+    success: bool
+    message: str
+    model_id: str
+    bytes_warmed: int = 0
+    nodes: list[NodeWarmResult] = Field(default_factory=list)
 
 
 class ModelListResponse(BaseModel):
@@ -39,6 +39,7 @@ class VLLMMetrics(BaseModel):
     model_loaded: bool = False
     model_name: Optional[str] = None
     port: int = 8000
+    instance_id: str = "default"
 
 
 class MetricsSnapshot(BaseModel):
@@ -51,3 +52,84 @@ class MetricsSummary(BaseModel):
     current: VLLMMetrics
     derived: dict
     recommendations: list[str]
+
+
+class GatewayRequestRecord(BaseModel):
+    request_id: str
+    instance_id: str
+    method: str
+    path: str
+    model: Optional[str] = None
+    stream: bool = False
+    status_code: Optional[int] = None
+    priority_class: Optional[str] = None
+    queue_wait_ms: Optional[float] = None
+    cache: Optional[str] = None
+    started_at: datetime
+    ttft_ms: Optional[float] = None
+    total_ms: float = 0.0
+    chunks: int = 0
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    itl_mean_ms: Optional[float] = None
+    itl_p95_ms: Optional[float] = None
+    itl_max_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+class GatewaySummary(BaseModel):
+    requests: int = 0
+    errors: int = 0
+    ttft_p50_ms: Optional[float] = None
+    ttft_p95_ms: Optional[float] = None
+    total_p50_ms: Optional[float] = None
+    total_p95_ms: Optional[float] = None
+    itl_mean_ms: Optional[float] = None
+    completion_tokens: int = 0
+    output_tokens_per_second: Optional[float] = None
+
+
+class GatewayMetricsResponse(BaseModel):
+    summary: GatewaySummary
+    recent: list[GatewayRequestRecord]
+
+
+class UpstreamLoad(BaseModel):
+    num_requests_waiting: int = 0
+    kv_cache_usage: Optional[float] = None
+
+
+class AdmissionClassMetrics(BaseModel):
+    priority_class: str
+    queue_depth: int = 0
+    in_flight: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    wait_p50_ms: Optional[float] = None
+    wait_p95_ms: Optional[float] = None
+
+
+class AdmissionMetrics(BaseModel):
+    instance_id: str
+    in_flight: int = 0
+    max_in_flight: int = 0
+    upstream: Optional[UpstreamLoad] = None
+    classes: list[AdmissionClassMetrics] = []
+
+
+class ResponseCacheMetrics(BaseModel):
+    enabled: bool = False
+    entries: int = 0
+    bytes: int = 0
+    max_bytes: int = 0
+    disk_entries: int = 0
+    disk_bytes: int = 0
+    disk_max_bytes: int = 0
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    hit_rate: Optional[float] = None
+    bytes_saved: int = 0
+    upstream_seconds_saved: float = 0.0
@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import Optional, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, RootModel
 
 
 class ModelLaunchConfig(BaseModel):
@@ -27,7 +28,18 @@ class ModelLaunchConfig(BaseModel):
     port: int = Field(8000, ge=1024, le=65535, description="Port for vLLM server")
 
 
+class VLLMInstance(BaseModel):
+    id: str
+    port: int
+    model_id: Optional[str] = None
+    pid_file: str
+    config_file: str
+    log_file: str
+    created_at: datetime
+
+
 class ModelStatus(BaseModel):
+    instance_id: str = "default"
     running: bool
     model_id: Optional[str] = None
     uptime: Optional[str] = None
@@ -35,11 +47,96 @@ class ModelStatus(BaseModel):
     message: Optional[str] = None
 
 
+class ModelStatuses(RootModel[dict[str, ModelStatus]]):
+    pass
+
+
 class LaunchResult(BaseModel):
+    instance_id: str = "default"
     success: bool
     message: str
     model_id: Optional[str] = None
     port: Optional[int] = None
+    launch_id: Optional[str] = None
+
+
+class LaunchPhase(BaseModel):
+    name: str
+    started_at: datetime
+    duration_seconds: Optional[float] = None
+
+
+class LaunchState(BaseModel):
+    launch_id: str
+    instance_id: str = "default"
+    model_id: str
+    config_hash: str
+    port: int
+    state: Literal["starting", "ready", "failed", "stopped"] = "starting"
+    phase: str = "process_start"
+    started_at: datetime
+    ready_at: Optional[datetime] = None
+    time_to_ready_seconds: Optional[float] = None
+    phases: list[LaunchPhase] = Field(default_factory=list)
+    error: Optional[str] = None
+    profile_id: Optional[str] = None
+    stopped_at: Optional[datetime] = None
+    exit_reason: Optional[
+        Literal["stopped", "replaced", "exited", "failed", "timeout"]
+    ] = None
+
+
+class LaunchRecord(LaunchState):
+    peak_tokens_per_second: Optional[float] = None
+    median_tokens_per_second: Optional[float] = None
+    p95_latency_seconds: Optional[float] = None
+    p95_ttft_seconds: Optional[float] = None
+    max_kv_cache_usage: Optional[float] = None
+    requests: Optional[int] = None
+    generation_tokens: Optional[int] = None
+    samples: int = 0
+
+
+class LaunchMetricComparison(BaseModel):
+    metric: str
+    higher_is_better: bool
+    latest: Optional[float] = None
+    baseline: Optional[float] = None
+    change_pct: Optional[float] = None
+    regression: bool = False
+
+
+class LaunchComparison(BaseModel):
+    profile_id: Optional[str] = None
+    config_hash: Optional[str] = None
+    latest: Optional[LaunchRecord] = None
+    baseline_runs: int = 0
+    metrics: list[LaunchMetricComparison] = []
+    regressions: list[str] = []
+    runs: list[LaunchRecord] = []
+
+
+class SwitchStep(BaseModel):
+    name: str
+    status: Literal["running", "completed", "failed", "skipped"] = "running"
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    message: Optional[str] = None
+
+
+class SwitchState(BaseModel):
+    switch_id: str
+    instance_id: str = "default"
+    model_id: str
+    from_port: int
+    to_port: int
+    state: Literal["running", "completed", "rolled_back", "failed"] = "running"
+    step: Optional[str] = None
+    launch_id: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    steps: list[SwitchStep] = Field(default_factory=list)
+    error: Optional[str] = None
 
 
 class RunningConfig(BaseModel):
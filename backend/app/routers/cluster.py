@@ -1,29 +1,71 @@
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+import logging
+import secrets
+
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
 from typing import Optional
 
+from app.config import settings
 from app.services.cluster_service import cluster_service
-from app.models.cluster import ClusterStatus, NodeStatus
+from app.services.network_monitor import network_monitor
+from app.services.state_service import state_service
+from app.models.cluster import (
+    AgentCommandRequest,
+    AgentCommandResult,
+    ClusterStatus,
+    HostTelemetry,
+    NetworkLinkStats,
+    NetworkQuality,
+    NodeStatus,
+    NodeTelemetry,
+    ThroughputRequest,
+    ThroughputResult,
+)
 
 router = APIRouter(prefix="/cluster", tags=["cluster"])
 
+logger = logging.getLogger(__name__)
+
+AGENT_TOKEN_HEADER = "x-spark-agent-token"
+AGENT_HELLO_TIMEOUT_SECONDS = 10.0
+
 
 @router.get("/status", response_model=ClusterStatus)
 async def get_cluster_status():
+    cached = state_service.get("cluster")
+    if cached is not None:
+        return cached
     return await cluster_service.get_status()
 
 
 @router.post("/start", response_model=ClusterStatus)
 async def start_cluster():
-    return await cluster_service.start_cluster()
+    result = await cluster_service.start_cluster()
+    state_service.refresh("cluster")
+    state_service.refresh("nodes")
+    return result
 
 
 @router.post("/stop", response_model=ClusterStatus)
 async def stop_cluster():
-    return await cluster_service.stop_cluster()
+    result = await cluster_service.stop_cluster()
+    state_service.refresh("cluster")
+    state_service.refresh("nodes")
+    return result
 
 
 @router.get("/nodes", response_model=NodeStatus)
 async def get_nodes_status():
+    cached = state_service.get("nodes")
+    if cached is not None:
+        return cached
     return await cluster_service.get_nodes_status()
 
 
@@ -31,3 +73,89 @@ async def get_nodes_status():
 async def get_cluster_uptime():
     uptime = await cluster_service.get_uptime()
     return {"uptime": uptime}
+
+
+@router.get("/network", response_model=NetworkQuality)
+async def get_network_quality():
+    return network_monitor.get_quality()
+
+
+@router.get("/network/history", response_model=list[NetworkLinkStats])
+async def get_network_history(
+    minutes: int = Query(default=60, ge=1, le=7 * 24 * 60),
+    source: Optional[str] = None,
+    target: Optional[str] = None,
+):
+    return await network_monitor.get_history(minutes, source, target)
+
+
+@router.post("/network/throughput", response_model=ThroughputResult)
+async def run_throughput_test(request: ThroughputRequest):
+    try:
+        return await network_monitor.run_throughput_test(
+            request.source, request.target, request.duration_seconds, request.streams
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.get("/telemetry", response_model=list[NodeTelemetry])
+async def get_node_telemetry():
+    return cluster_service.get_node_telemetry()
+
+
+@router.get("/telemetry/{node}/history", response_model=list[HostTelemetry])
+async def get_node_telemetry_history(
+    node: str, minutes: Optional[int] = Query(default=None, ge=1, le=24 * 60)
+):
+    history = cluster_service.get_telemetry_history(node, minutes)
+    if history is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No telemetry for node {node}",
+        )
+    return history
+
+
+@router.post("/nodes/{node}/run", response_model=AgentCommandResult)
+async def run_on_node(node: str, request: AgentCommandRequest):
+    try:
+        return await cluster_service.run_on_node(
+            node, request.argv, request.timeout_seconds
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.websocket("/agents/ws")
+async def agent_websocket(websocket: WebSocket):
+    token = websocket.headers.get(AGENT_TOKEN_HEADER, "")
+    if settings.agent_token and not secrets.compare_digest(token, settings.agent_token):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    agent = None
+    try:
+        hello = await asyncio.wait_for(
+            websocket.receive_json(), timeout=AGENT_HELLO_TIMEOUT_SECONDS
+        )
+        if hello.get("type") != "hello":
+            raise ValueError("Expected a hello message")
+        peer = websocket.client.host if websocket.client else None
+        agent = cluster_service.register_agent(websocket, hello, peer)
+        while True:
+            message = await websocket.receive_json()
+            cluster_service.record_agent_message(agent, message)
+    except WebSocketDisconnect:
+        pass
+    except (asyncio.TimeoutError, ValueError) as e:
+        logger.warning(f"Rejecting agent connection: {e}")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+    except Exception as e:
+        logger.exception(f"Unexpected error in agent WebSocket: {e}")
+    finally:
+        if agent is not None:
+            cluster_service.unregister_agent(agent)
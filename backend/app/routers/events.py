@@ -0,0 +1,45 @@
+import asyncio
+import logging
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from app.services.state_service import state_service
+
+router = APIRouter(tags=["events"])
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL_SECONDS = 30.0
+
+
+@router.get("/state")
+async def get_state():
+    return state_service.snapshot()
+
+
+@router.websocket("/events")
+async def events_websocket(websocket: WebSocket):
+    await websocket.accept()
+    logger.info("WebSocket connection established for state events")
+
+    queue = state_service.subscribe()
+    try:
+        await websocket.send_json(state_service.snapshot_event())
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), timeout=HEARTBEAT_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                event = {"type": "heartbeat"}
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        logger.info("WebSocket connection closed for state events")
+    except Exception as e:
+        logger.exception(f"Unexpected error in events WebSocket: {e}")
+    finally:
+        state_service.unsubscribe(queue)
+        try:
+            await websocket.close()
+        except Exception:
+            pass
@@ -0,0 +1,186 @@
+import json
+import logging
+import time
+
+import httpx
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.models.metrics import GatewayRequestRecord
+from app.services.admission_service import (
+    AdmissionRejected,
+    Ticket,
+    admission_controller,
+)
+from app.services.gateway_service import (
+    CACHE_HEADER,
+    CLIENT_HEADER,
+    HOP_BY_HOP_HEADERS,
+    INSTANCE_HEADER,
+    PRIORITY_HEADER,
+    gateway_service,
+)
+from app.services.response_cache import CachedResponse, response_cache
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/v1", tags=["gateway"])
+
+
+@router.api_route("/{path:path}", methods=["GET", "POST", "DELETE"])
+async def proxy(path: str, request: Request):
+    content = await request.body()
+    body = None
+    if content and request.headers.get("content-type", "").startswith(
+        "application/json"
+    ):
+        try:
+            body = json.loads(content)
+        except ValueError:
+            body = None
+    if not isinstance(body, dict):
+        body = None
+
+    instance = gateway_service.resolve_instance(
+        body.get("model") if body else None,
+        request.headers.get(INSTANCE_HEADER),
+    )
+    if instance is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": {"message": "Unknown vLLM instance", "type": "gateway"}},
+        )
+
+    record = gateway_service.new_record(instance, request.method, path, body)
+    record.priority_class = admission_controller.classify(
+        request.headers.get(PRIORITY_HEADER)
+    )
+    client = request.headers.get(CLIENT_HEADER) or (
+        request.client.host if request.client else "unknown"
+    )
+    started = time.perf_counter()
+
+    cache_key = None
+    if response_cache.cacheable(
+        request.method, path, body, request.headers.get("cache-control", "")
+    ):
+        cache_key = await response_cache.key(instance.id, path, body)
+    if cache_key is not None:
+        entry = await response_cache.get(cache_key)
+        record.cache = "miss" if entry is None else "hit"
+        if entry is not None:
+            return _replay(entry, record, started)
+
+    try:
+        ticket = await admission_controller.acquire(
+            instance, client, record.priority_class
+        )
+    except AdmissionRejected as e:
+        record.status_code = 429
+        gateway_service.finish(record, started, error=e.reason)
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": str(e.retry_after)},
+            content={"error": {"message": e.reason, "type": "rate_limit_exceeded"}},
+        )
+    record.queue_wait_ms = round(ticket.wait_seconds * 1000, 3)
+
+    try:
+        upstream = await gateway_service.send(
+            request.method,
+            gateway_service.upstream_url(instance, path),
+            gateway_service.forward_headers(request.headers),
+            request.query_params,
+            content,
+        )
+    except httpx.HTTPError as e:
+        ticket.release()
+        logger.warning(f"Gateway upstream error for instance {instance.id}: {e}")
+        gateway_service.finish(record, started, error=str(e) or type(e).__name__)
+        return JSONResponse(
+            status_code=502,
+            content={
+                "error": {"message": "vLLM upstream unavailable", "type": "gateway"}
+            },
+        )
+    except BaseException:
+        # e.g. the client went away while we waited for upstream headers
+        ticket.release()
+        raise
+
+    handed_off = False
+    try:
+        record.status_code = upstream.status_code
+        headers = {
+            key: value
+            for key, value in upstream.headers.items()
+            if key.lower() not in HOP_BY_HOP_HEADERS
+        }
+        content_type = upstream.headers.get("content-type", "")
+        if cache_key is not None:
+            headers[CACHE_HEADER] = "miss"
+            if upstream.status_code != 200:
+                cache_key = None
+
+        if content_type.startswith("text/event-stream"):
+            record.stream = True
+            writer = (
+                response_cache.writer(
+                    cache_key, upstream.status_code, content_type, started
+                )
+                if cache_key is not None
+                else None
+            )
+            response = StreamingResponse(
+                gateway_service.relay(
+                    upstream, record, started, ticket.release, writer
+                ),
+                status_code=upstream.status_code,
+                headers=headers,
+                # Also runs when the body never started, e.g. after an early disconnect
+                background=BackgroundTask(_close_stream, upstream, ticket),
+            )
+            handed_off = True
+            return response
+
+        payload = await upstream.aread()
+    finally:
+        if not handed_off:
+            await upstream.aclose()
+            ticket.release()
+    gateway_service.finish(record, started, payload)
+    if cache_key is not None:
+        response_cache.put(
+            cache_key,
+            CachedResponse(
+                status_code=upstream.status_code,
+                content_type=content_type,
+                stream=False,
+                chunks=[payload],
+                upstream_ms=record.total_ms - (record.queue_wait_ms or 0),
+            ),
+        )
+    return Response(content=payload, status_code=upstream.status_code, headers=headers)
+
+
+async def _close_stream(upstream: httpx.Response, ticket: Ticket):
+    ticket.release()
+    await upstream.aclose()
+
+
+def _replay(
+    entry: CachedResponse, record: GatewayRequestRecord, started: float
+) -> Response:
+    record.status_code = entry.status_code
+    headers = {"content-type": entry.content_type, CACHE_HEADER: "hit"}
+    if entry.stream:
+        record.stream = True
+        return StreamingResponse(
+            gateway_service.replay(entry, record, started),
+            status_code=entry.status_code,
+            headers=headers,
+        )
+    payload = b"".join(entry.chunks)
+    gateway_service.finish(record, started, payload)
+    return Response(content=payload, status_code=entry.status_code, headers=headers)
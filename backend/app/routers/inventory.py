@@ -1,17 +1,29 @@
 import logging
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 
+from app.services.distribution import distribution_service
+from app.services.download_queue import download_queue
 from app.services.inventory_service import inventory_service
+from app.services.state_service import state_service
 from app.models.inventory import (
     LocalModel,
     DownloadStatus,
+    DownloadJob,
+    DownloadJobUpdate,
+    DownloadLimits,
+    DownloadQueueStatus,
     DownloadRequest,
     DownloadResponse,
     DeleteResponse,
+    DistributeRequest,
     DistributeResponse,
+    DistributionJob,
+    DistributionStatus,
     ModelListResponse,
+    ModelVerification,
+    WarmResponse,
 )
 
 logger = logging.getLogger(__name__)
@@ -30,6 +42,72 @@ async def list_models():
     )
 
 
+@router.get("/downloads", response_model=DownloadQueueStatus)
+async def list_downloads():
+    cached = state_service.get("downloads")
+    if cached is not None:
+        return cached
+    return download_queue.status()
+
+
+@router.put("/downloads/limits", response_model=DownloadQueueStatus)
+async def set_download_limits(limits: DownloadLimits):
+    download_queue.set_limits(
+        max_concurrent=limits.max_concurrent,
+        bandwidth_limit_mbps=limits.bandwidth_limit_mbps,
+    )
+    return download_queue.status()
+
+
+@router.patch("/downloads/{job_id}", response_model=DownloadJob)
+async def update_download(job_id: str, update: DownloadJobUpdate):
+    job = await download_queue.set_priority(job_id, update.priority)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Download job {job_id} not found",
+        )
+    return job
+
+
+@router.post("/downloads/{job_id}/cancel", response_model=DownloadJob)
+async def cancel_download_job(job_id: str):
+    job = await download_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Download job {job_id} not found",
+        )
+    return job
+
+
+@router.get("/distributions", response_model=DistributionStatus)
+async def list_distributions():
+    return distribution_service.status()
+
+
+@router.get("/distributions/{job_id}", response_model=DistributionJob)
+async def get_distribution(job_id: str):
+    job = distribution_service.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Distribution job {job_id} not found",
+        )
+    return job
+
+
+@router.post("/distributions/{job_id}/cancel", response_model=DistributionJob)
+async def cancel_distribution(job_id: str):
+    job = await distribution_service.cancel(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Distribution job {job_id} not found",
+        )
+    return job
+
+
 @router.get("/{model_id}", response_model=LocalModel)
 async def get_model(model_id: str):
     model = await inventory_service.get_model_info(model_id)
@@ -52,7 +130,10 @@ async def download_model(request: DownloadRequest):
     result = await inventory_service.download_model(
         request.model_id,
         distribute=request.distribute,
+        revision=request.revision,
+        priority=request.priority,
     )
+    state_service.refresh("download")
 
     if not result["success"]:
         raise HTTPException(
@@ -64,6 +145,7 @@ async def download_model(request: DownloadRequest):
         success=True,
         message=result["message"],
         model_id=request.model_id,
+        job_id=result.get("job_id"),
     )
 
 
@@ -92,11 +174,14 @@ async def delete_model(model_id: str):
 
 @router.get("/download/status", response_model=DownloadStatus)
 async def get_download_status():
+    cached = state_service.get("download")
+    if cached is not None:
+        return cached
     return await inventory_service.get_download_progress()
 
 
-@router.post("/{model_id}/distribute", response_model=DistributeResponse)
-async def distribute_model(model_id: str):
+@router.post("/{model_id:path}/distribute", response_model=DistributeResponse)
+async def distribute_model(model_id: str, request: Optional[DistributeRequest] = None):
     if not model_id or not model_id.strip():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -110,7 +195,13 @@ async def distribute_model(model_id: str):
             detail=f"Model {model_id} not found in local inventory",
         )
 
-    result = await inventory_service.distribute_model(model_id)
+    request = request or DistributeRequest()
+    try:
+        result = await inventory_service.distribute_model(
+            model_id, nodes=request.nodes, fanout=request.fanout
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     if not result["success"]:
         raise HTTPException(
@@ -122,9 +213,57 @@ async def distribute_model(model_id: str):
         success=True,
         message=result["message"],
         distributed_to=result.get("distributed_to", []),
+        job_id=result.get("job_id"),
     )
 
 
+@router.post("/{model_id:path}/verify", response_model=ModelVerification)
+async def verify_model(model_id: str):
+    if not model_id or not model_id.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Model ID is required",
+        )
+
+    model = await inventory_service.get_model_info(model_id)
+    if model is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model {model_id} not found in local inventory",
+        )
+
+    result = await inventory_service.verify_model(model_id)
+    if not result["success"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=result["message"],
+        )
+    return result["verification"]
+
+
+@router.post("/{model_id}/warm", response_model=WarmResponse)
+async def warm_model(
+    model_id: str,
+    concurrency: Optional[int] = Query(default=None, ge=1, le=64),
+    include_workers: bool = True,
+):
+    if not model_id or not model_id.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Model ID is required",
+        )
+
+    result = await inventory_service.warm_model(
+        model_id, concurrency=concurrency, include_workers=include_workers
+    )
+    if not result.success and not result.nodes:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=result.message,
+        )
+    return result
+
+
 @router.post("/download/{model_id}/cancel")
 async def cancel_download(model_id: str):
     if not model_id or not model_id.strip():
@@ -134,6 +273,7 @@ async def cancel_download(model_id: str):
         )
 
     result = await inventory_service.cancel_download(model_id)
+    state_service.refresh("download")
 
     if not result["success"]:
         raise HTTPException(
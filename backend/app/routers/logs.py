@@ -14,6 +14,8 @@ from fastapi import (
 )
 from pydantic import BaseModel
 
+from app.models.vllm import VLLMInstance
+from app.services.instance_registry import instance_registry
 from app.services.log_service import log_service, LogLevel
 from app.services.vllm_service import vllm_service
 
@@ -25,6 +27,8 @@ class LogEntryResponse(BaseModel):
     level: str
     message: str
     raw_line: str
+    node: Optional[str] = None
+    source: Optional[str] = None
 
 
 class LogHistoryResponse(BaseModel):
@@ -38,17 +42,63 @@ class LogStreamMessage(BaseModel):
     level: str
     message: str
     raw_line: str
+    node: Optional[str] = None
+    source: Optional[str] = None
+
+
+class LogSourceResponse(BaseModel):
+    id: str
+    node: str
+    kind: str
+    container: str
+    path: Optional[str] = None
+    remote: bool
 
 
 router = APIRouter(prefix="/logs", tags=["logs"])
 
 
+def _split_query_list(value: Optional[str]) -> Optional[list[str]]:
+    if not value:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _get_instance(instance_id: str) -> VLLMInstance:
+    instance = instance_registry.get(instance_id)
+    if instance is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown vLLM instance: {instance_id}",
+        )
+    return instance
+
+
+@router.get("/sources", response_model=list[LogSourceResponse])
+async def get_log_sources():
+    return [
+        LogSourceResponse(
+            id=source.id,
+            node=source.node,
+            kind=source.kind,
+            container=source.container,
+            path=source.path,
+            remote=source.remote,
+        )
+        for source in log_service.get_sources()
+    ]
+
+
 @router.get("/history", response_model=LogHistoryResponse)
 async def get_log_history(
     lines: int = Query(default=100, ge=1, le=1000),
     level: Optional[str] = None,
+    sources: Optional[str] = None,
+    nodes: Optional[str] = None,
+    instance_id: str = "default",
 ):
-    status_result = await vllm_service.get_model_status()
+    instance = _get_instance(instance_id)
+    status_result = await vllm_service.get_model_status(instance_id)
     if not status_result.running:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -66,10 +116,22 @@ async def get_log_history(
                     detail=f"Invalid log level: {level}. Valid levels: DEBUG, INFO, WARNING, ERROR, CRITICAL",
                 )
 
-        if log_level:
-            logs = await log_service.get_filtered_logs(level=log_level, lines=lines)
+        if sources or nodes:
+            logs = await log_service.get_merged_recent_logs(
+                lines=lines,
+                sources=_split_query_list(sources),
+                nodes=_split_query_list(nodes),
+                level=log_level,
+                instance_id=instance.id,
+            )
+        elif log_level:
+            logs = await log_service.get_filtered_logs(
+                level=log_level, lines=lines, log_file=instance.log_file
+            )
         else:
-            logs = await log_service.get_recent_logs(lines=lines)
+            logs = await log_service.get_recent_logs(
+                lines=lines, log_file=instance.log_file
+            )
 
         return LogHistoryResponse(
             logs=[
@@ -78,6 +140,8 @@ async def get_log_history(
                     level=log.level.value,
                     message=log.message,
                     raw_line=log.raw_line,
+                    node=log.node,
+                    source=log.source,
                 )
                 for log in logs
             ],
@@ -92,8 +156,12 @@ async def get_log_history(
 
 
 @router.get("/download")
-async def download_logs(lines: int = Query(default=1000, ge=1, le=10000)):
-    status_result = await vllm_service.get_model_status()
+async def download_logs(
+    lines: int = Query(default=1000, ge=1, le=10000),
+    instance_id: str = "default",
+):
+    instance = _get_instance(instance_id)
+    status_result = await vllm_service.get_model_status(instance_id)
     if not status_result.running:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -101,9 +169,11 @@ async def download_logs(lines: int = Query(default=1000, ge=1, le=10000)):
         )
 
     try:
-        content = await log_service.get_log_file_content()
+        content = await log_service.get_log_file_content(instance.log_file)
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         filename = f"vllm_logs_{timestamp}.log"
+        if instance_id != "default":
+            filename = f"vllm_logs_{instance_id}_{timestamp}.log"
 
         return Response(
             content=content,
@@ -124,9 +194,25 @@ async def logs_websocket(websocket: WebSocket):
     await websocket.accept()
     logger.info("WebSocket connection established for log streaming")
 
+    sources = _split_query_list(websocket.query_params.get("sources"))
+    nodes = _split_query_list(websocket.query_params.get("nodes"))
+    instance = instance_registry.get(
+        websocket.query_params.get("instance_id", "default")
+    )
+    if instance is None:
+        await websocket.send_json(
+            {
+                "error": "Unknown vLLM instance",
+                "error_type": "unknown_instance",
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+            }
+        )
+        await websocket.close()
+        return
+
     is_vllm_running = False
     try:
-        status_result = await vllm_service.get_model_status()
+        status_result = await vllm_service.get_model_status(instance.id)
         is_vllm_running = status_result.running
         logger.info(
             f"Model status check: running={status_result.running}, message={status_result.message}"
@@ -136,13 +222,21 @@ async def logs_websocket(websocket: WebSocket):
 
     if is_vllm_running:
         logger.info("vLLM is running, starting log stream")
+        if sources or nodes:
+            log_stream = log_service.stream_merged_logs(
+                sources=sources, nodes=nodes, instance_id=instance.id
+            )
+        else:
+            log_stream = log_service.stream_logs(log_file=instance.log_file)
         try:
-            async for log_entry in log_service.stream_logs():
+            async for log_entry in log_stream:
                 message = LogStreamMessage(
                     timestamp=log_entry.timestamp,
                     level=log_entry.level.value,
                     message=log_entry.message,
                     raw_line=log_entry.raw_line,
+                    node=log_entry.node,
+                    source=log_entry.source,
                 )
                 await websocket.send_json(message.model_dump())
         except WebSocketDisconnect:
@@ -169,7 +263,14 @@ async def logs_websocket(websocket: WebSocket):
     else:
         logger.info("vLLM not running, sending historical logs only")
         try:
-            logs = await log_service.get_recent_logs(lines=100)
+            if sources or nodes:
+                logs = await log_service.get_merged_recent_logs(
+                    lines=100, sources=sources, nodes=nodes, instance_id=instance.id
+                )
+            else:
+                logs = await log_service.get_recent_logs(
+                    lines=100, log_file=instance.log_file
+                )
             logger.info(f"Retrieved {len(logs)} historical log entries")
             for log_entry in logs:
                 message = LogStreamMessage(
@@ -177,6 +278,8 @@ async def logs_websocket(websocket: WebSocket):
                     level=log_entry.level.value,
                     message=log_entry.message,
                     raw_line=log_entry.raw_line,
+                    node=log_entry.node,
+                    source=log_entry.source,
                 )
                 await websocket.send_json(message.model_dump())
             await websocket.send_json(
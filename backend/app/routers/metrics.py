@@ -4,10 +4,20 @@ import logging
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 
+from app.services.admission_service import admission_controller
+from app.services.gateway_service import gateway_service
 from app.services.metrics_service import metrics_service
-from app.models.metrics import VLLMMetrics, MetricsSnapshot, MetricsSummary
+from app.services.response_cache import response_cache
+from app.models.metrics import (
+    AdmissionMetrics,
+    GatewayMetricsResponse,
+    VLLMMetrics,
+    MetricsSnapshot,
+    MetricsSummary,
+    ResponseCacheMetrics,
+)
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
@@ -15,8 +25,8 @@ logger = logging.getLogger(__name__)
 
 
 @router.get("/", response_model=MetricsSummary)
-async def get_current_metrics():
-    snapshot = await metrics_service.get_snapshot()
+async def get_current_metrics(instance_id: str = "default"):
+    snapshot = await metrics_service.get_snapshot(instance_id)
     if snapshot is None:
         return MetricsSummary(
             current=VLLMMetrics(timestamp=datetime.utcnow().isoformat() + "Z"),
@@ -42,8 +52,8 @@ async def get_current_metrics():
 
 
 @router.get("/current", response_model=MetricsSnapshot)
-async def get_metrics_snapshot():
-    snapshot = await metrics_service.get_snapshot()
+async def get_metrics_snapshot(instance_id: str = "default"):
+    snapshot = await metrics_service.get_snapshot(instance_id)
     if snapshot is None:
         return MetricsSnapshot(
             timestamp=datetime.utcnow().isoformat() + "Z",
@@ -53,17 +63,45 @@ async def get_metrics_snapshot():
     return snapshot
 
 
+@router.get("/gateway", response_model=GatewayMetricsResponse)
+async def get_gateway_metrics(
+    instance_id: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    return GatewayMetricsResponse(
+        summary=gateway_service.get_summary(instance_id),
+        recent=gateway_service.get_recent(limit, instance_id),
+    )
+
+
+@router.get("/admission", response_model=list[AdmissionMetrics])
+async def get_admission_metrics(instance_id: Optional[str] = None):
+    return admission_controller.get_metrics(instance_id)
+
+
+@router.get("/cache", response_model=ResponseCacheMetrics)
+async def get_cache_metrics():
+    return response_cache.get_metrics()
+
+
+@router.delete("/cache", response_model=ResponseCacheMetrics)
+async def clear_cache():
+    await asyncio.to_thread(response_cache.clear)
+    return response_cache.get_metrics()
+
+
 @router.websocket("/stream")
 async def metrics_websocket(websocket: WebSocket):
     await websocket.accept()
     logger.info("WebSocket connection established for metrics stream")
 
+    instance_id = websocket.query_params.get("instance_id", "default")
     previous_metrics: Optional[VLLMMetrics] = None
 
     try:
         while True:
             try:
-                snapshot = await metrics_service.get_snapshot()
+                snapshot = await metrics_service.get_snapshot(instance_id)
 
                 if snapshot is not None:
                     derived = metrics_service.calculate_derived_metrics(
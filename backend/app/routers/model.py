@@ -1,29 +1,163 @@
-from fastapi import APIRouter, HTTPException, status
+from typing import Optional
 
+from fastapi import APIRouter, HTTPException, Query, status
+
+from app.services.instance_registry import DEFAULT_INSTANCE_ID, instance_registry
+from app.services.launch_history import launch_history
+from app.services.launch_tracker import launch_tracker
+from app.services.state_service import state_service
+from app.services.switch_service import SwitchError, switch_service
 from app.services.vllm_service import vllm_service
-from app.models.vllm import ModelLaunchConfig, ModelStatus, LaunchResult, RunningConfig
+from app.models.vllm import (
+    ModelLaunchConfig,
+    ModelStatus,
+    LaunchComparison,
+    LaunchResult,
+    LaunchRecord,
+    LaunchState,
+    RunningConfig,
+    SwitchState,
+    VLLMInstance,
+)
 
 router = APIRouter(prefix="/model", tags=["model"])
 
 
+def _require_instance(instance_id: str) -> VLLMInstance:
+    instance = instance_registry.get(instance_id)
+    if instance is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown vLLM instance: {instance_id}",
+        )
+    return instance
+
+
+@router.get("/instances", response_model=list[ModelStatus])
+async def list_instances():
+    return await vllm_service.get_all_statuses()
+
+
+@router.delete("/instances/{instance_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_instance(instance_id: str):
+    _require_instance(instance_id)
+    if instance_id == DEFAULT_INSTANCE_ID:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The default instance cannot be removed",
+        )
+    if (await vllm_service.get_model_status(instance_id)).running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Instance {instance_id} is still running",
+        )
+    instance_registry.remove(instance_id)
+
+
 @router.post("/launch", response_model=LaunchResult)
-async def launch_model(config: ModelLaunchConfig):
-    return await vllm_service.launch_model(config)
+async def launch_model(
+    config: ModelLaunchConfig, instance_id: str = DEFAULT_INSTANCE_ID
+):
+    result = await vllm_service.launch_model(config, instance_id)
+    state_service.refresh("model")
+    return result
 
 
 @router.post("/stop", response_model=LaunchResult)
-async def stop_model():
-    return await vllm_service.stop_model()
+async def stop_model(instance_id: str = DEFAULT_INSTANCE_ID):
+    _require_instance(instance_id)
+    result = await vllm_service.stop_model(instance_id)
+    state_service.refresh("model")
+    return result
+
+
+@router.post(
+    "/switch", response_model=SwitchState, status_code=status.HTTP_202_ACCEPTED
+)
+async def switch_model(
+    config: ModelLaunchConfig, instance_id: str = DEFAULT_INSTANCE_ID
+):
+    try:
+        result = await switch_service.start(config, instance_id)
+    except SwitchError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    state_service.refresh("model")
+    return result
+
+
+@router.get("/switch", response_model=SwitchState)
+async def get_switch_state():
+    if switch_service.current is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No model switch has been started",
+        )
+    return switch_service.current
 
 
 @router.get("/status", response_model=ModelStatus)
-async def get_model_status():
-    return await vllm_service.get_model_status()
+async def get_model_status(instance_id: str = DEFAULT_INSTANCE_ID):
+    _require_instance(instance_id)
+    cached = state_service.get("model")
+    if cached is not None and instance_id in cached:
+        return cached[instance_id]
+    return await vllm_service.get_model_status(instance_id)
+
+
+@router.get("/launch-state", response_model=LaunchState)
+async def get_launch_state(instance_id: str = DEFAULT_INSTANCE_ID):
+    launch_state = launch_tracker.get(instance_id)
+    if launch_state is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No model has been launched",
+        )
+    return launch_state
+
+
+@router.get("/launches", response_model=list[LaunchRecord])
+# Older clients use /launch-history; it serves the same records
+@router.get(
+    "/launch-history", response_model=list[LaunchRecord], include_in_schema=False
+)
+async def list_launches(
+    profile_id: Optional[str] = None,
+    config_hash: Optional[str] = None,
+    model_id: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    return await launch_history.list_launches(profile_id, config_hash, model_id, limit)
+
+
+@router.get("/launches/compare", response_model=LaunchComparison)
+async def compare_launches(
+    profile_id: Optional[str] = None,
+    config_hash: Optional[str] = None,
+    limit: int = Query(default=10, ge=2, le=100),
+):
+    if not profile_id and not config_hash:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Specify a profile_id or config_hash to compare",
+        )
+    return await launch_history.compare(profile_id, config_hash, limit)
+
+
+@router.get("/launches/{launch_id}", response_model=LaunchRecord)
+async def get_launch(launch_id: str):
+    launch = await launch_history.get_launch(launch_id)
+    if launch is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Launch {launch_id} not found",
+        )
+    return launch
 
 
 @router.get("/running-config", response_model=RunningConfig)
-async def get_running_config():
-    config = await vllm_service.get_running_config()
+async def get_running_config(instance_id: str = DEFAULT_INSTANCE_ID):
+    _require_instance(instance_id)
+    config = await vllm_service.get_running_config(instance_id)
     if config is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -6,7 +6,9 @@ from pydantic import BaseModel
 from app.db.database import get_async_session
 from app.db.models import Profile
 from app.services.profile_service import ProfileService
-from app.models.vllm import ModelLaunchConfig
+from app.config import settings
+from app.models.inventory import WarmResponse
+from app.models.vllm import ModelLaunchConfig, SwitchState
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/profiles", tags=["profiles"])
@@ -59,6 +61,7 @@ class LaunchFromProfileResponse(BaseModel):
     message: str
     profile_id: str
     model_id: str
+    warm: Optional[WarmResponse] = None
 
 
 def profile_to_response(profile: Profile) -> ProfileResponse:
@@ -162,8 +165,11 @@ async def delete_profile(
 @router.post("/{profile_id}/launch", response_model=LaunchFromProfileResponse)
 async def launch_from_profile(
     profile_id: str,
+    warm: Optional[bool] = None,
     service: ProfileService = Depends(get_profile_service),
 ):
+    from app.services.inventory_service import inventory_service
+    from app.services.state_service import state_service
     from app.services.vllm_service import vllm_service
 
     profile = await service.get_profile(profile_id)
@@ -180,16 +186,49 @@ async def launch_from_profile(
             detail=f"Failed to parse configuration for profile {profile_id}",
         )
 
-    result = await vllm_service.launch_model(config)
+    warm_result = None
+    if warm if warm is not None else settings.warm_before_launch:
+        warm_result = await inventory_service.warm_model(config.model_id)
+
+    result = await vllm_service.launch_model(config, profile_id=profile_id)
+    state_service.refresh("model")
 
     return LaunchFromProfileResponse(
         success=result.success,
         message=result.message,
         profile_id=profile_id,
         model_id=profile.model_id,
+        warm=warm_result,
     )
 
 
+@router.post(
+    "/{profile_id}/switch",
+    response_model=SwitchState,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def switch_to_profile(
+    profile_id: str,
+    service: ProfileService = Depends(get_profile_service),
+):
+    from app.services.state_service import state_service
+    from app.services.switch_service import SwitchError, switch_service
+
+    config = await service.get_config_from_profile(profile_id)
+    if config is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile {profile_id} not found",
+        )
+
+    try:
+        result = await switch_service.start(config, profile_id=profile_id)
+    except SwitchError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    state_service.refresh("model")
+    return result
+
+
 @router.post("/import", response_model=dict)
 async def import_profiles(
     import_request: ImportRequest,
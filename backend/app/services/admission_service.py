@@ -0,0 +1,324 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+from app.models.metrics import AdmissionClassMetrics, AdmissionMetrics, UpstreamLoad
+from app.models.vllm import VLLMInstance
+from app.services.config_service import config_service
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_CLASSES = {"interactive": 0, "batch": 1}
+UPSTREAM_LOAD_TTL_SECONDS = 1.0
+UPSTREAM_LOAD_TIMEOUT_SECONDS = 0.5
+WAITING_METRIC = "vllm:num_requests_waiting"
+KV_USAGE_METRICS = ("vllm:gpu_cache_usage_perc", "vllm:kv_cache_usage_perc")
+MAX_RETRY_AFTER_SECONDS = 60
+WAIT_SAMPLES = 500
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass(order=True)
+class Waiter:
+    priority: int
+    sequence: int
+    future: asyncio.Future = field(compare=False)
+    priority_class: str = field(compare=False)
+
+
+@dataclass
+class ClassStats:
+    queued: int = 0
+    in_flight: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    waits: deque = field(default_factory=lambda: deque(maxlen=WAIT_SAMPLES))
+
+
+class InstanceQueue:
+    def __init__(self):
+        self.in_flight = 0
+        self.waiters: list[Waiter] = []
+        self.classes = {name: ClassStats() for name in PRIORITY_CLASSES}
+        self.service_times: deque = deque(maxlen=WAIT_SAMPLES)
+        self.load: Optional[UpstreamLoad] = None
+        self.load_at = 0.0
+        self.load_task: Optional[asyncio.Task] = None
+
+
+class Ticket:
+    def __init__(
+        self,
+        controller: "AdmissionController",
+        instance_id: str,
+        client: str,
+        priority_class: str,
+        wait_seconds: float,
+    ):
+        self.controller = controller
+        self.instance_id = instance_id
+        self.client = client
+        self.priority_class = priority_class
+        self.wait_seconds = wait_seconds
+        self.started = time.perf_counter()
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller._release(self)
+
+
+class AdmissionController:
+    def __init__(self):
+        self._queues: dict[str, InstanceQueue] = {}
+        self._clients: dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _queue(self, instance_id: str) -> InstanceQueue:
+        if instance_id not in self._queues:
+            self._queues[instance_id] = InstanceQueue()
+        return self._queues[instance_id]
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=UPSTREAM_LOAD_TIMEOUT_SECONDS)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def classify(self, value: Optional[str]) -> str:
+        if value and value.lower() in PRIORITY_CLASSES:
+            return value.lower()
+        return settings.gateway_default_priority
+
+    async def _fetch_load(self, instance: VLLMInstance) -> Optional[UpstreamLoad]:
+        host = settings.gateway_upstream_host or config_service.get_head_node_ip()
+        try:
+            response = await self._get_client().get(
+                f"http://{host}:{instance.port}/metrics"
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.debug(f"Could not read load for instance {instance.id}: {e}")
+            return None
+
+        waiting = 0.0
+        kv_usage = None
+        for line in response.text.splitlines():
+            if line.startswith(WAITING_METRIC):
+                waiting += float(line.rsplit(" ", 1)[1])
+            elif line.startswith(KV_USAGE_METRICS):
+                kv_usage = max(kv_usage or 0.0, float(line.rsplit(" ", 1)[1]))
+        return UpstreamLoad(num_requests_waiting=int(waiting), kv_cache_usage=kv_usage)
+
+    async def _refresh_load(self, queue: InstanceQueue, instance: VLLMInstance):
+        queue.load = await self._fetch_load(instance)
+        queue.load_at = time.monotonic()
+
+    def upstream_load(self, instance: VLLMInstance) -> Optional[UpstreamLoad]:
+        queue = self._queue(instance.id)
+        stale = time.monotonic() - queue.load_at >= UPSTREAM_LOAD_TTL_SECONDS
+        if stale and (queue.load_task is None or queue.load_task.done()):
+            queue.load_task = asyncio.create_task(self._refresh_load(queue, instance))
+        return queue.load
+
+    def _overloaded(self, load: Optional[UpstreamLoad]) -> Optional[str]:
+        if load is None:
+            return None
+        if load.num_requests_waiting >= settings.gateway_max_upstream_waiting:
+            return f"vLLM has {load.num_requests_waiting} requests waiting"
+        if (
+            load.kv_cache_usage is not None
+            and load.kv_cache_usage >= settings.gateway_max_kv_cache_usage
+        ):
+            return f"vLLM KV cache is {load.kv_cache_usage:.0%} full"
+        return None
+
+    def _retry_after(self, queue: InstanceQueue, ahead: int) -> int:
+        service_time = (
+            sum(queue.service_times) / len(queue.service_times)
+            if queue.service_times
+            else 1.0
+        )
+        slots = max(1, settings.gateway_max_inflight)
+        estimate = math.ceil((ahead + 1) * service_time / slots)
+        return max(1, min(MAX_RETRY_AFTER_SECONDS, estimate))
+
+    def _reject(self, queue: InstanceQueue, priority_class: str, reason: str):
+        queue.classes[priority_class].rejected += 1
+        raise AdmissionRejected(reason, self._retry_after(queue, len(queue.waiters)))
+
+    def _has_slot(self, queue: InstanceQueue) -> bool:
+        return (
+            settings.gateway_max_inflight <= 0
+            or queue.in_flight < settings.gateway_max_inflight
+        )
+
+    async def acquire(
+        self, instance: VLLMInstance, client: str, priority_class: str
+    ) -> Ticket:
+        queue = self._queue(instance.id)
+        stats = queue.classes[priority_class]
+
+        limit = settings.gateway_client_concurrency
+        if limit > 0 and self._clients.get(client, 0) >= limit:
+            self._reject(
+                queue, priority_class, f"Client {client} has {limit} requests open"
+            )
+
+        overloaded = self._overloaded(self.upstream_load(instance))
+        if overloaded and priority_class != "interactive":
+            self._reject(queue, priority_class, overloaded)
+
+        self._clients[client] = self._clients.get(client, 0) + 1
+        arrived = time.perf_counter()
+
+        if not queue.waiters and self._has_slot(queue):
+            queue.in_flight += 1
+            return self._admit(queue, instance.id, client, priority_class, arrived)
+
+        if stats.queued >= settings.gateway_max_queue:
+            self._client_done(client)
+            self._reject(
+                queue,
+                priority_class,
+                f"{priority_class} queue is full ({stats.queued})",
+            )
+
+        waiter = Waiter(
+            priority=PRIORITY_CLASSES[priority_class],
+            sequence=next(self._sequence),
+            future=asyncio.get_running_loop().create_future(),
+            priority_class=priority_class,
+        )
+        heapq.heappush(queue.waiters, waiter)
+        stats.queued += 1
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(waiter.future), settings.gateway_queue_timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            self._abandon(queue, waiter, client)
+            self._reject(
+                queue,
+                priority_class,
+                f"Timed out after {settings.gateway_queue_timeout_seconds}s in the {priority_class} queue",
+            )
+        except asyncio.CancelledError:
+            self._abandon(queue, waiter, client)
+            raise
+        return self._admit(queue, instance.id, client, priority_class, arrived)
+
+    def _abandon(self, queue: InstanceQueue, waiter: Waiter, client: str):
+        self._client_done(client)
+        if waiter.future.done() and not waiter.future.cancelled():
+            queue.in_flight -= 1
+            self._dispatch(queue)
+            return
+        waiter.future.cancel()
+        queue.waiters.remove(waiter)
+        heapq.heapify(queue.waiters)
+        queue.classes[waiter.priority_class].queued -= 1
+
+    def _admit(
+        self,
+        queue: InstanceQueue,
+        instance_id: str,
+        client: str,
+        priority_class: str,
+        arrived: float,
+    ) -> Ticket:
+        stats = queue.classes[priority_class]
+        wait = time.perf_counter() - arrived
+        stats.admitted += 1
+        stats.in_flight += 1
+        stats.waits.append(wait)
+        return Ticket(self, instance_id, client, priority_class, wait)
+
+    def _client_done(self, client: str):
+        remaining = self._clients.get(client, 0) - 1
+        if remaining > 0:
+            self._clients[client] = remaining
+        else:
+            self._clients.pop(client, None)
+
+    def _dispatch(self, queue: InstanceQueue):
+        while queue.waiters and self._has_slot(queue):
+            waiter = heapq.heappop(queue.waiters)
+            queue.classes[waiter.priority_class].queued -= 1
+            if waiter.future.done():
+                continue
+            queue.in_flight += 1
+            waiter.future.set_result(None)
+
+    def _release(self, ticket: Ticket):
+        queue = self._queue(ticket.instance_id)
+        queue.in_flight -= 1
+        queue.classes[ticket.priority_class].in_flight -= 1
+        queue.service_times.append(time.perf_counter() - ticket.started)
+        self._client_done(ticket.client)
+        self._dispatch(queue)
+
+    def get_metrics(self, instance_id: Optional[str] = None) -> list[AdmissionMetrics]:
+        results = []
+        for queue_id, queue in self._queues.items():
+            if instance_id is not None and queue_id != instance_id:
+                continue
+            classes = []
+            for name, stats in queue.classes.items():
+                waits_ms = sorted(wait * 1000 for wait in stats.waits)
+                classes.append(
+                    AdmissionClassMetrics(
+                        priority_class=name,
+                        queue_depth=stats.queued,
+                        in_flight=stats.in_flight,
+                        admitted=stats.admitted,
+                        rejected=stats.rejected,
+                        wait_p50_ms=(
+                            round(waits_ms[len(waits_ms) // 2], 3) if waits_ms else None
+                        ),
+                        wait_p95_ms=(
+                            round(
+                                waits_ms[
+                                    min(len(waits_ms) - 1, int(len(waits_ms) * 0.95))
+                                ],
+                                3,
+                            )
+                            if waits_ms
+                            else None
+                        ),
+                    )
+                )
+            results.append(
+                AdmissionMetrics(
+                    instance_id=queue_id,
+                    in_flight=queue.in_flight,
+                    max_in_flight=settings.gateway_max_inflight,
+                    upstream=queue.load,
+                    classes=classes,
+                )
+            )
+        return results
+
+
+admission_controller = AdmissionController()
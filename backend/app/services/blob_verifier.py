@@ -0,0 +1,290 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.db.database import async_session_maker
+from app.db.models import BlobHash
+from app.models.inventory import ModelVerification
+from app.services.size_index import INCOMPLETE_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+SHA256_NAME = re.compile(r"^[0-9a-f]{64}$")
+GIT_SHA1_NAME = re.compile(r"^[0-9a-f]{40}$")
+
+
+@dataclass
+class _Blob:
+    path: str
+    name: str
+    filename: Optional[str]
+    size: int
+    mtime_ns: int
+
+
+def _hash_blob(path: str, name: str, size: int, read_bytes: int) -> str:
+    if SHA256_NAME.match(name):
+        hasher = hashlib.sha256()
+    else:
+        # Small non-LFS files are named by their git blob id
+        hasher = hashlib.sha1()
+        hasher.update(f"blob {size}\0".encode())
+    buffer = bytearray(read_bytes)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return hasher.hexdigest()
+
+
+def _list_blobs(repo: str) -> tuple[list[_Blob], int]:
+    filenames: dict[str, str] = {}
+    snapshots = os.path.join(repo, "snapshots")
+    for root, _, names in os.walk(snapshots):
+        for name in names:
+            path = os.path.join(root, name)
+            if os.path.islink(path):
+                # Relative to the commit directory, e.g. "model-00001-of-00004.safetensors"
+                rel = os.path.relpath(path, snapshots).split(os.sep, 1)[-1]
+                filenames.setdefault(os.path.basename(os.readlink(path)), rel)
+
+    blobs, incomplete = [], 0
+    try:
+        with os.scandir(os.path.join(repo, "blobs")) as entries:
+            for entry in entries:
+                if entry.name.endswith(INCOMPLETE_SUFFIX):
+                    incomplete += 1
+                    continue
+                info = entry.stat(follow_symlinks=False)
+                blobs.append(
+                    _Blob(
+                        path=entry.path,
+                        name=entry.name,
+                        filename=filenames.get(entry.name),
+                        size=info.st_size,
+                        mtime_ns=info.st_mtime_ns,
+                    )
+                )
+    except FileNotFoundError:
+        pass
+    return blobs, incomplete
+
+
+class BlobVerifier:
+    def __init__(self):
+        self._hashes: dict[str, BlobHash] = {}
+        self._results: dict[str, ModelVerification] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # hashlib releases the GIL while hashing large buffers, so threads use
+        # every core without copying blob data into worker processes
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.verify_workers),
+                thread_name_prefix="verify",
+            )
+        return self._executor
+
+    async def load(self):
+        async with async_session_maker() as session:
+            result = await session.execute(select(BlobHash))
+            rows = result.scalars().all()
+        by_repo: dict[str, list[BlobHash]] = {}
+        for row in rows:
+            self._hashes[row.path] = row
+            by_repo.setdefault(row.repo, []).append(row)
+        for repo, entries in by_repo.items():
+            corrupt = sorted(row.filename or row.path for row in entries if not row.ok)
+            self._results[repo] = ModelVerification(
+                status="corrupt" if corrupt else "verified",
+                blobs_total=len(entries),
+                blobs_checked=len(entries),
+                corrupt=corrupt,
+                verified_at=max(row.verified_at for row in entries),
+            )
+        logger.info(f"Loaded {len(rows)} verified blob hashes")
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def state(self, repo: str) -> Optional[ModelVerification]:
+        result = self._results.get(repo)
+        # A copy, so the inventory index notices when a running check moves on
+        return result.model_copy(deep=True) if result is not None else None
+
+    def start(self, repo: str, model_id: str) -> ModelVerification:
+        if repo in self._tasks:
+            raise ValueError(f"{model_id} is already being verified")
+        self._results[repo] = ModelVerification(status="verifying")
+        self._tasks[repo] = asyncio.create_task(self._run(repo, model_id))
+        return self._results[repo]
+
+    async def forget(self, repo: str):
+        task = self._tasks.get(repo)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._results.pop(repo, None)
+        for path in [p for p, row in self._hashes.items() if row.repo == repo]:
+            del self._hashes[path]
+        try:
+            async with async_session_maker() as session:
+                await session.execute(delete(BlobHash).where(BlobHash.repo == repo))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to drop blob hashes for {repo}: {e}")
+
+    async def _publish(self, repo: str):
+        from app.services.inventory_service import inventory_service
+        from app.services.state_service import state_service
+
+        for event in await inventory_service.refresh_repos({repo}):
+            state_service.publish(event)
+
+    async def _save(self, repo: str, rows: list[BlobHash], current: set[str]):
+        stale = [
+            path
+            for path, row in self._hashes.items()
+            if row.repo == repo and path not in current
+        ]
+        for path in stale:
+            del self._hashes[path]
+        for row in rows:
+            self._hashes[row.path] = row
+        try:
+            async with async_session_maker() as session:
+                # Hashes of blobs that are gone, e.g. after a revision update
+                if stale:
+                    await session.execute(
+                        delete(BlobHash).where(BlobHash.path.in_(stale))
+                    )
+                for row in rows:
+                    await session.merge(row)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to save blob hashes for {repo}: {e}")
+
+    async def _hash(self, blob: _Blob) -> tuple[_Blob, str]:
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(
+            self._pool(),
+            _hash_blob,
+            blob.path,
+            blob.name,
+            blob.size,
+            settings.verify_read_bytes,
+        )
+        return blob, digest
+
+    async def _run(self, repo: str, model_id: str):
+        result = self._results[repo]
+        rows: list[BlobHash] = []
+        blobs: list[_Blob] = []
+        start = time.monotonic()
+        try:
+            blobs, incomplete = await asyncio.to_thread(_list_blobs, repo)
+            result.blobs_total = len(blobs)
+            pending = []
+            for blob in blobs:
+                known = self._hashes.get(blob.path)
+                if not (SHA256_NAME.match(blob.name) or GIT_SHA1_NAME.match(blob.name)):
+                    result.blobs_unverifiable += 1
+                elif (
+                    known is not None
+                    and known.size == blob.size
+                    and known.mtime_ns == blob.mtime_ns
+                ):
+                    result.blobs_cached += 1
+                    result.blobs_checked += 1
+                    if not known.ok:
+                        result.corrupt.append(blob.filename or blob.name)
+                else:
+                    pending.append(blob)
+            await self._publish(repo)
+
+            # Largest first, so one big shard does not run alone at the end
+            pending.sort(key=lambda blob: blob.size, reverse=True)
+            published = time.monotonic()
+            for done in asyncio.as_completed([self._hash(blob) for blob in pending]):
+                blob, digest = await done
+                ok = digest == blob.name
+                rows.append(
+                    BlobHash(
+                        path=blob.path,
+                        repo=repo,
+                        filename=blob.filename,
+                        size=blob.size,
+                        mtime_ns=blob.mtime_ns,
+                        digest=digest,
+                        ok=ok,
+                        verified_at=datetime.utcnow(),
+                    )
+                )
+                result.blobs_checked += 1
+                result.bytes_hashed += blob.size
+                if not ok:
+                    result.corrupt.append(blob.filename or blob.name)
+                    logger.warning(
+                        f"{model_id}: {blob.filename or blob.name} is corrupt"
+                    )
+                elapsed = time.monotonic() - start
+                if elapsed > 0:
+                    result.throughput_mbps = round(
+                        result.bytes_hashed / (1024**2) / elapsed, 1
+                    )
+                if time.monotonic() - published >= (
+                    settings.download_progress_interval_seconds
+                ):
+                    published = time.monotonic()
+                    await self._publish(repo)
+
+            result.corrupt.sort()
+            if result.corrupt:
+                result.status = "corrupt"
+            elif incomplete:
+                result.status = "incomplete"
+            else:
+                result.status = "verified"
+            result.verified_at = datetime.utcnow()
+            logger.info(
+                f"Verified {model_id}: {result.status}, {result.bytes_hashed / 1024**3:.2f} GB "
+                f"hashed, {result.blobs_cached} blob(s) unchanged"
+            )
+        except asyncio.CancelledError:
+            result.status = "failed"
+            result.error = "Verification cancelled"
+            raise
+        except Exception as e:
+            result.status = "failed"
+            result.error = str(e)
+            logger.warning(f"Verification of {model_id} failed: {e}")
+        finally:
+            self._tasks.pop(repo, None)
+            await self._save(repo, rows, {blob.path for blob in blobs})
+            await self._publish(repo)
+
+
+blob_verifier = BlobVerifier()
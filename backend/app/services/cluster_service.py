@@ -1,18 +1,64 @@
 import asyncio
+import ipaddress
 import logging
+import math
 import re
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
+from app.config import settings
 from app.services.config_service import config_service
-from app.models.cluster import ClusterStatus, NodeHealth, NodeStatus
+from app.models.cluster import (
+    AgentCommandResult,
+    ClusterStatus,
+    HostTelemetry,
+    NodeHealth,
+    NodeStatus,
+    NodeTelemetry,
+    PortProbe,
+)
 
 logger = logging.getLogger(__name__)
 
+MIN_AGENT_INTERVAL_SECONDS = 0.1
+
+
+def _is_loopback(address: Optional[str]) -> bool:
+    if address == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(address or "").is_loopback
+    except ValueError:
+        return False
+
+
+@dataclass
+class NodeAgent:
+    node: str
+    websocket: Any
+    hostname: Optional[str] = None
+    version: Optional[str] = None
+    interval_seconds: float = 1.0
+    commands: bool = False
+    connected_at: datetime = field(default_factory=datetime.utcnow)
+    last_seen: Optional[datetime] = None
+    telemetry: deque = field(default_factory=deque)
+    pending: dict[str, asyncio.Future] = field(default_factory=dict)
+
 
 class ClusterService:
     def __init__(self):
         self.spark_docker_path = None
+        self._nodes_status: Optional[NodeStatus] = None
+        self._nodes_checked_at = 0.0
+        self._nodes_task: Optional[asyncio.Task] = None
+        self._agents: dict[str, NodeAgent] = {}
+        self._telemetry: dict[str, deque] = {}
 
     def _get_script_path(self, script_name: str) -> Path:
         self.spark_docker_path = config_service.get_spark_docker_path()
@@ -90,6 +136,7 @@ class ClusterService:
         )
 
     async def start_cluster(self) -> ClusterStatus:
+        self.invalidate_nodes()
         try:
             stdout, stderr, returncode = await self._run_script(
                 "launch-cluster.sh", ["-d"]
@@ -128,6 +175,7 @@ class ClusterService:
             )
 
     async def stop_cluster(self) -> ClusterStatus:
+        self.invalidate_nodes()
         try:
             stdout, stderr, returncode = await self._run_script(
                 "launch-cluster.sh", ["stop"]
@@ -219,54 +267,301 @@ class ClusterService:
             logger.error(f"Error getting uptime: {e}")
             return None
 
-    async def check_node_health(self, ip: str) -> NodeHealth:
+    async def _ping(self, ip: str) -> tuple[Optional[bool], Optional[float]]:
+        timeout = max(1, math.ceil(settings.node_probe_timeout_seconds))
         try:
             proc = await asyncio.create_subprocess_exec(
                 "ping",
                 "-c",
-                "3",
+                "1",
                 "-W",
-                "2",
+                str(timeout),
                 ip,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
             )
+        except FileNotFoundError:
+            return None, None
 
+        try:
             stdout, _ = await proc.communicate()
-            output = stdout.decode("utf-8", errors="replace")
+        except asyncio.CancelledError:
+            proc.kill()
+            raise
+        output = stdout.decode("utf-8", errors="replace")
 
-            latency_match = re.search(r"rtt.*=[\d.]+/([\d.]+)", output)
-            latency_ms = None
-            if latency_match:
-                latency_ms = float(latency_match.group(1))
+        latency_match = re.search(r"rtt.*=[\d.]+/([\d.]+)", output)
+        latency_ms = float(latency_match.group(1)) if latency_match else None
+        return proc.returncode == 0, latency_ms
 
-            healthy = proc.returncode == 0
+    async def _probe_port(self, ip: str, name: str, port: int) -> PortProbe:
+        started = time.perf_counter()
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(ip, port),
+                timeout=settings.node_probe_timeout_seconds,
+            )
+        except (OSError, asyncio.TimeoutError):
+            return PortProbe(name=name, port=port, open=False)
+
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return PortProbe(name=name, port=port, open=True, latency_ms=latency_ms)
+
+    def _node_ports(self, role: str) -> list[tuple[str, int]]:
+        ports = [("ssh", settings.node_ssh_port)]
+        if role == "head":
+            ports.append(("ray", settings.ray_port))
+            ports.append(("vllm", int(config_service.get_vllm_port())))
+        return ports
+
+    async def check_node_health(self, ip: str, role: str = "worker") -> NodeHealth:
+        try:
+            (icmp, icmp_latency), *ports = await asyncio.gather(
+                self._ping(ip),
+                *[
+                    self._probe_port(ip, name, port)
+                    for name, port in self._node_ports(role)
+                ],
+            )
+
+            open_latencies = [p.latency_ms for p in ports if p.open]
+            latency_ms = icmp_latency
+            if latency_ms is None and open_latencies:
+                latency_ms = min(open_latencies)
 
             return NodeHealth(
                 ip=ip,
-                healthy=healthy,
+                role=role,
+                healthy=bool(icmp) or bool(open_latencies),
                 latency_ms=latency_ms,
+                icmp=icmp,
+                ports=ports,
+                agent=self.agent_connected(ip),
             )
 
         except Exception as e:
             logger.exception(f"Error checking node health for {ip}: {e}")
             return NodeHealth(
                 ip=ip,
+                role=role,
                 healthy=False,
                 latency_ms=None,
+                error=str(e),
             )
 
+    def invalidate_nodes(self):
+        self._nodes_checked_at = 0.0
+
     async def get_nodes_status(self) -> NodeStatus:
+        if (
+            self._nodes_status is not None
+            and time.monotonic() - self._nodes_checked_at
+            < settings.node_status_cache_seconds
+        ):
+            return self._nodes_status
+
+        if self._nodes_task is None or self._nodes_task.done():
+            self._nodes_task = asyncio.create_task(self._probe_nodes())
+        return await asyncio.shield(self._nodes_task)
+
+    async def _probe_nodes(self) -> NodeStatus:
         head_ip = config_service.get_head_node_ip()
-        worker_ips = config_service.get_worker_node_ips()
-        worker_ip = worker_ips[0] if worker_ips else "192.168.5.212"
+        targets = [(head_ip, "head")] + [
+            (ip, "worker")
+            for ip in dict.fromkeys(config_service.get_worker_node_ips())
+            if ip and ip != head_ip
+        ]
+
+        started = time.perf_counter()
+        tasks = [
+            asyncio.create_task(self.check_node_health(ip, role))
+            for ip, role in targets
+        ]
+        done, pending = await asyncio.wait(
+            tasks, timeout=settings.node_probe_deadline_seconds
+        )
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        nodes = []
+        for task, (ip, role) in zip(tasks, targets):
+            if task in done:
+                nodes.append(task.result())
+            else:
+                nodes.append(
+                    NodeHealth(
+                        ip=ip,
+                        role=role,
+                        healthy=False,
+                        error=f"No response within {settings.node_probe_deadline_seconds}s",
+                    )
+                )
 
-        head_health = await self.check_node_health(head_ip)
-        worker_health = await self.check_node_health(worker_ip)
+        status = NodeStatus(
+            nodes=nodes,
+            healthy=sum(node.healthy for node in nodes),
+            total=len(nodes),
+            checked_at=datetime.utcnow(),
+            duration_ms=round((time.perf_counter() - started) * 1000, 3),
+        )
+        self._nodes_status = status
+        self._nodes_checked_at = time.monotonic()
+        return status
 
-        return NodeStatus(
-            head=head_health,
-            worker=worker_health,
+    def _configured_nodes(self) -> dict[str, str]:
+        head_ip = config_service.get_head_node_ip()
+        nodes = {head_ip: "head"}
+        for ip in config_service.get_worker_node_ips():
+            if ip:
+                nodes.setdefault(ip, "worker")
+        return nodes
+
+    def agent_connected(self, node: str) -> bool:
+        return node in self._agents
+
+    def register_agent(
+        self, websocket: Any, hello: dict, peer: Optional[str] = None
+    ) -> NodeAgent:
+        node = str(hello.get("node") or "")
+        if not node:
+            raise ValueError("Agent hello is missing the node address")
+        # Loopback agents on the dashboard host are allowed so one box can run both
+        local = _is_loopback(peer)
+        if node not in self._configured_nodes() and not (local and _is_loopback(node)):
+            raise ValueError(f"{node} is not a configured node")
+        if not settings.agent_token and not local and peer != node:
+            raise ValueError(
+                f"Agent for {node} connected from {peer}; set SPARK_AGENT_TOKEN to allow this"
+            )
+        interval = max(
+            float(hello.get("interval_seconds") or 1.0), MIN_AGENT_INTERVAL_SECONDS
+        )
+        history = self._telemetry.get(node)
+        maxlen = max(int(settings.agent_history_minutes * 60 / interval), 1)
+        if history is None or history.maxlen != maxlen:
+            history = deque(history or (), maxlen=maxlen)
+            self._telemetry[node] = history
+        agent = NodeAgent(
+            node=node,
+            websocket=websocket,
+            hostname=hello.get("hostname"),
+            version=hello.get("version"),
+            interval_seconds=interval,
+            commands=bool(hello.get("commands")),
+            telemetry=history,
+        )
+        previous = self._agents.get(node)
+        if previous is not None:
+            logger.info(f"Agent for {node} reconnected, replacing previous connection")
+            self._fail_pending(previous, "Agent reconnected")
+        self._agents[node] = agent
+        logger.info(f"Agent connected for {node} ({agent.hostname})")
+        return agent
+
+    def unregister_agent(self, agent: NodeAgent):
+        if self._agents.get(agent.node) is agent:
+            del self._agents[agent.node]
+            logger.info(f"Agent disconnected for {agent.node}")
+            if agent.node not in self._configured_nodes():
+                self._telemetry.pop(agent.node, None)
+        self._fail_pending(agent, "Agent disconnected")
+
+    def _fail_pending(self, agent: NodeAgent, reason: str):
+        for future in agent.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(reason))
+        agent.pending.clear()
+
+    def record_agent_message(self, agent: NodeAgent, message: dict):
+        kind = message.get("type")
+        agent.last_seen = datetime.utcnow()
+        if kind == "telemetry":
+            try:
+                sample = HostTelemetry(timestamp=agent.last_seen, **message)
+            except ValueError as e:
+                logger.warning(f"Dropping malformed telemetry from {agent.node}: {e}")
+                return
+            agent.telemetry.append(sample)
+        elif kind == "result":
+            future = agent.pending.pop(str(message.get("id")), None)
+            if future is not None and not future.done():
+                future.set_result(message)
+
+    def get_node_telemetry(self) -> list[NodeTelemetry]:
+        configured = self._configured_nodes()
+        stale_after = timedelta(seconds=settings.agent_stale_seconds)
+        now = datetime.utcnow()
+        nodes = []
+        for node in list(configured) + [n for n in self._telemetry if n not in configured]:
+            agent = self._agents.get(node)
+            history = self._telemetry.get(node)
+            latest = history[-1] if history else None
+            entry = NodeTelemetry(
+                node=node,
+                role=configured.get(node),
+                latest=latest,
+                last_seen=latest.timestamp if latest else None,
+            )
+            if agent is not None:
+                entry.connected = True
+                entry.hostname = agent.hostname
+                entry.agent_version = agent.version
+                entry.commands = agent.commands
+                entry.connected_at = agent.connected_at
+                entry.last_seen = agent.last_seen
+                entry.stale = agent.last_seen is None or now - agent.last_seen > stale_after
+            nodes.append(entry)
+        return nodes
+
+    def get_telemetry_history(
+        self, node: str, minutes: Optional[int] = None
+    ) -> Optional[list[HostTelemetry]]:
+        history = self._telemetry.get(node)
+        if history is None:
+            return None
+        if minutes is None:
+            return list(history)
+        since = datetime.utcnow() - timedelta(minutes=minutes)
+        return [sample for sample in history if sample.timestamp >= since]
+
+    async def run_on_node(
+        self, node: str, argv: list[str], timeout: float = 60.0
+    ) -> AgentCommandResult:
+        agent = self._agents.get(node)
+        if agent is None:
+            raise RuntimeError(f"No agent connected for {node}")
+        if not agent.commands:
+            raise RuntimeError(f"Agent on {node} does not accept commands")
+
+        command_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        agent.pending[command_id] = future
+        try:
+            await agent.websocket.send_json(
+                {"type": "run", "id": command_id, "argv": argv, "timeout": timeout}
+            )
+            # Allow the agent a moment to report its own timeout before giving up
+            reply = await asyncio.wait_for(future, timeout + 5.0)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            return AgentCommandResult(
+                node=node, argv=argv, error=str(e) or "No reply from agent"
+            )
+        finally:
+            agent.pending.pop(command_id, None)
+        return AgentCommandResult(
+            node=node,
+            argv=argv,
+            returncode=reply.get("returncode"),
+            stdout=reply.get("stdout", ""),
+            stderr=reply.get("stderr", ""),
+            duration_seconds=reply.get("duration_seconds"),
+            error=reply.get("error"),
         )
 
 
@@ -61,7 +61,7 @@ class ConfigService:
 
     def get_worker_node_ips(self) -> list[str]:
         config = self.get_config()
-        return config.get("worker_node_ips", ["192.168.5.212"])
+        return [ip for ip in config.get("worker_node_ips", ["192.168.5.212"]) if ip]
 
     def get_vllm_port(self) -> int:
         config = self.get_config()
@@ -0,0 +1,480 @@
+import asyncio
+import logging
+import os
+import shlex
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from app.config import settings
+from app.models.inventory import DistributionJob, DistributionStatus, NodeDistribution
+from app.services.size_index import INCOMPLETE_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_BYTES = 8 * 1024**2
+SSH_OPTIONS = ["-o", "BatchMode=yes", "-o", "ConnectTimeout=5"]
+JOBS_KEPT = 20
+HEAD = "head"
+
+
+class DistributionError(RuntimeError):
+    pass
+
+
+def _repo_manifest(repo: Path) -> tuple[dict[str, int], dict[str, str], dict[str, str]]:
+    files, links, refs = {}, {}, {}
+    for directory in ("blobs", "snapshots"):
+        for root, _, names in os.walk(repo / directory):
+            for name in names:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, repo)
+                if os.path.islink(path):
+                    links[rel] = os.readlink(path)
+                elif not name.endswith(INCOMPLETE_SUFFIX):
+                    files[rel] = os.path.getsize(path)
+    for root, _, names in os.walk(repo / "refs"):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path) as f:
+                refs[os.path.relpath(path, repo / "refs")] = f.read().strip()
+    return files, links, refs
+
+
+def _local_files(repo: Path) -> dict[str, int]:
+    files = {}
+    for directory in ("blobs", "snapshots"):
+        for root, _, names in os.walk(repo / directory):
+            for name in names:
+                path = os.path.join(root, name)
+                if not os.path.islink(path):
+                    files[os.path.relpath(path, repo)] = os.path.getsize(path)
+    return files
+
+
+def _local_finalize(repo: Path, links: dict[str, str], refs: dict[str, str]):
+    for rel, target in links.items():
+        link = repo / rel
+        link.parent.mkdir(parents=True, exist_ok=True)
+        if link.is_symlink() or link.exists():
+            link.unlink()
+        link.symlink_to(target)
+    for ref, commit in refs.items():
+        path = repo / "refs" / ref
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(commit)
+
+
+def _local_copy(source: Path, target: Path, progress: Callable[[int], None]):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + INCOMPLETE_SUFFIX)
+    with open(source, "rb") as src, open(partial, "wb") as dst:
+        offset, size = 0, os.fstat(src.fileno()).st_size
+        while offset < size:
+            sent = os.sendfile(dst.fileno(), src.fileno(), offset, COPY_CHUNK_BYTES)
+            if sent == 0:
+                break
+            offset += sent
+            progress(sent)
+    os.replace(partial, target)
+
+
+class LocalNode:
+    def __init__(self, name: str, cache_dir: Union[str, Path]):
+        self.name = name
+        self.cache_dir = Path(cache_dir)
+
+    def repo(self, repo_dir: str) -> Path:
+        return self.cache_dir / repo_dir
+
+    async def list_files(self, repo_dir: str) -> dict[str, int]:
+        return await asyncio.to_thread(_local_files, self.repo(repo_dir))
+
+    async def finalize(
+        self, repo_dir: str, links: dict[str, str], refs: dict[str, str]
+    ):
+        await asyncio.to_thread(_local_finalize, self.repo(repo_dir), links, refs)
+
+
+class SSHNode:
+    def __init__(self, host: str, cache_dir: str):
+        # ssh would parse a leading dash as an option such as -oProxyCommand
+        if not host or host.startswith("-"):
+            raise ValueError(f"Invalid node host: {host!r}")
+        self.name = host
+        self.cache_dir = cache_dir
+
+    def repo(self, repo_dir: str) -> str:
+        return f"{self.cache_dir.rstrip('/')}/{repo_dir}"
+
+    async def run(self, command: str, stdin: Optional[bytes] = None) -> str:
+        proc = await asyncio.create_subprocess_exec(
+            "ssh",
+            *SSH_OPTIONS,
+            self.name,
+            command,
+            stdin=asyncio.subprocess.PIPE if stdin is not None else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await proc.communicate(stdin)
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        if proc.returncode != 0:
+            raise DistributionError(
+                stderr.decode("utf-8", errors="replace").strip()
+                or f"ssh {self.name} exited with {proc.returncode}"
+            )
+        return stdout.decode("utf-8", errors="replace")
+
+    async def list_files(self, repo_dir: str) -> dict[str, int]:
+        repo = shlex.quote(self.repo(repo_dir))
+        output = await self.run(
+            f"cd {repo} 2>/dev/null || exit 0; "
+            "find blobs snapshots -type f -printf '%s\\t%p\\n' 2>/dev/null; true"
+        )
+        files = {}
+        for line in output.splitlines():
+            size, _, rel = line.partition("\t")
+            if rel and not rel.endswith(INCOMPLETE_SUFFIX):
+                files[rel] = int(size)
+        return files
+
+    async def finalize(
+        self, repo_dir: str, links: dict[str, str], refs: dict[str, str]
+    ):
+        lines = ["set -e", f"cd {shlex.quote(self.repo(repo_dir))}"]
+        for rel, target in links.items():
+            lines.append(f"mkdir -p {shlex.quote(os.path.dirname(rel))}")
+            lines.append(f"ln -sfn {shlex.quote(target)} {shlex.quote(rel)}")
+        for ref, commit in refs.items():
+            path = shlex.quote(f"refs/{ref}")
+            lines.append(f"mkdir -p $(dirname {path})")
+            lines.append(f"printf %s {shlex.quote(commit)} > {path}")
+        await self.run("sh -s", stdin="\n".join(lines).encode())
+
+
+Node = Union[LocalNode, SSHNode]
+
+
+def _receive_command(target: str) -> str:
+    partial = shlex.quote(target + INCOMPLETE_SUFFIX)
+    return (
+        f"mkdir -p {shlex.quote(os.path.dirname(target))} && cat > {partial} "
+        f"&& mv {partial} {shlex.quote(target)}"
+    )
+
+
+async def _pipe(
+    reader: asyncio.subprocess.Process,
+    writer: asyncio.subprocess.Process,
+    progress: Callable[[int], None],
+):
+    while True:
+        data = await reader.stdout.read(COPY_CHUNK_BYTES)
+        if not data:
+            break
+        writer.stdin.write(data)
+        await writer.stdin.drain()
+        progress(len(data))
+    writer.stdin.close()
+
+
+async def copy_file(
+    source: Node,
+    target: Node,
+    repo_dir: str,
+    rel: str,
+    size: int,
+    progress: Callable[[int], None],
+):
+    src_path = f"{source.repo(repo_dir)}/{rel}"
+    dst_path = f"{target.repo(repo_dir)}/{rel}"
+    if isinstance(source, LocalNode) and isinstance(target, LocalNode):
+        loop = asyncio.get_running_loop()
+        await asyncio.to_thread(
+            _local_copy,
+            Path(src_path),
+            Path(dst_path),
+            lambda n: loop.call_soon_threadsafe(progress, n),
+        )
+        return
+
+    if isinstance(source, SSHNode) and isinstance(target, SSHNode):
+        # Relay: the bytes flow between the two nodes without passing the head
+        await source.run(
+            f"cat {shlex.quote(src_path)} | ssh {' '.join(SSH_OPTIONS)} "
+            f"{shlex.quote(target.name)} {shlex.quote(_receive_command(dst_path))}"
+        )
+        progress(size)
+        return
+
+    procs = []
+    try:
+        if isinstance(source, LocalNode):
+            reader = await asyncio.create_subprocess_exec(
+                "cat", src_path, stdout=asyncio.subprocess.PIPE
+            )
+        else:
+            reader = await asyncio.create_subprocess_exec(
+                "ssh",
+                *SSH_OPTIONS,
+                source.name,
+                f"cat {shlex.quote(src_path)}",
+                stdout=asyncio.subprocess.PIPE,
+            )
+        procs.append(reader)
+        if isinstance(target, LocalNode):
+            writer = await asyncio.create_subprocess_shell(
+                _receive_command(dst_path), stdin=asyncio.subprocess.PIPE
+            )
+        else:
+            writer = await asyncio.create_subprocess_exec(
+                "ssh",
+                *SSH_OPTIONS,
+                target.name,
+                _receive_command(dst_path),
+                stdin=asyncio.subprocess.PIPE,
+            )
+        procs.append(writer)
+        await _pipe(reader, writer, progress)
+        codes = [await reader.wait(), await writer.wait()]
+        if any(codes):
+            raise DistributionError(f"Copy of {rel} to {target.name} failed")
+    finally:
+        for proc in procs:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+
+@dataclass
+class _NodeRun:
+    node: Node
+    record: Optional[NodeDistribution]
+    parent: Optional["_NodeRun"]
+    ready: dict[str, asyncio.Event] = field(default_factory=dict)
+    failed: asyncio.Event = field(default_factory=asyncio.Event)
+    started: float = 0.0
+
+
+class DistributionService:
+    def __init__(self):
+        self._jobs: dict[str, DistributionJob] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def status(self) -> DistributionStatus:
+        return DistributionStatus(
+            jobs=sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+        )
+
+    def get(self, job_id: str) -> Optional[DistributionJob]:
+        return self._jobs.get(job_id)
+
+    def _publish(self):
+        from app.services.state_service import state_service
+
+        state_service.update("distributions", self.status())
+
+    def start(
+        self,
+        model_id: str,
+        targets: list[Node],
+        fanout: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+    ) -> DistributionJob:
+        for job in self._jobs.values():
+            if job.model_id == model_id and job.status == "running":
+                raise ValueError(
+                    f"{model_id} is already being distributed (job {job.job_id})"
+                )
+        if not targets:
+            raise ValueError("No target nodes to distribute to")
+
+        fanout = max(1, fanout or settings.distribution_fanout)
+        head = LocalNode(HEAD, cache_dir or settings.hf_cache_dir)
+        root = _NodeRun(node=head, record=None, parent=None)
+        runs = []
+        for index, target in enumerate(targets):
+            # Breadth-first tree: fanout=1 is a relay chain, fanout>=len(targets) is a star
+            parent = root if index < fanout else runs[(index - fanout) // fanout]
+            run = _NodeRun(
+                node=target,
+                record=NodeDistribution(node=target.name, source=parent.node.name),
+                parent=parent,
+            )
+            runs.append(run)
+
+        job = DistributionJob(
+            job_id=str(uuid.uuid4()),
+            model_id=model_id,
+            fanout=fanout,
+            nodes=[run.record for run in runs],
+            created_at=datetime.utcnow(),
+        )
+        self._jobs[job.job_id] = job
+        for stale in sorted(self._jobs.values(), key=lambda j: j.created_at)[
+            :-JOBS_KEPT
+        ]:
+            if stale.status != "running":
+                del self._jobs[stale.job_id]
+        self._tasks[job.job_id] = asyncio.create_task(self._run(job, root, runs))
+        self._publish()
+        logger.info(
+            f"Distributing {model_id} to {len(targets)} node(s) with fanout {fanout}"
+        )
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[DistributionJob]:
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return self._jobs.get(job_id)
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _source_for(self, run: _NodeRun, rel: str) -> Node:
+        parent = run.parent
+        while parent.record is not None:
+            ready = asyncio.create_task(parent.ready[rel].wait())
+            failed = asyncio.create_task(parent.failed.wait())
+            await asyncio.wait({ready, failed}, return_when=asyncio.FIRST_COMPLETED)
+            ready.cancel()
+            failed.cancel()
+            if parent.ready[rel].is_set():
+                return parent.node
+            # The parent dropped out, pull from further up the tree instead
+            parent = parent.parent
+        return parent.node
+
+    def _progress(self, run: _NodeRun) -> Callable[[int], None]:
+        def advance(nbytes: int):
+            run.record.bytes_done += nbytes
+
+        return advance
+
+    async def _sync_node(
+        self,
+        run: _NodeRun,
+        repo_dir: str,
+        files: dict[str, int],
+        links: dict[str, str],
+        refs: dict[str, str],
+    ):
+        record = run.record
+        record.status = "comparing"
+        try:
+            existing = await run.node.list_files(repo_dir)
+            missing = [rel for rel, size in files.items() if existing.get(rel) != size]
+            for rel in files:
+                if rel not in missing:
+                    run.ready[rel].set()
+            record.files_total = len(missing)
+            record.bytes_total = sum(files[rel] for rel in missing)
+            record.bytes_skipped = sum(files.values()) - record.bytes_total
+            record.status = "copying"
+            record.started_at = datetime.utcnow()
+            run.started = time.monotonic()
+
+            pending = list(missing)
+            progress = self._progress(run)
+
+            async def stream():
+                while pending:
+                    rel = pending.pop(0)
+                    source = await self._source_for(run, rel)
+                    await copy_file(
+                        source, run.node, repo_dir, rel, files[rel], progress
+                    )
+                    record.files_done += 1
+                    run.ready[rel].set()
+
+            streams = max(1, settings.distribution_streams_per_node)
+            async with asyncio.TaskGroup() as group:
+                for _ in range(streams):
+                    group.create_task(stream())
+            await run.node.finalize(repo_dir, links, refs)
+            record.status = "completed"
+        except asyncio.CancelledError:
+            record.status = "cancelled"
+            raise
+        except Exception as e:
+            if isinstance(e, ExceptionGroup):
+                e = e.exceptions[0]
+            record.status = "failed"
+            record.error = str(e)[-500:]
+            run.failed.set()
+            logger.warning(f"Distribution to {record.node} failed: {e}")
+        finally:
+            record.finished_at = datetime.utcnow()
+            self._update_throughput(run)
+
+    def _update_throughput(self, run: _NodeRun):
+        if run.started and run.record.bytes_done:
+            elapsed = time.monotonic() - run.started
+            if elapsed > 0:
+                run.record.throughput_mbps = round(
+                    run.record.bytes_done / (1024**2) / elapsed, 1
+                )
+
+    async def _report(self, runs: list[_NodeRun]):
+        while True:
+            await asyncio.sleep(settings.download_progress_interval_seconds)
+            for run in runs:
+                if run.record.status == "copying":
+                    self._update_throughput(run)
+            self._publish()
+
+    async def _run(self, job: DistributionJob, root: _NodeRun, runs: list[_NodeRun]):
+        repo_dir = f"models--{job.model_id.replace('/', '--')}"
+        reporter = asyncio.create_task(self._report(runs))
+        try:
+            repo = root.node.repo(repo_dir)
+            files, links, refs = await asyncio.to_thread(_repo_manifest, repo)
+            if not files:
+                raise DistributionError(f"{job.model_id} is not in the local cache")
+            job.bytes_total = sum(files.values())
+            for run in [root, *runs]:
+                run.ready = {rel: asyncio.Event() for rel in files}
+            for event in root.ready.values():
+                event.set()
+
+            await asyncio.gather(
+                *(self._sync_node(run, repo_dir, files, links, refs) for run in runs)
+            )
+            failed = [run.record.node for run in runs if run.record.status == "failed"]
+            if failed:
+                job.status = "failed"
+                job.error = f"Failed on {', '.join(failed)}"
+            else:
+                job.status = "completed"
+            logger.info(f"Distribution of {job.model_id} {job.status}")
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            for run in runs:
+                if run.record.status in ("pending", "comparing", "copying"):
+                    run.record.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.warning(f"Distribution of {job.model_id} failed: {e}")
+        finally:
+            reporter.cancel()
+            job.finished_at = datetime.utcnow()
+            self._tasks.pop(job.job_id, None)
+            self._publish()
+
+
+distribution_service = DistributionService()
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import logging
+from typing import AsyncGenerator, AsyncIterator, Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+STDIN = 0
+STDOUT = 1
+STDERR = 2
+
+
+class DockerError(RuntimeError):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Docker API error {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+class DockerClient:
+    def __init__(self, socket_path: Optional[str] = None):
+        self.socket_path = socket_path or settings.docker_socket_path
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tty_cache: dict[str, bool] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            transport = httpx.AsyncHTTPTransport(uds=self.socket_path)
+            self._client = httpx.AsyncClient(
+                transport=transport,
+                base_url="http://docker",
+                timeout=httpx.Timeout(30.0, read=None),
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=8),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _raise_for_status(self, response: httpx.Response):
+        if response.status_code < 400:
+            return
+        try:
+            message = response.json().get("message", response.text)
+        except Exception:
+            message = response.text
+        raise DockerError(response.status_code, message)
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        response = await self._get_client().request(method, path, **kwargs)
+        self._raise_for_status(response)
+        return response
+
+    async def _demux(
+        self, chunks: AsyncIterator[bytes]
+    ) -> AsyncGenerator[tuple[int, bytes], None]:
+        buffer = bytearray()
+        async for chunk in chunks:
+            buffer.extend(chunk)
+            while len(buffer) >= 8:
+                size = int.from_bytes(buffer[4:8], "big")
+                if len(buffer) < 8 + size:
+                    break
+                stream = buffer[0]
+                payload = bytes(buffer[8 : 8 + size])
+                del buffer[: 8 + size]
+                yield stream, payload
+
+    async def _raw(
+        self, chunks: AsyncIterator[bytes]
+    ) -> AsyncGenerator[tuple[int, bytes], None]:
+        async for chunk in chunks:
+            yield STDOUT, chunk
+
+    async def ping(self) -> bool:
+        try:
+            response = await self._request("GET", "/_ping")
+            return response.text == "OK"
+        except Exception:
+            return False
+
+    async def inspect_container(self, container: str) -> dict:
+        response = await self._request("GET", f"/containers/{container}/json")
+        return response.json()
+
+    async def _container_tty(self, container: str) -> bool:
+        if container not in self._tty_cache:
+            info = await self.inspect_container(container)
+            self._tty_cache[container] = bool(info.get("Config", {}).get("Tty"))
+        return self._tty_cache[container]
+
+    async def create_exec(
+        self, container: str, cmd: list[str], attach_stdin: bool = False
+    ) -> str:
+        response = await self._request(
+            "POST",
+            f"/containers/{container}/exec",
+            json={
+                "Cmd": cmd,
+                "AttachStdin": attach_stdin,
+                "AttachStdout": True,
+                "AttachStderr": True,
+                "Tty": False,
+            },
+        )
+        return response.json()["Id"]
+
+    async def inspect_exec(self, exec_id: str) -> dict:
+        response = await self._request("GET", f"/exec/{exec_id}/json")
+        return response.json()
+
+    async def stream_exec(
+        self, exec_id: str
+    ) -> AsyncGenerator[tuple[int, bytes], None]:
+        async with self._get_client().stream(
+            "POST",
+            f"/exec/{exec_id}/start",
+            json={"Detach": False, "Tty": False},
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                self._raise_for_status(response)
+            async for frame in self._demux(response.aiter_raw()):
+                yield frame
+
+    async def open_exec_socket(
+        self, exec_id: str
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        body = json.dumps({"Detach": False, "Tty": False}).encode()
+        writer.write(
+            (
+                f"POST /exec/{exec_id}/start HTTP/1.1\r\n"
+                "Host: docker\r\n"
+                "Content-Type: application/json\r\n"
+                "Connection: Upgrade\r\n"
+                "Upgrade: tcp\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n"
+            ).encode()
+            + body
+        )
+        await writer.drain()
+
+        status_line = await reader.readline()
+        parts = status_line.decode("latin-1").split(" ", 2)
+        status_code = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+        while True:
+            header = await reader.readline()
+            if header in (b"\r\n", b"\n", b""):
+                break
+
+        if status_code not in (101, 200):
+            writer.close()
+            raise DockerError(status_code, status_line.decode("latin-1").strip())
+        return reader, writer
+
+    async def read_frame(self, reader: asyncio.StreamReader) -> tuple[int, bytes]:
+        header = await reader.readexactly(8)
+        size = int.from_bytes(header[4:8], "big")
+        return header[0], await reader.readexactly(size)
+
+    async def exit_code(self, exec_id: str) -> Optional[int]:
+        info = await self.inspect_exec(exec_id)
+        if info.get("Running"):
+            return None
+        return info.get("ExitCode") or 0
+
+    async def _wait_exit(self, exec_id: str) -> int:
+        # The output streams close just before Docker marks the exec as finished
+        delay = 0.01
+        while True:
+            returncode = await self.exit_code(exec_id)
+            if returncode is not None:
+                return returncode
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _kill(self, container: str, pid: Optional[int]):
+        if pid is None:
+            logger.warning(f"Cannot kill timed out exec in {container}: pid unknown")
+            return
+        try:
+            exec_id = await self.create_exec(container, ["kill", "-KILL", str(pid)])
+            async for _ in self.stream_exec(exec_id):
+                pass
+        except Exception as e:
+            logger.warning(f"Failed to kill timed out exec {pid} in {container}: {e}")
+
+    async def exec(
+        self,
+        container: str,
+        cmd: list[str],
+        timeout: Optional[float] = None,
+    ) -> tuple[str, str, int]:
+        if timeout is not None:
+            # Docker has no API to kill an exec, so learn its pid to kill it on timeout
+            cmd = ["sh", "-c", 'echo "$$" >&2; exec "$@"', "sh", *cmd]
+        exec_id = await self.create_exec(container, cmd)
+        stdout = bytearray()
+        stderr = bytearray()
+
+        async def collect() -> int:
+            async for stream, data in self.stream_exec(exec_id):
+                if stream == STDERR:
+                    stderr.extend(data)
+                else:
+                    stdout.extend(data)
+            return await self._wait_exit(exec_id)
+
+        def pid() -> Optional[int]:
+            line, newline, _ = stderr.partition(b"\n")
+            return int(line) if newline and line.strip().isdigit() else None
+
+        try:
+            returncode = await asyncio.wait_for(collect(), timeout)
+        except asyncio.TimeoutError:
+            await self._kill(container, pid())
+            raise
+        if timeout is not None and pid() is not None:
+            del stderr[: stderr.index(b"\n") + 1]
+        return (
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace"),
+            returncode,
+        )
+
+    async def _lines(
+        self, frames: AsyncIterator[tuple[int, bytes]], include_stderr: bool
+    ) -> AsyncGenerator[bytes, None]:
+        pending = {STDOUT: bytearray(), STDERR: bytearray()}
+        async for stream, data in frames:
+            if stream == STDERR and not include_stderr:
+                continue
+            buffer = pending.setdefault(stream, bytearray())
+            buffer.extend(data)
+            while True:
+                newline = buffer.find(b"\n")
+                if newline < 0:
+                    break
+                yield bytes(buffer[: newline + 1])
+                del buffer[: newline + 1]
+        for buffer in pending.values():
+            if buffer:
+                yield bytes(buffer)
+
+    async def exec_lines(
+        self, container: str, cmd: list[str], include_stderr: bool = False
+    ) -> AsyncGenerator[bytes, None]:
+        exec_id = await self.create_exec(container, cmd)
+        async for line in self._lines(self.stream_exec(exec_id), include_stderr):
+            yield line
+
+    async def log_lines(
+        self, container: str, tail: int = 100, follow: bool = False
+    ) -> AsyncGenerator[bytes, None]:
+        tty = await self._container_tty(container)
+        params = {
+            "stdout": "1",
+            "stderr": "1",
+            "tail": str(tail),
+            "follow": "1" if follow else "0",
+        }
+        async with self._get_client().stream(
+            "GET", f"/containers/{container}/logs", params=params
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                self._raise_for_status(response)
+            chunks = response.aiter_raw()
+            frames = self._raw(chunks) if tty else self._demux(chunks)
+            async for line in self._lines(frames, include_stderr=True):
+                yield line
+
+
+docker_client = DockerClient()
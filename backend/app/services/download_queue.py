@@ -0,0 +1,320 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.db.database import async_session_maker
+from app.db.models import Download
+from app.models.inventory import DownloadJob, DownloadQueueStatus, DownloadStatus
+from app.services.download_tracker import DownloadTracker
+from app.services.hf_downloader import hf_downloader
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = ("queued", "downloading")
+FINISHED_JOBS_KEPT = 50
+
+
+def _to_job(row: Download) -> DownloadJob:
+    return DownloadJob(
+        job_id=row.id,
+        model_id=row.model_id,
+        revision=row.revision,
+        distribute=bool(row.distribute),
+        priority=row.priority or 0,
+        status=row.status,
+        progress=row.progress or 0.0,
+        downloaded_bytes=row.downloaded_bytes or 0,
+        total_bytes=row.total_bytes,
+        files_done=row.files_done or 0,
+        files_total=row.files_total,
+        error_message=row.error,
+        created_at=row.created_at,
+        started_at=row.started_at,
+        finished_at=row.finished_at,
+    )
+
+
+class DownloadQueue:
+    def __init__(self):
+        self._jobs: dict[str, DownloadJob] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._lock = asyncio.Lock()
+        self._stopping = False
+        self.max_concurrent = settings.download_max_concurrent
+
+    async def start(self):
+        self._stopping = False
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Download).order_by(Download.created_at.desc())
+            )
+            rows = result.scalars().all()
+        interrupted = 0
+        for row in rows:
+            job = _to_job(row)
+            if job.status == "downloading":
+                # Interrupted by a restart, the partial blobs are resumed
+                job.status = "queued"
+                interrupted += 1
+            self._jobs[job.job_id] = job
+        if interrupted:
+            logger.info(f"Requeued {interrupted} interrupted download(s)")
+        self._schedule()
+        self._publish()
+
+    async def stop(self):
+        self._stopping = True
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _save(self, job: DownloadJob):
+        try:
+            async with self._lock, async_session_maker() as session:
+                row = await session.get(Download, job.job_id)
+                if row is None:
+                    row = Download(id=job.job_id)
+                    session.add(row)
+                row.model_id = job.model_id
+                row.revision = job.revision
+                row.distribute = job.distribute
+                row.priority = job.priority
+                row.status = job.status
+                row.progress = job.progress
+                row.downloaded_bytes = job.downloaded_bytes
+                row.total_bytes = job.total_bytes
+                row.files_done = job.files_done
+                row.files_total = job.files_total
+                row.error = job.error_message
+                row.created_at = job.created_at
+                row.started_at = job.started_at
+                row.finished_at = job.finished_at
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to save download job {job.job_id}: {e}")
+
+    async def _prune(self):
+        finished = [job for job in self.jobs() if job.status not in ACTIVE_STATES]
+        stale = [job.job_id for job in finished[FINISHED_JOBS_KEPT:]]
+        if not stale:
+            return
+        for job_id in stale:
+            self._jobs.pop(job_id, None)
+        try:
+            async with self._lock, async_session_maker() as session:
+                await session.execute(delete(Download).where(Download.id.in_(stale)))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to prune download history: {e}")
+
+    def jobs(self) -> list[DownloadJob]:
+        active = sorted(
+            (job for job in self._jobs.values() if job.status in ACTIVE_STATES),
+            key=lambda job: (
+                job.status != "downloading",
+                -job.priority,
+                job.created_at,
+            ),
+        )
+        finished = sorted(
+            (job for job in self._jobs.values() if job.status not in ACTIVE_STATES),
+            key=lambda job: job.finished_at or job.created_at,
+            reverse=True,
+        )
+        return active + finished
+
+    def status(self) -> DownloadQueueStatus:
+        return DownloadQueueStatus(
+            jobs=self.jobs(),
+            active=len(self._tasks),
+            max_concurrent=self.max_concurrent,
+            bandwidth_limit_mbps=hf_downloader.bandwidth.limit_mbps,
+        )
+
+    def current(self) -> DownloadStatus:
+        jobs = self.jobs()
+        if not jobs:
+            return DownloadStatus(model_id="", status="idle")
+        return DownloadStatus(
+            **jobs[0].model_dump(include=set(DownloadStatus.model_fields))
+        )
+
+    def get(self, job_id: str) -> Optional[DownloadJob]:
+        return self._jobs.get(job_id)
+
+    def active_job(self, model_id: str) -> Optional[DownloadJob]:
+        for job in self._jobs.values():
+            if job.model_id == model_id and job.status in ACTIVE_STATES:
+                return job
+        return None
+
+    def _publish(self):
+        from app.services.state_service import state_service
+
+        state_service.update("downloads", self.status())
+        state_service.update("download", self.current())
+
+    async def enqueue(
+        self,
+        model_id: str,
+        revision: Optional[str] = None,
+        distribute: bool = False,
+        priority: int = 0,
+    ) -> DownloadJob:
+        existing = self.active_job(model_id)
+        if existing is not None:
+            raise ValueError(
+                f"{model_id} is already {existing.status} (job {existing.job_id})"
+            )
+        job = DownloadJob(
+            job_id=str(uuid.uuid4()),
+            model_id=model_id,
+            revision=revision,
+            distribute=distribute,
+            priority=priority,
+            status="queued",
+            created_at=datetime.utcnow(),
+        )
+        self._jobs[job.job_id] = job
+        await self._save(job)
+        logger.info(f"Queued download of {model_id} (job {job.job_id})")
+        self._schedule()
+        self._publish()
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[DownloadJob]:
+        job = self._jobs.get(job_id)
+        if job is None or job.status not in ACTIVE_STATES:
+            return job
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        else:
+            job.status = "cancelled"
+            job.finished_at = datetime.utcnow()
+            await self._save(job)
+            self._publish()
+        return job
+
+    async def set_priority(self, job_id: str, priority: int) -> Optional[DownloadJob]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        job.priority = priority
+        await self._save(job)
+        self._schedule()
+        self._publish()
+        return job
+
+    def set_limits(
+        self,
+        max_concurrent: Optional[int] = None,
+        bandwidth_limit_mbps: Optional[float] = None,
+    ):
+        if max_concurrent is not None:
+            self.max_concurrent = max_concurrent
+        if bandwidth_limit_mbps is not None:
+            hf_downloader.bandwidth.limit_mbps = bandwidth_limit_mbps
+        self._schedule()
+        self._publish()
+
+    def _schedule(self):
+        if self._stopping:
+            return
+        # Lowering the limit lets running jobs finish rather than preempting them
+        for job in self.jobs():
+            if len(self._tasks) >= self.max_concurrent:
+                break
+            if job.status == "queued" and job.job_id not in self._tasks:
+                self._tasks[job.job_id] = asyncio.create_task(self._run(job))
+
+    def _on_progress(self, job: DownloadJob, status: DownloadStatus):
+        if status.status != "downloading":
+            return
+        job.progress = status.progress
+        job.downloaded_bytes = status.downloaded_bytes
+        job.total_bytes = status.total_bytes
+        job.speed_mbps = status.speed_mbps
+        job.eta_seconds = status.eta_seconds
+        job.files_done = status.files_done
+        job.files_total = status.files_total
+        job.updated_at = status.updated_at
+        self._publish()
+
+    async def _run(self, job: DownloadJob):
+        job.status = "downloading"
+        job.started_at = datetime.utcnow()
+        job.error_message = None
+        await self._save(job)
+        self._publish()
+
+        tracker = DownloadTracker(
+            on_update=lambda status: self._on_progress(job, status)
+        )
+        download = asyncio.create_task(
+            hf_downloader.download(job.model_id, settings.hf_cache_dir, job.revision)
+        )
+        blobs = (
+            Path(settings.hf_cache_dir)
+            / f"models--{job.model_id.replace('/', '--')}"
+            / "blobs"
+        )
+        tracker.start(
+            job.model_id,
+            blobs,
+            revision=job.revision,
+            started_at=job.started_at,
+            job=download,
+        )
+        try:
+            error = await tracker.wait()
+            if error is not None:
+                # Without the monitor nothing would ever finish the job
+                download.cancel()
+                await asyncio.gather(download, return_exceptions=True)
+                logger.error(f"Progress tracking for {job.model_id} failed: {error}")
+                job.status = "failed"
+                job.error_message = f"Progress tracking failed: {error}"
+            else:
+                job.status = tracker.status.status
+                job.error_message = tracker.status.error_message
+            job.progress = tracker.status.progress
+            job.downloaded_bytes = tracker.status.downloaded_bytes
+            if job.status == "completed" and job.distribute:
+                await self._distribute(job)
+        except asyncio.CancelledError:
+            download.cancel()
+            await asyncio.gather(download, return_exceptions=True)
+            await tracker.stop()
+            job.status = "queued" if self._stopping else "cancelled"
+            logger.info(f"Download of {job.model_id} {job.status}")
+            raise
+        finally:
+            job.speed_mbps = None
+            job.eta_seconds = None
+            if job.status not in ACTIVE_STATES:
+                job.finished_at = datetime.utcnow()
+            self._tasks.pop(job.job_id, None)
+            await self._save(job)
+            if not self._stopping:
+                await self._prune()
+                self._schedule()
+                self._publish()
+
+    async def _distribute(self, job: DownloadJob):
+        from app.services.inventory_service import inventory_service
+
+        result = await inventory_service.distribute_model(job.model_id)
+        if not result["success"]:
+            logger.warning(f"Downloaded {job.model_id} but {result['message']}")
+
+
+download_queue = DownloadQueue()
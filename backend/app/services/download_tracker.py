@@ -0,0 +1,258 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+import httpx
+
+from app.config import settings
+from app.models.inventory import DownloadStatus
+from app.services.hf_hub import fetch_manifest, manifest_blobs
+from app.services.size_index import INCOMPLETE_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_LOG_FILE = "/tmp/hf-download.log"
+SPEED_SMOOTHING = 0.3
+LOG_PERCENT = re.compile(r"(\d{1,3})%\|")
+LOG_ERROR = re.compile(r"Traceback|Error|error:")
+
+
+def _measure(blobs_dir: Path, expected: dict[str, int]) -> tuple[int, int, bool]:
+    done = files = 0
+    partial = False
+    try:
+        with os.scandir(blobs_dir) as entries:
+            for entry in entries:
+                try:
+                    size = entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+                if entry.name.endswith(INCOMPLETE_SUFFIX):
+                    partial = True
+                    name = entry.name[: -len(INCOMPLETE_SUFFIX)]
+                    if not expected or name in expected:
+                        done += min(size, expected.get(name, size))
+                elif not expected or entry.name in expected:
+                    done += size
+                    files += 1
+    except FileNotFoundError:
+        pass
+    return done, files, partial
+
+
+def _tail_log(limit: int = 8192) -> str:
+    try:
+        with open(DOWNLOAD_LOG_FILE, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - limit))
+            return f.read().decode("utf-8", errors="replace")
+    except OSError:
+        return ""
+
+
+def pid_alive(pid_file: str) -> bool:
+    try:
+        with open(pid_file) as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+class DownloadTracker:
+    def __init__(self, on_update: Optional[Callable[[DownloadStatus], None]] = None):
+        self.status = DownloadStatus(model_id="", status="idle")
+        self._task: Optional[asyncio.Task] = None
+        self._cancelled = False
+        self._on_update = on_update
+
+    def _publish(self):
+        self.status.updated_at = datetime.utcnow()
+        if self._on_update is not None:
+            self._on_update(self.status)
+            return
+        from app.services.state_service import state_service
+
+        state_service.update("download", self.status)
+
+    def start(
+        self,
+        model_id: str,
+        blobs_dir: Path,
+        pid_file: Optional[str] = None,
+        revision: Optional[str] = None,
+        started_at: Optional[datetime] = None,
+        job: Optional[asyncio.Task] = None,
+    ):
+        if self._task is not None:
+            self._task.cancel()
+        self._cancelled = False
+        self.status = DownloadStatus(
+            model_id=model_id,
+            status="downloading",
+            revision=revision,
+            started_at=started_at or datetime.utcnow(),
+        )
+        self._publish()
+        self._task = asyncio.create_task(
+            self._monitor(model_id, blobs_dir, pid_file, revision, job)
+        )
+
+    def cancel(self):
+        self._cancelled = True
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.status.status == "downloading":
+            self.status.status = "cancelled"
+            self.status.speed_mbps = None
+            self.status.eta_seconds = None
+            self._publish()
+
+    async def wait(self) -> Optional[Exception]:
+        if self._task is None:
+            return None
+        (result,) = await asyncio.gather(self._task, return_exceptions=True)
+        return result if isinstance(result, Exception) else None
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _load_manifest(
+        self, model_id: str, revision: Optional[str]
+    ) -> dict[str, int]:
+        try:
+            manifest = await fetch_manifest(model_id, revision)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(
+                f"No file manifest for {model_id}, progress will be estimated: {e}"
+            )
+            return {}
+        self.status.revision = manifest.get("sha") or revision
+        return manifest_blobs(manifest)
+
+    async def _monitor(
+        self,
+        model_id: str,
+        blobs_dir: Path,
+        pid_file: Optional[str],
+        revision: Optional[str],
+        job: Optional[asyncio.Task],
+    ):
+        expected = await self._load_manifest(model_id, revision)
+        if expected:
+            self.status.total_bytes = sum(expected.values())
+            self.status.files_total = len(expected)
+        baseline = None
+        last_done, last_at = None, None
+        speed = None
+
+        while True:
+            done, files, partial = await asyncio.to_thread(
+                _measure, blobs_dir, expected
+            )
+            now = time.monotonic()
+            if not expected and baseline is None:
+                baseline = done
+            if not expected:
+                done -= baseline
+
+            if last_done is not None and now > last_at:
+                rate = max(done - last_done, 0) / (now - last_at)
+                speed = (
+                    rate
+                    if speed is None
+                    else SPEED_SMOOTHING * rate + (1 - SPEED_SMOOTHING) * speed
+                )
+            last_done, last_at = done, now
+
+            status = self.status
+            status.downloaded_bytes = done
+            status.files_done = files
+            status.speed_mbps = (
+                round(speed / (1024**2), 2) if speed is not None else None
+            )
+            if status.total_bytes:
+                status.progress = round(min(done / status.total_bytes * 100, 100.0), 2)
+                remaining = max(status.total_bytes - done, 0)
+                status.eta_seconds = round(remaining / speed, 1) if speed else None
+            else:
+                percents = LOG_PERCENT.findall(await asyncio.to_thread(_tail_log))
+                if percents:
+                    status.progress = float(min(int(percents[-1]), 100))
+
+            alive = not job.done() if job is not None else pid_alive(pid_file)
+            if not alive:
+                self._finish(done, partial, job)
+                self._publish()
+                return
+            self._publish()
+            await asyncio.sleep(settings.download_progress_interval_seconds)
+
+    def _finish(self, done: int, partial: bool, job: Optional[asyncio.Task]):
+        status = self.status
+        status.speed_mbps = None
+        status.eta_seconds = None
+        if self._cancelled or (job is not None and job.cancelled()):
+            status.status = "cancelled"
+            return
+        if job is not None:
+            error = job.exception()
+            if error is None:
+                status.status = "completed"
+                status.progress = 100.0
+                status.downloaded_bytes = status.total_bytes or done
+                logger.info(f"Download of {status.model_id} completed")
+            else:
+                status.status = "failed"
+                status.error_message = str(error)[-500:]
+                logger.warning(f"Download of {status.model_id} failed: {error}")
+            return
+        tail = _tail_log()
+        complete = not partial and (
+            (status.total_bytes and done >= status.total_bytes)
+            or not LOG_ERROR.search(tail)
+        )
+        if complete:
+            status.status = "completed"
+            status.progress = 100.0
+            logger.info(f"Download of {status.model_id} completed")
+            return
+        lines = [line for line in tail.splitlines() if line.strip()]
+        status.status = "failed"
+        status.error_message = lines[-1][-500:] if lines else "Download process exited"
+        logger.warning(f"Download of {status.model_id} failed: {status.error_message}")
+
+    def resume(self, status_file: str, pid_file: str, cache_dir: str):
+        if not pid_alive(pid_file):
+            return
+        try:
+            with open(status_file) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        model_id = data.get("model_id")
+        if not model_id:
+            return
+        started_at = data.get("started_at")
+        self.start(
+            model_id,
+            Path(cache_dir) / f"models--{model_id.replace('/', '--')}" / "blobs",
+            pid_file,
+            revision=data.get("revision"),
+            started_at=datetime.fromisoformat(started_at) if started_at else None,
+        )
+        logger.info(f"Resumed progress tracking for {model_id}")
+
+
+download_tracker = DownloadTracker()
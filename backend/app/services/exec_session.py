@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import re
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.config import settings
+from app.services.docker_client import STDERR, docker_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMMAND_TIMEOUT_SECONDS = 30.0
+SENTINEL_PREFIX = "__SPARK_EXEC_"
+
+
+class ExecSessionError(RuntimeError):
+    pass
+
+
+class ExecSessionLost(ExecSessionError):
+    # The command reached the shell, so it may have run and must not be retried
+    pass
+
+
+@dataclass
+class PendingCommand:
+    token: str
+    future: asyncio.Future
+    stdout: bytearray = field(default_factory=bytearray)
+    stderr: bytearray = field(default_factory=bytearray)
+    returncode: Optional[int] = None
+    stdout_done: bool = False
+    stderr_done: bool = False
+
+
+class ExecSession:
+    def __init__(self, container: str):
+        self.container = container
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: deque[PendingCommand] = deque()
+        self._stdout_buffer = bytearray()
+        self._stderr_buffer = bytearray()
+        self._start_lock = asyncio.Lock()
+        self._command_lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._reader_task is not None and not self._reader_task.done()
+
+    async def _ensure_started(self):
+        if self.alive:
+            return
+        async with self._start_lock:
+            if self.alive:
+                return
+            exec_id = await docker_client.create_exec(
+                self.container, ["sh"], attach_stdin=True
+            )
+            reader, self._writer = await docker_client.open_exec_socket(exec_id)
+            self._stdout_buffer.clear()
+            self._stderr_buffer.clear()
+            self._reader_task = asyncio.create_task(self._read_loop(reader))
+            logger.info(f"Started persistent exec session in {self.container}")
+
+    def _frame(self, cmd: str, token: str) -> bytes:
+        sentinel = f"{SENTINEL_PREFIX}{token}"
+        return (
+            f"(\n{cmd}\n) </dev/null; "
+            f"printf '{sentinel}_%d__\\n' \"$?\"; "
+            f"printf '{sentinel}__\\n' >&2\n"
+        ).encode()
+
+    async def run(
+        self, cmd: str, timeout: float = DEFAULT_COMMAND_TIMEOUT_SECONDS
+    ) -> tuple[str, str, int]:
+        # The shell runs one command at a time anyway. Writing the next one only
+        # after the last has finished means a timeout or a lost session never
+        # takes queued commands down with it, and unsent commands can go elsewhere
+        async with self._command_lock:
+            try:
+                await self._ensure_started()
+            except Exception as e:
+                raise ExecSessionError(f"Failed to start exec session: {e}")
+            writer = self._writer
+            if writer is None or not self.alive:
+                raise ExecSessionError("Exec session closed")
+
+            loop = asyncio.get_running_loop()
+            command = PendingCommand(
+                token=uuid.uuid4().hex, future=loop.create_future()
+            )
+            self._pending.append(command)
+            try:
+                writer.write(self._frame(cmd, command.token))
+                await writer.drain()
+                return await asyncio.wait_for(asyncio.shield(command.future), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Command timed out in exec session, respawning: {cmd}")
+                command.future.cancel()
+                await self.close(
+                    ExecSessionError("Exec session restarted after timeout")
+                )
+                raise
+            except (ConnectionError, OSError) as e:
+                await self.close(ExecSessionError(f"Exec session connection lost: {e}"))
+                raise ExecSessionLost(str(e))
+            except ExecSessionError as e:
+                raise ExecSessionLost(str(e))
+
+    def _complete_ready(self):
+        while self._pending:
+            command = self._pending[0]
+            if not command.stdout_done:
+                marker = re.search(
+                    rf"{SENTINEL_PREFIX}{command.token}_(\d+)__\n".encode(),
+                    self._stdout_buffer,
+                )
+                if marker:
+                    command.stdout.extend(self._stdout_buffer[: marker.start()])
+                    command.returncode = int(marker.group(1))
+                    command.stdout_done = True
+                    del self._stdout_buffer[: marker.end()]
+            if not command.stderr_done:
+                marker = f"{SENTINEL_PREFIX}{command.token}__\n".encode()
+                index = self._stderr_buffer.find(marker)
+                if index >= 0:
+                    command.stderr.extend(self._stderr_buffer[:index])
+                    command.stderr_done = True
+                    del self._stderr_buffer[: index + len(marker)]
+
+            if not (command.stdout_done and command.stderr_done):
+                return
+
+            self._pending.popleft()
+            if not command.future.done():
+                command.future.set_result(
+                    (
+                        command.stdout.decode("utf-8", errors="replace"),
+                        command.stderr.decode("utf-8", errors="replace"),
+                        command.returncode or 0,
+                    )
+                )
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        error: Exception = ExecSessionError("Exec session ended")
+        try:
+            while True:
+                stream, data = await docker_client.read_frame(reader)
+                if stream == STDERR:
+                    self._stderr_buffer.extend(data)
+                else:
+                    self._stdout_buffer.extend(data)
+                self._complete_ready()
+        except asyncio.IncompleteReadError:
+            logger.warning(f"Persistent exec session in {self.container} exited")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Persistent exec session in {self.container} failed: {e}")
+            error = ExecSessionError(str(e))
+        finally:
+            self._fail_pending(error)
+
+    def _fail_pending(self, error: Exception):
+        while self._pending:
+            command = self._pending.popleft()
+            if not command.future.done():
+                command.future.set_exception(error)
+
+    async def close(self, error: Optional[Exception] = None):
+        self._fail_pending(error or ExecSessionError("Exec session closed"))
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class ExecSessionManager:
+    def __init__(self):
+        self._sessions: dict[str, ExecSession] = {}
+
+    def get(self, container: str) -> ExecSession:
+        if container not in self._sessions:
+            self._sessions[container] = ExecSession(container)
+        return self._sessions[container]
+
+    async def run(
+        self,
+        container: str,
+        cmd: str,
+        timeout: float = DEFAULT_COMMAND_TIMEOUT_SECONDS,
+    ) -> tuple[str, str, int]:
+        return await self.get(container).run(cmd, timeout)
+
+    async def close(self):
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions = {}
+
+
+exec_sessions = ExecSessionManager()
+
+
+async def run_in_container(
+    container: str,
+    cmd: str,
+    persistent: Optional[bool] = None,
+    timeout: Optional[float] = None,
+) -> tuple[str, str, int]:
+    if persistent is None:
+        persistent = settings.exec_session_enabled
+
+    if persistent:
+        try:
+            return await exec_sessions.run(
+                container, cmd, timeout or DEFAULT_COMMAND_TIMEOUT_SECONDS
+            )
+        except ExecSessionLost:
+            raise
+        except ExecSessionError as e:
+            logger.warning(f"Exec session unavailable, using one-shot exec: {e}")
+
+    return await docker_client.exec(container, ["sh", "-c", cmd], timeout=timeout)
@@ -0,0 +1,317 @@
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import AsyncGenerator, Callable, Optional
+
+import httpx
+
+from app.config import settings
+from app.models.metrics import GatewayRequestRecord, GatewaySummary
+from app.models.vllm import VLLMInstance
+from app.services.config_service import config_service
+from app.services.instance_registry import DEFAULT_INSTANCE_ID, instance_registry
+from app.services.response_cache import CachedResponse, CacheWriter
+
+logger = logging.getLogger(__name__)
+
+INSTANCE_HEADER = "x-spark-instance"
+PRIORITY_HEADER = "x-spark-priority"
+CLIENT_HEADER = "x-spark-client"
+CACHE_HEADER = "x-spark-cache"
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+    "content-length",
+    "accept-encoding",
+    INSTANCE_HEADER,
+    PRIORITY_HEADER,
+    CLIENT_HEADER,
+}
+SSE_DATA = b"data:"
+SSE_DONE = b"[DONE]"
+USAGE_MARKER = b'"completion_tokens"'
+
+
+def _percentile(values: list[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 3)
+
+
+class StreamMeter:
+    __slots__ = (
+        "started",
+        "first_at",
+        "last_at",
+        "gaps",
+        "events",
+        "usage_line",
+        "_partial",
+    )
+
+    def __init__(self, started: float):
+        self.started = started
+        self.first_at: Optional[float] = None
+        self.last_at: Optional[float] = None
+        self.gaps: list[float] = []
+        self.events = 0
+        self.usage_line: Optional[bytes] = None
+        self._partial = b""
+
+    def feed(self, chunk: bytes):
+        # Only whole lines starting with "data:" are events; a frame split across
+        # chunks is counted once its line is complete
+        lines = chunk.split(b"\n")
+        if self._partial:
+            lines[0] = self._partial + lines[0]
+        self._partial = lines.pop()
+        events = 0
+        for line in lines:
+            if not line.startswith(SSE_DATA):
+                continue
+            payload = line[len(SSE_DATA) :].strip()
+            if payload == SSE_DONE:
+                continue
+            events += 1
+            if USAGE_MARKER in payload:
+                self.usage_line = payload
+        if not events:
+            return
+        now = time.perf_counter()
+        if self.first_at is None:
+            self.first_at = now
+        else:
+            self.gaps.append(now - self.last_at)
+        self.last_at = now
+        self.events += events
+
+    def usage(self) -> dict:
+        if self.usage_line is None:
+            return {}
+        try:
+            return json.loads(self.usage_line).get("usage") or {}
+        except ValueError:
+            return {}
+
+
+class GatewayService:
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._records: deque[GatewayRequestRecord] = deque(
+            maxlen=settings.gateway_history_size
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0, read=None),
+                limits=httpx.Limits(
+                    max_connections=settings.gateway_max_connections,
+                    max_keepalive_connections=settings.gateway_max_connections,
+                ),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def resolve_instance(
+        self, model: Optional[str], instance_id: Optional[str] = None
+    ) -> Optional[VLLMInstance]:
+        if instance_id:
+            return instance_registry.get(instance_id)
+        if model:
+            for instance in instance_registry.list():
+                if instance.model_id == model:
+                    return instance
+        return instance_registry.get(DEFAULT_INSTANCE_ID)
+
+    def upstream_url(self, instance: VLLMInstance, path: str) -> str:
+        host = settings.gateway_upstream_host or config_service.get_head_node_ip()
+        return f"http://{host}:{instance.port}/v1/{path}"
+
+    def forward_headers(self, headers) -> dict[str, str]:
+        forwarded = {
+            key: value
+            for key, value in headers.items()
+            if key.lower() not in HOP_BY_HOP_HEADERS
+        }
+        forwarded["accept-encoding"] = "identity"
+        return forwarded
+
+    def new_record(
+        self,
+        instance: VLLMInstance,
+        method: str,
+        path: str,
+        body: Optional[dict],
+    ) -> GatewayRequestRecord:
+        return GatewayRequestRecord(
+            request_id=str(uuid.uuid4()),
+            instance_id=instance.id,
+            method=method,
+            path=f"/v1/{path}",
+            model=body.get("model") if body else None,
+            stream=bool(body.get("stream")) if body else False,
+            started_at=datetime.utcnow(),
+        )
+
+    async def send(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        params,
+        content: bytes,
+    ) -> httpx.Response:
+        client = self._get_client()
+        request = client.build_request(
+            method, url, headers=headers, params=params, content=content
+        )
+        return await client.send(request, stream=True)
+
+    async def relay(
+        self,
+        response: httpx.Response,
+        record: GatewayRequestRecord,
+        started: float,
+        on_close: Optional[Callable[[], None]] = None,
+        writer: Optional[CacheWriter] = None,
+    ) -> AsyncGenerator[bytes, None]:
+        meter = StreamMeter(started)
+        completed = False
+        try:
+            async for chunk in response.aiter_raw():
+                meter.feed(chunk)
+                if writer is not None:
+                    writer.feed(chunk)
+                yield chunk
+            completed = True
+            if writer is not None:
+                writer.commit()
+        except Exception as e:
+            record.error = str(e) or type(e).__name__
+            raise
+        finally:
+            await response.aclose()
+            if on_close is not None:
+                on_close()
+            if not completed and record.error is None:
+                record.error = "Client disconnected"
+            self._finish_stream(record, meter)
+
+    async def replay(
+        self, entry: CachedResponse, record: GatewayRequestRecord, started: float
+    ) -> AsyncGenerator[bytes, None]:
+        meter = StreamMeter(started)
+        completed = False
+        try:
+            for chunk in entry.chunks:
+                meter.feed(chunk)
+                yield chunk
+            completed = True
+        finally:
+            if not completed:
+                record.error = "Client disconnected"
+            self._finish_stream(record, meter)
+
+    def _finish_stream(self, record: GatewayRequestRecord, meter: StreamMeter):
+        now = time.perf_counter()
+        record.total_ms = round((now - meter.started) * 1000, 3)
+        record.chunks = meter.events
+        if meter.first_at is not None:
+            record.ttft_ms = round((meter.first_at - meter.started) * 1000, 3)
+        if meter.gaps:
+            gaps_ms = [gap * 1000 for gap in meter.gaps]
+            record.itl_mean_ms = round(sum(gaps_ms) / len(gaps_ms), 3)
+            record.itl_p95_ms = _percentile(gaps_ms, 95)
+            record.itl_max_ms = round(max(gaps_ms), 3)
+        usage = meter.usage()
+        record.prompt_tokens = usage.get("prompt_tokens")
+        record.completion_tokens = usage.get("completion_tokens", meter.events)
+        self._records.append(record)
+
+    def finish(
+        self,
+        record: GatewayRequestRecord,
+        started: float,
+        content: Optional[bytes] = None,
+        error: Optional[str] = None,
+    ):
+        record.total_ms = round((time.perf_counter() - started) * 1000, 3)
+        record.error = error
+        if content:
+            try:
+                usage = json.loads(content).get("usage") or {}
+            except (ValueError, AttributeError):
+                usage = {}
+            record.prompt_tokens = usage.get("prompt_tokens")
+            record.completion_tokens = usage.get("completion_tokens")
+        self._records.append(record)
+
+    def get_recent(
+        self, limit: int = 100, instance_id: Optional[str] = None
+    ) -> list[GatewayRequestRecord]:
+        records = [
+            record
+            for record in reversed(self._records)
+            if instance_id is None or record.instance_id == instance_id
+        ]
+        return records[:limit]
+
+    def get_summary(self, instance_id: Optional[str] = None) -> GatewaySummary:
+        records = [
+            record
+            for record in self._records
+            if instance_id is None or record.instance_id == instance_id
+        ]
+        if not records:
+            return GatewaySummary()
+
+        ttfts = [r.ttft_ms for r in records if r.ttft_ms is not None]
+        totals = [r.total_ms for r in records]
+        itls = [r.itl_mean_ms for r in records if r.itl_mean_ms is not None]
+        streamed = [
+            r
+            for r in records
+            if r.stream and r.completion_tokens and r.total_ms and r.cache != "hit"
+        ]
+        tokens = sum(r.completion_tokens or 0 for r in records)
+        stream_seconds = sum(r.total_ms for r in streamed) / 1000
+
+        return GatewaySummary(
+            requests=len(records),
+            errors=sum(
+                1
+                for r in records
+                if r.error or (r.status_code is not None and r.status_code >= 400)
+            ),
+            ttft_p50_ms=_percentile(ttfts, 50),
+            ttft_p95_ms=_percentile(ttfts, 95),
+            total_p50_ms=_percentile(totals, 50),
+            total_p95_ms=_percentile(totals, 95),
+            itl_mean_ms=round(sum(itls) / len(itls), 3) if itls else None,
+            completion_tokens=tokens,
+            output_tokens_per_second=(
+                round(sum(r.completion_tokens for r in streamed) / stream_seconds, 2)
+                if stream_seconds > 0
+                else None
+            ),
+        )
+
+
+gateway_service = GatewayService()
@@ -0,0 +1,212 @@
+import logging
+import os
+import stat
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+
+from app.models.inventory import CachedRevision, IncompleteBlob
+from app.services.size_index import INCOMPLETE_SUFFIX, mtimes_unchanged
+
+logger = logging.getLogger(__name__)
+
+MODEL_PREFIX = "models--"
+DEFAULT_REF = "main"
+
+
+@dataclass
+class CachedRepo:
+    repo_id: str
+    path: str
+    refs: dict[str, str] = field(default_factory=dict)
+    revisions: list[CachedRevision] = field(default_factory=list)
+    incomplete: list[IncompleteBlob] = field(default_factory=list)
+    modified_at: Optional[datetime] = None
+
+    @property
+    def revision(self) -> Optional[str]:
+        commits = {revision.commit for revision in self.revisions}
+        if self.refs.get(DEFAULT_REF) in commits:
+            return self.refs[DEFAULT_REF]
+        if not self.revisions:
+            return None
+        latest = max(self.revisions, key=lambda r: r.last_modified or datetime.min)
+        return latest.commit
+
+
+@dataclass
+class _ScanEntry:
+    repo: CachedRepo
+    dirs: dict[str, int]
+
+
+def repo_id_from_dir(name: str) -> Optional[str]:
+    if not name.startswith(MODEL_PREFIX):
+        return None
+    return name[len(MODEL_PREFIX) :].replace("--", "/")
+
+
+class HFCacheScanner:
+    def __init__(self):
+        self._repos: dict[str, _ScanEntry] = {}
+        self._lock = threading.Lock()
+
+    def _read_refs(self, refs_dir: str, dirs: dict[str, int]) -> dict[str, str]:
+        refs = {}
+        stack = [refs_dir]
+        while stack:
+            directory = stack.pop()
+            try:
+                dirs[directory] = os.stat(directory).st_mtime_ns
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            # Refs are rewritten in place, which leaves the directory mtime alone
+                            dirs[entry.path] = entry.stat().st_mtime_ns
+                            with open(entry.path) as f:
+                                refs[os.path.relpath(entry.path, refs_dir)] = (
+                                    f.read().strip()
+                                )
+            except OSError:
+                continue
+        return refs
+
+    def _scan_revision(
+        self, snapshot: str, commit: str, dirs: dict[str, int]
+    ) -> CachedRevision:
+        revision = CachedRevision(commit=commit)
+        seen: set[tuple[int, int]] = set()
+        latest = None
+        stack = [snapshot]
+        while stack:
+            directory = stack.pop()
+            try:
+                dirs[directory] = os.stat(directory).st_mtime_ns
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            info = entry.stat()
+                        except OSError:
+                            continue
+                        if not stat.S_ISREG(info.st_mode):
+                            continue
+                        key = (info.st_dev, info.st_ino)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        revision.size_bytes += info.st_size
+                        revision.files += 1
+                        latest = max(latest or 0.0, info.st_mtime)
+            except OSError:
+                continue
+        if latest is not None:
+            revision.last_modified = datetime.fromtimestamp(latest)
+        return revision
+
+    def _scan_repo(self, path: str, repo_id: str) -> _ScanEntry:
+        dirs = {path: os.stat(path).st_mtime_ns}
+        repo = CachedRepo(
+            repo_id=repo_id,
+            path=path,
+            modified_at=datetime.fromtimestamp(os.stat(path).st_mtime),
+        )
+        repo.refs = self._read_refs(os.path.join(path, "refs"), dirs)
+
+        snapshots = os.path.join(path, "snapshots")
+        try:
+            dirs[snapshots] = os.stat(snapshots).st_mtime_ns
+            with os.scandir(snapshots) as entries:
+                commits = [entry.name for entry in entries if entry.is_dir()]
+        except OSError:
+            commits = []
+        for commit in sorted(commits):
+            revision = self._scan_revision(
+                os.path.join(snapshots, commit), commit, dirs
+            )
+            revision.refs = sorted(
+                ref for ref, target in repo.refs.items() if target == commit
+            )
+            repo.revisions.append(revision)
+
+        blobs = os.path.join(path, "blobs")
+        try:
+            dirs[blobs] = os.stat(blobs).st_mtime_ns
+            with os.scandir(blobs) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(INCOMPLETE_SUFFIX):
+                        continue
+                    info = entry.stat(follow_symlinks=False)
+                    repo.incomplete.append(
+                        IncompleteBlob(
+                            name=entry.name,
+                            size_bytes=info.st_size,
+                            modified_at=datetime.fromtimestamp(info.st_mtime),
+                        )
+                    )
+        except OSError:
+            pass
+        return _ScanEntry(repo=repo, dirs=dirs)
+
+    def _repo_locked(self, path: str, repo_id: str) -> Optional[CachedRepo]:
+        entry = self._repos.get(path)
+        if (
+            entry is not None
+            and not entry.repo.incomplete
+            and mtimes_unchanged(entry.dirs)
+        ):
+            return entry.repo
+        try:
+            entry = self._scan_repo(path, repo_id)
+        except OSError as e:
+            logger.warning(f"Failed to scan cached model {path}: {e}")
+            self._repos.pop(path, None)
+            return None
+        self._repos[path] = entry
+        return entry.repo
+
+    def scan(self, cache_dir: Union[str, Path]) -> list[CachedRepo]:
+        cache_dir = str(cache_dir)
+        try:
+            with os.scandir(cache_dir) as entries:
+                candidates = [
+                    (entry.path, repo_id_from_dir(entry.name))
+                    for entry in entries
+                    if entry.is_dir()
+                ]
+        except OSError as e:
+            logger.warning(f"Cannot read model cache {cache_dir}: {e}")
+            return []
+
+        repos = []
+        with self._lock:
+            for path, repo_id in sorted(candidates):
+                if repo_id is None:
+                    continue
+                repo = self._repo_locked(path, repo_id)
+                if repo is not None:
+                    repos.append(repo)
+
+            existing = {path for path, _ in candidates}
+            prefix = cache_dir.rstrip(os.sep) + os.sep
+            for path in [p for p in self._repos if p.startswith(prefix)]:
+                if path not in existing:
+                    del self._repos[path]
+        return repos
+
+    def scan_repo(self, path: Union[str, Path]) -> Optional[CachedRepo]:
+        path = str(path)
+        repo_id = repo_id_from_dir(os.path.basename(path))
+        if repo_id is None or not os.path.isdir(path):
+            return None
+        with self._lock:
+            return self._repo_locked(path, repo_id)
+
+
+hf_cache = HFCacheScanner()
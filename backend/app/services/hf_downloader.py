@@ -0,0 +1,325 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+from app.services.hf_hub import fetch_manifest, hf_headers, resolve_url, sibling_blob
+from app.services.size_index import INCOMPLETE_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+HASH_READ_BYTES = 8 * 1024**2
+RETRY_BACKOFF_SECONDS = 1.0
+CONNECT_TIMEOUT_SECONDS = 15.0
+READ_TIMEOUT_SECONDS = 60.0
+BANDWIDTH_BURST_SECONDS = 0.5
+
+
+class DownloadError(RuntimeError):
+    pass
+
+
+class RangeNotSupported(DownloadError):
+    pass
+
+
+@dataclass
+class RepoFile:
+    filename: str
+    blob: str
+    size: int
+    lfs: bool
+
+
+@dataclass
+class FileSource:
+    url: str
+    # Signed CDN location the hub redirects to, reused for every chunk
+    location: Optional[str] = None
+
+
+@dataclass
+class DownloadResult:
+    model_id: str
+    commit: str
+    files: int
+    bytes_downloaded: int
+    bytes_reused: int
+
+
+def _new_hasher(file: RepoFile):
+    if file.lfs:
+        return hashlib.sha256()
+    # Non-LFS files are named by their git blob id
+    hasher = hashlib.sha1()
+    hasher.update(f"blob {file.size}\0".encode())
+    return hasher
+
+
+def _hash_prefix(path: Path, length: int, hasher):
+    remaining = length
+    with open(path, "rb") as f:
+        while remaining > 0:
+            data = f.read(min(HASH_READ_BYTES, remaining))
+            if not data:
+                break
+            hasher.update(data)
+            remaining -= len(data)
+
+
+def _append(out, hasher, data: bytes):
+    out.write(data)
+    hasher.update(data)
+
+
+class BandwidthLimiter:
+    def __init__(self, limit_mbps: float = 0.0):
+        self.limit_mbps = limit_mbps
+        self._next_at = 0.0
+
+    async def acquire(self, nbytes: int):
+        if self.limit_mbps <= 0:
+            return
+        # Shared virtual clock: every byte, from any download, pushes it forward
+        now = time.monotonic()
+        self._next_at = max(self._next_at, now) + nbytes / (self.limit_mbps * 1024**2)
+        delay = self._next_at - now - BANDWIDTH_BURST_SECONDS
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class HFDownloader:
+    def __init__(self):
+        self._connections: Optional[asyncio.Semaphore] = None
+        self.bandwidth = BandwidthLimiter(settings.download_bandwidth_limit_mbps)
+
+    def _connection_slots(self) -> asyncio.Semaphore:
+        if self._connections is None:
+            self._connections = asyncio.Semaphore(max(1, settings.download_connections))
+        return self._connections
+
+    async def download(
+        self,
+        model_id: str,
+        cache_dir: str,
+        revision: Optional[str] = None,
+    ) -> DownloadResult:
+        try:
+            manifest = await fetch_manifest(model_id, revision)
+        except httpx.HTTPError as e:
+            raise DownloadError(f"Failed to fetch file list for {model_id}: {e}")
+        commit = manifest.get("sha")
+        if not commit:
+            raise DownloadError(
+                f"No commit returned for {model_id}@{revision or 'main'}"
+            )
+
+        files = []
+        for sibling in manifest.get("siblings", []):
+            blob, size, lfs = sibling_blob(sibling)
+            if not blob or size is None:
+                raise DownloadError(
+                    f"Manifest for {model_id} lacks blob metadata for {sibling.get('rfilename')}"
+                )
+            files.append(RepoFile(sibling["rfilename"], blob, size, lfs))
+
+        repo_path = Path(cache_dir) / f"models--{model_id.replace('/', '--')}"
+        blobs = repo_path / "blobs"
+        snapshot = repo_path / "snapshots" / commit
+        blobs.mkdir(parents=True, exist_ok=True)
+        snapshot.mkdir(parents=True, exist_ok=True)
+
+        file_slots = asyncio.Semaphore(max(1, settings.download_parallel_files))
+        timeout = httpx.Timeout(READ_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS)
+        limits = httpx.Limits(max_connections=max(1, settings.download_connections))
+        async with httpx.AsyncClient(
+            timeout=timeout, limits=limits, follow_redirects=True
+        ) as client:
+
+            async def fetch(file: RepoFile) -> tuple[int, int]:
+                async with file_slots:
+                    return await self._fetch_file(client, model_id, commit, file, blobs)
+
+            results = await asyncio.gather(
+                *(fetch(file) for file in files), return_exceptions=True
+            )
+
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            if any(isinstance(e, asyncio.CancelledError) for e in errors):
+                raise asyncio.CancelledError()
+            raise DownloadError(f"{len(errors)} file(s) failed, first: {errors[0]}")
+
+        for file in files:
+            link = snapshot / file.filename
+            link.parent.mkdir(parents=True, exist_ok=True)
+            target = os.path.relpath(blobs / file.blob, link.parent)
+            if link.is_symlink() or link.exists():
+                link.unlink()
+            link.symlink_to(target)
+
+        ref = revision or "main"
+        if ref != commit:
+            ref_file = repo_path / "refs" / ref
+            ref_file.parent.mkdir(parents=True, exist_ok=True)
+            ref_file.write_text(commit)
+
+        downloaded = sum(r[0] for r in results)
+        reused = sum(r[1] for r in results)
+        logger.info(
+            f"Downloaded {model_id}@{commit[:8]}: {downloaded / 1024**3:.2f} GB fetched, "
+            f"{reused / 1024**3:.2f} GB already cached"
+        )
+        return DownloadResult(
+            model_id=model_id,
+            commit=commit,
+            files=len(files),
+            bytes_downloaded=downloaded,
+            bytes_reused=reused,
+        )
+
+    async def _fetch_file(
+        self,
+        client: httpx.AsyncClient,
+        model_id: str,
+        commit: str,
+        file: RepoFile,
+        blobs: Path,
+    ) -> tuple[int, int]:
+        blob_path = blobs / file.blob
+        if blob_path.exists() and blob_path.stat().st_size == file.size:
+            return 0, file.size
+
+        partial = blobs / f"{file.blob}{INCOMPLETE_SUFFIX}"
+        offset = partial.stat().st_size if partial.exists() else 0
+        if offset > file.size:
+            partial.unlink()
+            offset = 0
+
+        hasher = _new_hasher(file)
+        if offset:
+            logger.info(f"Resuming {file.filename} at {offset}/{file.size} bytes")
+            await asyncio.to_thread(_hash_prefix, partial, offset, hasher)
+
+        source = FileSource(resolve_url(model_id, commit, file.filename))
+        if offset < file.size:
+            await self._locate(client, source)
+        with open(partial, "ab") as out:
+            await self._fetch_ranges(client, source, file, offset, out, hasher)
+
+        if partial.stat().st_size != file.size:
+            raise DownloadError(
+                f"{file.filename}: expected {file.size} bytes, got {partial.stat().st_size}"
+            )
+        if hasher.hexdigest() != file.blob:
+            partial.unlink()
+            raise DownloadError(
+                f"{file.filename}: hash mismatch, partial file discarded"
+            )
+        os.replace(partial, blob_path)
+        return file.size - offset, offset
+
+    async def _fetch_ranges(
+        self,
+        client: httpx.AsyncClient,
+        source: FileSource,
+        file: RepoFile,
+        offset: int,
+        out,
+        hasher,
+    ):
+        chunk = max(1, settings.download_chunk_bytes)
+        window = max(1, settings.download_connections_per_file)
+        ranges = [
+            (start, min(start + chunk, file.size) - 1)
+            for start in range(offset, file.size, chunk)
+        ]
+        pending: list[asyncio.Task] = []
+        try:
+            # Chunks are fetched concurrently but appended in order, so the
+            # .incomplete file always holds a contiguous, resumable prefix and
+            # at most `window` chunks are buffered per file.
+            for index in range(len(ranges)):
+                while len(pending) < window and index + len(pending) < len(ranges):
+                    start, end = ranges[index + len(pending)]
+                    pending.append(
+                        asyncio.create_task(
+                            self._fetch_range(client, source, start, end)
+                        )
+                    )
+                data = await pending.pop(0)
+                await asyncio.to_thread(_append, out, hasher, data)
+            out.flush()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _locate(self, client: httpx.AsyncClient, source: FileSource):
+        async with self._connection_slots():
+            # httpx drops the token when the hub redirects to another host
+            response = await client.head(source.url, headers=hf_headers())
+        response.raise_for_status()
+        source.location = str(response.url)
+
+    async def _get_range(
+        self, client: httpx.AsyncClient, source: FileSource, start: int, end: int
+    ) -> bytes:
+        url = source.location or source.url
+        headers = {"Range": f"bytes={start}-{end}"}
+        if url == source.url:
+            # Only the hub gets the token, never a signed CDN location
+            headers.update(hf_headers())
+        async with client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 403 and source.location:
+                # The signed location expired, ask the hub for a fresh one
+                source.location = None
+                raise DownloadError("download link expired")
+            if response.status_code == 200 and start != 0:
+                raise RangeNotSupported("Server ignored range request")
+            if response.status_code not in (200, 206):
+                response.raise_for_status()
+            parts = []
+            received = 0
+            # A 200 answer to the first range is the whole file, keep only the chunk
+            async for piece in response.aiter_bytes():
+                piece = piece[: end - start + 1 - received]
+                await self.bandwidth.acquire(len(piece))
+                parts.append(piece)
+                received += len(piece)
+                if received > end - start:
+                    break
+        return b"".join(parts)
+
+    async def _fetch_range(
+        self, client: httpx.AsyncClient, source: FileSource, start: int, end: int
+    ) -> bytes:
+        attempts = max(1, settings.download_retries)
+        for attempt in range(1, attempts + 1):
+            try:
+                if source.location is None:
+                    await self._locate(client, source)
+                async with self._connection_slots():
+                    data = await self._get_range(client, source, start, end)
+                if len(data) != end - start + 1:
+                    raise DownloadError(
+                        f"Short read for bytes {start}-{end}: got {len(data)}"
+                    )
+                return data
+            except RangeNotSupported:
+                raise
+            except (httpx.HTTPError, DownloadError) as e:
+                if attempt == attempts:
+                    raise DownloadError(f"bytes {start}-{end}: {e}")
+                logger.warning(f"Retrying bytes {start}-{end} of {source.url}: {e}")
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+
+hf_downloader = HFDownloader()
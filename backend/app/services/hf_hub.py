@@ -0,0 +1,46 @@
+import os
+from typing import Optional
+from urllib.parse import quote
+
+import httpx
+
+from app.config import settings
+
+MANIFEST_TIMEOUT_SECONDS = 15.0
+
+
+def hf_headers() -> dict[str, str]:
+    token = settings.hf_token or os.environ.get("HF_TOKEN")
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def hf_url(path: str) -> str:
+    return f"{settings.hf_endpoint.rstrip('/')}/{path.lstrip('/')}"
+
+
+def resolve_url(model_id: str, commit: str, filename: str) -> str:
+    return hf_url(f"{model_id}/resolve/{commit}/{quote(filename)}")
+
+
+async def fetch_manifest(model_id: str, revision: Optional[str] = None) -> dict:
+    url = hf_url(f"api/models/{model_id}/revision/{quote(revision or 'main', safe='')}")
+    async with httpx.AsyncClient(timeout=MANIFEST_TIMEOUT_SECONDS) as client:
+        response = await client.get(url, params={"blobs": "true"}, headers=hf_headers())
+        response.raise_for_status()
+        return response.json()
+
+
+def sibling_blob(sibling: dict) -> tuple[Optional[str], Optional[int], bool]:
+    lfs = sibling.get("lfs")
+    if lfs:
+        return lfs.get("sha256"), lfs.get("size"), True
+    return sibling.get("blobId"), sibling.get("size"), False
+
+
+def manifest_blobs(manifest: dict) -> dict[str, int]:
+    blobs = {}
+    for sibling in manifest.get("siblings", []):
+        name, size, _ = sibling_blob(sibling)
+        if name and size is not None:
+            blobs[name] = size
+    return blobs
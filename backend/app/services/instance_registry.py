@@ -0,0 +1,119 @@
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Optional
+
+from app.db.database import PROFILES_DIR
+from app.models.vllm import VLLMInstance
+from app.services.config_service import config_service
+
+logger = logging.getLogger(__name__)
+
+INSTANCES_FILE = PROFILES_DIR / "instances.json"
+DEFAULT_INSTANCE_ID = "default"
+INSTANCE_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+
+
+class InstanceRegistry:
+    def __init__(self):
+        self._instances: Optional[dict[str, VLLMInstance]] = None
+
+    def _files(self, instance_id: str) -> dict[str, str]:
+        if instance_id == DEFAULT_INSTANCE_ID:
+            return {
+                "pid_file": "/tmp/vllm_server.pid",
+                "config_file": "/tmp/vllm_config.json",
+                "log_file": "/tmp/vllm.log",
+            }
+        return {
+            "pid_file": f"/tmp/vllm_server.{instance_id}.pid",
+            "config_file": f"/tmp/vllm_config.{instance_id}.json",
+            "log_file": f"/tmp/vllm.{instance_id}.log",
+        }
+
+    def _load(self) -> dict[str, VLLMInstance]:
+        if self._instances is None:
+            self._instances = {}
+            try:
+                with open(INSTANCES_FILE) as f:
+                    for entry in json.load(f):
+                        instance = VLLMInstance(**entry)
+                        self._instances[instance.id] = instance
+            except (OSError, json.JSONDecodeError, TypeError, ValueError):
+                pass
+        if DEFAULT_INSTANCE_ID not in self._instances:
+            self._instances[DEFAULT_INSTANCE_ID] = VLLMInstance(
+                id=DEFAULT_INSTANCE_ID,
+                port=int(config_service.get_vllm_port()),
+                created_at=datetime.utcnow(),
+                **self._files(DEFAULT_INSTANCE_ID),
+            )
+        return self._instances
+
+    def _save(self):
+        try:
+            with open(INSTANCES_FILE, "w") as f:
+                json.dump(
+                    [
+                        instance.model_dump(mode="json")
+                        for instance in self._load().values()
+                    ],
+                    f,
+                )
+        except OSError as e:
+            logger.error(f"Failed to save instance registry: {e}")
+
+    def validate_id(self, instance_id: str) -> str:
+        if not INSTANCE_ID_PATTERN.match(instance_id):
+            raise ValueError(
+                f"Invalid instance id: {instance_id}. Use lowercase letters, digits, '-' or '_'"
+            )
+        return instance_id
+
+    def list(self) -> list[VLLMInstance]:
+        return list(self._load().values())
+
+    def get(self, instance_id: str = DEFAULT_INSTANCE_ID) -> Optional[VLLMInstance]:
+        return self._load().get(instance_id)
+
+    def require(self, instance_id: str = DEFAULT_INSTANCE_ID) -> VLLMInstance:
+        instance = self.get(instance_id)
+        if instance is None:
+            raise KeyError(f"Unknown vLLM instance: {instance_id}")
+        return instance
+
+    def register(
+        self, instance_id: str, port: int, model_id: Optional[str] = None
+    ) -> VLLMInstance:
+        instances = self._load()
+        existing = instances.get(self.validate_id(instance_id))
+        instance = VLLMInstance(
+            id=instance_id,
+            port=port,
+            model_id=model_id,
+            created_at=existing.created_at if existing else datetime.utcnow(),
+            **self._files(instance_id),
+        )
+        instances[instance_id] = instance
+        self._save()
+        return instance
+
+    def remove(self, instance_id: str) -> bool:
+        if instance_id == DEFAULT_INSTANCE_ID:
+            return False
+        removed = self._load().pop(instance_id, None)
+        if removed is not None:
+            self._save()
+        return removed is not None
+
+    def port_owner(
+        self, port: int, exclude: Optional[str] = None
+    ) -> Optional[VLLMInstance]:
+        for instance in self._load().values():
+            if instance.port == port and instance.id != exclude:
+                return instance
+        return None
+
+
+instance_registry = InstanceRegistry()
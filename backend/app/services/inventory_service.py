@@ -1,22 +1,42 @@
 import asyncio
+import json
 import logging
 import os
 import re
+import shlex
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
+from app.services.blob_verifier import blob_verifier
 from app.services.config_service import config_service
+from app.services.download_queue import download_queue
+from app.services.distribution import SSHNode, distribution_service
+from app.services.download_tracker import pid_alive, download_tracker
+from app.services.exec_session import run_in_container
+from app.services.hf_cache import CachedRepo, hf_cache
+from app.services.size_index import size_index
+from app.services.weight_metadata import weight_metadata
 from app.config import settings
 from app.models.inventory import (
     LocalModel,
     DownloadStatus,
+    DownloadQueueStatus,
     DownloadRequest,
+    DistributionStatus,
+    NodeWarmResult,
+    WarmResponse,
+    WeightMetadata,
 )
 
 logger = logging.getLogger(__name__)
 
+WARM_CHUNK_BYTES = 256 * 1024**2
+WARM_READ_BYTES = 8 * 1024**2
+
 
 class InventoryService:
     DOWNLOAD_STATUS_FILE = "/tmp/model_download_status.json"
@@ -25,6 +45,9 @@ class InventoryService:
     def __init__(self):
         self.container_name = None
         self.spark_docker_path = None
+        self._warm_scheduler_task: Optional[asyncio.Task] = None
+        self._index: Optional[dict[str, LocalModel]] = None
+        self.index_live = False
 
     def _get_hf_cache_dir(self) -> str:
         return settings.hf_cache_dir
@@ -33,10 +56,14 @@ class InventoryService:
         self.container_name = config_service.get_container_name()
         self.spark_docker_path = config_service.get_spark_docker_path()
 
-    async def _run_docker_command(self, cmd: str) -> tuple[str, str, int]:
-        full_cmd = f"docker exec {self.container_name} sh -c '{cmd}'"
+    async def _run_docker_command(
+        self, cmd: str, persistent: Optional[bool] = None
+    ) -> tuple[str, str, int]:
+        return await run_in_container(self.container_name, cmd, persistent=persistent)
+
+    async def _run_local_command(self, cmd: str) -> tuple[str, str, int]:
         proc = await asyncio.create_subprocess_shell(
-            full_cmd,
+            cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
@@ -47,116 +74,326 @@ class InventoryService:
             proc.returncode or 0,
         )
 
-    async def _run_local_command(self, cmd: str) -> tuple[str, str, int]:
-        proc = await asyncio.create_subprocess_shell(
-            cmd,
+    def _model_cache_path(self, model_id: str) -> Path:
+        return Path(self._get_hf_cache_dir()) / f"models--{model_id.replace('/', '--')}"
+
+    def _snapshot_dir(self, model_path: Path) -> Optional[Path]:
+        ref_file = model_path / "refs" / "main"
+        if ref_file.is_file():
+            snapshot = model_path / "snapshots" / ref_file.read_text().strip()
+            if snapshot.is_dir():
+                return snapshot
+        snapshots = model_path / "snapshots"
+        if not snapshots.is_dir():
+            return None
+        candidates = [p for p in snapshots.iterdir() if p.is_dir()]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda p: p.stat().st_mtime)
+
+    def _snapshot_files(self, snapshot: Path) -> list[tuple[str, int]]:
+        files = {}
+        for path in snapshot.rglob("*"):
+            try:
+                resolved = path.resolve()
+                if resolved.is_file():
+                    files[str(resolved)] = resolved.stat().st_size
+            except OSError:
+                continue
+        return list(files.items())
+
+    def _warm_chunk(self, path: str, offset: int, length: int) -> int:
+        buffer = memoryview(bytearray(min(WARM_READ_BYTES, length) or 1))
+        done = 0
+        with open(path, "rb", buffering=0) as f:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), offset, length, os.POSIX_FADV_WILLNEED)
+            f.seek(offset)
+            while done < length:
+                read = f.readinto(buffer[: min(len(buffer), length - done)])
+                if not read:
+                    break
+                done += read
+        return done
+
+    async def _warm_local(
+        self, node: str, snapshot: Path, concurrency: int
+    ) -> NodeWarmResult:
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, self._snapshot_files, snapshot)
+        chunks = [
+            (path, offset, min(WARM_CHUNK_BYTES, size - offset))
+            for path, size in files
+            for offset in range(0, size, WARM_CHUNK_BYTES)
+        ]
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = await asyncio.gather(
+                *(
+                    loop.run_in_executor(pool, self._warm_chunk, *chunk)
+                    for chunk in chunks
+                )
+            )
+        duration = time.monotonic() - start
+        bytes_warmed = sum(results)
+
+        return NodeWarmResult(
+            node=node,
+            success=True,
+            files=len(files),
+            bytes_warmed=bytes_warmed,
+            duration_seconds=round(duration, 3),
+            throughput_mbps=(
+                round(bytes_warmed / (1024**2) / duration, 1) if duration > 0 else None
+            ),
+        )
+
+    async def _warm_remote(
+        self, node: str, snapshot: Path, concurrency: int
+    ) -> NodeWarmResult:
+        path = shlex.quote(str(snapshot))
+        remote_cmd = (
+            f"find -L {path} -type f -print0 | xargs -0 -r -P {concurrency} -n 1 cat > /dev/null"
+            f" && find -L {path} -type f | wc -l && du -sLb {path} | cut -f1"
+        )
+        start = time.monotonic()
+        proc = await asyncio.create_subprocess_exec(
+            "ssh",
+            "-o",
+            "BatchMode=yes",
+            "-o",
+            "ConnectTimeout=5",
+            node,
+            remote_cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
         stdout, stderr = await proc.communicate()
-        return (
-            stdout.decode("utf-8", errors="replace"),
-            stderr.decode("utf-8", errors="replace"),
-            proc.returncode or 0,
+        duration = time.monotonic() - start
+
+        output = stdout.decode("utf-8", errors="replace").split()
+        if proc.returncode != 0 or len(output) < 2:
+            return NodeWarmResult(
+                node=node,
+                success=False,
+                duration_seconds=round(duration, 3),
+                error=stderr.decode("utf-8", errors="replace").strip()
+                or "Failed to warm model on node",
+            )
+
+        bytes_warmed = int(output[-1])
+        return NodeWarmResult(
+            node=node,
+            success=True,
+            files=int(output[-2]),
+            bytes_warmed=bytes_warmed,
+            duration_seconds=round(duration, 3),
+            throughput_mbps=(
+                round(bytes_warmed / (1024**2) / duration, 1) if duration > 0 else None
+            ),
         )
 
+    async def warm_model(
+        self,
+        model_id: str,
+        concurrency: Optional[int] = None,
+        include_workers: bool = True,
+    ) -> WarmResponse:
+        concurrency = max(1, concurrency or settings.warm_io_concurrency)
+        model_path = self._model_cache_path(model_id)
+        snapshot = self._snapshot_dir(model_path)
+        if snapshot is None:
+            return WarmResponse(
+                success=False,
+                message=f"Model not found in cache: {model_id}",
+                model_id=model_id,
+            )
+
+        head_ip = config_service.get_head_node_ip()
+        tasks = [self._warm_local(head_ip, snapshot, concurrency)]
+        if include_workers:
+            tasks.extend(
+                self._warm_remote(ip, snapshot, concurrency)
+                for ip in config_service.get_worker_node_ips()
+                if ip
+            )
+
+        results = []
+        for node_result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(node_result, Exception):
+                logger.error(f"Error warming {model_id}: {node_result}")
+                node_result = NodeWarmResult(
+                    node="unknown", success=False, error=str(node_result)
+                )
+            results.append(node_result)
+
+        bytes_warmed = sum(result.bytes_warmed for result in results)
+        success = all(result.success for result in results)
+        logger.info(
+            f"Warmed {bytes_warmed / (1024**3):.2f} GB of {model_id} across {len(results)} nodes"
+        )
+        return WarmResponse(
+            success=success,
+            message=f"Warmed {model_id} on {sum(r.success for r in results)}/{len(results)} nodes",
+            model_id=model_id,
+            bytes_warmed=bytes_warmed,
+            nodes=results,
+        )
+
+    async def _warm_favorites_loop(self, interval_seconds: float):
+        from app.db.database import async_session_maker
+        from app.services.profile_service import ProfileService
+
+        while True:
+            try:
+                async with async_session_maker() as session:
+                    profiles = await ProfileService(session).list_profiles(
+                        include_favorites_only=True
+                    )
+                for model_id in dict.fromkeys(p.model_id for p in profiles):
+                    await self.warm_model(model_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error warming favorite models: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    def start_warm_scheduler(self):
+        interval = settings.warm_favorites_interval_minutes
+        if interval <= 0 or self._warm_scheduler_task is not None:
+            return
+        self._warm_scheduler_task = asyncio.create_task(
+            self._warm_favorites_loop(interval * 60)
+        )
+        logger.info(f"Warming favorite models every {interval} minutes")
+
+    async def stop_warm_scheduler(self):
+        if self._warm_scheduler_task is not None:
+            self._warm_scheduler_task.cancel()
+            await asyncio.gather(self._warm_scheduler_task, return_exceptions=True)
+            self._warm_scheduler_task = None
+
     def _parse_model_id(self, model_path: str) -> str:
         return Path(model_path).name
 
     def _get_model_name(self, model_id: str) -> str:
         return model_id.split("/")[-1].replace("-", " ").replace("_", " ").title()
 
-    def _detect_quantization(self, model_id: str) -> Optional[str]:
-        quantization_patterns = ["awq", "gptq", "gguf", "int4", "int8"]
-        for pattern in quantization_patterns:
-            if pattern.lower() in model_id.lower():
-                return pattern.upper()
+    def _detect_quantization(
+        self, snapshot: str, weights: Optional[WeightMetadata]
+    ) -> Optional[str]:
+        if weights is not None:
+            return weights.quantization
+        try:
+            if any(name.endswith(".gguf") for name in os.listdir(snapshot)):
+                return "GGUF"
+        except OSError:
+            pass
         return None
 
     def _get_file_size_gb(self, path: Path) -> float:
-        total = 0
-        if path.exists() and path.is_dir():
-            for p in path.rglob("*"):
-                if p.is_file():
-                    total += p.stat().st_size
-        elif path.exists() and path.is_file():
-            total = path.stat().st_size
-        return total / (1024**3)
-
-    async def list_local_models(self) -> list[LocalModel]:
-        self._get_config()
-
-        try:
-            hf_cache_dir = self._get_hf_cache_dir()
-            cmd = f"ls -la {hf_cache_dir} 2>/dev/null | tail -n +2"
+        return size_index.size(path) / (1024**3)
+
+    def _build_model(self, repo: CachedRepo, size_bytes: int) -> LocalModel:
+        model_id = repo.repo_id
+        snapshot = os.path.join(repo.path, "snapshots", repo.revision or "")
+        weights = weight_metadata.read(snapshot) if repo.revision else None
+        return LocalModel(
+            id=model_id,
+            name=self._get_model_name(model_id),
+            size_gb=round(size_bytes / (1024**3), 2),
+            quantization=self._detect_quantization(snapshot, weights),
+            revision=repo.revision,
+            downloaded_at=repo.modified_at,
+            download_status="incomplete" if repo.incomplete else "completed",
+            local_path=repo.path,
+            size_bytes=size_bytes,
+            refs=repo.refs,
+            revisions=repo.revisions,
+            incomplete=repo.incomplete,
+            weights=weights,
+            verification=blob_verifier.state(repo.path),
+        )
 
-            if hf_cache_dir.startswith("/home/") or hf_cache_dir.startswith("/root/"):
-                stdout, stderr, returncode = await self._run_local_command(cmd)
+    def _scan_models(self) -> dict[str, LocalModel]:
+        hf_cache_dir = self._get_hf_cache_dir()
+        sizes = size_index.sizes(hf_cache_dir)
+        return {
+            repo.path: self._build_model(
+                repo, sizes.get(os.path.basename(repo.path), 0)
+            )
+            for repo in hf_cache.scan(hf_cache_dir)
+        }
+
+    def _scan_model(self, path: str) -> Optional[LocalModel]:
+        repo = hf_cache.scan_repo(path)
+        if repo is None:
+            size_index.invalidate(path)
+            return None
+        return self._build_model(repo, size_index.size(path))
+
+    def _index_event(
+        self, path: str, model: Optional[LocalModel]
+    ) -> Optional[dict[str, Any]]:
+        previous = self._index.get(path)
+        if model is None:
+            if previous is None:
+                return None
+            del self._index[path]
+            kind, model_id = "removed", previous.id
+        else:
+            self._index[path] = model
+            model_id = model.id
+            if previous is None:
+                kind = "added"
+            elif previous.size_bytes != model.size_bytes:
+                kind = "size_changed"
+            elif previous != model:
+                kind = "updated"
             else:
-                stdout, stderr, returncode = await self._run_docker_command(cmd)
+                return None
+        return {
+            "type": "inventory",
+            "event": kind,
+            "model_id": model_id,
+            "model": model.model_dump(mode="json") if model is not None else None,
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+        }
+
+    async def rebuild_index(self) -> list[dict[str, Any]]:
+        models = await asyncio.to_thread(self._scan_models)
+        if self._index is None:
+            self._index = models
+            return []
+        events = [
+            self._index_event(path, models.get(path))
+            for path in set(self._index) | set(models)
+        ]
+        return [event for event in events if event is not None]
+
+    async def refresh_repos(self, paths: set[str]) -> list[dict[str, Any]]:
+        if self._index is None:
+            return await self.rebuild_index()
+        models = await asyncio.to_thread(
+            lambda: {path: self._scan_model(path) for path in paths}
+        )
+        events = [self._index_event(path, model) for path, model in models.items()]
+        return [event for event in events if event is not None]
 
-            if returncode != 0:
-                logger.warning(f"Failed to list models from {hf_cache_dir}: {stderr}")
-                return []
-
-            if not stdout.strip():
-                return []
-
-            models = []
-            lines = stdout.strip().split("\n")
-
-            for line in lines:
-                if not line.strip():
-                    continue
-
-                parts = line.split()
-                if len(parts) < 9:
-                    continue
-
-                permissions = parts[0]
-                if not permissions.startswith("d"):
-                    continue
-
-                model_path = parts[-1]
-
-                if model_path.startswith("."):
-                    continue
-
-                if not model_path.startswith("models--"):
-                    continue
-
-                model_id = model_path.replace("models--", "").replace("--", "/")
-                hf_cache_dir = self._get_hf_cache_dir()
-                full_path = Path(hf_cache_dir) / model_path
-                size_gb = self._get_file_size_gb(full_path)
-
-                name = self._get_model_name(model_id)
-                quantization = self._detect_quantization(model_id)
-
-                downloaded_at = None
-                try:
-                    stat = full_path.stat()
-                    downloaded_at = datetime.fromtimestamp(stat.st_mtime)
-                except Exception:
-                    pass
-
-                download_status = "completed"
-                if self._is_downloading(model_id):
-                    download_status = "downloading"
-
-                models.append(
-                    LocalModel(
-                        id=model_id,
-                        name=name,
-                        size_gb=round(size_gb, 2),
-                        quantization=quantization,
-                        downloaded_at=downloaded_at,
-                        download_status=download_status,
-                        local_path=str(full_path),
-                    )
+    async def list_local_models(self) -> list[LocalModel]:
+        try:
+            if self._index is None or not self.index_live:
+                await self.rebuild_index()
+
+            return [
+                (
+                    m.model_copy(update={"download_status": "downloading"})
+                    if self._is_downloading(m.id)
+                    else m
                 )
-
-            return models
+                for m in sorted(self._index.values(), key=lambda m: m.id)
+            ]
 
         except Exception as e:
             logger.error(f"Error listing models: {e}")
@@ -169,22 +406,52 @@ class InventoryService:
                 return model
         return None
 
-    def _is_downloading(self, model_id: str) -> bool:
+    def _script_download(self) -> Optional[str]:
+        if not pid_alive(self.DOWNLOAD_PID_FILE):
+            return None
         try:
-            if os.path.exists(self.DOWNLOAD_PID_FILE):
-                with open(self.DOWNLOAD_PID_FILE) as f:
-                    pid = f.read().strip()
-                    if pid:
-                        try:
-                            os.kill(int(pid), 0)
-                            return True
-                        except (OSError, ProcessLookupError):
-                            return False
-            return False
-        except Exception:
-            return False
-
-    async def download_model(self, model_id: str, distribute: bool = False) -> dict:
+            with open(self.DOWNLOAD_STATUS_FILE) as f:
+                return json.load(f).get("model_id") or ""
+        except (OSError, ValueError):
+            return ""
+
+    def _is_downloading(self, model_id: str) -> bool:
+        if download_queue.active_job(model_id) is not None:
+            return True
+        running = self._script_download()
+        return bool(running) and running == model_id
+
+    async def download_model(
+        self,
+        model_id: str,
+        distribute: bool = False,
+        revision: Optional[str] = None,
+        priority: int = 0,
+    ) -> dict:
+        if settings.download_backend == "native":
+            try:
+                job = await download_queue.enqueue(
+                    model_id,
+                    revision=revision,
+                    distribute=distribute,
+                    priority=priority,
+                )
+            except ValueError as e:
+                return {"success": False, "message": str(e)}
+            return {
+                "success": True,
+                "message": f"Download queued for {model_id}",
+                "model_id": model_id,
+                "job_id": job.job_id,
+            }
+
+        running = self._script_download()
+        if running is not None:
+            return {
+                "success": False,
+                "message": f"Download already in progress: {running or 'unknown model'}",
+            }
+
         self._get_config()
 
         if not self.spark_docker_path:
@@ -217,7 +484,9 @@ class InventoryService:
             if hf_cache_dir.startswith("/home/") or hf_cache_dir.startswith("/root/"):
                 stdout, stderr, returncode = await self._run_local_command(full_cmd)
             else:
-                stdout, stderr, returncode = await self._run_docker_command(full_cmd)
+                stdout, stderr, returncode = await self._run_docker_command(
+                    full_cmd, persistent=False
+                )
 
             if returncode != 0 and "nohup" not in stderr.lower():
                 return {
@@ -225,17 +494,22 @@ class InventoryService:
                     "message": f"Failed to start download: {stderr}",
                 }
 
+            started_at = datetime.utcnow()
             with open(self.DOWNLOAD_STATUS_FILE, "w") as f:
-                import json
-
                 json.dump(
                     {
                         "model_id": model_id,
                         "status": "downloading",
-                        "started_at": datetime.utcnow().isoformat(),
+                        "started_at": started_at.isoformat(),
                     },
                     f,
                 )
+            download_tracker.start(
+                model_id,
+                self._model_cache_path(model_id) / "blobs",
+                self.DOWNLOAD_PID_FILE,
+                started_at=started_at,
+            )
 
             return {
                 "success": True,
@@ -270,7 +544,7 @@ class InventoryService:
                     "freed_space_gb": 0.0,
                 }
 
-            size_before = self._get_file_size_gb(model_path)
+            size_before = await asyncio.to_thread(self._get_file_size_gb, model_path)
 
             cmd = f"rm -rf {model_path}"
 
@@ -286,7 +560,9 @@ class InventoryService:
                     "freed_space_gb": 0.0,
                 }
 
-            size_after = self._get_file_size_gb(model_path.parent)
+            size_index.invalidate(model_path)
+            await blob_verifier.forget(str(model_path))
+            size_after = await asyncio.to_thread(self._get_file_size_gb, model_path)
             freed = max(0, size_before - size_after)
 
             return {
@@ -303,39 +579,68 @@ class InventoryService:
             }
 
     async def get_download_progress(self) -> Optional[DownloadStatus]:
-        try:
-            if not os.path.exists(self.DOWNLOAD_STATUS_FILE):
-                return DownloadStatus(
-                    model_id="",
-                    progress=0.0,
-                    status="idle",
-                )
+        if settings.download_backend == "native":
+            return download_queue.current()
+        return download_tracker.status
 
-            with open(self.DOWNLOAD_STATUS_FILE) as f:
-                import json
-
-                data = json.load(f)
-
-            return DownloadStatus(
-                model_id=data.get("model_id", ""),
-                progress=data.get("progress", 0.0),
-                status=data.get("status", "idle"),
-                downloaded_bytes=data.get("downloaded_bytes", 0),
-                total_bytes=data.get("total_bytes"),
-                speed_mbps=data.get("speed_mbps"),
-                error_message=data.get("error_message"),
-                updated_at=datetime.utcnow(),
-            )
+    async def get_download_queue(self) -> DownloadQueueStatus:
+        return download_queue.status()
 
-        except Exception as e:
-            return DownloadStatus(
-                model_id="",
-                progress=0.0,
-                status="idle",
-                error_message=str(e),
-            )
+    async def get_distributions(self) -> DistributionStatus:
+        return distribution_service.status()
 
-    async def distribute_model(self, model_id: str) -> dict:
+    def resume_download_tracking(self):
+        download_tracker.resume(
+            self.DOWNLOAD_STATUS_FILE,
+            self.DOWNLOAD_PID_FILE,
+            self._get_hf_cache_dir(),
+        )
+
+    async def verify_model(self, model_id: str) -> dict:
+        model = await self.get_model_info(model_id)
+        if model is None or not model.local_path:
+            return {"success": False, "message": f"Model not found: {model_id}"}
+        try:
+            verification = blob_verifier.start(model.local_path, model.id)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+        return {
+            "success": True,
+            "message": f"Verifying {model.id}",
+            "verification": verification,
+        }
+
+    async def distribute_model(
+        self,
+        model_id: str,
+        nodes: Optional[list[str]] = None,
+        fanout: Optional[int] = None,
+    ) -> dict:
+        if settings.download_backend == "script":
+            return await self._distribute_script(model_id)
+
+        workers = config_service.get_worker_node_ips()
+        targets = nodes or workers
+        unknown = [node for node in targets if node not in workers]
+        if unknown:
+            raise ValueError(f"{', '.join(unknown)} not configured worker nodes")
+        try:
+            job = distribution_service.start(
+                model_id,
+                [SSHNode(node, settings.hf_cache_dir) for node in targets],
+                fanout=fanout,
+                cache_dir=self._get_hf_cache_dir(),
+            )
+        except ValueError as e:
+            return {"success": False, "message": str(e), "distributed_to": []}
+        return {
+            "success": True,
+            "message": f"Distributing {model_id} to {len(targets)} nodes",
+            "distributed_to": targets,
+            "job_id": job.job_id,
+        }
+
+    async def _distribute_script(self, model_id: str) -> dict:
         self._get_config()
 
         if not self.spark_docker_path:
@@ -388,6 +693,13 @@ class InventoryService:
             }
 
     async def cancel_download(self, model_id: str) -> dict:
+        job = download_queue.active_job(model_id)
+        if job is not None:
+            await download_queue.cancel(job.job_id)
+            return {
+                "success": True,
+                "message": f"Download cancelled for {model_id}",
+            }
         try:
             if not os.path.exists(self.DOWNLOAD_PID_FILE):
                 return {
@@ -404,6 +716,7 @@ class InventoryService:
                     "message": "No download in progress",
                 }
 
+            download_tracker.cancel()
             cmd = f"kill {pid} 2>/dev/null; rm -f {self.DOWNLOAD_PID_FILE} {self.DOWNLOAD_STATUS_FILE}"
 
             hf_cache_dir = self._get_hf_cache_dir()
@@ -0,0 +1,240 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+from typing import Optional
+
+from app.config import settings
+from app.services.hf_cache import repo_id_from_dir
+from app.services.inventory_service import inventory_service
+from app.services.state_service import state_service
+
+logger = logging.getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+DIR_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+
+class Inotify:
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int = DIR_MASK) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(
+                errno, f"inotify_add_watch failed: {os.strerror(errno)}", path
+            )
+        return wd
+
+    def read(self) -> list[tuple[int, int, str]]:
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return []
+        events, offset = [], 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class InventoryWatcher:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._inotify: Optional[Inotify] = None
+        self._watches: dict[int, tuple[str, Optional[str]]] = {}
+        self._dirty: set[str] = set()
+        self._rescan = False
+        self._cache_lost = False
+        self._inotify_failed = False
+        self._wake = asyncio.Event()
+        self.mode: Optional[str] = None
+
+    def start(self):
+        if not settings.inventory_watch_enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._close_inotify()
+        inventory_service.index_live = False
+
+    def _close_inotify(self):
+        if self._inotify is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            except RuntimeError:
+                pass
+            self._inotify.close()
+            self._inotify = None
+        self._watches.clear()
+
+    def _watch_tree(self, path: str, repo: Optional[str]):
+        self._watches[self._inotify.add_watch(path)] = (path, repo)
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    self._watch_tree(entry.path, repo)
+
+    def _watch_cache(self, cache_dir: str):
+        self._watches[self._inotify.add_watch(cache_dir)] = (cache_dir, None)
+        with os.scandir(cache_dir) as entries:
+            for entry in entries:
+                if entry.is_dir() and repo_id_from_dir(entry.name):
+                    self._watch_tree(entry.path, entry.path)
+
+    def _start_inotify(self, cache_dir: str) -> bool:
+        try:
+            self._inotify = Inotify()
+            self._watch_cache(cache_dir)
+        except (OSError, AttributeError) as e:
+            logger.warning(
+                f"inotify unavailable for {cache_dir} ({e}), polling instead"
+            )
+            self._close_inotify()
+            self._inotify_failed = True
+            return False
+        asyncio.get_running_loop().add_reader(self._inotify.fd, self._on_readable)
+        return True
+
+    def _on_readable(self):
+        for wd, mask, name in self._inotify.read():
+            if mask & IN_Q_OVERFLOW:
+                self._rescan = True
+                continue
+            watch = self._watches.get(wd)
+            if watch is None:
+                continue
+            path, repo = watch
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                if repo is None:
+                    self._cache_lost = True
+                continue
+            if repo is None:
+                if not name or not repo_id_from_dir(name):
+                    continue
+                repo = os.path.join(path, name)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                try:
+                    self._watch_tree(os.path.join(path, name), repo)
+                except OSError:
+                    pass
+            self._dirty.add(repo)
+        if self._dirty or self._rescan or self._cache_lost:
+            self._wake.set()
+
+    async def _publish(self, events: list[dict]):
+        for event in events:
+            logger.info(f"Inventory {event['event']}: {event['model_id']}")
+            state_service.publish(event)
+
+    def _select_mode(self, cache_dir: str):
+        if os.path.isdir(cache_dir) and self._start_inotify(cache_dir):
+            self.mode = "inotify"
+            logger.info(
+                f"Watching {cache_dir} with inotify ({len(self._watches)} dirs)"
+            )
+        else:
+            self.mode = "polling"
+            logger.info(
+                f"Polling {cache_dir} every {settings.inventory_poll_interval_seconds}s"
+            )
+
+    async def _run(self):
+        cache_dir = inventory_service._get_hf_cache_dir()
+        await self._publish(await inventory_service.rebuild_index())
+        self._select_mode(cache_dir)
+        inventory_service.index_live = True
+
+        try:
+            while True:
+                if self._cache_lost:
+                    # The cache directory itself was removed or replaced
+                    self._cache_lost = False
+                    self._close_inotify()
+                    self._select_mode(cache_dir)
+                    self._rescan = True
+                elif (
+                    self.mode == "polling"
+                    and not self._inotify_failed
+                    and os.path.isdir(cache_dir)
+                ):
+                    # The cache directory appeared after startup
+                    if self._start_inotify(cache_dir):
+                        self.mode = "inotify"
+                        self._rescan = True
+                        logger.info(f"Watching {cache_dir} with inotify")
+
+                if self._rescan:
+                    self._wake.clear()
+                elif self.mode == "inotify":
+                    await self._wake.wait()
+                    # Coalesce the burst of writes a download produces into one rescan
+                    await asyncio.sleep(settings.inventory_watch_debounce_seconds)
+                    self._wake.clear()
+                else:
+                    await asyncio.sleep(settings.inventory_poll_interval_seconds)
+
+                dirty, self._dirty = self._dirty, set()
+                try:
+                    if self.mode == "polling" or self._rescan:
+                        self._rescan = False
+                        events = await inventory_service.rebuild_index()
+                    else:
+                        events = await inventory_service.refresh_repos(dirty)
+                    await self._publish(events)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Failed to refresh inventory index: {e}")
+        finally:
+            inventory_service.index_live = False
+
+
+inventory_watcher = InventoryWatcher()
@@ -0,0 +1,307 @@
+import asyncio
+import json
+import logging
+import math
+import statistics
+import time
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.db.database import PROFILES_DIR, async_session_maker
+from app.db.models import Launch
+from app.models.vllm import (
+    LaunchComparison,
+    LaunchMetricComparison,
+    LaunchRecord,
+    LaunchState,
+    ModelLaunchConfig,
+)
+
+logger = logging.getLogger(__name__)
+
+LEGACY_HISTORY_FILE = PROFILES_DIR / "launch_history.json"
+GENERATION_TOKENS_METRIC = "vllm:generation_tokens_total"
+E2E_LATENCY_BUCKETS = "vllm:e2e_request_latency_seconds_bucket"
+TTFT_BUCKETS = "vllm:time_to_first_token_seconds_bucket"
+KV_USAGE_METRICS = ("vllm:gpu_cache_usage_perc", "vllm:kv_cache_usage_perc")
+COMPARED_METRICS = [
+    ("time_to_ready_seconds", False),
+    ("peak_tokens_per_second", True),
+    ("median_tokens_per_second", True),
+    ("p95_latency_seconds", False),
+    ("p95_ttft_seconds", False),
+    ("max_kv_cache_usage", False),
+]
+
+
+def _sample_value(line: str) -> tuple[str, str, float]:
+    series, value = line.rsplit(" ", 1)
+    name, _, labels = series.partition("{")
+    return name, labels, float(value)
+
+
+def _bucket_bound(labels: str) -> Optional[float]:
+    for label in labels.rstrip("}").split(","):
+        key, _, value = label.partition("=")
+        if key.strip() == "le":
+            return float(value.strip('"'))
+    return None
+
+
+def histogram_quantile(buckets: dict[float, float], quantile: float) -> Optional[float]:
+    bounds = sorted(buckets)
+    if not bounds or buckets[bounds[-1]] <= 0:
+        return None
+    target = quantile * buckets[bounds[-1]]
+    lower, below = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= target:
+            if math.isinf(bound):
+                return lower
+            if count == below:
+                return bound
+            return lower + (bound - lower) * (target - below) / (count - below)
+        lower, below = bound, count
+    return lower
+
+
+class RunStats:
+    def __init__(self):
+        self.samples = 0
+        self.rates: list[float] = []
+        self.generation_tokens: Optional[float] = None
+        self.max_kv_usage: Optional[float] = None
+        self.latency_buckets: dict[float, float] = {}
+        self.ttft_buckets: dict[float, float] = {}
+        self._last_at: Optional[float] = None
+
+    def feed(self, text: str, at: Optional[float] = None):
+        at = at if at is not None else time.monotonic()
+        tokens = None
+        latency: dict[float, float] = {}
+        ttft: dict[float, float] = {}
+        for line in text.splitlines():
+            if not line.startswith("vllm:"):
+                continue
+            try:
+                name, labels, value = _sample_value(line)
+            except ValueError:
+                continue
+            if name == GENERATION_TOKENS_METRIC:
+                tokens = (tokens or 0.0) + value
+            elif name in KV_USAGE_METRICS:
+                self.max_kv_usage = max(self.max_kv_usage or 0.0, value)
+            elif name in (E2E_LATENCY_BUCKETS, TTFT_BUCKETS):
+                bound = _bucket_bound(labels)
+                if bound is not None:
+                    target = latency if name == E2E_LATENCY_BUCKETS else ttft
+                    target[bound] = target.get(bound, 0.0) + value
+
+        if tokens is not None:
+            if self.generation_tokens is not None and self._last_at is not None:
+                elapsed = at - self._last_at
+                delta = tokens - self.generation_tokens
+                if elapsed > 0 and delta > 0:
+                    self.rates.append(delta / elapsed)
+            self.generation_tokens = tokens
+            self._last_at = at
+        if latency:
+            self.latency_buckets = latency
+        if ttft:
+            self.ttft_buckets = ttft
+        self.samples += 1
+
+    def summary(self) -> dict:
+        p95_latency = histogram_quantile(self.latency_buckets, 0.95)
+        p95_ttft = histogram_quantile(self.ttft_buckets, 0.95)
+        requests = max(self.latency_buckets.values()) if self.latency_buckets else None
+        return {
+            "peak_tokens_per_second": (
+                round(max(self.rates), 2) if self.rates else None
+            ),
+            "median_tokens_per_second": (
+                round(statistics.median(self.rates), 2) if self.rates else None
+            ),
+            "p95_latency_seconds": (
+                round(p95_latency, 4) if p95_latency is not None else None
+            ),
+            "p95_ttft_seconds": round(p95_ttft, 4) if p95_ttft is not None else None,
+            "max_kv_cache_usage": (
+                round(self.max_kv_usage, 4) if self.max_kv_usage is not None else None
+            ),
+            "requests": int(requests) if requests is not None else None,
+            "generation_tokens": (
+                int(self.generation_tokens)
+                if self.generation_tokens is not None
+                else None
+            ),
+            "samples": self.samples,
+        }
+
+
+def _to_record(row: Launch) -> LaunchRecord:
+    phases = json.loads(row.phases_json) if row.phases_json else []
+    return LaunchRecord(
+        launch_id=row.id,
+        instance_id=row.instance_id,
+        profile_id=row.profile_id,
+        model_id=row.model_id,
+        config_hash=row.config_hash,
+        port=row.port,
+        state=row.state,
+        phase=phases[-1]["name"] if phases else "process_start",
+        phases=phases,
+        error=row.error,
+        exit_reason=row.exit_reason,
+        started_at=row.started_at,
+        ready_at=row.ready_at,
+        stopped_at=row.stopped_at,
+        time_to_ready_seconds=row.time_to_ready_seconds,
+        peak_tokens_per_second=row.peak_tokens_per_second,
+        median_tokens_per_second=row.median_tokens_per_second,
+        p95_latency_seconds=row.p95_latency_seconds,
+        p95_ttft_seconds=row.p95_ttft_seconds,
+        max_kv_cache_usage=row.max_kv_cache_usage,
+        requests=row.requests,
+        generation_tokens=row.generation_tokens,
+        samples=row.samples or 0,
+    )
+
+
+class LaunchHistoryService:
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    async def save(
+        self,
+        state: LaunchState,
+        stats: Optional[RunStats] = None,
+        config: Optional[ModelLaunchConfig] = None,
+    ):
+        phases = [phase.model_dump(mode="json") for phase in state.phases]
+        try:
+            async with self._lock, async_session_maker() as session:
+                row = await session.get(Launch, state.launch_id)
+                if row is None:
+                    row = Launch(id=state.launch_id)
+                    session.add(row)
+                row.instance_id = state.instance_id
+                row.profile_id = state.profile_id
+                row.model_id = state.model_id
+                row.config_hash = state.config_hash
+                row.port = state.port
+                row.state = state.state
+                row.phases_json = json.dumps(phases)
+                row.error = state.error
+                row.exit_reason = state.exit_reason
+                row.started_at = state.started_at
+                row.ready_at = state.ready_at
+                row.stopped_at = state.stopped_at
+                row.time_to_ready_seconds = state.time_to_ready_seconds
+                if config is not None:
+                    row.config_json = json.dumps(config.model_dump())
+                if stats is not None:
+                    for key, value in stats.summary().items():
+                        setattr(row, key, value)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to save launch {state.launch_id}: {e}")
+
+    async def list_launches(
+        self,
+        profile_id: Optional[str] = None,
+        config_hash: Optional[str] = None,
+        model_id: Optional[str] = None,
+        limit: int = 50,
+    ) -> list[LaunchRecord]:
+        query = select(Launch).order_by(Launch.started_at.desc()).limit(limit)
+        if profile_id:
+            query = query.where(Launch.profile_id == profile_id)
+        if config_hash:
+            query = query.where(Launch.config_hash == config_hash)
+        if model_id:
+            query = query.where(Launch.model_id == model_id)
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            return [_to_record(row) for row in result.scalars().all()]
+
+    async def get_launch(self, launch_id: str) -> Optional[LaunchRecord]:
+        async with async_session_maker() as session:
+            row = await session.get(Launch, launch_id)
+            return _to_record(row) if row is not None else None
+
+    async def compare(
+        self,
+        profile_id: Optional[str] = None,
+        config_hash: Optional[str] = None,
+        limit: int = 10,
+    ) -> LaunchComparison:
+        launches = await self.list_launches(
+            profile_id=profile_id, config_hash=config_hash, limit=limit * 4
+        )
+        runs = [launch for launch in launches if launch.ready_at is not None][:limit]
+        comparison = LaunchComparison(
+            profile_id=profile_id, config_hash=config_hash, runs=runs
+        )
+        if not runs:
+            return comparison
+
+        latest, previous = runs[0], runs[1:]
+        comparison.latest = latest
+        comparison.baseline_runs = len(previous)
+        threshold = settings.launch_regression_threshold
+        for metric, higher_is_better in COMPARED_METRICS:
+            values = [
+                getattr(run, metric)
+                for run in previous
+                if getattr(run, metric) is not None
+            ]
+            current = getattr(latest, metric)
+            baseline = statistics.median(values) if values else None
+            entry = LaunchMetricComparison(
+                metric=metric,
+                higher_is_better=higher_is_better,
+                latest=current,
+                baseline=round(baseline, 4) if baseline is not None else None,
+            )
+            if current is not None and baseline:
+                change = (current - baseline) / baseline
+                entry.change_pct = round(change * 100, 2)
+                worse = -change if higher_is_better else change
+                entry.regression = worse > threshold
+            if entry.regression:
+                comparison.regressions.append(metric)
+            comparison.metrics.append(entry)
+        return comparison
+
+    async def import_legacy_history(self):
+        if not LEGACY_HISTORY_FILE.exists():
+            return
+        try:
+            with open(LEGACY_HISTORY_FILE) as f:
+                history = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read legacy launch history: {e}")
+            return
+
+        imported = 0
+        for entries in history.values():
+            for entry in entries:
+                try:
+                    state = LaunchState(**entry)
+                except ValueError:
+                    continue
+                if state.exit_reason is None and state.state in ("failed", "stopped"):
+                    state.exit_reason = state.state
+                if await self.get_launch(state.launch_id) is None:
+                    await self.save(state)
+                    imported += 1
+
+        LEGACY_HISTORY_FILE.rename(LEGACY_HISTORY_FILE.with_suffix(".json.imported"))
+        logger.info(f"Imported {imported} launches from {LEGACY_HISTORY_FILE}")
+
+
+launch_history = LaunchHistoryService()
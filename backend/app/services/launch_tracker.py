@@ -0,0 +1,355 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from app.config import settings
+from app.models.vllm import LaunchPhase, LaunchState, ModelLaunchConfig
+from app.services.docker_client import docker_client
+from app.services.exec_session import run_in_container
+from app.services.launch_history import RunStats, launch_history
+
+logger = logging.getLogger(__name__)
+
+RUN_CHECKPOINT_SAMPLES = 12
+READY_TIMEOUT_SECONDS = 30 * 60
+PROBE_INITIAL_DELAY_SECONDS = 1.0
+PROBE_MAX_DELAY_SECONDS = 15.0
+
+PHASE_ORDER = [
+    "process_start",
+    "ray_init",
+    "weight_loading",
+    "kv_cache_profiling",
+    "cuda_graph_capture",
+    "ready",
+]
+
+PHASE_PATTERNS = [
+    (
+        "ray_init",
+        re.compile(
+            r"ray\.init|Connecting to existing Ray cluster|Started a local Ray instance|Initializing a V\d engine",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        "weight_loading",
+        re.compile(
+            r"Starting to load model|Loading model weights|Loading safetensors checkpoint shards",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        "kv_cache_profiling",
+        re.compile(
+            r"Memory profiling takes|Available KV cache memory|# GPU blocks|GPU KV cache size",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        "cuda_graph_capture",
+        re.compile(
+            r"Capturing (?:CUDA graphs|cudagraphs)|Graph capturing", re.IGNORECASE
+        ),
+    ),
+]
+
+# Fatal signatures only: vLLM, Ray and NCCL log plenty of harmless ERROR lines
+ERROR_PATTERN = re.compile(
+    r"Traceback \(most recent call last\)|CUDA out of memory|OutOfMemoryError"
+    r"|\bRuntimeError:|Engine core initialization failed"
+)
+
+
+def config_hash(config: ModelLaunchConfig) -> str:
+    payload = json.dumps(config.model_dump(), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class LaunchTracker:
+    def __init__(self):
+        self.current: Optional[LaunchState] = None
+        self._states: dict[str, LaunchState] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._runs: dict[str, tuple[LaunchState, asyncio.Task]] = {}
+        self._saves: set[asyncio.Task] = set()
+
+    def get(self, instance_id: str) -> Optional[LaunchState]:
+        return self._states.get(instance_id)
+
+    def starting(self) -> bool:
+        return any(state.state == "starting" for state in self._states.values())
+
+    def _advance(self, state: LaunchState, phase: str, at: Optional[datetime] = None):
+        if PHASE_ORDER.index(phase) <= PHASE_ORDER.index(state.phase) and state.phases:
+            return
+        at = at or datetime.utcnow()
+        if state.phases:
+            previous = state.phases[-1]
+            previous.duration_seconds = round(
+                (at - previous.started_at).total_seconds(), 3
+            )
+        state.phases.append(LaunchPhase(name=phase, started_at=at))
+        state.phase = phase
+        logger.info(f"Launch {state.launch_id} entered phase {phase}")
+
+    def _finish(
+        self,
+        state: LaunchState,
+        outcome: str,
+        error: Optional[str] = None,
+        exit_reason: Optional[str] = None,
+    ):
+        if state.state != "starting":
+            return
+        now = datetime.utcnow()
+        if outcome == "ready":
+            self._advance(state, "ready", now)
+            state.ready_at = now
+            state.time_to_ready_seconds = round(
+                (now - state.started_at).total_seconds(), 3
+            )
+        else:
+            if state.phases and state.phases[-1].duration_seconds is None:
+                state.phases[-1].duration_seconds = round(
+                    (now - state.phases[-1].started_at).total_seconds(), 3
+                )
+            state.stopped_at = now
+            state.exit_reason = state.exit_reason or exit_reason or outcome
+        state.state = outcome
+        if error:
+            state.error = error
+
+    def start(
+        self,
+        config: ModelLaunchConfig,
+        container: str,
+        pid_file: str,
+        log_file: str,
+        instance_id: str = "default",
+        profile_id: Optional[str] = None,
+    ) -> LaunchState:
+        task = self._tasks.get(instance_id)
+        if task is not None and not task.done():
+            self._states[instance_id].exit_reason = "replaced"
+            task.cancel()
+
+        state = LaunchState(
+            launch_id=str(uuid.uuid4()),
+            instance_id=instance_id,
+            profile_id=profile_id,
+            model_id=config.model_id,
+            config_hash=config_hash(config),
+            port=config.port,
+            started_at=datetime.utcnow(),
+        )
+        self._advance(state, "process_start", state.started_at)
+        self.current = state
+        self._states[instance_id] = state
+        self._tasks[instance_id] = asyncio.create_task(
+            self._track(state, container, pid_file, log_file)
+        )
+        self._save(state, config=config)
+        return state
+
+    def promote(self, from_id: str, instance_id: str) -> Optional[LaunchState]:
+        # A blue/green standby becomes the instance's launch once it takes over
+        state = self._states.pop(from_id, None)
+        if state is None:
+            return None
+        state.instance_id = instance_id
+        self._states[instance_id] = state
+        task = self._tasks.pop(from_id, None)
+        if task is not None:
+            self._tasks[instance_id] = task
+        self._save(state)
+        return state
+
+    def _save(
+        self,
+        state: LaunchState,
+        stats: Optional[RunStats] = None,
+        config: Optional[ModelLaunchConfig] = None,
+    ):
+        task = asyncio.create_task(launch_history.save(state, stats, config))
+        self._saves.add(task)
+        task.add_done_callback(self._saves.discard)
+
+    async def stop(self, instance_id: str = "default"):
+        state = self._states.get(instance_id)
+        if state is not None:
+            self._finish(state, "stopped")
+        task = self._tasks.get(instance_id)
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        for launch_id, (run_state, _) in list(self._runs.items()):
+            if run_state.instance_id == instance_id:
+                await self.end_run(launch_id, "stopped")
+
+    async def end_run(self, launch_id: str, reason: str):
+        run = self._runs.get(launch_id)
+        if run is None:
+            return
+        state, task = run
+        state.exit_reason = state.exit_reason or reason
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def wait(self, launch_id: str) -> Optional[LaunchState]:
+        for instance_id, state in self._states.items():
+            if state.launch_id == launch_id:
+                task = self._tasks.get(instance_id)
+                if task is not None:
+                    await asyncio.gather(asyncio.shield(task), return_exceptions=True)
+                return state
+        return None
+
+    async def _track(
+        self, state: LaunchState, container: str, pid_file: str, log_file: str
+    ):
+        follower = asyncio.create_task(self._follow_log(state, container, log_file))
+        try:
+            await asyncio.wait_for(
+                self._wait_until_ready(state, container, pid_file),
+                timeout=READY_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            self._finish(
+                state,
+                "failed",
+                "Timed out waiting for vLLM to become ready",
+                exit_reason="timeout",
+            )
+        except asyncio.CancelledError:
+            self._finish(state, "stopped")
+            raise
+        except Exception as e:
+            logger.exception(f"Error tracking launch {state.launch_id}: {e}")
+            self._finish(state, "failed", str(e))
+        finally:
+            follower.cancel()
+            await asyncio.gather(follower, return_exceptions=True)
+            self._save(state)
+            if state.state == "ready":
+                self._runs[state.launch_id] = (
+                    state,
+                    asyncio.create_task(self._monitor_run(state, container, pid_file)),
+                )
+
+    async def _sample(self, container: str, state: LaunchState, stats: RunStats):
+        stdout, _, returncode = await run_in_container(
+            container, f"curl -sf http://localhost:{state.port}/metrics"
+        )
+        if returncode == 0:
+            stats.feed(stdout)
+
+    async def _monitor_run(self, state: LaunchState, container: str, pid_file: str):
+        stats = RunStats()
+        stdout, _, _ = await run_in_container(container, f"cat {pid_file} 2>/dev/null")
+        pid_match = re.search(r"(\d+)", stdout)
+        pid = pid_match.group(1) if pid_match else None
+        try:
+            while True:
+                await asyncio.sleep(settings.launch_sample_interval_seconds)
+                stdout, _, _ = await run_in_container(
+                    container, f"kill -0 {pid} 2>/dev/null && echo alive"
+                )
+                if pid is None or "alive" not in stdout:
+                    state.exit_reason = state.exit_reason or "exited"
+                    break
+                await self._sample(container, state, stats)
+                if stats.samples % RUN_CHECKPOINT_SAMPLES == 0:
+                    self._save(state, stats)
+        except asyncio.CancelledError:
+            try:
+                await self._sample(container, state, stats)
+            except Exception as e:
+                logger.debug(f"Final sample for launch {state.launch_id} failed: {e}")
+            raise
+        except Exception as e:
+            logger.exception(f"Error monitoring launch {state.launch_id}: {e}")
+            state.exit_reason = state.exit_reason or "exited"
+        finally:
+            self._runs.pop(state.launch_id, None)
+            state.state = "stopped"
+            state.stopped_at = datetime.utcnow()
+            logger.info(
+                f"Launch {state.launch_id} ended ({state.exit_reason}) after {stats.samples} samples"
+            )
+            self._save(state, stats)
+
+    async def _follow_log(self, state: LaunchState, container: str, log_file: str):
+        try:
+            async for line in docker_client.exec_lines(
+                container, ["tail", "-n", "+1", "-F", log_file]
+            ):
+                decoded_line = line.decode("utf-8", errors="replace").strip()
+                if not decoded_line:
+                    continue
+                if ERROR_PATTERN.search(decoded_line):
+                    state.error = decoded_line
+                for phase, pattern in PHASE_PATTERNS:
+                    if pattern.search(decoded_line):
+                        self._advance(state, phase)
+                        break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Stopped following launch log: {e}")
+
+    async def _process_alive(self, container: str, pid_file: str) -> bool:
+        stdout, _, _ = await run_in_container(
+            container, f"kill -0 $(cat {pid_file}) 2>/dev/null && echo alive"
+        )
+        return "alive" in stdout
+
+    async def _endpoint_ready(self, container: str, state: LaunchState) -> bool:
+        stdout, _, _ = await run_in_container(
+            container,
+            f"curl -s -o /dev/null -w '%{{http_code}}' http://localhost:{state.port}/health",
+        )
+        if stdout.strip() != "200":
+            return False
+
+        stdout, _, returncode = await run_in_container(
+            container, f"curl -sf http://localhost:{state.port}/v1/models"
+        )
+        if returncode != 0:
+            return False
+        try:
+            served = [model.get("id") for model in json.loads(stdout).get("data", [])]
+        except (json.JSONDecodeError, AttributeError):
+            return False
+        return bool(served)
+
+    async def _wait_until_ready(
+        self, state: LaunchState, container: str, pid_file: str
+    ):
+        delay = PROBE_INITIAL_DELAY_SECONDS
+        while state.state == "starting":
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, PROBE_MAX_DELAY_SECONDS)
+
+            if not await self._process_alive(container, pid_file):
+                self._finish(
+                    state,
+                    "failed",
+                    state.error or "vLLM process exited before becoming ready",
+                )
+                return
+
+            if await self._endpoint_ready(container, state):
+                self._finish(state, "ready")
+                logger.info(
+                    f"Launch {state.launch_id} ready in {state.time_to_ready_seconds}s"
+                )
+                return
+
+
+launch_tracker = LaunchTracker()
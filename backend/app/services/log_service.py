@@ -1,11 +1,21 @@
 import asyncio
+import heapq
+import itertools
 import re
 import logging
-from datetime import datetime
+import shlex
+from contextlib import aclosing
+from datetime import datetime, timezone
 from typing import AsyncGenerator, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+import httpx
+
+from app.services.config_service import config_service
+from app.services.docker_client import DockerError, docker_client
+from app.services.instance_registry import DEFAULT_INSTANCE_ID, instance_registry
+
 
 logger = logging.getLogger(__name__)
 
@@ -24,11 +34,26 @@ class ParsedLogEntry:
     level: LogLevel
     message: str
     raw_line: str
+    node: Optional[str] = None
+    source: Optional[str] = None
+
+
+@dataclass
+class LogSource:
+    id: str
+    node: str
+    kind: str
+    container: str
+    path: Optional[str] = None
+    remote: bool = False
 
 
 class LogService:
     CONTAINER_NAME = "vllm_node"
     LOG_FILE = "/tmp/vllm.log"
+    RAY_WORKER_LOGS = "/tmp/ray/session_latest/logs/worker-*.err"
+    REORDER_WINDOW_SECONDS = 0.5
+    MAX_REORDER_BUFFER = 5000
 
     def __init__(self, container_name: Optional[str] = None):
         self.container_name = container_name or self.CONTAINER_NAME
@@ -90,151 +115,347 @@ class LogService:
             raw_line=original_line.strip(),
         )
 
-    async def _run_docker_exec(self, cmd: list[str]) -> asyncio.subprocess.Process:
-        docker_cmd = ["docker", "exec", self.container_name] + cmd
-        return await asyncio.create_subprocess_exec(
-            *docker_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
+    async def _run_docker_exec(self, cmd: list[str]) -> tuple[str, str, int]:
+        return await docker_client.exec(self.container_name, cmd, timeout=10.0)
 
-    async def get_recent_logs(self, lines: int = 100) -> list[ParsedLogEntry]:
-        cmd = ["tail", "-n", str(lines), self.LOG_FILE]
-        proc = await self._run_docker_exec(cmd)
+    async def get_recent_logs(
+        self, lines: int = 100, log_file: Optional[str] = None
+    ) -> list[ParsedLogEntry]:
+        cmd = ["tail", "-n", str(lines), log_file or self.LOG_FILE]
 
-        output = b""
+        output = ""
         try:
-            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=10.0)
-            output = stdout
-            if proc.returncode != 0 and stderr:
-                logger.warning(
-                    f"tail command stderr: {stderr.decode('utf-8', errors='replace')}"
-                )
+            output, stderr, returncode = await self._run_docker_exec(cmd)
+            if returncode != 0 and stderr:
+                logger.warning(f"tail command stderr: {stderr}")
         except asyncio.TimeoutError:
             logger.warning("Timeout reading log file")
-            proc.terminate()
-            try:
-                await proc.wait()
-            except Exception:
-                pass
+        except (DockerError, httpx.HTTPError, OSError) as e:
+            logger.warning(f"Failed to read log file: {e}")
 
         if not output:
             logger.info("No log output received")
             return []
 
-        lines_list = output.decode("utf-8", errors="replace").splitlines()
+        lines_list = output.splitlines()
         logger.info(f"Parsed {len(lines_list)} raw log lines")
         return [self._parse_log_line(line) for line in lines_list if line.strip()]
 
-    async def get_log_file_content(self) -> bytes:
-        cmd = ["cat", self.LOG_FILE]
-        proc = await self._run_docker_exec(cmd)
-
-        stdout, stderr = await proc.communicate()
-        if proc.returncode != 0:
-            error_msg = stderr.decode("utf-8", errors="replace")
-            logger.error(f"Failed to read log file: {error_msg}")
-            raise RuntimeError(f"Failed to read log file: {error_msg}")
+    async def get_log_file_content(self, log_file: Optional[str] = None) -> bytes:
+        cmd = ["cat", log_file or self.LOG_FILE]
+        stdout, stderr, returncode = await docker_client.exec(self.container_name, cmd)
+        if returncode != 0:
+            logger.error(f"Failed to read log file: {stderr}")
+            raise RuntimeError(f"Failed to read log file: {stderr}")
 
-        content = stdout
+        content = stdout.encode("utf-8")
         logger.info(
             f"Log file content: {len(content)} bytes, {content.count(chr(10))} lines"
         )
-        if content:
-            logger.info(
-                f"First line: {content.decode('utf-8', errors='replace').split(chr(10))[0][:100]}"
-            )
-        else:
+        if not content:
             logger.warning("Log file is empty")
 
         return content
 
     async def stream_logs(
-        self, delay: float = 0.5
+        self, delay: float = 0.5, log_file: Optional[str] = None
     ) -> AsyncGenerator[ParsedLogEntry, None]:
-        logger.info(f"Starting log stream from {self.LOG_FILE}")
+        log_file = log_file or self.LOG_FILE
+        logger.info(f"Starting log stream from {log_file}")
 
         try:
-            content = await self.get_log_file_content()
-            if not content:
-                logger.warning("Log file is empty, will wait for new content")
-
-            logger.info("Starting tail process for real-time updates")
-
-            proc = await asyncio.create_subprocess_exec(
-                "docker",
-                "exec",
-                self.container_name,
-                "tail",
-                "-f",
-                self.LOG_FILE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
+            async for line in docker_client.exec_lines(
+                self.container_name, ["tail", "-n", "+1", "-F", log_file]
+            ):
+                decoded_line = line.decode("utf-8", errors="replace").strip()
+                if decoded_line:
+                    yield self._parse_log_line(decoded_line)
 
-            logger.info(f"tail process started with PID={proc.pid}")
+        except Exception as e:
+            logger.exception(f"Error in log streaming: {e}")
+            raise RuntimeError(f"Failed to stream logs: {str(e)}")
 
-            if content:
-                lines = content.decode("utf-8", errors="replace").splitlines()
-                for line in lines:
-                    if line.strip():
-                        yield self._parse_log_line(line)
-                logger.info(
-                    f"Yielded {len(lines)} historical log lines, now waiting for new content"
-                )
+    async def get_filtered_logs(
+        self,
+        level: Optional[LogLevel] = None,
+        lines: int = 100,
+        log_file: Optional[str] = None,
+    ) -> list[ParsedLogEntry]:
+        logs = await self.get_recent_logs(lines * 2, log_file)
 
-            stdout = proc.stdout
-            stderr = proc.stderr
-            empty_reads = 0
-            max_empty_reads = 30
+        if level:
+            logs = [log for log in logs if log.level == level]
 
-            read_task = None
+        return logs[-lines:]
 
-            while True:
-                try:
-                    line = await asyncio.wait_for(stdout.readline(), timeout=5.0)
-                    if not line:
-                        empty_reads += 1
-                        if empty_reads >= max_empty_reads:
-                            logger.warning(
-                                f"No log output for {max_empty_reads} reads, stopping stream"
-                            )
-                            break
-                        continue
+    def get_sources(self, instance_id: Optional[str] = None) -> list[LogSource]:
+        container = config_service.get_container_name() or self.container_name
+        head_ip = config_service.get_head_node_ip()
+        worker_ips = [ip for ip in config_service.get_worker_node_ips() if ip]
+        # A merged view for one instance only tails that instance's vLLM log
+        instances = (
+            [instance_registry.require(instance_id)]
+            if instance_id
+            else instance_registry.list()
+        )
 
-                    empty_reads = 0
-                    decoded_line = line.decode("utf-8", errors="replace").strip()
-                    if decoded_line:
-                        yield self._parse_log_line(decoded_line)
+        sources = [
+            LogSource(
+                id=f"{head_ip}:vllm"
+                if instance.id == DEFAULT_INSTANCE_ID
+                else f"{head_ip}:vllm:{instance.id}",
+                node=head_ip,
+                kind="vllm",
+                container=container,
+                path=instance.log_file,
+            )
+            for instance in instances
+        ]
+        sources.append(
+            LogSource(
+                id=f"{head_ip}:container",
+                node=head_ip,
+                kind="container",
+                container=container,
+            )
+        )
+        for ip in worker_ips:
+            sources.append(
+                LogSource(
+                    id=f"{ip}:ray_worker",
+                    node=ip,
+                    kind="ray_worker",
+                    container=container,
+                    path=self.RAY_WORKER_LOGS,
+                    remote=True,
+                )
+            )
+            sources.append(
+                LogSource(
+                    id=f"{ip}:container",
+                    node=ip,
+                    kind="container",
+                    container=container,
+                    remote=True,
+                )
+            )
+        return sources
+
+    def select_sources(
+        self,
+        sources: Optional[list[str]] = None,
+        nodes: Optional[list[str]] = None,
+        instance_id: Optional[str] = None,
+    ) -> list[LogSource]:
+        selected = self.get_sources(instance_id)
+        if sources and "all" not in sources:
+            wanted = set(sources)
+            selected = [s for s in selected if s.id in wanted or s.kind in wanted]
+        if nodes:
+            wanted_nodes = set(nodes)
+            selected = [s for s in selected if s.node in wanted_nodes]
+        return selected
+
+    def _build_remote_command(
+        self, source: LogSource, lines: int, follow: bool
+    ) -> list[str]:
+        if source.kind == "container":
+            cmd = ["docker", "logs", "--tail", str(lines)]
+            if follow:
+                cmd.append("-f")
+            cmd.append(source.container)
+        else:
+            cmd = ["docker", "exec", source.container] + self._tail_command(
+                source, lines, follow
+            )
 
-                except asyncio.TimeoutError:
-                    logger.debug("Timeout waiting for log line, continuing...")
-                    continue
+        return [
+            "ssh",
+            "-o",
+            "BatchMode=yes",
+            "-o",
+            "ConnectTimeout=5",
+            source.node,
+            shlex.join(cmd),
+        ]
 
-        except Exception as e:
-            logger.exception(f"Error in log streaming: {e}")
-            raise RuntimeError(f"Failed to stream logs: {str(e)}")
+    def _tail_command(self, source: LogSource, lines: int, follow: bool) -> list[str]:
+        tail = f"tail -q -n {lines}"
+        if follow:
+            tail += " -F"
+        return ["sh", "-c", f"{tail} {source.path} 2>/dev/null"]
+
+    async def _remote_source_lines(
+        self, source: LogSource, lines: int, follow: bool
+    ) -> AsyncGenerator[bytes, None]:
+        proc = await asyncio.create_subprocess_exec(
+            *self._build_remote_command(source, lines, follow),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+            if source.kind == "container"
+            else asyncio.subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                line = await proc.stdout.readline()
+                if not line:
+                    break
+                yield line
+        finally:
+            if proc.returncode is None:
+                proc.terminate()
+                try:
+                    await asyncio.wait_for(proc.wait(), timeout=5.0)
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+
+    def _source_lines(
+        self, source: LogSource, lines: int, follow: bool
+    ) -> AsyncGenerator[bytes, None]:
+        if source.remote:
+            return self._remote_source_lines(source, lines, follow)
+        if source.kind == "container":
+            return docker_client.log_lines(source.container, tail=lines, follow=follow)
+        return docker_client.exec_lines(
+            source.container, self._tail_command(source, lines, follow)
+        )
 
-    async def get_log_file_content(self) -> bytes:
-        cmd = ["cat", self.LOG_FILE]
-        proc = await self._run_docker_exec(cmd)
+    def _tag_entry(self, line: str, source: LogSource) -> ParsedLogEntry:
+        entry = self._parse_log_line(line)
+        entry.node = source.node
+        entry.source = source.kind
+        return entry
 
-        stdout, stderr = await proc.communicate()
-        if proc.returncode != 0:
-            error_msg = stderr.decode("utf-8", errors="replace")
-            raise RuntimeError(f"Failed to read log file: {error_msg}")
+    def _timestamp_sort_key(self, timestamp: str) -> float:
+        try:
+            parsed = datetime.fromisoformat(timestamp.replace(" ", "T", 1))
+        except ValueError:
+            return datetime.now(timezone.utc).timestamp()
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+    async def _read_source_tail(
+        self, source: LogSource, lines: int
+    ) -> list[ParsedLogEntry]:
+        entries = []
 
-        return stdout
+        async def collect():
+            # aclosing runs the generator's cleanup now, not when it is collected
+            source_lines = self._source_lines(source, lines, follow=False)
+            async with aclosing(source_lines):
+                async for line in source_lines:
+                    decoded_line = line.decode("utf-8", errors="replace").strip()
+                    if decoded_line:
+                        entries.append(self._tag_entry(decoded_line, source))
 
-    async def get_filtered_logs(
-        self, level: Optional[LogLevel] = None, lines: int = 100
+        try:
+            await asyncio.wait_for(collect(), timeout=10.0)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout reading logs from {source.id}")
+        except Exception as e:
+            logger.warning(f"Failed to read logs from {source.id}: {e}")
+        return entries
+
+    async def get_merged_recent_logs(
+        self,
+        lines: int = 100,
+        sources: Optional[list[str]] = None,
+        nodes: Optional[list[str]] = None,
+        level: Optional[LogLevel] = None,
+        instance_id: Optional[str] = None,
     ) -> list[ParsedLogEntry]:
-        logs = await self.get_recent_logs(lines * 2)
+        selected = self.select_sources(sources, nodes, instance_id)
+        results = await asyncio.gather(
+            *(self._read_source_tail(source, lines) for source in selected)
+        )
 
+        merged = [entry for entries in results for entry in entries]
+        merged.sort(key=lambda entry: self._timestamp_sort_key(entry.timestamp))
         if level:
-            logs = [log for log in logs if log.level == level]
+            merged = [entry for entry in merged if entry.level == level]
+        return merged[-lines:]
+
+    async def _follow_source(
+        self,
+        source: LogSource,
+        queue: asyncio.Queue,
+        history_lines: int,
+    ) -> None:
+        try:
+            logger.info(f"Following logs from {source.id}")
+            async for line in self._source_lines(source, history_lines, follow=True):
+                decoded_line = line.decode("utf-8", errors="replace").strip()
+                if decoded_line:
+                    await queue.put(self._tag_entry(decoded_line, source))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Log follower for {source.id} failed: {e}")
+        finally:
+            await queue.put(None)
+
+    async def stream_merged_logs(
+        self,
+        sources: Optional[list[str]] = None,
+        nodes: Optional[list[str]] = None,
+        history_lines: int = 100,
+        instance_id: Optional[str] = None,
+    ) -> AsyncGenerator[ParsedLogEntry, None]:
+        selected = self.select_sources(sources, nodes, instance_id)
+        if not selected:
+            return
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.MAX_REORDER_BUFFER)
+        followers = [
+            asyncio.create_task(self._follow_source(source, queue, history_lines))
+            for source in selected
+        ]
+        logger.info(f"Merging logs from {len(followers)} sources")
 
-        return logs[-lines:]
+        heap: list[tuple[float, int, float, ParsedLogEntry]] = []
+        sequence = itertools.count()
+        remaining = len(followers)
+
+        try:
+            while remaining or heap:
+                timeout = None
+                if heap:
+                    timeout = max(
+                        0.0, heap[0][2] + self.REORDER_WINDOW_SECONDS - loop.time()
+                    )
+
+                if remaining:
+                    try:
+                        entry = await asyncio.wait_for(queue.get(), timeout)
+                        if entry is None:
+                            remaining -= 1
+                        else:
+                            heapq.heappush(
+                                heap,
+                                (
+                                    self._timestamp_sort_key(entry.timestamp),
+                                    next(sequence),
+                                    loop.time(),
+                                    entry,
+                                ),
+                            )
+                    except asyncio.TimeoutError:
+                        pass
+
+                now = loop.time()
+                while heap and (
+                    not remaining
+                    or heap[0][2] + self.REORDER_WINDOW_SECONDS <= now
+                    or len(heap) > self.MAX_REORDER_BUFFER
+                ):
+                    yield heapq.heappop(heap)[3]
+        finally:
+            for follower in followers:
+                follower.cancel()
+            await asyncio.gather(*followers, return_exceptions=True)
 
 
 log_service = LogService()
@@ -6,6 +6,8 @@ from datetime import datetime
 from typing import Optional
 
 from app.config import settings
+from app.services.exec_session import run_in_container
+from app.services.instance_registry import DEFAULT_INSTANCE_ID, instance_registry
 from app.models.metrics import VLLMMetrics, MetricsSnapshot
 
 logger = logging.getLogger(__name__)
@@ -14,24 +16,12 @@ logger = logging.getLogger(__name__)
 class MetricsService:
     def __init__(self):
         self.container_name = settings.container_name
-        self.vllm_port = settings.vllm_port
 
-    async def _run_docker_command(self, cmd: str) -> tuple[str, str, int]:
-        full_cmd = f"docker exec {self.container_name} sh -c '{cmd}'"
-        logger.debug(f"Running Docker command: {full_cmd}")
-
-        proc = await asyncio.create_subprocess_shell(
-            full_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-
-        stdout, stderr = await proc.communicate()
-        return (
-            stdout.decode("utf-8", errors="replace"),
-            stderr.decode("utf-8", errors="replace"),
-            proc.returncode or 0,
-        )
+    async def _run_docker_command(
+        self, cmd: str, persistent: Optional[bool] = None
+    ) -> tuple[str, str, int]:
+        logger.debug(f"Running Docker command in {self.container_name}: {cmd}")
+        return await run_in_container(self.container_name, cmd, persistent=persistent)
 
     def parse_prometheus(self, text: str) -> dict[str, float]:
         metrics = {}
@@ -74,9 +64,12 @@ class MetricsService:
 
         return labels
 
-    async def fetch_metrics(self) -> Optional[VLLMMetrics]:
+    async def fetch_metrics(
+        self, instance_id: str = DEFAULT_INSTANCE_ID
+    ) -> Optional[VLLMMetrics]:
         try:
-            curl_cmd = f"curl -s http://localhost:{self.vllm_port}/metrics 2>/dev/null"
+            port = instance_registry.require(instance_id).port
+            curl_cmd = f"curl -s http://localhost:{port}/metrics 2>/dev/null"
             stdout, stderr, returncode = await self._run_docker_command(curl_cmd)
 
             if returncode != 0 or not stdout.strip():
@@ -191,15 +184,18 @@ class MetricsService:
                 num_finished_requests=num_finished,
                 model_loaded=model_loaded,
                 model_name=labels.get("model_name"),
-                port=self.vllm_port,
+                port=port,
+                instance_id=instance_id,
             )
 
         except Exception as e:
             logger.exception(f"Error fetching metrics: {e}")
             return None
 
-    async def get_snapshot(self) -> Optional[MetricsSnapshot]:
-        metrics = await self.fetch_metrics()
+    async def get_snapshot(
+        self, instance_id: str = DEFAULT_INSTANCE_ID
+    ) -> Optional[MetricsSnapshot]:
+        metrics = await self.fetch_metrics(instance_id)
         if metrics is None:
             return None
 
@@ -0,0 +1,466 @@
+import asyncio
+import ipaddress
+import json
+import logging
+import re
+import shlex
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.db.database import async_session_maker
+from app.db.models import NetworkSample
+from app.models.cluster import NetworkLinkStats, NetworkQuality, ThroughputResult
+from app.services.config_service import config_service
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_SOURCE = "dashboard"
+LOOPBACK_HOSTS = {"127.0.0.1", "localhost", "::1"}
+PING_REPLY = re.compile(rb"icmp_seq=(\d+).*time=([\d.]+)\s*ms")
+PING_NO_ANSWER = re.compile(rb"no answer yet for icmp_seq=(\d+)")
+PROBE_RESTART_SECONDS = 5.0
+THROUGHPUT_SETUP_TIMEOUT_SECONDS = 15.0
+
+THROUGHPUT_AGENT = r"""
+import json, socket, sys, threading, time
+
+CHUNK = 1 << 20
+mode = sys.argv[1]
+if mode == "server":
+    port, streams, timeout = int(sys.argv[2]), int(sys.argv[3]), float(sys.argv[4])
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("0.0.0.0", port))
+    server.listen(streams)
+    server.settimeout(timeout)
+    print(json.dumps({"port": server.getsockname()[1]}), flush=True)
+    totals = []
+
+    def drain(conn):
+        received, buffer = 0, bytearray(CHUNK)
+        while True:
+            n = conn.recv_into(buffer)
+            if not n:
+                break
+            received += n
+        conn.close()
+        totals.append(received)
+
+    threads = []
+    for _ in range(streams):
+        conn, _ = server.accept()
+        conn.settimeout(timeout)
+        thread = threading.Thread(target=drain, args=(conn,))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    print(json.dumps({"bytes": sum(totals)}), flush=True)
+else:
+    host, port = sys.argv[2], int(sys.argv[3])
+    streams, duration = int(sys.argv[4]), float(sys.argv[5])
+    payload, sent = b"\0" * CHUNK, []
+
+    def pump(conn, deadline):
+        total = 0
+        while time.perf_counter() < deadline:
+            conn.sendall(payload)
+            total += CHUNK
+        conn.shutdown(socket.SHUT_WR)
+        while conn.recv(CHUNK):
+            pass
+        conn.close()
+        sent.append(total)
+
+    conns = [socket.create_connection((host, port), timeout=10) for _ in range(streams)]
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=pump, args=(conn, started + duration)) for conn in conns
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(json.dumps({"bytes": sum(sent), "seconds": time.perf_counter() - started}))
+"""
+
+
+def _percentile(ordered: list[float], pct: float) -> Optional[float]:
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 3)
+
+
+class LinkWindow:
+    def __init__(self, source: str, target: str, method: str):
+        self.source = source
+        self.target = target
+        self.method = method
+        self.replies: dict[int, Optional[float]] = {}
+        self.started_at = datetime.utcnow()
+
+    def reply(self, seq: int, rtt_ms: float):
+        self.replies[seq] = rtt_ms
+
+    def lost(self, seq: int):
+        self.replies.setdefault(seq, None)
+
+    def feed_ping_line(self, line: bytes):
+        match = PING_REPLY.search(line)
+        if match:
+            self.reply(int(match.group(1)), float(match.group(2)))
+            return
+        match = PING_NO_ANSWER.search(line)
+        if match:
+            self.lost(int(match.group(1)))
+
+    def flush(self) -> Optional[NetworkLinkStats]:
+        replies, self.replies = self.replies, {}
+        started_at, self.started_at = self.started_at, datetime.utcnow()
+        if not replies:
+            return None
+
+        rtts = [replies[seq] for seq in sorted(replies) if replies[seq] is not None]
+        ordered = sorted(rtts)
+        gaps = [abs(b - a) for a, b in zip(rtts, rtts[1:])]
+        lost = len(replies) - len(rtts)
+        return NetworkLinkStats(
+            source=self.source,
+            target=self.target,
+            method=self.method,
+            window_start=started_at,
+            window_end=self.started_at,
+            samples=len(replies),
+            lost=lost,
+            loss_pct=round(lost / len(replies) * 100, 2),
+            rtt_min_ms=round(ordered[0], 3) if ordered else None,
+            rtt_p50_ms=_percentile(ordered, 50),
+            rtt_p95_ms=_percentile(ordered, 95),
+            rtt_p99_ms=_percentile(ordered, 99),
+            rtt_max_ms=round(ordered[-1], 3) if ordered else None,
+            jitter_ms=round(sum(gaps) / len(gaps), 3) if gaps else None,
+        )
+
+
+class NetworkMonitor:
+    def __init__(self):
+        self._windows: dict[str, LinkWindow] = {}
+        self._probes: dict[str, asyncio.Task] = {}
+        self._latest: dict[tuple[str, str], NetworkLinkStats] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._throughput_lock = asyncio.Lock()
+
+    def _nodes(self) -> list[str]:
+        head_ip = config_service.get_head_node_ip()
+        workers = [ip for ip in config_service.get_worker_node_ips() if ip]
+        return list(dict.fromkeys([head_ip] + workers))
+
+    def _is_loopback(self, node: str) -> bool:
+        if node in LOOPBACK_HOSTS:
+            return True
+        try:
+            return ipaddress.ip_address(node).is_loopback
+        except ValueError:
+            return False
+
+    def _is_local(self, node: str) -> bool:
+        return self._is_loopback(node) or node == config_service.get_head_node_ip()
+
+    def _node_command(self, node: str, argv: list[str]) -> list[str]:
+        if self._is_local(node):
+            return argv
+        return [
+            "ssh",
+            "-o",
+            "BatchMode=yes",
+            "-o",
+            "ConnectTimeout=5",
+            node,
+            shlex.join(argv),
+        ]
+
+    def _ping_command(self, target: str, deadline: Optional[int] = None) -> list[str]:
+        argv = [
+            "ping",
+            "-n",
+            "-O",
+            "-i",
+            str(settings.network_probe_interval_seconds),
+            "-W",
+            "1",
+        ]
+        if deadline is not None:
+            argv += ["-w", str(deadline)]
+        return argv + [target]
+
+    def start(self):
+        if self._tasks or not settings.network_monitor_enabled:
+            return
+        self._tasks.append(asyncio.create_task(self._run_windows()))
+        if settings.network_monitor_node_pairs:
+            self._tasks.append(asyncio.create_task(self._run_node_pairs()))
+        logger.info("Network monitor started")
+
+    async def stop(self):
+        tasks = self._tasks + list(self._probes.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._probes = {}
+
+    def _sync_probes(self):
+        nodes = set(self._nodes())
+        for node in list(self._probes):
+            if node not in nodes:
+                self._probes.pop(node).cancel()
+                self._windows.pop(node, None)
+        for node in nodes:
+            if node not in self._probes:
+                self._windows[node] = LinkWindow(DASHBOARD_SOURCE, node, "icmp")
+                self._probes[node] = asyncio.create_task(self._probe_node(node))
+
+    async def _probe_node(self, node: str):
+        while True:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *self._ping_command(node),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+            except FileNotFoundError:
+                logger.warning("ping is not available, using TCP connect probes")
+                await self._probe_node_tcp(node)
+                return
+
+            try:
+                async for line in proc.stdout:
+                    self._windows[node].feed_ping_line(line)
+            finally:
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+            logger.warning(f"Latency probe to {node} exited, restarting")
+            await asyncio.sleep(PROBE_RESTART_SECONDS)
+
+    async def _probe_node_tcp(self, node: str):
+        window = self._windows[node]
+        window.method = "tcp"
+        seq = 0
+        while True:
+            seq += 1
+            started = time.perf_counter()
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(node, settings.node_ssh_port),
+                    timeout=settings.node_probe_timeout_seconds,
+                )
+                window.reply(seq, (time.perf_counter() - started) * 1000)
+                writer.close()
+            except (OSError, asyncio.TimeoutError):
+                window.lost(seq)
+            await asyncio.sleep(settings.network_probe_interval_seconds)
+
+    async def _run_windows(self):
+        while True:
+            self._sync_probes()
+            await asyncio.sleep(settings.network_window_seconds)
+            stats = [window.flush() for window in self._windows.values()]
+            await self._record([s for s in stats if s is not None])
+
+    async def _probe_pair(self, source: str, target: str) -> Optional[NetworkLinkStats]:
+        window = LinkWindow(source, target, "icmp")
+        proc = await asyncio.create_subprocess_exec(
+            *self._node_command(
+                source,
+                self._ping_command(target, deadline=settings.network_window_seconds),
+            ),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            async for line in proc.stdout:
+                window.feed_ping_line(line)
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+            await proc.wait()
+        return window.flush()
+
+    async def _run_node_pairs(self):
+        while True:
+            nodes = self._nodes()
+            pairs = [
+                (source, target)
+                for source in nodes
+                if not self._is_local(source)
+                for target in nodes
+                if target != source
+            ]
+            if not pairs:
+                await asyncio.sleep(settings.network_window_seconds)
+                continue
+            results = await asyncio.gather(
+                *[self._probe_pair(source, target) for source, target in pairs],
+                return_exceptions=True,
+            )
+            stats = []
+            for (source, target), result in zip(pairs, results):
+                if isinstance(result, Exception):
+                    logger.warning(
+                        f"Latency probe {source} -> {target} failed: {result}"
+                    )
+                elif result is not None:
+                    stats.append(result)
+            await self._record(stats)
+
+    async def _record(self, stats: list[NetworkLinkStats]):
+        for link in stats:
+            self._latest[(link.source, link.target)] = link
+        cutoff = datetime.utcnow() - timedelta(hours=settings.network_history_hours)
+        try:
+            async with async_session_maker() as session:
+                session.add_all(NetworkSample(**link.model_dump()) for link in stats)
+                await session.execute(
+                    delete(NetworkSample).where(NetworkSample.window_end < cutoff)
+                )
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to record network samples: {e}")
+
+    def get_quality(self) -> NetworkQuality:
+        return NetworkQuality(
+            enabled=settings.network_monitor_enabled,
+            window_seconds=settings.network_window_seconds,
+            links=sorted(
+                self._latest.values(), key=lambda link: (link.source, link.target)
+            ),
+        )
+
+    async def get_history(
+        self,
+        minutes: int = 60,
+        source: Optional[str] = None,
+        target: Optional[str] = None,
+    ) -> list[NetworkLinkStats]:
+        query = (
+            select(NetworkSample)
+            .where(
+                NetworkSample.window_end
+                >= datetime.utcnow() - timedelta(minutes=minutes)
+            )
+            .order_by(NetworkSample.window_end)
+        )
+        if source:
+            query = query.where(NetworkSample.source == source)
+        if target:
+            query = query.where(NetworkSample.target == target)
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            return [
+                NetworkLinkStats(
+                    **{
+                        field: getattr(row, field)
+                        for field in NetworkLinkStats.model_fields
+                    }
+                )
+                for row in result.scalars().all()
+            ]
+
+    def _validate_node(self, node: str):
+        if not self._is_loopback(node) and node not in self._nodes():
+            raise ValueError(f"{node} is not a configured node")
+
+    async def _agent(self, node: str, *args: str) -> asyncio.subprocess.Process:
+        return await asyncio.create_subprocess_exec(
+            *self._node_command(node, ["python3", "-c", THROUGHPUT_AGENT, *args]),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+    async def run_throughput_test(
+        self, source: str, target: str, duration_seconds: float, streams: int
+    ) -> ThroughputResult:
+        self._validate_node(source)
+        self._validate_node(target)
+        if self._throughput_lock.locked():
+            raise RuntimeError("A throughput test is already running")
+
+        result = ThroughputResult(
+            source=source, target=target, success=False, streams=streams
+        )
+        async with self._throughput_lock:
+            server = await self._agent(
+                target,
+                "server",
+                str(settings.network_throughput_port),
+                str(streams),
+                str(THROUGHPUT_SETUP_TIMEOUT_SECONDS + duration_seconds),
+            )
+            client = None
+            try:
+                line = await asyncio.wait_for(
+                    server.stdout.readline(), THROUGHPUT_SETUP_TIMEOUT_SECONDS
+                )
+                if not line:
+                    _, stderr = await server.communicate()
+                    result.error = stderr.decode(errors="replace").strip() or (
+                        "Throughput server failed to start"
+                    )
+                    return result
+                port = json.loads(line)["port"]
+
+                client = await self._agent(
+                    source,
+                    "client",
+                    target,
+                    str(port),
+                    str(streams),
+                    str(duration_seconds),
+                )
+                stdout, stderr = await asyncio.wait_for(
+                    client.communicate(),
+                    duration_seconds + THROUGHPUT_SETUP_TIMEOUT_SECONDS,
+                )
+                if client.returncode != 0:
+                    result.error = stderr.decode(errors="replace").strip() or (
+                        "Throughput client failed"
+                    )
+                    return result
+                sent = json.loads(stdout)
+                received = json.loads(
+                    (
+                        await asyncio.wait_for(
+                            server.communicate(), THROUGHPUT_SETUP_TIMEOUT_SECONDS
+                        )
+                    )[0]
+                )
+
+                result.success = True
+                result.duration_seconds = round(sent["seconds"], 3)
+                result.bytes_sent = sent["bytes"]
+                result.bytes_received = received["bytes"]
+                if sent["seconds"] > 0:
+                    result.gbps = round(
+                        received["bytes"] * 8 / sent["seconds"] / 1e9, 3
+                    )
+                logger.info(
+                    f"Throughput {source} -> {target}: {result.gbps} Gbit/s over {streams} streams"
+                )
+                return result
+            except (asyncio.TimeoutError, ValueError, KeyError) as e:
+                result.error = f"Throughput test failed: {str(e) or type(e).__name__}"
+                return result
+            finally:
+                for proc in (client, server):
+                    if proc is not None and proc.returncode is None:
+                        proc.kill()
+                        await proc.wait()
+
+
+network_monitor = NetworkMonitor()
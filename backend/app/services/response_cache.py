@@ -0,0 +1,304 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config import settings
+from app.db.database import PROFILES_DIR
+from app.models.metrics import ResponseCacheMetrics
+from app.services.vllm_service import vllm_service
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = PROFILES_DIR / "response-cache"
+CACHEABLE_PATHS = {"completions", "chat/completions", "embeddings"}
+ALWAYS_DETERMINISTIC_PATHS = {"embeddings"}
+IGNORED_FIELDS = {"user"}
+CONFIG_HASH_TTL_SECONDS = 2.0
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    content_type: str
+    stream: bool
+    chunks: list[bytes]
+    upstream_ms: float
+
+    @property
+    def size(self) -> int:
+        return sum(len(chunk) for chunk in self.chunks)
+
+
+class CacheWriter:
+    def __init__(
+        self,
+        cache: "ResponseCache",
+        key: str,
+        status_code: int,
+        content_type: str,
+        started: float,
+    ):
+        self.cache = cache
+        self.key = key
+        self.status_code = status_code
+        self.content_type = content_type
+        self.started = started
+        self.chunks: Optional[list[bytes]] = []
+        self.size = 0
+
+    def feed(self, chunk: bytes):
+        if self.chunks is None:
+            return
+        self.size += len(chunk)
+        if self.size > settings.response_cache_max_entry_bytes:
+            self.chunks = None
+            return
+        self.chunks.append(chunk)
+
+    def commit(self):
+        if self.chunks is None:
+            return
+        self.cache.put(
+            self.key,
+            CachedResponse(
+                status_code=self.status_code,
+                content_type=self.content_type,
+                stream=True,
+                chunks=self.chunks,
+                upstream_ms=(time.perf_counter() - self.started) * 1000,
+            ),
+        )
+
+
+class ResponseCache:
+    def __init__(self):
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._bytes = 0
+        self._disk_index: Optional[OrderedDict[str, int]] = None
+        self._disk_bytes = 0
+        self._disk_lock = threading.RLock()
+        self._config_hashes: dict[str, tuple[Optional[str], float]] = {}
+        self._config_lock = asyncio.Lock()
+        self._pending_writes: set[asyncio.Task] = set()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+        self.upstream_ms_saved = 0.0
+
+    @property
+    def disk_enabled(self) -> bool:
+        return settings.response_cache_disk_max_bytes > 0
+
+    def cacheable(
+        self, method: str, path: str, body: Optional[dict], cache_control: str = ""
+    ) -> bool:
+        if not settings.response_cache_enabled or method != "POST" or body is None:
+            return False
+        if path not in CACHEABLE_PATHS:
+            return False
+        if "no-cache" in cache_control or "no-store" in cache_control:
+            return False
+        if path in ALWAYS_DETERMINISTIC_PATHS:
+            return True
+        temperature = body.get("temperature")
+        return isinstance(temperature, (int, float)) and temperature == 0
+
+    async def _config_hash(self, instance_id: str) -> Optional[str]:
+        cached = self._config_hashes.get(instance_id)
+        if cached and time.monotonic() - cached[1] < CONFIG_HASH_TTL_SECONDS:
+            return cached[0]
+        async with self._config_lock:
+            cached = self._config_hashes.get(instance_id)
+            if cached and time.monotonic() - cached[1] < CONFIG_HASH_TTL_SECONDS:
+                return cached[0]
+            running = await vllm_service.get_running_config(instance_id)
+            value = (
+                hashlib.sha256(
+                    json.dumps(running.model_dump(), sort_keys=True).encode()
+                ).hexdigest()[:16]
+                if running
+                else None
+            )
+            self._config_hashes[instance_id] = (value, time.monotonic())
+            return value
+
+    async def key(self, instance_id: str, path: str, body: dict) -> Optional[str]:
+        config = await self._config_hash(instance_id)
+        if config is None:
+            return None
+        normalized = {k: v for k, v in body.items() if k not in IGNORED_FIELDS}
+        payload = json.dumps(
+            {
+                "model": body.get("model"),
+                "path": path,
+                "config": config,
+                "body": normalized,
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None and self.disk_enabled:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self.disk_hits += 1
+                self._remember(key, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self.hits += 1
+        self.bytes_saved += entry.size
+        self.upstream_ms_saved += entry.upstream_ms
+        return entry
+
+    def writer(
+        self, key: str, status_code: int, content_type: str, started: float
+    ) -> CacheWriter:
+        return CacheWriter(self, key, status_code, content_type, started)
+
+    def put(self, key: str, entry: CachedResponse):
+        if entry.size > settings.response_cache_max_entry_bytes:
+            return
+        self.stores += 1
+        self._remember(key, entry)
+        if self.disk_enabled:
+            task = asyncio.create_task(asyncio.to_thread(self._write_disk, key, entry))
+            self._pending_writes.add(task)
+            task.add_done_callback(self._pending_writes.discard)
+
+    def _remember(self, key: str, entry: CachedResponse):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > settings.response_cache_max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def _load_disk_index(self) -> OrderedDict[str, int]:
+        if self._disk_index is None:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            files = []
+            with os.scandir(CACHE_DIR) as entries:
+                for item in entries:
+                    if item.is_file() and not item.name.endswith(".tmp"):
+                        stat = item.stat()
+                        files.append((stat.st_mtime, item.name, stat.st_size))
+            files.sort()
+            self._disk_index = OrderedDict((name, size) for _, name, size in files)
+            self._disk_bytes = sum(self._disk_index.values())
+        return self._disk_index
+
+    def _read_disk(self, key: str) -> Optional[CachedResponse]:
+        with self._disk_lock:
+            return self._read_disk_locked(key)
+
+    def _read_disk_locked(self, key: str) -> Optional[CachedResponse]:
+        index = self._load_disk_index()
+        if key not in index:
+            return None
+        path = CACHE_DIR / key
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                chunks = [f.read(length) for length in header["chunks"]]
+            os.utime(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Dropping unreadable response cache file {key}: {e}")
+            self._drop_disk(key)
+            return None
+        index.move_to_end(key)
+        return CachedResponse(
+            status_code=header["status_code"],
+            content_type=header["content_type"],
+            stream=header["stream"],
+            chunks=chunks,
+            upstream_ms=header["upstream_ms"],
+        )
+
+    def _write_disk(self, key: str, entry: CachedResponse):
+        with self._disk_lock:
+            self._write_disk_locked(key, entry)
+
+    def _write_disk_locked(self, key: str, entry: CachedResponse):
+        index = self._load_disk_index()
+        header = {
+            "status_code": entry.status_code,
+            "content_type": entry.content_type,
+            "stream": entry.stream,
+            "upstream_ms": entry.upstream_ms,
+            "chunks": [len(chunk) for chunk in entry.chunks],
+        }
+        path = CACHE_DIR / key
+        tmp_path = CACHE_DIR / f"{key}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(header).encode() + b"\n")
+                for chunk in entry.chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+        except OSError as e:
+            logger.warning(f"Failed to write response cache file {key}: {e}")
+            return
+        self._disk_bytes += size - index.pop(key, 0)
+        index[key] = size
+        while self._disk_bytes > settings.response_cache_disk_max_bytes and index:
+            self._drop_disk(next(iter(index)))
+
+    def _drop_disk(self, key: str):
+        self._disk_bytes -= self._disk_index.pop(key, 0)
+        try:
+            os.unlink(CACHE_DIR / key)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove response cache file {key}: {e}")
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+        if CACHE_DIR.exists():
+            with self._disk_lock:
+                for key in list(self._load_disk_index()):
+                    self._drop_disk(key)
+
+    def get_metrics(self) -> ResponseCacheMetrics:
+        lookups = self.hits + self.misses
+        return ResponseCacheMetrics(
+            enabled=settings.response_cache_enabled,
+            entries=len(self._entries),
+            bytes=self._bytes,
+            max_bytes=settings.response_cache_max_bytes,
+            disk_entries=len(self._disk_index or {}),
+            disk_bytes=self._disk_bytes,
+            disk_max_bytes=settings.response_cache_disk_max_bytes,
+            hits=self.hits,
+            disk_hits=self.disk_hits,
+            misses=self.misses,
+            stores=self.stores,
+            evictions=self.evictions,
+            hit_rate=round(self.hits / lookups, 4) if lookups else None,
+            bytes_saved=self.bytes_saved,
+            upstream_seconds_saved=round(self.upstream_ms_saved / 1000, 3),
+        )
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,120 @@
+import logging
+import os
+import stat
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+INCOMPLETE_SUFFIX = ".incomplete"
+
+
+def mtimes_unchanged(paths: dict[str, int]) -> bool:
+    for path, mtime in paths.items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+@dataclass
+class RepoSize:
+    size_bytes: int = 0
+    files: int = 0
+    dirs: dict[str, int] = field(default_factory=dict)
+    # Partially downloaded blobs grow without touching any directory mtime
+    volatile: bool = False
+
+
+class SizeIndex:
+    def __init__(self):
+        self._repos: dict[str, RepoSize] = {}
+        self._lock = threading.Lock()
+        self.scans = 0
+        self.hits = 0
+
+    def _scan(self, root: str) -> RepoSize:
+        result = RepoSize()
+        seen: set[tuple[int, int]] = set()
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                result.dirs[directory] = os.stat(directory).st_mtime_ns
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            # Follows snapshot symlinks so each blob inode is counted once
+                            info = entry.stat()
+                        except OSError:
+                            continue
+                        if not stat.S_ISREG(info.st_mode):
+                            continue
+                        if entry.name.endswith(INCOMPLETE_SUFFIX):
+                            result.volatile = True
+                        key = (info.st_dev, info.st_ino)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        result.size_bytes += info.st_size
+                        result.files += 1
+            except OSError as e:
+                logger.debug(f"Skipping unreadable directory {directory}: {e}")
+        self.scans += 1
+        return result
+
+    def _size_locked(self, path: str) -> int:
+        entry = self._repos.get(path)
+        if entry is not None and not entry.volatile and mtimes_unchanged(entry.dirs):
+            self.hits += 1
+            return entry.size_bytes
+        if os.path.isfile(path):
+            return os.path.getsize(path)
+        if not os.path.isdir(path):
+            self._repos.pop(path, None)
+            return 0
+        entry = self._scan(path)
+        self._repos[path] = entry
+        return entry.size_bytes
+
+    def size(self, path: Union[str, Path]) -> int:
+        with self._lock:
+            return self._size_locked(str(path))
+
+    def sizes(self, cache_dir: Union[str, Path]) -> dict[str, int]:
+        cache_dir = str(cache_dir)
+        sizes = {}
+        with self._lock:
+            try:
+                with os.scandir(cache_dir) as entries:
+                    repos = [
+                        entry.path
+                        for entry in entries
+                        if entry.is_dir() and not entry.name.startswith(".")
+                    ]
+            except OSError as e:
+                logger.warning(f"Cannot read model cache {cache_dir}: {e}")
+                repos = []
+            for repo in repos:
+                sizes[os.path.basename(repo)] = self._size_locked(repo)
+
+            existing = set(repos)
+            prefix = cache_dir.rstrip(os.sep) + os.sep
+            for path in [p for p in self._repos if p.startswith(prefix)]:
+                if path not in existing:
+                    del self._repos[path]
+        return sizes
+
+    def invalidate(self, path: Union[str, Path]):
+        with self._lock:
+            self._repos.pop(str(path), None)
+
+
+size_index = SizeIndex()
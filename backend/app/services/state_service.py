@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import BaseModel
+
+from app.models.vllm import ModelStatuses
+
+from app.services.cluster_service import cluster_service
+from app.services.inventory_service import inventory_service
+from app.services.launch_tracker import launch_tracker
+from app.services.switch_service import switch_service
+from app.services.vllm_service import vllm_service
+
+logger = logging.getLogger(__name__)
+
+TRANSITION_WINDOW_SECONDS = 60.0
+# Volatile-only changes are still pushed, just not on every poll
+VOLATILE_PUSH_SECONDS = 10.0
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+async def _model_statuses() -> ModelStatuses:
+    statuses = await vllm_service.get_all_statuses()
+    return ModelStatuses({status.instance_id: status for status in statuses})
+
+
+@dataclass
+class StatePart:
+    name: str
+    fetch: Callable[[], Awaitable[BaseModel]]
+    fast_interval: float
+    slow_interval: float
+    is_transitional: Callable[[dict], bool] = lambda data: False
+    # Fields that change on every read, e.g. uptime or probe latency
+    volatile: frozenset[str] = frozenset()
+    value: Optional[dict] = None
+    stale: bool = False
+    updated_at: float = 0.0
+    pushed_at: float = 0.0
+    interval: float = 0.0
+    fast_until: float = 0.0
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class StateService:
+    def __init__(self):
+        self.parts: dict[str, StatePart] = {
+            "cluster": StatePart(
+                name="cluster",
+                fetch=cluster_service.get_status,
+                fast_interval=2.0,
+                slow_interval=30.0,
+                volatile=frozenset({"uptime"}),
+            ),
+            "model": StatePart(
+                name="model",
+                # Keyed by instance id, so each instance diffs on its own
+                fetch=_model_statuses,
+                fast_interval=2.0,
+                slow_interval=15.0,
+                is_transitional=lambda data: launch_tracker.starting()
+                or switch_service.running,
+                volatile=frozenset({"uptime"}),
+            ),
+            "nodes": StatePart(
+                name="nodes",
+                fetch=cluster_service.get_nodes_status,
+                fast_interval=5.0,
+                slow_interval=30.0,
+                volatile=frozenset({"latency_ms", "checked_at", "duration_ms"}),
+            ),
+            "download": StatePart(
+                name="download",
+                # The download tracker pushes progress through update()
+                fetch=inventory_service.get_download_progress,
+                fast_interval=1.0,
+                slow_interval=30.0,
+            ),
+            "downloads": StatePart(
+                name="downloads",
+                # The download queue pushes job changes through update()
+                fetch=inventory_service.get_download_queue,
+                fast_interval=5.0,
+                slow_interval=60.0,
+            ),
+            "distributions": StatePart(
+                name="distributions",
+                # Distribution jobs push per-node progress through update()
+                fetch=inventory_service.get_distributions,
+                fast_interval=5.0,
+                slow_interval=60.0,
+            ),
+        }
+        self._tasks: list[asyncio.Task] = []
+        self._subscribers: set[asyncio.Queue] = set()
+
+    def start(self):
+        if self._tasks:
+            return
+        for part in self.parts.values():
+            part.interval = part.fast_interval
+            self._tasks.append(asyncio.create_task(self._run_part(part)))
+        logger.info(f"State reconciler started for {len(self._tasks)} parts")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def get(self, name: str) -> Optional[dict]:
+        part = self.parts.get(name)
+        if part is None or part.value is None or part.stale or not self._tasks:
+            return None
+        if time.monotonic() - part.updated_at > part.slow_interval * 2:
+            return None
+        return part.value
+
+    def snapshot(self) -> dict[str, Optional[dict]]:
+        return {name: part.value for name, part in self.parts.items()}
+
+    def refresh(self, name: str, transition_seconds: float = TRANSITION_WINDOW_SECONDS):
+        part = self.parts.get(name)
+        if part is None:
+            return
+        part.fast_until = time.monotonic() + transition_seconds
+        # Readers fetch fresh state until the reconciler has caught up
+        part.stale = True
+        part.wake.set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event: dict[str, Any]):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot_event())
+
+    def snapshot_event(self) -> dict[str, Any]:
+        return {
+            "type": "snapshot",
+            "state": self.snapshot(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+        }
+
+    def _stable(self, data: Any, volatile: frozenset[str]) -> Any:
+        if isinstance(data, dict):
+            return {
+                key: self._stable(value, volatile)
+                for key, value in data.items()
+                if key not in volatile
+            }
+        if isinstance(data, list):
+            return [self._stable(value, volatile) for value in data]
+        return data
+
+    def _diff(self, old: Optional[dict], new: dict) -> tuple[dict, list[str]]:
+        if old is None:
+            return new, []
+        changes = {key: value for key, value in new.items() if old.get(key) != value}
+        removed = [key for key in old if key not in new]
+        return changes, removed
+
+    def _next_interval(self, part: StatePart, changed: bool) -> float:
+        if (
+            changed
+            or time.monotonic() < part.fast_until
+            or (part.value is not None and part.is_transitional(part.value))
+        ):
+            return part.fast_interval
+        return min(part.slow_interval, max(part.fast_interval, part.interval * 2))
+
+    async def _refresh_part(self, part: StatePart) -> bool:
+        return self._apply(part, await part.fetch())
+
+    def update(self, name: str, result: BaseModel):
+        part = self.parts.get(name)
+        if part is not None:
+            self._apply(part, result)
+
+    def _apply(self, part: StatePart, result: BaseModel) -> bool:
+        data = result.model_dump(mode="json")
+        previous = part.value
+        changes, removed = self._diff(previous, data)
+
+        part.value = data
+        part.stale = False
+        part.updated_at = time.monotonic()
+
+        if not changes and not removed:
+            return False
+        if (
+            previous is not None
+            and part.volatile
+            and self._stable(previous, part.volatile)
+            == self._stable(data, part.volatile)
+        ):
+            # Only volatile fields moved: not a change for scheduling, and
+            # subscribers get them at most every VOLATILE_PUSH_SECONDS
+            if time.monotonic() - part.pushed_at >= VOLATILE_PUSH_SECONDS:
+                self._publish_diff(part, changes, removed)
+            return False
+
+        self._publish_diff(part, changes, removed)
+        return True
+
+    def _publish_diff(self, part: StatePart, changes: dict, removed: list[str]):
+        part.pushed_at = time.monotonic()
+
+        self.publish(
+            {
+                "type": "diff",
+                "part": part.name,
+                "changes": changes,
+                "removed": removed,
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+            }
+        )
+
+    async def _run_part(self, part: StatePart):
+        while True:
+            part.wake.clear()
+            changed = False
+            try:
+                changed = await self._refresh_part(part)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to refresh {part.name} state: {e}")
+
+            part.interval = self._next_interval(part, changed)
+            try:
+                await asyncio.wait_for(part.wake.wait(), timeout=part.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+state_service = StateService()
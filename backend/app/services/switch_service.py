@@ -0,0 +1,303 @@
+import asyncio
+import json
+import logging
+import shlex
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from app.config import settings
+from app.models.vllm import ModelLaunchConfig, SwitchState, SwitchStep, VLLMInstance
+from app.services.config_service import config_service
+from app.services.exec_session import run_in_container
+from app.services.instance_registry import DEFAULT_INSTANCE_ID, instance_registry
+from app.services.launch_tracker import launch_tracker
+from app.services.vllm_service import vllm_service
+
+logger = logging.getLogger(__name__)
+
+DRAIN_POLL_SECONDS = 1.0
+STOP_TIMEOUT_SECONDS = 30.0
+IN_FLIGHT_METRICS = ("vllm:num_requests_running", "vllm:num_requests_waiting")
+# Launch tracker key of a standby; instance ids cannot contain ':'
+STANDBY_SUFFIX = ":standby"
+
+
+class SwitchError(RuntimeError):
+    pass
+
+
+class SwitchService:
+    def __init__(self):
+        self.current: Optional[SwitchState] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run_docker_command(self, cmd: str) -> tuple[str, str, int]:
+        container_name = config_service.get_container_name()
+        logger.info(f"Running Docker command in {container_name}: {cmd}")
+        return await run_in_container(container_name, cmd)
+
+    def _begin(self, state: SwitchState, name: str):
+        state.steps.append(SwitchStep(name=name, started_at=datetime.utcnow()))
+        state.step = name
+        logger.info(f"Switch {state.switch_id}: {name}")
+
+    def _end(
+        self,
+        state: SwitchState,
+        status: str = "completed",
+        message: Optional[str] = None,
+    ):
+        step = state.steps[-1]
+        step.status = status
+        step.finished_at = datetime.utcnow()
+        step.message = message
+
+    def _standby_files(self, instance: VLLMInstance) -> tuple[str, str]:
+        return (
+            instance.pid_file.replace(".pid", ".standby.pid"),
+            instance.log_file.replace(".log", ".standby.log"),
+        )
+
+    def _standby_id(self, instance: VLLMInstance) -> str:
+        return f"{instance.id}{STANDBY_SUFFIX}"
+
+    def _standby_port(
+        self, config: ModelLaunchConfig, instance: VLLMInstance, active_port: int
+    ) -> int:
+        if config.port != active_port:
+            return config.port
+        base_port = (
+            int(config_service.get_vllm_port())
+            if instance.id == DEFAULT_INSTANCE_ID
+            else active_port
+        )
+        return active_port + 1 if active_port == base_port else base_port
+
+    async def start(
+        self,
+        config: ModelLaunchConfig,
+        instance_id: str = DEFAULT_INSTANCE_ID,
+        profile_id: Optional[str] = None,
+    ) -> SwitchState:
+        if self.running:
+            raise SwitchError("A model switch is already in progress")
+        if not settings.gateway_enabled:
+            # The instance moves to another port; only gateway clients follow it
+            raise SwitchError(
+                "Zero-downtime switching routes traffic through the gateway; "
+                "set SPARK_GATEWAY_ENABLED=true or stop and relaunch instead"
+            )
+
+        instance = instance_registry.get(instance_id)
+        if instance is None:
+            raise SwitchError(f"Unknown vLLM instance: {instance_id}")
+
+        active_pid = await vllm_service.read_pid(instance.pid_file)
+        active_config = await vllm_service.get_running_config(instance_id)
+        if active_pid is None or active_config is None:
+            raise SwitchError("No running model to switch from")
+
+        to_port = self._standby_port(config, instance, active_config.port)
+        owner = instance_registry.port_owner(to_port, exclude=instance_id)
+        if (
+            owner is not None
+            and (await vllm_service.get_model_status(owner.id)).running
+        ):
+            raise SwitchError(
+                f"Port {to_port} is already in use by instance {owner.id}"
+            )
+
+        state = SwitchState(
+            switch_id=str(uuid.uuid4()),
+            instance_id=instance_id,
+            model_id=config.model_id,
+            from_port=active_config.port,
+            to_port=to_port,
+            started_at=datetime.utcnow(),
+        )
+        self.current = state
+        active_launch = launch_tracker.get(instance_id)
+        self._task = asyncio.create_task(
+            self._run(
+                state,
+                instance,
+                config.model_copy(update={"port": to_port}),
+                active_pid,
+                active_launch.launch_id if active_launch else None,
+                profile_id,
+            )
+        )
+        return state
+
+    async def _run(
+        self,
+        state: SwitchState,
+        instance: VLLMInstance,
+        config: ModelLaunchConfig,
+        old_pid: int,
+        old_launch_id: Optional[str],
+        profile_id: Optional[str],
+    ):
+        try:
+            await self._bring_up_standby(state, instance, config, profile_id)
+        except Exception as e:
+            logger.error(f"Switch {state.switch_id} failed, rolling back: {e}")
+            if state.steps and state.steps[-1].finished_at is None:
+                self._end(state, "failed", str(e))
+            state.error = str(e)
+            await self._rollback(state, instance)
+            state.state = "rolled_back"
+            state.finished_at = datetime.utcnow()
+            return
+
+        try:
+            await self._cut_over(state, instance, config)
+            await self._drain(state, state.from_port)
+            if old_launch_id is not None:
+                await launch_tracker.end_run(old_launch_id, "replaced")
+            await self._stop_old(state, old_pid)
+            state.state = "completed"
+        except Exception as e:
+            logger.exception(f"Switch {state.switch_id} failed after cutover: {e}")
+            if state.steps and state.steps[-1].finished_at is None:
+                self._end(state, "failed", str(e))
+            state.error = str(e)
+            state.state = "failed"
+        finally:
+            state.finished_at = datetime.utcnow()
+            vllm_service.invalidate_status(instance.id)
+
+    async def _bring_up_standby(
+        self,
+        state: SwitchState,
+        instance: VLLMInstance,
+        config: ModelLaunchConfig,
+        profile_id: Optional[str],
+    ):
+        self._begin(state, "launch")
+        pid_file, log_file = self._standby_files(instance)
+        _, stderr, returncode = await vllm_service.start_process(
+            config, pid_file, log_file
+        )
+        if returncode != 0:
+            raise SwitchError(f"Failed to launch standby instance: {stderr.strip()}")
+        launch_state = launch_tracker.start(
+            config,
+            vllm_service.container_name,
+            pid_file,
+            log_file,
+            instance_id=self._standby_id(instance),
+            profile_id=profile_id,
+        )
+        state.launch_id = launch_state.launch_id
+        self._end(state, message=f"Standby instance starting on port {config.port}")
+
+        self._begin(state, "readiness")
+        launch_state = await launch_tracker.wait(launch_state.launch_id)
+        if launch_state is None or launch_state.state != "ready":
+            raise SwitchError(
+                (launch_state.error if launch_state else None)
+                or "Standby instance did not become ready"
+            )
+        self._end(state, message=f"Ready in {launch_state.time_to_ready_seconds}s")
+
+        self._begin(state, "warmup")
+        payload = json.dumps(
+            {"model": config.model_id, "prompt": "Hello", "max_tokens": 1}
+        )
+        _, stderr, returncode = await self._run_docker_command(
+            f"curl -sf -X POST http://localhost:{config.port}/v1/completions "
+            f"-H 'Content-Type: application/json' -d {shlex.quote(payload)} > /dev/null"
+        )
+        if returncode != 0:
+            raise SwitchError(f"Warmup request failed: {stderr.strip() or returncode}")
+        self._end(state)
+
+    async def _cut_over(
+        self, state: SwitchState, instance: VLLMInstance, config: ModelLaunchConfig
+    ):
+        self._begin(state, "cutover")
+        pid_file, log_file = self._standby_files(instance)
+        _, stderr, returncode = await self._run_docker_command(
+            f"mv -f {pid_file} {instance.pid_file} && "
+            f"mv -f {log_file} {instance.log_file}"
+        )
+        if returncode != 0:
+            raise SwitchError(f"Failed to promote standby instance: {stderr.strip()}")
+        vllm_service.write_running_config(config, instance.config_file)
+        # The gateway resolves the upstream port from the registry per request
+        instance_registry.register(instance.id, config.port, config.model_id)
+        launch_tracker.promote(self._standby_id(instance), instance.id)
+        vllm_service.invalidate_status(instance.id)
+        self._end(state, message=f"Gateway now routes to port {config.port}")
+
+    async def _in_flight(self, port: int) -> Optional[int]:
+        stdout, _, returncode = await self._run_docker_command(
+            f"curl -sf http://localhost:{port}/metrics"
+        )
+        if returncode != 0:
+            return None
+        total = 0.0
+        for line in stdout.splitlines():
+            if line.startswith(IN_FLIGHT_METRICS):
+                try:
+                    total += float(line.rsplit(" ", 1)[1])
+                except (IndexError, ValueError):
+                    continue
+        return int(total)
+
+    async def _drain(self, state: SwitchState, port: int):
+        self._begin(state, "drain")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.switch_drain_timeout_seconds
+        in_flight = await self._in_flight(port)
+        while in_flight and loop.time() < deadline:
+            await asyncio.sleep(DRAIN_POLL_SECONDS)
+            in_flight = await self._in_flight(port)
+
+        if in_flight:
+            self._end(
+                state,
+                message=f"Drain timed out with {in_flight} requests still in flight",
+            )
+        else:
+            self._end(state, message="No requests in flight")
+
+    async def _kill(self, pid: int):
+        loop = asyncio.get_running_loop()
+        await self._run_docker_command(f"kill {pid} 2>/dev/null")
+        deadline = loop.time() + STOP_TIMEOUT_SECONDS
+        while loop.time() < deadline:
+            stdout, _, _ = await self._run_docker_command(
+                f"kill -0 {pid} 2>/dev/null && echo alive"
+            )
+            if "alive" not in stdout:
+                return
+            await asyncio.sleep(DRAIN_POLL_SECONDS)
+        await self._run_docker_command(f"kill -9 {pid} 2>/dev/null")
+
+    async def _stop_old(self, state: SwitchState, pid: int):
+        self._begin(state, "stop_old")
+        await self._kill(pid)
+        self._end(state, message=f"Stopped previous instance (PID {pid})")
+
+    async def _rollback(self, state: SwitchState, instance: VLLMInstance):
+        self._begin(state, "rollback")
+        pid_file, _ = self._standby_files(instance)
+        try:
+            pid = await vllm_service.read_pid(pid_file)
+            if pid is not None:
+                await self._kill(pid)
+            await self._run_docker_command(f"rm -f {pid_file}")
+            self._end(state, message=f"Still serving from port {state.from_port}")
+        except Exception as e:
+            logger.exception(f"Rollback of switch {state.switch_id} failed: {e}")
+            self._end(state, "failed", str(e))
+
+
+switch_service = SwitchService()
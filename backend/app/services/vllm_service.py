@@ -3,16 +3,103 @@ import json
 import logging
 import os
 import re
+import shlex
+import time
 from pathlib import Path
 from typing import Optional
 
 from app.services.config_service import config_service
-from app.models.vllm import ModelLaunchConfig, ModelStatus, LaunchResult, RunningConfig
+from app.services.exec_session import run_in_container
+from app.services.instance_registry import DEFAULT_INSTANCE_ID, instance_registry
+from app.services.launch_tracker import launch_tracker
+from app.models.vllm import (
+    ModelLaunchConfig,
+    ModelStatus,
+    LaunchResult,
+    RunningConfig,
+    VLLMInstance,
+)
 
 logger = logging.getLogger(__name__)
 
-VLLM_PID_FILE = "/tmp/vllm_server.pid"
-VLLM_CONFIG_FILE = "/tmp/vllm_config.json"
+STATUS_PROBE_TTL_SECONDS = 2.0
+STATUS_PROBE_TIMEOUT_SECONDS = 10.0
+
+STATUS_PROBE_SCRIPT = r"""
+import json, os, sys
+
+pid_file, config_file, log_file, port = sys.argv[1:5]
+
+
+def read(path, limit=None):
+    try:
+        with open(path, "rb") as f:
+            if limit:
+                f.seek(0, 2)
+                f.seek(max(0, f.tell() - limit))
+            return f.read().decode("utf-8", "replace")
+    except OSError:
+        return None
+
+
+def etime(pid):
+    stat = read(f"/proc/{pid}/stat")
+    uptime = read("/proc/uptime")
+    if not stat or not uptime:
+        return None
+    start = int(stat.rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+    seconds = int(float(uptime.split()[0]) - start)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    value = f"{minutes:02d}:{seconds:02d}"
+    if hours or days:
+        value = f"{hours:02d}:{value}"
+    if days:
+        value = f"{days}-{value}"
+    return value
+
+
+def listening_ports():
+    ports = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        for line in (read(table) or "").splitlines()[1:]:
+            fields = line.split()
+            if len(fields) > 3 and fields[3] == "0A":
+                ports.add(int(fields[1].rsplit(":", 1)[1], 16))
+    return sorted(ports)
+
+
+def vllm_pids():
+    pids = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit() and int(entry) != os.getpid():
+            cmdline = read(f"/proc/{entry}/cmdline") or ""
+            if "vllm" in cmdline and f"--port\0{port}\0" in cmdline:
+                pids.append(int(entry))
+    return pids
+
+
+pid = (read(pid_file) or "").strip()
+pid = int(pid) if pid.isdigit() else None
+alive = pid is not None and os.path.exists(f"/proc/{pid}")
+config = read(config_file)
+try:
+    config = json.loads(config) if config else None
+except ValueError:
+    config = None
+tail = (read(log_file, 4096) or "").splitlines()
+
+print(json.dumps({
+    "pid": pid,
+    "alive": alive,
+    "etime": etime(pid) if alive else None,
+    "listening_ports": listening_ports(),
+    "vllm_pids": vllm_pids(),
+    "config": config,
+    "log_tail": tail[-1] if tail else None,
+}))
+"""
 
 
 class VLLMService:
@@ -20,34 +107,34 @@ class VLLMService:
         self.container_name = None
         self.vllm_port = None
         self.spark_docker_path = None
+        self._status_probe_tasks: dict[str, asyncio.Task] = {}
+        self._status_probe_results: dict[str, dict] = {}
+        self._status_probe_at: dict[str, float] = {}
 
     def _get_config(self):
         self.container_name = config_service.get_container_name()
         self.vllm_port = config_service.get_vllm_port()
         self.spark_docker_path = config_service.get_spark_docker_path()
 
-    async def _run_docker_command(self, cmd: str) -> tuple[str, str, int]:
+    async def _run_docker_command(
+        self,
+        cmd: str,
+        persistent: Optional[bool] = None,
+        timeout: Optional[float] = None,
+    ) -> tuple[str, str, int]:
         self._get_config()
         if not self.container_name:
             raise RuntimeError(
                 "Container name not configured. Please set container_name in settings."
             )
 
-        full_cmd = f"docker exec {self.container_name} sh -c '{cmd}'"
-        logger.info(f"Running Docker command: {full_cmd}")
-
-        proc = await asyncio.create_subprocess_shell(
-            full_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+        logger.info(f"Running Docker command in {self.container_name}: {cmd}")
+        return await run_in_container(
+            self.container_name, cmd, persistent=persistent, timeout=timeout
         )
 
-        stdout, stderr = await proc.communicate()
-        return (
-            stdout.decode("utf-8", errors="replace"),
-            stderr.decode("utf-8", errors="replace"),
-            proc.returncode or 0,
-        )
+    def _get_instance(self, instance_id: str) -> VLLMInstance:
+        return instance_registry.require(instance_id)
 
     def _build_vllm_command(self, config: ModelLaunchConfig) -> list[str]:
         cmd_parts = [
@@ -86,12 +173,50 @@ class VLLMService:
 
         return cmd_parts
 
-    async def launch_model(self, config: ModelLaunchConfig) -> LaunchResult:
+    async def start_process(
+        self, config: ModelLaunchConfig, pid_file: str, log_file: str
+    ) -> tuple[str, str, int]:
+        vllm_cmd = " ".join(self._build_vllm_command(config))
+        full_cmd = f"cd /spark-dashboard/spark-vllm-docker && nohup {vllm_cmd} > {log_file} 2>&1 & echo $! > {pid_file}"
+        return await self._run_docker_command(full_cmd, persistent=False)
+
+    def write_running_config(self, config: ModelLaunchConfig, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(config.model_dump(), f)
+        os.replace(tmp_path, path)
+
+    async def read_pid(self, pid_file: str) -> Optional[int]:
+        stdout, _, _ = await self._run_docker_command(f"cat {pid_file} 2>/dev/null")
+        pid_match = re.search(r"(\d+)", stdout)
+        return int(pid_match.group(1)) if pid_match else None
+
+    async def launch_model(
+        self,
+        config: ModelLaunchConfig,
+        instance_id: str = DEFAULT_INSTANCE_ID,
+        profile_id: Optional[str] = None,
+    ) -> LaunchResult:
         try:
-            vllm_cmd = " ".join(self._build_vllm_command(config))
-            full_cmd = f"cd /spark-dashboard/spark-vllm-docker && nohup {vllm_cmd} > /tmp/vllm.log 2>&1 & echo $! > {VLLM_PID_FILE}"
+            instance_registry.validate_id(instance_id)
+        except ValueError as e:
+            return LaunchResult(instance_id=instance_id, success=False, message=str(e))
 
-            stdout, stderr, returncode = await self._run_docker_command(full_cmd)
+        owner = instance_registry.port_owner(config.port, exclude=instance_id)
+        if owner is not None and (await self.get_model_status(owner.id)).running:
+            return LaunchResult(
+                instance_id=instance_id,
+                success=False,
+                message=f"Port {config.port} is already in use by instance {owner.id}",
+            )
+
+        try:
+            instance = instance_registry.register(
+                instance_id, config.port, config.model_id
+            )
+            stdout, stderr, returncode = await self.start_process(
+                config, instance.pid_file, instance.log_file
+            )
 
             logger.info(f"Launch command stdout: {stdout}")
             if stderr:
@@ -101,51 +226,67 @@ class VLLMService:
                 error_msg = stderr or stdout
                 logger.error(f"Failed to launch model: {error_msg}")
                 return LaunchResult(
+                    instance_id=instance_id,
                     success=False,
                     message=f"Failed to launch model: {error_msg.strip()}",
                 )
 
-            config_data = config.model_dump()
-            with open(VLLM_CONFIG_FILE, "w") as f:
-                json.dump(config_data, f)
+            self.write_running_config(config, instance.config_file)
+            self.invalidate_status(instance_id)
+            launch_state = launch_tracker.start(
+                config,
+                self.container_name,
+                instance.pid_file,
+                instance.log_file,
+                instance_id=instance_id,
+                profile_id=profile_id,
+            )
 
             logger.info(
-                f"Successfully launched model {config.model_id} on port {config.port}"
+                f"Successfully launched model {config.model_id} on port {config.port} as instance {instance_id}"
             )
             return LaunchResult(
+                instance_id=instance_id,
                 success=True,
                 message=f"Model {config.model_id} launched successfully on port {config.port}",
                 model_id=config.model_id,
                 port=config.port,
+                launch_id=launch_state.launch_id,
             )
 
         except Exception as e:
             logger.exception(f"Error launching model: {e}")
             return LaunchResult(
+                instance_id=instance_id,
                 success=False,
                 message=f"Unexpected error launching model: {str(e)}",
             )
 
-    async def stop_model(self) -> LaunchResult:
+    async def stop_model(self, instance_id: str = DEFAULT_INSTANCE_ID) -> LaunchResult:
         try:
-            check_cmd = f"cat {VLLM_PID_FILE} 2>/dev/null"
+            instance = self._get_instance(instance_id)
+            check_cmd = f"cat {instance.pid_file} 2>/dev/null"
             stdout, _, _ = await self._run_docker_command(check_cmd)
 
             pid_match = re.search(r"(\d+)", stdout)
             if pid_match:
                 pid = pid_match.group(1)
-                kill_cmd = (
-                    f"kill {pid} 2>/dev/null; rm -f {VLLM_PID_FILE} {VLLM_CONFIG_FILE}"
-                )
+                await launch_tracker.stop(instance_id)
+                kill_cmd = f"kill {pid} 2>/dev/null; rm -f {instance.pid_file} {instance.config_file}"
                 await self._run_docker_command(kill_cmd)
-                logger.info(f"Stopped vLLM process with PID {pid}")
+                self.invalidate_status(instance_id)
+                logger.info(f"Stopped vLLM instance {instance_id} with PID {pid}")
                 return LaunchResult(
+                    instance_id=instance_id,
                     success=True,
                     message="Model stopped successfully",
                 )
             else:
-                logger.warning("No running vLLM process found")
+                logger.warning(
+                    f"No running vLLM process found for instance {instance_id}"
+                )
                 return LaunchResult(
+                    instance_id=instance_id,
                     success=False,
                     message="No running vLLM process found",
                 )
@@ -153,18 +294,167 @@ class VLLMService:
         except Exception as e:
             logger.exception(f"Error stopping model: {e}")
             return LaunchResult(
+                instance_id=instance_id,
                 success=False,
                 message=f"Unexpected error stopping model: {str(e)}",
             )
 
-    async def get_model_status(self) -> ModelStatus:
+    def invalidate_status(self, instance_id: Optional[str] = None):
+        if instance_id is None:
+            self._status_probe_results.clear()
+            self._status_probe_at.clear()
+        else:
+            self._status_probe_results.pop(instance_id, None)
+            self._status_probe_at.pop(instance_id, None)
+
+    async def _run_status_probe(self, instance: VLLMInstance) -> Optional[dict]:
+        probe_cmd = shlex.join(
+            [
+                "python3",
+                "-c",
+                STATUS_PROBE_SCRIPT,
+                instance.pid_file,
+                instance.config_file,
+                instance.log_file,
+                str(instance.port),
+            ]
+        )
+        try:
+            stdout, stderr, returncode = await self._run_docker_command(
+                probe_cmd, timeout=STATUS_PROBE_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Status probe timed out")
+            return None
+
+        if returncode != 0:
+            logger.warning(f"Status probe failed: {stderr.strip()}")
+            return None
+
+        try:
+            return json.loads(stdout)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Failed to parse status probe output: {e}")
+            return None
+
+    async def probe_status(
+        self, instance_id: str = DEFAULT_INSTANCE_ID
+    ) -> Optional[dict]:
+        now = time.monotonic()
+        if (
+            instance_id in self._status_probe_results
+            and now - self._status_probe_at.get(instance_id, 0.0)
+            < STATUS_PROBE_TTL_SECONDS
+        ):
+            return self._status_probe_results[instance_id]
+
+        task = self._status_probe_tasks.get(instance_id)
+        if task is None or task.done():
+            task = asyncio.create_task(
+                self._run_status_probe(self._get_instance(instance_id))
+            )
+            self._status_probe_tasks[instance_id] = task
+
+        result = await asyncio.shield(task)
+        if task is self._status_probe_tasks.get(instance_id) and result is not None:
+            self._status_probe_results[instance_id] = result
+            self._status_probe_at[instance_id] = time.monotonic()
+        return result
+
+    def _status_from_probe(self, probe: dict, instance: VLLMInstance) -> ModelStatus:
+        config = None
+        if probe.get("config"):
+            try:
+                config = RunningConfig(**probe["config"])
+            except Exception as e:
+                logger.warning(f"Ignoring invalid running config: {e}")
+
+        port = config.port if config else instance.port
+        model_id = config.model_id if config else None
+
+        if probe.get("alive"):
+            return ModelStatus(
+                instance_id=instance.id,
+                running=True,
+                model_id=model_id,
+                uptime=probe.get("etime"),
+                port=port,
+                message="vLLM model is running",
+            )
+
+        if port in probe.get("listening_ports", []):
+            return ModelStatus(
+                instance_id=instance.id,
+                running=True,
+                model_id=model_id,
+                uptime=None,
+                port=port,
+                message="vLLM model is running (detected via port check)",
+            )
+
+        if probe.get("vllm_pids"):
+            return ModelStatus(
+                instance_id=instance.id,
+                running=True,
+                model_id=model_id,
+                uptime=None,
+                port=port,
+                message="vLLM model is running (detected via process check)",
+            )
+
+        if probe.get("log_tail"):
+            # stop_model keeps the log for reading, so it is no sign of a live process
+            return ModelStatus(
+                instance_id=instance.id,
+                running=False,
+                model_id=model_id,
+                port=port,
+                message="No vLLM process running (log file from an earlier run exists)",
+            )
+
+        return ModelStatus(
+            instance_id=instance.id,
+            running=False,
+            message="No vLLM process running (PID file not found and no alternative detection methods succeeded)",
+        )
+
+    async def get_model_status(
+        self, instance_id: str = DEFAULT_INSTANCE_ID
+    ) -> ModelStatus:
+        try:
+            instance = self._get_instance(instance_id)
+            probe = await self.probe_status(instance_id)
+            if probe is not None:
+                return self._status_from_probe(probe, instance)
+        except Exception as e:
+            logger.exception(f"Error getting model status: {e}")
+            return ModelStatus(
+                instance_id=instance_id,
+                running=False,
+                message=f"Error checking status: {str(e)}",
+            )
+
+        logger.info("Status probe unavailable, falling back to sequential checks")
+        return await self._get_model_status_sequential(instance)
+
+    async def get_all_statuses(self) -> list[ModelStatus]:
+        return list(
+            await asyncio.gather(
+                *(
+                    self.get_model_status(instance.id)
+                    for instance in instance_registry.list()
+                )
+            )
+        )
+
+    async def _get_model_status_sequential(self, instance: VLLMInstance) -> ModelStatus:
         try:
             self._get_config()
             logger.info(
-                f"Checking model status with container_name={self.container_name}"
+                f"Checking model status of {instance.id} with container_name={self.container_name}"
             )
 
-            check_pid_cmd = f"cat {VLLM_PID_FILE} 2>/dev/null"
+            check_pid_cmd = f"cat {instance.pid_file} 2>/dev/null"
             stdout, stderr, returncode = await self._run_docker_command(check_pid_cmd)
 
             logger.info(
@@ -194,43 +484,45 @@ class VLLMService:
                     if uptime_match:
                         uptime = uptime_match.group(1)
 
-                    config = await self.get_running_config()
+                    config = await self.get_running_config(instance.id)
 
-                    port = int(self.vllm_port) if self.vllm_port else 8000
                     return ModelStatus(
+                        instance_id=instance.id,
                         running=True,
                         model_id=config.model_id if config else None,
                         uptime=uptime,
-                        port=port,
+                        port=config.port if config else instance.port,
                         message="vLLM model is running",
                     )
 
             logger.info("PID file method failed, trying alternative checks")
 
-            check_port_cmd = "ss -tlnp 2>/dev/null | grep ':8000' || netstat -tlnp 2>/dev/null | grep ':8000' || true"
+            port = instance.port
+            check_port_cmd = f"ss -tlnp 2>/dev/null | grep ':{port} ' || netstat -tlnp 2>/dev/null | grep ':{port} ' || true"
             port_output, _, _ = await self._run_docker_command(check_port_cmd)
             logger.info(f"Port check output: '{port_output}'")
 
-            if "8000" in port_output:
-                logger.info("Port 8000 is listening, vLLM appears to be running")
-                config = await self.get_running_config()
+            if f":{port}" in port_output:
+                logger.info(f"Port {port} is listening, vLLM appears to be running")
+                config = await self.get_running_config(instance.id)
                 return ModelStatus(
+                    instance_id=instance.id,
                     running=True,
                     model_id=config.model_id if config else None,
                     uptime=None,
-                    port=8000,
+                    port=port,
                     message="vLLM model is running (detected via port check)",
                 )
 
-            check_pgrep_cmd = "pgrep -f 'vllm' || pgrep -f 'vllm serve' || true"
+            check_pgrep_cmd = f"pgrep -f 'vllm serve.*--port {port}( |$)' || true"
             pgrep_output, _, _ = await self._run_docker_command(check_pgrep_cmd)
             logger.info(f"pgrep output: '{pgrep_output}'")
 
             if pgrep_output.strip():
                 logger.info("vLLM process found via pgrep")
-                config = await self.get_running_config()
-                port = self.vllm_port if self.vllm_port else 8000
+                config = await self.get_running_config(instance.id)
                 return ModelStatus(
+                    instance_id=instance.id,
                     running=True,
                     model_id=config.model_id if config else None,
                     uptime=None,
@@ -238,24 +530,24 @@ class VLLMService:
                     message="vLLM model is running (detected via process check)",
                 )
 
-            check_log_cmd = f"tail -n 1 /tmp/vllm.log 2>/dev/null || echo ''"
+            check_log_cmd = f"tail -n 1 {instance.log_file} 2>/dev/null || echo ''"
             log_output, _, _ = await self._run_docker_command(check_log_cmd)
             logger.info(f"Log file check: '{log_output}'")
 
             if log_output.strip() and "No such file" not in log_output:
                 logger.info("Log file exists and has content")
-                config = await self.get_running_config()
-                port = self.vllm_port if self.vllm_port else 8000
+                config = await self.get_running_config(instance.id)
                 return ModelStatus(
-                    running=True,
+                    instance_id=instance.id,
+                    running=False,
                     model_id=config.model_id if config else None,
-                    uptime=None,
                     port=port,
-                    message="vLLM model may be running (log file exists)",
+                    message="No vLLM process running (log file from an earlier run exists)",
                 )
 
             logger.warning("All checks failed, vLLM does not appear to be running")
             return ModelStatus(
+                instance_id=instance.id,
                 running=False,
                 message="No vLLM process running (PID file not found and no alternative detection methods succeeded)",
             )
@@ -263,13 +555,17 @@ class VLLMService:
         except Exception as e:
             logger.exception(f"Error getting model status: {e}")
             return ModelStatus(
+                instance_id=instance.id,
                 running=False,
                 message=f"Error checking status: {str(e)}",
             )
 
-    async def get_running_config(self) -> Optional[RunningConfig]:
+    async def get_running_config(
+        self, instance_id: str = DEFAULT_INSTANCE_ID
+    ) -> Optional[RunningConfig]:
         try:
-            check_config_cmd = f"cat {VLLM_CONFIG_FILE} 2>/dev/null"
+            instance = self._get_instance(instance_id)
+            check_config_cmd = f"cat {instance.config_file} 2>/dev/null"
             stdout, _, returncode = await self._run_docker_command(check_config_cmd)
 
             if returncode != 0 or not stdout.strip():
@@ -0,0 +1,218 @@
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+from typing import Any, Optional
+
+from app.models.inventory import WeightMetadata
+
+logger = logging.getLogger(__name__)
+
+SAFETENSORS_SUFFIX = ".safetensors"
+SAFETENSORS_INDEX = "model.safetensors.index.json"
+MAX_HEADER_BYTES = 100 * 1024 * 1024
+INTEGER_DTYPE = re.compile(r"^[IU](\d+)$")
+# Scales, zero points and packing metadata that ride along with quantized weights
+AUX_TENSOR = re.compile(
+    r"\.(q?zeros|scales?|g_idx|absmax|quant_map|nested_\w+|\w*_scale(_inv|_\d)?"
+    r"|\w*zero_point|\w*_shape|quant_state(\.\w+)?)$"
+)
+# Low-bit weights stored several to an integer, as GPTQ/AWQ and compressed-tensors do
+PACKED_TENSOR = re.compile(r"\.(qweight|weight_packed)$")
+PACKED_DTYPES = {"U8", "I32"}
+
+
+def read_header(path: str) -> dict[str, Any]:
+    # An 8 byte little-endian length followed by the JSON header, then raw data
+    with open(path, "rb") as f:
+        prefix = f.read(8)
+        if len(prefix) != 8:
+            raise ValueError(f"{path} is too short to be a safetensors file")
+        (length,) = struct.unpack("<Q", prefix)
+        if length > MAX_HEADER_BYTES:
+            raise ValueError(f"{path} has an implausible header length {length}")
+        with mmap.mmap(f.fileno(), 8 + length, access=mmap.ACCESS_READ) as view:
+            return json.loads(view[8:])
+
+
+def _tensor_role(name: str, dtype: str) -> str:
+    if AUX_TENSOR.search(name):
+        return "aux"
+    if PACKED_TENSOR.search(name) or (
+        dtype in PACKED_DTYPES and name.endswith(".weight")
+    ):
+        return "packed"
+    return "param"
+
+
+def _summarize_shard(header: dict[str, Any]) -> dict[tuple[str, str], list[int]]:
+    # (dtype, role) -> [elements, bytes]; small enough to keep for every shard
+    summary: dict[tuple[str, str], list[int]] = {}
+    for name, tensor in header.items():
+        if name == "__metadata__":
+            continue
+        elements = 1
+        for dim in tensor["shape"]:
+            elements *= dim
+        start, end = tensor["data_offsets"]
+        entry = summary.setdefault(
+            (tensor["dtype"], _tensor_role(name, tensor["dtype"])), [0, 0]
+        )
+        entry[0] += elements
+        entry[1] += end - start
+    return summary
+
+
+def _quant_bits(method: str, config: dict[str, Any]) -> Optional[int]:
+    for key in ("bits", "w_bit", "num_bits"):
+        if isinstance(config.get(key), int):
+            return config[key]
+    for group in (config.get("config_groups") or {}).values():
+        bits = (group.get("weights") or {}).get("num_bits")
+        if isinstance(bits, int):
+            return bits
+    if config.get("load_in_4bit"):
+        return 4
+    if config.get("load_in_8bit"):
+        return 8
+    if "fp4" in method.lower():
+        return 4
+    if "fp8" in method.lower():
+        return 8
+    return None
+
+
+def _quantization(
+    config: dict[str, Any], quant_config: dict[str, Any]
+) -> tuple[Optional[str], Optional[int]]:
+    quant = config.get("quantization_config") or {}
+    # ModelOpt checkpoints describe the algorithm in hf_quant_config.json
+    modelopt = quant_config.get("quantization") or {}
+    method = (
+        modelopt.get("quant_algo")
+        or quant.get("quant_algo")
+        or quant.get("quant_method")
+        or quant.get("quant_type")
+    )
+    if not method:
+        return None, None
+    method = str(method)
+    return method.upper(), _quant_bits(method, {**modelopt, **quant})
+
+
+class WeightMetadataReader:
+    def __init__(self):
+        # Keyed by blob hash, so entries never go stale and shared blobs are read once
+        self._shards: dict[str, dict[tuple[str, str], list[int]]] = {}
+        self._json: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _cache_key(self, path: str) -> str:
+        if os.path.islink(path):
+            return os.path.basename(os.readlink(path))
+        info = os.stat(path)
+        return f"{path}:{info.st_size}:{info.st_mtime_ns}"
+
+    def _shard(self, path: str) -> dict[tuple[str, str], list[int]]:
+        key = self._cache_key(path)
+        with self._lock:
+            cached = self._shards.get(key)
+        if cached is None:
+            cached = _summarize_shard(read_header(path))
+            with self._lock:
+                self._shards[key] = cached
+        return cached
+
+    def _read_json(self, path: str) -> dict[str, Any]:
+        if not os.path.exists(path):
+            return {}
+        key = self._cache_key(path)
+        with self._lock:
+            cached = self._json.get(key)
+        if cached is None:
+            with open(path) as f:
+                cached = json.load(f)
+            with self._lock:
+                self._json[key] = cached
+        return cached
+
+    def _shard_names(self, snapshot: str) -> list[str]:
+        index = self._read_json(os.path.join(snapshot, SAFETENSORS_INDEX))
+        if index.get("weight_map"):
+            return sorted(set(index["weight_map"].values()))
+        names = sorted(
+            name for name in os.listdir(snapshot) if name.endswith(SAFETENSORS_SUFFIX)
+        )
+        # Some repos ship both a consolidated checkpoint and the HF one
+        if "model.safetensors" in names:
+            return ["model.safetensors"]
+        return names
+
+    def read(self, snapshot: str) -> Optional[WeightMetadata]:
+        try:
+            names = self._shard_names(snapshot)
+        except (OSError, ValueError) as e:
+            logger.debug(f"Cannot list safetensors in {snapshot}: {e}")
+            return None
+        if not names:
+            return None
+
+        summary: dict[tuple[str, str], list[int]] = {}
+        shards = 0
+        for name in names:
+            path = os.path.join(snapshot, name)
+            try:
+                shard = self._shard(path)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                # Missing while a download is still running, or not safetensors at all
+                logger.debug(f"Skipping safetensors header of {path}: {e}")
+                continue
+            shards += 1
+            for key, (elements, nbytes) in shard.items():
+                entry = summary.setdefault(key, [0, 0])
+                entry[0] += elements
+                entry[1] += nbytes
+        if not shards:
+            return None
+
+        try:
+            config = self._read_json(os.path.join(snapshot, "config.json"))
+            quant_config = self._read_json(
+                os.path.join(snapshot, "hf_quant_config.json")
+            )
+        except (OSError, ValueError) as e:
+            logger.debug(f"Cannot read model config in {snapshot}: {e}")
+            config, quant_config = {}, {}
+        quantization, bits = _quantization(config, quant_config)
+
+        parameters = 0
+        dtypes: dict[str, int] = {}
+        for (dtype, role), (elements, nbytes) in summary.items():
+            dtypes[dtype] = dtypes.get(dtype, 0) + nbytes
+            if role == "aux":
+                continue
+            match = INTEGER_DTYPE.match(dtype)
+            if role == "packed" and match and bits and int(match.group(1)) > bits:
+                # Packed low-bit weights, e.g. eight 4-bit values per I32
+                elements *= int(match.group(1)) // bits
+            parameters += elements
+        if quantization is None and any(
+            dtype.startswith("F8") for dtype, role in summary if role != "aux"
+        ):
+            quantization, bits = "FP8", 8
+
+        return WeightMetadata(
+            parameters=parameters,
+            weight_bytes=sum(dtypes.values()),
+            dtypes=dict(sorted(dtypes.items(), key=lambda item: -item[1])),
+            quantization=quantization,
+            quant_bits=bits,
+            torch_dtype=config.get("torch_dtype") or config.get("dtype"),
+            shards=shards,
+        )
+
+
+weight_metadata = WeightMetadataReader()
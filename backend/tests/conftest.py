@@ -0,0 +1,167 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+
+# Just enough of the Docker Engine API on a unix socket to run execs locally
+class FakeDockerEngine:
+    def __init__(self, socket_path: str, exit_lag: float = 0.2):
+        self.socket_path = socket_path
+        self.exit_lag = exit_lag
+        self.containers = {"vllm"}
+        self.execs: dict[str, dict] = {}
+        self._server = None
+        self._connections: set[asyncio.Task] = set()
+
+    async def start(self):
+        self._server = await asyncio.start_unix_server(self._handle, self.socket_path)
+
+    async def stop(self):
+        self._server.close()
+        for task in self._connections:
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+        for info in self.execs.values():
+            proc = info.get("proc")
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+    async def _respond(self, writer, status: int, body):
+        data = json.dumps(body).encode() if not isinstance(body, bytes) else body
+        writer.write(
+            f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                method, target, _ = request_line.decode().split(" ", 2)
+                path = target.split("?", 1)[0]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                if not await self._route(method, path, body, reader, writer):
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            self._connections.discard(task)
+
+    async def _route(self, method: str, path: str, body: bytes, reader, writer) -> bool:
+        parts = path.strip("/").split("/")
+        if path == "/_ping":
+            await self._respond(writer, 200, b"OK")
+        elif method == "GET" and parts[0] == "containers" and parts[2] == "json":
+            if parts[1] not in self.containers:
+                await self._respond(writer, 404, {"message": "No such container"})
+            else:
+                await self._respond(writer, 200, {"Config": {"Tty": False}})
+        elif method == "POST" and parts[0] == "containers" and parts[2] == "exec":
+            if parts[1] not in self.containers:
+                await self._respond(
+                    writer, 404, {"message": f"No such container: {parts[1]}"}
+                )
+            else:
+                exec_id = uuid.uuid4().hex
+                config = json.loads(body)
+                self.execs[exec_id] = {
+                    "cmd": config["Cmd"],
+                    "stdin": config.get("AttachStdin", False),
+                    "running": True,
+                }
+                await self._respond(writer, 201, {"Id": exec_id})
+        elif method == "GET" and parts[0] == "exec" and parts[2] == "json":
+            info = self.execs[parts[1]]
+            proc = info.get("proc")
+            await self._respond(
+                writer,
+                200,
+                {
+                    "Running": info["running"],
+                    "ExitCode": None if info["running"] else proc.returncode,
+                    "Pid": proc.pid if proc is not None else 0,
+                },
+            )
+        elif method == "POST" and parts[0] == "exec" and parts[2] == "start":
+            await self._start_exec(self.execs[parts[1]], reader, writer)
+            return False
+        else:
+            await self._respond(writer, 404, {"message": f"page not found: {path}"})
+        return True
+
+    async def _start_exec(self, info: dict, reader, writer):
+        proc = await asyncio.create_subprocess_exec(
+            *info["cmd"],
+            stdin=asyncio.subprocess.PIPE if info["stdin"] else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        info["proc"] = proc
+        if info["stdin"]:
+            # Attached stdin hijacks the connection, as with Docker's Upgrade: tcp
+            writer.write(
+                b"HTTP/1.1 101 UPGRADED\r\n"
+                b"Content-Type: application/vnd.docker.raw-stream\r\n"
+                b"Connection: Upgrade\r\nUpgrade: tcp\r\n\r\n"
+            )
+            self._connections.add(asyncio.create_task(self._feed_stdin(reader, proc)))
+        else:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/vnd.docker.raw-stream\r\n"
+                b"Connection: close\r\n\r\n"
+            )
+
+        async def pump(stream, kind: int):
+            while True:
+                data = await stream.read(65536)
+                if not data:
+                    return
+                writer.write(bytes([kind, 0, 0, 0]) + len(data).to_bytes(4, "big"))
+                writer.write(data)
+                await writer.drain()
+
+        try:
+            await asyncio.gather(pump(proc.stdout, 1), pump(proc.stderr, 2))
+            await proc.wait()
+            writer.close()
+        finally:
+            # Docker marks an exec finished a moment after its streams close
+            await asyncio.sleep(self.exit_lag)
+            info["running"] = False
+
+    async def _feed_stdin(self, reader, proc):
+        try:
+            while data := await reader.read(65536):
+                proc.stdin.write(data)
+                await proc.stdin.drain()
+        except (ConnectionError, BrokenPipeError):
+            pass
+        finally:
+            if not proc.stdin.is_closing():
+                proc.stdin.close()
+
+
+@pytest.fixture
+async def fake_docker(tmp_path):
+    engine = FakeDockerEngine(str(tmp_path / "docker.sock"))
+    await engine.start()
+    yield engine
+    await engine.stop()
@@ -0,0 +1,112 @@
+import asyncio
+import importlib.util
+import json
+import socket
+from pathlib import Path
+
+import httpx
+import pytest
+import uvicorn
+import websockets
+from fastapi import FastAPI
+
+from app.routers import cluster
+from app.services.cluster_service import cluster_service
+
+AGENT_PATH = Path(__file__).parent.parent / "agent" / "spark_agent.py"
+
+
+def _load_agent():
+    spec = importlib.util.spec_from_file_location("spark_agent", AGENT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+async def dashboard(monkeypatch):
+    monkeypatch.setattr(
+        "app.services.cluster_service.config_service.get_head_node_ip",
+        lambda: "192.168.5.157",
+    )
+    monkeypatch.setattr(
+        "app.services.cluster_service.config_service.get_worker_node_ips",
+        lambda: ["192.168.5.212"],
+    )
+    monkeypatch.setattr("app.services.cluster_service.settings.agent_token", None)
+    monkeypatch.setattr("app.routers.cluster.settings.agent_token", None)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    app = FastAPI()
+    app.include_router(cluster.router, prefix="/api")
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    yield f"127.0.0.1:{port}"
+    server.should_exit = True
+    await task
+
+
+async def _wait_for(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.05)
+
+
+async def test_agent_streams_telemetry_and_runs_commands(dashboard):
+    spark_agent = _load_agent()
+    agent = spark_agent.Agent(
+        url=spark_agent._agent_url(f"ws://{dashboard}"),
+        node="127.0.0.1",
+        token=None,
+        interval=0.1,
+        allow_commands=True,
+    )
+    task = asyncio.create_task(agent.run())
+    try:
+        await _wait_for(
+            lambda: cluster_service.get_telemetry_history("127.0.0.1")
+            and len(cluster_service.get_telemetry_history("127.0.0.1")) >= 2
+        )
+        async with httpx.AsyncClient(base_url=f"http://{dashboard}") as client:
+            telemetry = (await client.get("/api/cluster/telemetry")).json()
+            local = next(node for node in telemetry if node["node"] == "127.0.0.1")
+            assert local["connected"] and local["commands"]
+            assert local["latest"]["memory"]["total_bytes"] > 0
+
+            response = await client.post(
+                "/api/cluster/nodes/127.0.0.1/run",
+                json={"argv": ["sh", "-c", "echo hi; exit 3"], "timeout_seconds": 5},
+            )
+            assert response.status_code == 200
+            result = response.json()
+            assert (result["stdout"], result["returncode"]) == ("hi\n", 3)
+
+            response = await client.post(
+                "/api/cluster/nodes/192.168.5.212/run", json={"argv": ["true"]}
+            )
+            assert response.status_code == 409
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        agent.sampler.close()
+    await _wait_for(lambda: not cluster_service.agent_connected("127.0.0.1"))
+    assert cluster_service.get_telemetry_history("127.0.0.1") is None
+
+
+@pytest.mark.parametrize("node", ["10.9.9.9", "spoofed-node"])
+async def test_agent_for_unknown_node_is_rejected(dashboard, node):
+    url = f"ws://{dashboard}/api/cluster/agents/ws"
+    async with websockets.connect(url) as ws:
+        await ws.send(json.dumps({"type": "hello", "node": node}))
+        with pytest.raises(websockets.ConnectionClosed) as closed:
+            await asyncio.wait_for(ws.recv(), 5.0)
+    assert closed.value.rcvd.code == 1008
+    assert not cluster_service.agent_connected(node)
+    assert cluster_service.get_telemetry_history(node) is None
@@ -0,0 +1,131 @@
+import hashlib
+import os
+from typing import Optional
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.models import Base
+from app.services import blob_verifier as verifier_module
+from app.services.blob_verifier import BlobVerifier
+
+WEIGHTS = os.urandom(256 * 1024)
+CONFIG = b'{"model_type": "llama"}'
+
+
+def _sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _git_sha1(content: bytes) -> str:
+    return hashlib.sha1(f"blob {len(content)}\0".encode() + content).hexdigest()
+
+
+def _add(
+    repo, name: str, content: bytes, filename: Optional[str] = None, commit: str = "c1"
+):
+    (repo / "blobs").mkdir(parents=True, exist_ok=True)
+    (repo / "blobs" / name).write_bytes(content)
+    if filename is not None:
+        link = repo / "snapshots" / commit / filename
+        link.parent.mkdir(parents=True, exist_ok=True)
+        link.symlink_to(os.path.relpath(repo / "blobs" / name, link.parent))
+
+
+@pytest.fixture
+async def session_maker(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(verifier_module, "async_session_maker", maker)
+    monkeypatch.setattr(verifier_module.settings, "verify_read_bytes", 64 * 1024)
+    yield maker
+    await engine.dispose()
+
+
+@pytest.fixture
+async def verifier(session_maker, monkeypatch):
+    verifier = BlobVerifier()
+
+    async def publish(repo):
+        pass
+
+    monkeypatch.setattr(verifier, "_publish", publish)
+    yield verifier
+    await verifier.stop()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "cache" / "models--org--model"
+    _add(repo, _sha256(WEIGHTS), WEIGHTS, "model.safetensors")
+    _add(repo, _git_sha1(CONFIG), CONFIG, "config.json")
+    return repo
+
+
+async def _verify(verifier: BlobVerifier, repo):
+    verifier.start(str(repo), "org/model")
+    await verifier._tasks[str(repo)]
+    return verifier.state(str(repo))
+
+
+async def test_sha256_and_git_sha1_blobs_pass(verifier, repo):
+    result = await _verify(verifier, repo)
+    assert result.status == "verified"
+    assert (result.blobs_total, result.blobs_checked, result.blobs_cached) == (2, 2, 0)
+    assert result.bytes_hashed == len(WEIGHTS) + len(CONFIG)
+    assert result.corrupt == []
+    assert result.verified_at is not None
+
+
+async def test_corrupt_blobs_are_reported_by_snapshot_filename(verifier, repo):
+    shard = os.urandom(1024)
+    _add(repo, _sha256(shard), shard[:-1] + b"\0", "shards/model-00002.safetensors")
+    tokenizer = b'{"bos_token": "<s>"}'
+    _add(repo, _git_sha1(tokenizer), b"tampered", "tokenizer_config.json", "c2")
+    result = await _verify(verifier, repo)
+    assert result.status == "corrupt"
+    assert result.corrupt == [
+        "shards/model-00002.safetensors",
+        "tokenizer_config.json",
+    ]
+
+
+async def test_unchanged_blobs_skip_rehash(verifier, repo, session_maker):
+    await _verify(verifier, repo)
+    result = await _verify(verifier, repo)
+    assert (result.blobs_cached, result.bytes_hashed) == (2, 0)
+    assert result.status == "verified"
+
+    # The index survives a restart through the database
+    restarted = BlobVerifier()
+    restarted._publish = verifier._publish
+    await restarted.load()
+    assert restarted.state(str(repo)).status == "verified"
+    result = await _verify(restarted, repo)
+    await restarted.stop()
+    assert (result.blobs_cached, result.bytes_hashed) == (2, 0)
+
+    blob = repo / "blobs" / _sha256(WEIGHTS)
+    mtime = blob.stat().st_mtime_ns
+    os.utime(blob, ns=(mtime, mtime + 1_000_000_000))
+    result = await _verify(verifier, repo)
+    assert (result.blobs_cached, result.bytes_hashed) == (1, len(WEIGHTS))
+
+
+async def test_cached_corrupt_blob_stays_corrupt(verifier, repo):
+    (repo / "blobs" / _git_sha1(CONFIG)).write_bytes(b"{}")
+    await _verify(verifier, repo)
+    result = await _verify(verifier, repo)
+    assert result.blobs_cached == 2
+    assert (result.status, result.corrupt) == ("corrupt", ["config.json"])
+
+
+async def test_incomplete_and_unverifiable_blobs(verifier, repo):
+    _add(repo, _sha256(b"partial") + ".incomplete", b"part")
+    _add(repo, "not-a-hash", b"x", "README.md")
+    result = await _verify(verifier, repo)
+    assert result.status == "incomplete"
+    assert (result.blobs_total, result.blobs_checked) == (3, 2)
+    assert result.blobs_unverifiable == 1
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.services.distribution import DistributionService, LocalNode, SSHNode
+from app.services.inventory_service import inventory_service
+
+REPO = "models--org--tiny"
+
+
+def _seed(cache):
+    repo = cache / REPO
+    (repo / "blobs").mkdir(parents=True)
+    (repo / "blobs" / "aaa").write_bytes(b"x" * 1000)
+    (repo / "blobs" / "bbb").write_text("{}")
+    snapshot = repo / "snapshots" / "main1"
+    snapshot.mkdir(parents=True)
+    (snapshot / "model.safetensors").symlink_to("../../blobs/aaa")
+    (snapshot / "config.json").symlink_to("../../blobs/bbb")
+    (repo / "refs").mkdir()
+    (repo / "refs" / "main").write_text("main1")
+
+
+async def test_chain_copies_missing_blobs_and_links_snapshot(tmp_path):
+    _seed(tmp_path / "head")
+    nodes = [LocalNode(f"node{i}", tmp_path / f"node{i}") for i in range(3)]
+    # node1 already has one blob, so only the other one is sent
+    (tmp_path / "node1" / REPO / "blobs").mkdir(parents=True)
+    (tmp_path / "node1" / REPO / "blobs" / "aaa").write_bytes(b"x" * 1000)
+
+    service = DistributionService()
+    job = service.start("org/tiny", nodes, fanout=1, cache_dir=tmp_path / "head")
+    await asyncio.wait_for(service._tasks[job.job_id], 10)
+
+    assert job.status == "completed"
+    assert [node.source for node in job.nodes] == ["head", "node0", "node1"]
+    assert job.nodes[1].bytes_skipped == 1000
+    for i in range(3):
+        repo = tmp_path / f"node{i}" / REPO
+        assert (repo / "snapshots" / "main1" / "model.safetensors").read_bytes() == (
+            b"x" * 1000
+        )
+        assert (repo / "refs" / "main").read_text() == "main1"
+
+
+@pytest.mark.parametrize(
+    "node", ["-oProxyCommand=touch /tmp/pwned", "/tmp/node1", "10.0.0.99"]
+)
+async def test_api_accepts_only_configured_workers(node, monkeypatch):
+    monkeypatch.setattr(
+        "app.services.inventory_service.settings.download_backend", "native"
+    )
+    monkeypatch.setattr(
+        "app.services.inventory_service.config_service.get_worker_node_ips",
+        lambda: ["192.168.5.212"],
+    )
+    with pytest.raises(ValueError, match="not configured"):
+        await inventory_service.distribute_model("org/tiny", nodes=[node])
+
+
+def test_ssh_node_rejects_option_hosts():
+    with pytest.raises(ValueError):
+        SSHNode("-oProxyCommand=id", "/cache")
@@ -0,0 +1,83 @@
+import asyncio
+import os
+
+import pytest
+
+from app.services.docker_client import DockerClient, DockerError
+from app.services.log_service import LogService
+
+
+@pytest.fixture
+async def client(fake_docker):
+    client = DockerClient(fake_docker.socket_path)
+    yield client
+    await client.close()
+
+
+async def test_exec_demuxes_output_and_waits_for_exit_code(client):
+    stdout, stderr, returncode = await client.exec(
+        "vllm", ["sh", "-c", "echo out; echo err >&2; exit 3"]
+    )
+    assert (stdout, stderr, returncode) == ("out\n", "err\n", 3)
+
+
+async def test_exec_with_timeout_hides_pid_line(client):
+    stdout, stderr, returncode = await client.exec(
+        "vllm", ["sh", "-c", "echo out; echo err >&2"], timeout=5.0
+    )
+    assert (stdout, stderr, returncode) == ("out\n", "err\n", 0)
+
+
+async def test_exit_code_is_none_while_running(client, fake_docker):
+    exec_id = await client.create_exec("vllm", ["sleep", "5"])
+    stream = client.stream_exec(exec_id)
+    task = asyncio.create_task(stream.__anext__())
+    await asyncio.sleep(0.2)
+    assert await client.exit_code(exec_id) is None
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await stream.aclose()
+
+
+async def test_timed_out_exec_is_killed(client, fake_docker):
+    with pytest.raises(asyncio.TimeoutError):
+        await client.exec("vllm", ["sleep", "30"], timeout=0.5)
+    sleeper = next(
+        info["proc"]
+        for info in fake_docker.execs.values()
+        if info["cmd"][-2:] == ["sleep", "30"]
+    )
+    await asyncio.wait_for(sleeper.wait(), 2.0)
+    with pytest.raises(ProcessLookupError):
+        os.kill(sleeper.pid, 0)
+
+
+async def test_missing_container_raises_docker_error(client):
+    with pytest.raises(DockerError) as error:
+        await client.exec("missing", ["true"])
+    assert error.value.status_code == 404
+    assert "No such container" in error.value.message
+
+
+async def test_exec_lines_splits_frames_into_lines(client):
+    lines = [
+        line async for line in client.exec_lines("vllm", ["printf", "a\\nbb\\nccc"])
+    ]
+    assert lines == [b"a\n", b"bb\n", b"ccc"]
+
+
+async def test_recent_logs_are_empty_when_the_container_is_gone(
+    client, monkeypatch, tmp_path
+):
+    monkeypatch.setattr("app.services.log_service.docker_client", client)
+    service = LogService()
+    service.container_name = "missing"
+    assert await service.get_recent_logs(log_file=str(tmp_path / "vllm.log")) == []
+
+    log = tmp_path / "vllm.log"
+    log.write_text("INFO 01-01 12:00:00 server started\n")
+    service.container_name = "vllm"
+    entries = await service.get_recent_logs(log_file=str(log))
+    assert [entry.raw_line for entry in entries] == [
+        "INFO 01-01 12:00:00 server started"
+    ]
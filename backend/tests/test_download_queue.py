@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.models.inventory import DownloadJob
+from app.services import download_queue as queue_module
+from app.services import download_tracker as tracker_module
+from app.services.download_queue import DownloadQueue
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    async def fetch_manifest(model_id, revision=None):
+        return {"siblings": []}
+
+    async def noop(*args):
+        pass
+
+    monkeypatch.setattr(tracker_module, "fetch_manifest", fetch_manifest)
+    monkeypatch.setattr(
+        tracker_module.settings, "download_progress_interval_seconds", 0.01
+    )
+    monkeypatch.setattr(queue_module.settings, "hf_cache_dir", str(tmp_path))
+    queue = DownloadQueue()
+    monkeypatch.setattr(queue, "_save", noop)
+    monkeypatch.setattr(queue, "_prune", noop)
+    monkeypatch.setattr(queue, "_publish", lambda: None)
+    return queue
+
+
+@pytest.fixture
+def download(monkeypatch):
+    calls = {"finish": asyncio.Event(), "cancelled": False}
+
+    async def download(model_id, cache_dir, revision=None):
+        try:
+            await calls["finish"].wait()
+        except asyncio.CancelledError:
+            calls["cancelled"] = True
+            raise
+
+    monkeypatch.setattr(queue_module.hf_downloader, "download", download)
+    return calls
+
+
+def _job() -> DownloadJob:
+    return DownloadJob(
+        job_id="job-1",
+        model_id="org/model",
+        status="queued",
+        created_at=datetime.utcnow(),
+    )
+
+
+async def test_job_completes_with_the_download(queue, download):
+    job = _job()
+    run = asyncio.create_task(queue._run(job))
+    await asyncio.sleep(0.05)
+    assert job.status == "downloading"
+    download["finish"].set()
+    await asyncio.wait_for(run, 5.0)
+    assert job.status == "completed"
+    assert job.finished_at is not None
+
+
+async def test_monitor_failure_fails_the_job(queue, download, monkeypatch):
+    def measure(blobs_dir, expected):
+        raise PermissionError(13, "Permission denied", str(blobs_dir))
+
+    monkeypatch.setattr(tracker_module, "_measure", measure)
+    job = _job()
+    await asyncio.wait_for(queue._run(job), 5.0)
+    assert job.status == "failed"
+    assert "Permission denied" in job.error_message
+    assert download["cancelled"]
+    assert job.finished_at is not None
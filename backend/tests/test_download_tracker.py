@@ -0,0 +1,144 @@
+import asyncio
+import os
+
+import pytest
+
+from app.models.inventory import DownloadStatus
+from app.services import download_tracker as tracker_module
+from app.services.download_tracker import DownloadTracker
+
+MIB = 1024**2
+MANIFEST = {
+    "sha": "c1",
+    "siblings": [
+        {
+            "rfilename": "model.safetensors",
+            "lfs": {"sha256": "aaa", "size": 80 * MIB},
+        },
+        {"rfilename": "config.json", "blobId": "bbb", "size": 20 * MIB},
+    ],
+}
+
+
+def _blob(blobs, name: str, size: int):
+    with open(blobs / name, "ab") as f:
+        f.truncate(size)
+
+
+async def _until(predicate):
+    for _ in range(300):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    async def fetch_manifest(model_id, revision=None):
+        return MANIFEST
+
+    monkeypatch.setattr(tracker_module, "fetch_manifest", fetch_manifest)
+    monkeypatch.setattr(
+        tracker_module.settings, "download_progress_interval_seconds", 0.05
+    )
+    return DownloadTracker(on_update=lambda status: None)
+
+
+async def test_progress_and_eta_follow_the_manifest(tracker, tmp_path):
+    blobs = tmp_path / "blobs"
+    blobs.mkdir()
+    _blob(blobs, "aaa.incomplete", 40 * MIB)
+    # Not part of the requested revision
+    _blob(blobs, "zzz", 5 * MIB)
+    finished = asyncio.Event()
+    job = asyncio.create_task(finished.wait())
+
+    tracker.start("org/model", blobs, job=job)
+    status = tracker.status
+    await _until(lambda: status.downloaded_bytes == 40 * MIB)
+    assert (status.total_bytes, status.files_total) == (100 * MIB, 2)
+    assert (status.progress, status.files_done, status.revision) == (40.0, 0, "c1")
+
+    _blob(blobs, "aaa.incomplete", 80 * MIB)
+    await _until(lambda: status.downloaded_bytes == 80 * MIB)
+    assert status.progress == 80.0
+    assert status.speed_mbps > 0
+    assert status.eta_seconds == pytest.approx(
+        20 / status.speed_mbps, rel=0.02, abs=0.1
+    )
+
+    os.rename(blobs / "aaa.incomplete", blobs / "aaa")
+    _blob(blobs, "bbb", 20 * MIB)
+    finished.set()
+    await tracker.wait()
+    assert status.status == "completed"
+    assert (status.progress, status.downloaded_bytes) == (100.0, 100 * MIB)
+    assert (status.files_done, status.speed_mbps, status.eta_seconds) == (
+        2,
+        None,
+        None,
+    )
+
+
+async def test_cancel_stops_monitoring(tracker, tmp_path):
+    job = asyncio.create_task(asyncio.Event().wait())
+    tracker.start("org/model", tmp_path / "blobs", job=job)
+    await _until(lambda: tracker.status.total_bytes)
+    tracker.cancel()
+    assert tracker.status.status == "cancelled"
+    job.cancel()
+
+
+def _finish(tracker, job=None, done=0, partial=False) -> DownloadStatus:
+    tracker.status = DownloadStatus(
+        model_id="org/model", status="downloading", total_bytes=100, speed_mbps=1.0
+    )
+    tracker._finish(done, partial, job)
+    assert tracker.status.speed_mbps is None
+    return tracker.status
+
+
+async def _job(outcome):
+    async def run():
+        if isinstance(outcome, Exception):
+            raise outcome
+
+    task = asyncio.create_task(run())
+    if outcome == "cancel":
+        task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return task
+
+
+async def test_finish_with_job_outcomes(tracker):
+    status = _finish(tracker, await _job(None), done=60)
+    assert (status.status, status.progress, status.downloaded_bytes) == (
+        "completed",
+        100.0,
+        100,
+    )
+
+    status = _finish(tracker, await _job(RuntimeError("disk full")))
+    assert (status.status, status.error_message) == ("failed", "disk full")
+
+    assert _finish(tracker, await _job("cancel")).status == "cancelled"
+
+    tracker._cancelled = True
+    assert _finish(tracker, await _job(None)).status == "cancelled"
+
+
+def test_finish_for_a_script_process(tracker, monkeypatch):
+    log = {"tail": "Fetching 2 files: 100%|##########|\n"}
+    monkeypatch.setattr(tracker_module, "_tail_log", lambda: log["tail"])
+    assert _finish(tracker, done=100).status == "completed"
+    assert _finish(tracker, done=50).status == "completed"
+
+    log["tail"] = "downloading\nOSError: Error: no space left on device\n\n"
+    status = _finish(tracker, done=50)
+    assert status.status == "failed"
+    assert status.error_message == "OSError: Error: no space left on device"
+    # All bytes on disk outweigh an error line in the log
+    assert _finish(tracker, done=100).status == "completed"
+    # A leftover .incomplete blob always means the download did not finish
+    assert _finish(tracker, done=100, partial=True).status == "failed"
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from app.services.docker_client import DockerClient
+from app.services.exec_session import (
+    ExecSession,
+    ExecSessionLost,
+    exec_sessions,
+    run_in_container,
+)
+
+
+@pytest.fixture
+async def client(fake_docker, monkeypatch):
+    client = DockerClient(fake_docker.socket_path)
+    monkeypatch.setattr("app.services.exec_session.docker_client", client)
+    yield client
+    await client.close()
+
+
+@pytest.fixture
+async def session(client):
+    session = ExecSession("vllm")
+    yield session
+    await session.close()
+
+
+async def test_concurrent_commands_get_their_own_output(session):
+    results = await asyncio.gather(
+        *(session.run(f"echo {i}; echo e{i} >&2; exit {i}") for i in range(5))
+    )
+    assert results == [(f"{i}\n", f"e{i}\n", i) for i in range(5)]
+
+
+async def test_timeout_fails_only_the_command_that_timed_out(session, tmp_path):
+    log = tmp_path / "ran"
+    slow = asyncio.create_task(session.run("sleep 5", timeout=0.5))
+    await asyncio.sleep(0.1)
+    others = [
+        asyncio.create_task(session.run(f"echo {i} >> {log}; echo {i}"))
+        for i in range(3)
+    ]
+    with pytest.raises(asyncio.TimeoutError):
+        await slow
+    assert [await task for task in others] == [(f"{i}\n", "", 0) for i in range(3)]
+    assert sorted(log.read_text().split()) == ["0", "1", "2"]
+
+
+async def test_lost_session_does_not_rerun_sent_command(
+    fake_docker, client, tmp_path, monkeypatch
+):
+    monkeypatch.setattr("app.services.exec_session.settings.exec_session_enabled", True)
+    log = tmp_path / "ran"
+    task = asyncio.create_task(
+        run_in_container("vllm", f"echo once >> {log}; sleep 5", timeout=10)
+    )
+    while not log.exists():
+        await asyncio.sleep(0.05)
+    shell = next(info["proc"] for info in fake_docker.execs.values() if info["stdin"])
+    shell.kill()
+    with pytest.raises(ExecSessionLost):
+        await task
+    await exec_sessions.close()
+    assert log.read_text() == "once\n"
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import os
+import socket
+import time
+from datetime import datetime
+
+import httpx
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from starlette.requests import Request
+
+from app.models.vllm import VLLMInstance
+from app.routers import gateway
+from app.services.admission_service import admission_controller
+from app.services.gateway_service import StreamMeter, gateway_service
+
+EVENTS = 2000
+
+
+def _event(i: int) -> bytes:
+    choice = {"choices": [{"text": f"token {i} data: not a frame"}]}
+    return b"data: " + json.dumps(choice).encode() + b"\n\n"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _instance(port: int) -> VLLMInstance:
+    return VLLMInstance(
+        id="bench",
+        port=port,
+        model_id="fake",
+        pid_file="/tmp/fake.pid",
+        config_file="/tmp/fake.json",
+        log_file="/tmp/fake.log",
+        created_at=datetime.utcnow(),
+    )
+
+
+def test_meter_counts_frames_split_across_chunks():
+    meter = StreamMeter(time.perf_counter())
+    stream = b"".join(_event(i) for i in range(3))
+    stream += b'data: {"usage": {"prompt_tokens": 2, "completion_tokens": 3}}\n\n'
+    stream += b"data: [DONE]\n\n"
+    for start in range(0, len(stream), 7):
+        meter.feed(stream[start : start + 7])
+    assert meter.events == 4
+    assert meter.usage() == {"prompt_tokens": 2, "completion_tokens": 3}
+
+
+def test_meter_ignores_data_inside_content():
+    meter = StreamMeter(time.perf_counter())
+    meter.feed(_event(0) + _event(1))
+    assert meter.events == 2
+    assert meter.usage() == {}
+
+
+def _request(body: dict) -> Request:
+    content = json.dumps(body).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": content, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/v1/completions",
+        "headers": [(b"content-type", b"application/json")],
+        "query_string": b"",
+        "client": ("127.0.0.1", 50000),
+    }
+    return Request(scope, receive)
+
+
+def _in_flight(instance: VLLMInstance) -> int:
+    return admission_controller._queue(instance.id).in_flight
+
+
+@pytest.fixture
+def instance(monkeypatch):
+    instance = _instance(_free_port())
+    monkeypatch.setattr(
+        gateway_service, "resolve_instance", lambda model, instance_id=None: instance
+    )
+    monkeypatch.setattr(admission_controller, "upstream_load", lambda instance: None)
+    return instance
+
+
+async def test_ticket_released_when_client_leaves_during_send(instance, monkeypatch):
+    sent = asyncio.Event()
+
+    async def hang(*args):
+        sent.set()
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(gateway_service, "send", hang)
+    task = asyncio.create_task(gateway.proxy("completions", _request({})))
+    await sent.wait()
+    assert _in_flight(instance) == 1
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert _in_flight(instance) == 0
+
+
+async def test_ticket_released_when_stream_never_starts(instance, monkeypatch):
+    closed = asyncio.Event()
+
+    class Upstream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield _event(0)
+
+        async def aclose(self):
+            closed.set()
+
+    async def send(*args):
+        return httpx.Response(
+            200, headers={"content-type": "text/event-stream"}, stream=Upstream()
+        )
+
+    monkeypatch.setattr(gateway_service, "send", send)
+    response = await gateway.proxy("completions", _request({"stream": True}))
+    assert isinstance(response, StreamingResponse)
+    assert _in_flight(instance) == 1
+
+    async def disconnected():
+        return {"type": "http.disconnect"}
+
+    async def discard(message):
+        pass
+
+    await response({"type": "http"}, disconnected, discard)
+    assert _in_flight(instance) == 0
+    assert closed.is_set()
+
+
+async def _serve(app: FastAPI, port: int) -> tuple[uvicorn.Server, asyncio.Task]:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task
+
+
+async def _stream(client: httpx.AsyncClient, url: str) -> tuple[bytes, float]:
+    started = time.perf_counter()
+    async with client.stream("POST", url, json={"stream": True}) as response:
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+    return body, time.perf_counter() - started
+
+
+@pytest.fixture
+async def relay(instance, monkeypatch):
+    upstream = FastAPI()
+
+    @upstream.post("/v1/completions")
+    async def completions():
+        async def events():
+            for i in range(EVENTS):
+                yield _event(i)
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    proxy = FastAPI()
+    proxy.include_router(gateway.router)
+    monkeypatch.setattr(
+        "app.services.gateway_service.settings.gateway_upstream_host", "127.0.0.1"
+    )
+    proxy_port = _free_port()
+    servers = [await _serve(upstream, instance.port), await _serve(proxy, proxy_port)]
+    try:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            yield (
+                client,
+                f"http://127.0.0.1:{instance.port}/v1/completions",
+                f"http://127.0.0.1:{proxy_port}/v1/completions",
+            )
+    finally:
+        for server, task in servers:
+            server.should_exit = True
+            await task
+        await gateway_service.close()
+
+
+async def test_relay_passes_every_frame_through(relay):
+    client, direct_url, proxied_url = relay
+    direct, _ = await _stream(client, direct_url)
+    proxied, _ = await _stream(client, proxied_url)
+    assert proxied == direct
+    assert proxied.count(b"\n\n") == EVENTS + 1
+    assert gateway_service.get_recent()[0].chunks == EVENTS
+
+
+@pytest.mark.skipif(
+    not os.environ.get("SPARK_BENCHMARK"),
+    reason="timing benchmark, run with SPARK_BENCHMARK=1",
+)
+async def test_relay_overhead_per_event_is_sub_millisecond(relay):
+    client, direct_url, proxied_url = relay
+    await _stream(client, direct_url)
+    await _stream(client, proxied_url)
+    direct = min([(await _stream(client, direct_url))[1] for _ in range(3)])
+    proxied = min([(await _stream(client, proxied_url))[1] for _ in range(3)])
+    per_event_ms = (proxied - direct) / EVENTS * 1000
+    assert per_event_ms < 1.0, (
+        f"direct {direct * 1000:.1f} ms, proxied {proxied * 1000:.1f} ms "
+        f"for {EVENTS} events"
+    )
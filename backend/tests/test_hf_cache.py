@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from app.services.hf_cache import HFCacheScanner, repo_id_from_dir
+
+
+def _blob(repo, name: str, size: int):
+    blob = repo / "blobs" / name
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    blob.write_bytes(b"\0" * size)
+
+
+def _link(repo, commit: str, filename: str, blob: str):
+    link = repo / "snapshots" / commit / filename
+    link.parent.mkdir(parents=True, exist_ok=True)
+    depth = "../" * (filename.count("/") + 2)
+    link.symlink_to(f"{depth}blobs/{blob}")
+
+
+def _ref(repo, name: str, commit: str):
+    ref = repo / "refs" / name
+    ref.parent.mkdir(parents=True, exist_ok=True)
+    ref.write_text(commit)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    repo = tmp_path / "models--org--model"
+    _blob(repo, "weights", 1000)
+    _blob(repo, "config", 10)
+    _blob(repo, "tokenizer", 20)
+    _ref(repo, "main", "c1")
+    _ref(repo, "pr/1", "c2")
+    _link(repo, "c1", "model.safetensors", "weights")
+    _link(repo, "c1", "config.json", "config")
+    _link(repo, "c2", "model.safetensors", "weights")
+    _link(repo, "c2", "tokenizer/tokenizer.json", "tokenizer")
+    # Blob removed behind the cache's back
+    _link(repo, "c2", "missing.bin", "gone")
+    (tmp_path / "datasets--org--data").mkdir()
+    (tmp_path / ".locks").mkdir()
+    return tmp_path
+
+
+def test_repo_id_from_dir():
+    assert repo_id_from_dir("models--org--some-model") == "org/some-model"
+    assert repo_id_from_dir("datasets--org--data") is None
+
+
+def test_scan_parses_refs_snapshots_and_blobs(cache):
+    (repo,) = HFCacheScanner().scan(cache)
+    assert repo.repo_id == "org/model"
+    assert repo.refs == {"main": "c1", os.path.join("pr", "1"): "c2"}
+    assert repo.revision == "c1"
+    c1, c2 = repo.revisions
+    assert (c1.commit, c1.refs, c1.files, c1.size_bytes) == ("c1", ["main"], 2, 1010)
+    assert c2.refs == [os.path.join("pr", "1")]
+    # The dangling symlink is skipped, nested snapshot dirs are walked
+    assert (c2.files, c2.size_bytes) == (2, 1020)
+    assert c1.last_modified is not None
+    assert repo.incomplete == []
+
+
+def test_incomplete_blobs_are_listed_and_rescanned(cache):
+    repo_dir = cache / "models--org--model"
+    _blob(repo_dir, "abc.incomplete", 5)
+    scanner = HFCacheScanner()
+    (repo,) = scanner.scan(cache)
+    assert [(b.name, b.size_bytes) for b in repo.incomplete] == [("abc.incomplete", 5)]
+    with open(repo_dir / "blobs" / "abc.incomplete", "ab") as f:
+        f.write(b"\0" * 5)
+    (repo,) = scanner.scan(cache)
+    assert repo.incomplete[0].size_bytes == 10
+
+
+def test_ref_rewritten_in_place_is_picked_up(cache):
+    repo_dir = cache / "models--org--model"
+    scanner = HFCacheScanner()
+    first = scanner.scan_repo(repo_dir)
+    assert scanner.scan_repo(repo_dir) is first
+
+    ref = repo_dir / "refs" / "main"
+    mtime = ref.stat().st_mtime_ns
+    ref.write_text("c2")
+    os.utime(ref, ns=(mtime, mtime + 1_000_000_000))
+    repo = scanner.scan_repo(repo_dir)
+    assert repo is not first
+    assert repo.revision == "c2"
+
+
+def test_revision_falls_back_to_latest_snapshot(cache):
+    repo_dir = cache / "models--org--model"
+    (repo_dir / "refs" / "main").unlink()
+    newer = (repo_dir / "snapshots" / "c2" / "model.safetensors").stat().st_mtime + 60
+    os.utime(repo_dir / "blobs" / "tokenizer", (newer, newer))
+    assert HFCacheScanner().scan_repo(repo_dir).revision == "c2"
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote
+
+import pytest
+
+from app.services.hf_downloader import DownloadError, HFDownloader
+from app.services.size_index import INCOMPLETE_SUFFIX
+
+MODEL = "org/tiny"
+COMMIT = "c" * 40
+TOKEN = "hf_secret"
+WEIGHTS = bytes(range(256)) * 41 + b"tail"
+CONFIG = b'{"model_type": "tiny"}'
+
+
+def _git_blob(data: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class Hub:
+    # The hub redirects resolve URLs to a CDN on another port, like the real one
+    def __init__(self):
+        self.files = {"model.safetensors": WEIGHTS, "configs/config.json": CONFIG}
+        self.digests = {"model.safetensors": hashlib.sha256(WEIGHTS).hexdigest()}
+        self.requests: list[tuple[str, str, str, str]] = []
+        self.hub = self._serve("hub")
+        self.cdn = self._serve("cdn")
+
+    def url(self, server) -> str:
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    def manifest(self) -> dict:
+        siblings = [
+            {"rfilename": "configs/config.json", "blobId": _git_blob(CONFIG)},
+            {
+                "rfilename": "model.safetensors",
+                "lfs": {"sha256": self.digests["model.safetensors"]},
+            },
+        ]
+        for sibling in siblings:
+            sibling["size"] = len(self.files[sibling["rfilename"]])
+            if "lfs" in sibling:
+                sibling["lfs"]["size"] = sibling["size"]
+        return {"sha": COMMIT, "siblings": siblings}
+
+    def ranges(self, name: str) -> list[str]:
+        return [r[3] for r in self.requests if r[:3] == ("cdn", "GET", f"/cdn/{name}")]
+
+    def _serve(self, role: str) -> ThreadingHTTPServer:
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self.do_GET(head=True)
+
+            def do_GET(self, head=False):
+                path = unquote(self.path.split("?")[0])
+                method = "HEAD" if head else "GET"
+                hub.requests.append((role, method, path, self.headers.get("Range", "")))
+                auth = self.headers.get("Authorization")
+                if role == "cdn" and auth:
+                    return self._send(400, b"token leaked to the CDN")
+                if role == "hub" and auth != f"Bearer {TOKEN}":
+                    return self._send(401, b"")
+                if path.startswith(f"/api/models/{MODEL}/revision/"):
+                    return self._send(200, json.dumps(hub.manifest()).encode())
+                if path.startswith(f"/{MODEL}/resolve/{COMMIT}/"):
+                    name = path.split(f"/{COMMIT}/", 1)[1]
+                    location = f"{hub.url(hub.cdn)}/cdn/{name}"
+                    return self._send(302, b"", {"Location": location})
+                if role == "cdn" and path.startswith("/cdn/"):
+                    data = hub.files[path[len("/cdn/") :]]
+                    if head or "Range" not in self.headers:
+                        return self._send(200, b"" if head else data)
+                    start, end = self.headers["Range"].split("=")[1].split("-")
+                    start, end = int(start), min(int(end), len(data) - 1)
+                    return self._send(
+                        206,
+                        data[start : end + 1],
+                        {"Content-Range": f"bytes {start}-{end}/{len(data)}"},
+                    )
+                self._send(404, b"")
+
+            def _send(self, status: int, body: bytes, headers: Optional[dict] = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def close(self):
+        for server in (self.hub, self.cdn):
+            server.shutdown()
+            server.server_close()
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = Hub()
+    monkeypatch.setattr("app.services.hf_hub.settings.hf_endpoint", hub.url(hub.hub))
+    monkeypatch.setattr("app.services.hf_hub.settings.hf_token", TOKEN)
+    monkeypatch.setattr(
+        "app.services.hf_downloader.settings.download_chunk_bytes", 1000
+    )
+    monkeypatch.setattr("app.services.hf_downloader.settings.download_retries", 1)
+    yield hub
+    hub.close()
+
+
+def _repo(cache) -> Path:
+    return cache / f"models--{MODEL.replace('/', '--')}"
+
+
+async def test_download_fetches_ranges_and_builds_cache_layout(hub, tmp_path):
+    result = await HFDownloader().download(MODEL, str(tmp_path))
+
+    assert result.commit == COMMIT
+    assert result.bytes_downloaded == len(WEIGHTS) + len(CONFIG)
+    ranges = hub.ranges("model.safetensors")
+    assert sorted(ranges, key=lambda r: int(r.split("=")[1].split("-")[0])) == [
+        f"bytes={start}-{min(start + 1000, len(WEIGHTS)) - 1}"
+        for start in range(0, len(WEIGHTS), 1000)
+    ]
+
+    repo = _repo(tmp_path)
+    snapshot = repo / "snapshots" / COMMIT
+    weights = snapshot / "model.safetensors"
+    config = snapshot / "configs" / "config.json"
+    assert os.readlink(weights) == f"../../blobs/{hub.digests['model.safetensors']}"
+    assert os.readlink(config) == f"../../../blobs/{_git_blob(CONFIG)}"
+    assert weights.read_bytes() == WEIGHTS
+    assert config.read_bytes() == CONFIG
+    assert (repo / "refs" / "main").read_text() == COMMIT
+    assert not list((repo / "blobs").glob(f"*{INCOMPLETE_SUFFIX}"))
+
+
+async def test_download_resumes_from_incomplete_blob(hub, tmp_path):
+    blobs = _repo(tmp_path) / "blobs"
+    blobs.mkdir(parents=True)
+    digest = hub.digests["model.safetensors"]
+    (blobs / f"{digest}{INCOMPLETE_SUFFIX}").write_bytes(WEIGHTS[:3000])
+
+    result = await HFDownloader().download(MODEL, str(tmp_path))
+
+    assert result.bytes_reused == 3000
+    assert (
+        min(int(r.split("=")[1].split("-")[0]) for r in hub.ranges("model.safetensors"))
+        == 3000
+    )
+    assert (blobs / digest).read_bytes() == WEIGHTS
+
+
+async def test_hash_mismatch_discards_partial_file(hub, tmp_path):
+    hub.digests["model.safetensors"] = "0" * 64
+
+    with pytest.raises(DownloadError, match="hash mismatch"):
+        await HFDownloader().download(MODEL, str(tmp_path))
+
+    blobs = _repo(tmp_path) / "blobs"
+    assert not (blobs / f"{'0' * 64}{INCOMPLETE_SUFFIX}").exists()
+    assert not (blobs / ("0" * 64)).exists()
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from app.services import inventory_watcher as watcher_module
+from app.services.inventory_watcher import InventoryWatcher
+
+DEBOUNCE = 0.2
+
+
+@pytest.fixture
+async def watched(tmp_path, monkeypatch):
+    repo = tmp_path / "models--org--model"
+    (repo / "blobs").mkdir(parents=True)
+    (tmp_path / ".locks").mkdir()
+
+    inventory = watcher_module.inventory_service
+    calls = {"rebuild": 0, "refresh": []}
+
+    async def rebuild_index():
+        calls["rebuild"] += 1
+        return []
+
+    async def refresh_repos(paths):
+        calls["refresh"].append(paths)
+        return [{"event": "model_updated", "model_id": "org/model"}]
+
+    monkeypatch.setattr(inventory, "_get_hf_cache_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(inventory, "rebuild_index", rebuild_index)
+    monkeypatch.setattr(inventory, "refresh_repos", refresh_repos)
+    monkeypatch.setattr(watcher_module.state_service, "publish", lambda event: None)
+    monkeypatch.setattr(
+        watcher_module.settings, "inventory_watch_debounce_seconds", DEBOUNCE
+    )
+    monkeypatch.setattr(watcher_module.settings, "inventory_watch_enabled", True)
+
+    watcher = InventoryWatcher()
+    watcher.start()
+    while watcher.mode is None:
+        await asyncio.sleep(0.01)
+    if watcher.mode != "inotify":
+        await watcher.stop()
+        pytest.skip("inotify is not available")
+    try:
+        yield watcher, tmp_path, repo, calls
+    finally:
+        await watcher.stop()
+
+
+async def _wait_for_refresh(calls, count: int):
+    for _ in range(200):
+        if len(calls["refresh"]) >= count:
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"expected {count} refreshes, got {calls['refresh']}")
+
+
+async def test_burst_of_writes_coalesces_into_one_refresh(watched):
+    watcher, _, repo, calls = watched
+    partial = repo / "blobs" / "abc.incomplete"
+    with open(partial, "wb") as f:
+        for _ in range(50):
+            f.write(b"\0" * 4096)
+            f.flush()
+    partial.rename(repo / "blobs" / "abc")
+
+    await _wait_for_refresh(calls, 1)
+    await asyncio.sleep(DEBOUNCE * 2)
+    assert calls["refresh"] == [{str(repo)}]
+    assert calls["rebuild"] == 1
+
+
+async def test_new_repo_is_watched_and_refreshed(watched):
+    watcher, cache, _, calls = watched
+    repo = cache / "models--org--new"
+    (repo / "blobs").mkdir(parents=True)
+    await _wait_for_refresh(calls, 1)
+    assert calls["refresh"] == [{str(repo)}]
+
+    # Directories created under the new repo are watched too
+    await asyncio.sleep(DEBOUNCE)
+    (repo / "blobs" / "weights").write_bytes(b"\0")
+    await _wait_for_refresh(calls, 2)
+    assert calls["refresh"][1] == {str(repo)}
+
+
+async def test_non_model_directories_are_ignored(watched):
+    watcher, cache, _, calls = watched
+    (cache / ".locks" / "lock").write_text("")
+    (cache / "datasets--org--data").mkdir()
+    await asyncio.sleep(DEBOUNCE * 3)
+    assert calls["refresh"] == []
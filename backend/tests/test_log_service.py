@@ -0,0 +1,53 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from app.models.vllm import VLLMInstance
+from app.services.instance_registry import instance_registry
+from app.services.log_service import LogService, LogSource
+
+
+@pytest.fixture
+def instances(monkeypatch):
+    now = datetime.utcnow()
+    monkeypatch.setattr(
+        instance_registry,
+        "_instances",
+        {
+            instance_id: VLLMInstance(
+                id=instance_id,
+                port=port,
+                created_at=now,
+                **instance_registry._files(instance_id),
+            )
+            for instance_id, port in (("default", 8000), ("blue", 8001))
+        },
+    )
+    monkeypatch.setattr(
+        "app.services.log_service.config_service.get_worker_node_ips", lambda: []
+    )
+
+
+def test_merged_sources_follow_the_requested_instance(instances):
+    service = LogService()
+    paths = [s.path for s in service.select_sources(["vllm"], instance_id="blue")]
+    assert paths == ["/tmp/vllm.blue.log"]
+    paths = [s.path for s in service.select_sources(["all"], instance_id="default")]
+    assert "/tmp/vllm.log" in paths and "/tmp/vllm.blue.log" not in paths
+
+
+async def test_remote_tail_reaps_its_process(monkeypatch):
+    service = LogService()
+    monkeypatch.setattr(
+        service,
+        "_build_remote_command",
+        lambda source, lines, follow: ["sh", "-c", "echo $$; exec sleep 30"],
+    )
+    source = LogSource(id="w:ray", node="w", kind="ray_worker", container="c")
+    lines = service._remote_source_lines(source, 10, follow=True)
+    pid = int(await lines.__anext__())
+    await lines.aclose()
+    # A terminated but unreaped child would still accept signal 0 as a zombie
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
@@ -0,0 +1,76 @@
+import pytest
+
+from app.services import network_monitor as monitor_module
+from app.services.network_monitor import LinkWindow, NetworkMonitor
+
+PING_OUTPUT = b"""PING 10.0.0.2 (10.0.0.2) 56(84) bytes of data.
+64 bytes from 10.0.0.2: icmp_seq=1 ttl=64 time=0.500 ms
+64 bytes from 10.0.0.2: icmp_seq=2 ttl=64 time=0.700 ms
+no answer yet for icmp_seq=3
+64 bytes from 10.0.0.2: icmp_seq=4 ttl=64 time=0.400 ms
+64 bytes from 10.0.0.2: icmp_seq=5 ttl=64 time=2.00 ms
+"""
+
+
+def _window(output: bytes) -> LinkWindow:
+    window = LinkWindow("dashboard", "10.0.0.2", "icmp")
+    for line in output.splitlines(keepends=True):
+        window.feed_ping_line(line)
+    return window
+
+
+def test_flush_reports_loss_percentiles_and_jitter():
+    stats = _window(PING_OUTPUT).flush()
+    assert (stats.samples, stats.lost, stats.loss_pct) == (5, 1, 20.0)
+    assert (stats.rtt_min_ms, stats.rtt_max_ms) == (0.4, 2.0)
+    assert (stats.rtt_p50_ms, stats.rtt_p95_ms, stats.rtt_p99_ms) == (0.7, 2.0, 2.0)
+    # Mean of |0.7-0.5|, |0.4-0.7|, |2.0-0.4| in sequence order
+    assert stats.jitter_ms == 0.7
+
+
+def test_late_reply_replaces_no_answer_and_flush_resets():
+    window = _window(
+        b"no answer yet for icmp_seq=1\n"
+        b"64 bytes from 10.0.0.2: icmp_seq=1 ttl=64 time=1.5 ms\n"
+    )
+    stats = window.flush()
+    assert (stats.samples, stats.lost, stats.rtt_p50_ms) == (1, 0, 1.5)
+    assert stats.jitter_ms is None
+    assert window.flush() is None
+
+
+def test_flush_with_only_losses_has_no_rtt():
+    stats = _window(
+        b"no answer yet for icmp_seq=1\nno answer yet for icmp_seq=2\n"
+    ).flush()
+    assert (stats.samples, stats.lost, stats.loss_pct) == (2, 2, 100.0)
+    assert stats.rtt_p50_ms is None and stats.rtt_min_ms is None
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    config = monitor_module.config_service
+    monkeypatch.setattr(config, "get_head_node_ip", lambda: "10.0.0.1")
+    monkeypatch.setattr(config, "get_worker_node_ips", lambda: ["10.0.0.2"])
+    return NetworkMonitor()
+
+
+def test_validate_node_rejects_unconfigured_host(monitor):
+    monitor._validate_node("10.0.0.2")
+    monitor._validate_node("127.0.0.1")
+    with pytest.raises(ValueError, match="not a configured node"):
+        monitor._validate_node("10.9.9.9")
+
+
+async def test_throughput_test_rejects_unconfigured_host(monitor):
+    with pytest.raises(ValueError):
+        await monitor.run_throughput_test("127.0.0.1", "evil.example; rm -rf /", 1, 1)
+
+
+async def test_throughput_test_over_loopback(monitor):
+    result = await monitor.run_throughput_test("127.0.0.1", "127.0.0.1", 0.3, 2)
+    assert result.success, result.error
+    assert result.streams == 2
+    assert result.bytes_sent > 0
+    assert result.bytes_received == result.bytes_sent
+    assert result.gbps > 0
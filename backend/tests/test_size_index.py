@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from app.services.size_index import SizeIndex
+
+
+def _write(path, size: int):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\0" * size)
+
+
+def _settle(directory):
+    # Coarse filesystem timestamps can leave the mtime unchanged within a tick
+    mtime = directory.stat().st_mtime_ns
+    os.utime(directory, ns=(mtime, mtime + 1_000_000_000))
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "models--org--model"
+    _write(repo / "blobs" / "aaa", 100)
+    _write(repo / "blobs" / "bbb", 50)
+    snapshot = repo / "snapshots" / "rev1"
+    snapshot.mkdir(parents=True)
+    (snapshot / "model.safetensors").symlink_to("../../blobs/aaa")
+    (snapshot / "config.json").symlink_to("../../blobs/bbb")
+    return repo
+
+
+def test_blobs_are_counted_once_and_cached(repo):
+    index = SizeIndex()
+    assert index.size(repo) == 150
+    assert index.size(repo) == 150
+    assert (index.scans, index.hits) == (1, 1)
+
+
+def test_new_blob_triggers_rescan(repo):
+    index = SizeIndex()
+    index.size(repo)
+    _write(repo / "blobs" / "ccc", 25)
+    _settle(repo / "blobs")
+    assert index.size(repo) == 175
+    assert index.scans == 2
+
+
+def test_replaced_blob_updates_size(repo):
+    index = SizeIndex()
+    index.size(repo)
+    _write(repo / "blobs" / "aaa.tmp", 300)
+    os.replace(repo / "blobs" / "aaa.tmp", repo / "blobs" / "aaa")
+    _settle(repo / "blobs")
+    assert index.size(repo) == 350
+    assert index.size(repo) == 350
+    assert (index.scans, index.hits) == (2, 1)
+
+
+def test_incomplete_blob_is_rescanned_while_it_grows(repo):
+    index = SizeIndex()
+    partial = repo / "blobs" / "ddd.incomplete"
+    _write(partial, 10)
+    assert index.size(repo) == 160
+    # Appending does not touch any directory mtime
+    with open(partial, "ab") as f:
+        f.write(b"\0" * 40)
+    assert index.size(repo) == 200
+    assert index.hits == 0
+
+
+def test_sizes_drops_deleted_repos(repo, tmp_path):
+    other = tmp_path / "models--org--other"
+    _write(other / "blobs" / "eee", 7)
+    index = SizeIndex()
+    assert index.sizes(tmp_path) == {repo.name: 150, other.name: 7}
+    (other / "blobs" / "eee").unlink()
+    (other / "blobs").rmdir()
+    other.rmdir()
+    assert index.sizes(tmp_path) == {repo.name: 150}
+    assert str(other) not in index._repos
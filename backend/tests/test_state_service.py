@@ -0,0 +1,57 @@
+from app.models.vllm import ModelStatus
+from app.services import state_service as state_module
+from app.services.state_service import StateService
+
+
+def _statuses(**running: bool) -> list[ModelStatus]:
+    return [
+        ModelStatus(instance_id=instance_id, running=up, uptime="1s" if up else None)
+        for instance_id, up in running.items()
+    ]
+
+
+async def test_model_part_is_keyed_by_instance(monkeypatch):
+    service = StateService()
+    queue = service.subscribe()
+    part = service.parts["model"]
+    results = iter(
+        [_statuses(default=True, blue=False), _statuses(default=True, blue=True)]
+    )
+
+    async def get_all_statuses():
+        return next(results)
+
+    monkeypatch.setattr(state_module.vllm_service, "get_all_statuses", get_all_statuses)
+    await service._refresh_part(part)
+    assert set(part.value) == {"default", "blue"}
+    queue.get_nowait()
+
+    assert await service._refresh_part(part)
+    diff = queue.get_nowait()
+    assert diff["part"] == "model"
+    assert list(diff["changes"]) == ["blue"]
+    assert diff["changes"]["blue"]["running"] is True
+
+
+def test_volatile_changes_are_pushed_throttled(monkeypatch):
+    service = StateService()
+    queue = service.subscribe()
+    part = service.parts["model"]
+    clock = [1000.0]
+    monkeypatch.setattr(state_module.time, "monotonic", lambda: clock[0])
+
+    def apply(uptime: str) -> bool:
+        status = ModelStatus(instance_id="default", running=True, uptime=uptime)
+        return service._apply(part, state_module.ModelStatuses({"default": status}))
+
+    assert apply("1s")
+    queue.get_nowait()
+
+    clock[0] += 2
+    assert not apply("3s")
+    assert queue.empty()
+    assert part.value["default"]["uptime"] == "3s"
+
+    clock[0] += state_module.VOLATILE_PUSH_SECONDS
+    assert not apply("13s")
+    assert queue.get_nowait()["changes"]["default"]["uptime"] == "13s"
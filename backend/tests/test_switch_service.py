@@ -0,0 +1,122 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.vllm import LaunchState, ModelLaunchConfig, SwitchState, VLLMInstance
+from app.services import switch_service as switch_module
+from app.services.gateway_service import gateway_service
+from app.services.instance_registry import instance_registry
+from app.services.launch_tracker import LaunchTracker
+from app.services.switch_service import SwitchError, SwitchService
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = LaunchTracker()
+    outcome = {"value": "ready"}
+
+    async def track(state, container, pid_file, log_file):
+        tracker._finish(state, outcome["value"], error="boom")
+
+    monkeypatch.setattr(tracker, "_track", track)
+    monkeypatch.setattr(tracker, "_save", lambda *args, **kwargs: None)
+    monkeypatch.setattr(switch_module, "launch_tracker", tracker)
+    tracker.outcome = outcome
+    return tracker
+
+
+@pytest.fixture
+def instance(monkeypatch):
+    instance = VLLMInstance(
+        id="default",
+        port=8000,
+        model_id="old/model",
+        created_at=datetime.utcnow(),
+        **instance_registry._files("default"),
+    )
+    monkeypatch.setattr(instance_registry, "_instances", {"default": instance})
+    monkeypatch.setattr(instance_registry, "_save", lambda: None)
+    service = switch_module.vllm_service
+
+    async def start_process(config, pid_file, log_file):
+        return "", "", 0
+
+    async def read_pid(pid_file):
+        return None
+
+    monkeypatch.setattr(service, "start_process", start_process)
+    monkeypatch.setattr(service, "read_pid", read_pid)
+    monkeypatch.setattr(service, "write_running_config", lambda config, path: None)
+    monkeypatch.setattr(
+        "app.services.gateway_service.settings.gateway_upstream_host", "127.0.0.1"
+    )
+    return instance
+
+
+@pytest.fixture
+def switch(monkeypatch):
+    switch = SwitchService()
+    commands = []
+
+    async def run(cmd):
+        commands.append(cmd)
+        return "", "", 0
+
+    async def in_flight(port):
+        return 0
+
+    monkeypatch.setattr(switch, "_run_docker_command", run)
+    monkeypatch.setattr(switch, "_in_flight", in_flight)
+    switch.commands = commands
+    return switch
+
+
+def _switch_state() -> SwitchState:
+    return SwitchState(
+        switch_id="s1",
+        model_id="new/model",
+        from_port=8000,
+        to_port=8001,
+        started_at=datetime.utcnow(),
+    )
+
+
+async def _run(switch, tracker, instance) -> tuple[SwitchState, LaunchState]:
+    old = tracker.start(
+        ModelLaunchConfig(model_id="old/model"), "vllm", "p", "l", "default"
+    )
+    await tracker.wait(old.launch_id)
+    state = _switch_state()
+    config = ModelLaunchConfig(model_id="new/model", port=8001)
+    await switch._run(state, instance, config, 1234, None, None)
+    return state, old
+
+
+async def test_standby_is_promoted_and_gateway_follows(switch, tracker, instance):
+    state, old = await _run(switch, tracker, instance)
+
+    assert state.state == "completed"
+    launch = tracker.get("default")
+    assert launch.launch_id == state.launch_id != old.launch_id
+    assert (launch.instance_id, launch.port) == ("default", 8001)
+    assert tracker.get("default:standby") is None
+    upstream = gateway_service.resolve_instance("new/model")
+    assert gateway_service.upstream_url(upstream, "completions").endswith(
+        ":8001/v1/completions"
+    )
+
+
+async def test_failed_standby_leaves_active_launch_alone(switch, tracker, instance):
+    tracker.outcome["value"] = "failed"
+    state, old = await _run(switch, tracker, instance)
+
+    assert state.state == "rolled_back"
+    assert tracker.get("default") is old
+    assert tracker.get("default:standby").state == "failed"
+    assert instance_registry.get("default").port == 8000
+
+
+async def test_switch_requires_the_gateway(switch, monkeypatch):
+    monkeypatch.setattr(switch_module.settings, "gateway_enabled", False)
+    with pytest.raises(SwitchError, match="gateway"):
+        await switch.start(ModelLaunchConfig(model_id="new/model"))
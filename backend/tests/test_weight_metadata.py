@@ -0,0 +1,66 @@
+import json
+import struct
+
+from app.services.weight_metadata import WeightMetadataReader
+
+DTYPE_BYTES = {"F16": 2, "I32": 4, "I64": 8, "U8": 1}
+
+
+def _write_shard(path, tensors: dict[str, tuple[str, list[int]]]):
+    header, offset = {}, 0
+    for name, (dtype, shape) in tensors.items():
+        size = DTYPE_BYTES[dtype]
+        for dim in shape:
+            size *= dim
+        header[name] = {
+            "dtype": dtype,
+            "shape": shape,
+            "data_offsets": [offset, offset + size],
+        }
+        offset += size
+    raw = json.dumps(header).encode()
+    path.write_bytes(struct.pack("<Q", len(raw)) + raw + bytes(offset))
+
+
+def test_only_packed_weights_are_unpacked(tmp_path):
+    (tmp_path / "config.json").write_text(
+        json.dumps({"quantization_config": {"quant_method": "gptq", "bits": 4}})
+    )
+    _write_shard(
+        tmp_path / "model.safetensors",
+        {
+            "model.layers.0.mlp.qweight": ("I32", [16, 64]),
+            "model.layers.0.mlp.scales": ("F16", [1, 64]),
+            "model.layers.0.mlp.g_idx": ("I32", [128]),
+            "model.embed_tokens.weight": ("F16", [32, 8]),
+            "model.rotary.position_ids": ("I64", [1, 100]),
+        },
+    )
+    metadata = WeightMetadataReader().read(str(tmp_path))
+    # 16 * 64 packed I32 hold eight 4-bit values each; position ids count once
+    assert metadata.parameters == 16 * 64 * 8 + 32 * 8 + 100
+    assert metadata.quantization == "GPTQ"
+    assert metadata.quant_bits == 4
+
+
+def test_integer_weight_in_compressed_layer_is_unpacked(tmp_path):
+    (tmp_path / "config.json").write_text(
+        json.dumps(
+            {
+                "quantization_config": {
+                    "quant_method": "bitsandbytes",
+                    "load_in_4bit": True,
+                }
+            }
+        )
+    )
+    _write_shard(
+        tmp_path / "model.safetensors",
+        {
+            "model.layers.0.mlp.weight": ("U8", [64, 1]),
+            "model.layers.0.mlp.weight.absmax": ("F16", [4]),
+            "model.norm.weight": ("F16", [8]),
+        },
+    )
+    metadata = WeightMetadataReader().read(str(tmp_path))
+    assert metadata.parameters == 64 * 2 + 8
@@ -74,7 +74,7 @@ export default function InventoryPage() {
     try {
       const response = await inventoryApi.distributeModel(modelId)
       if (response.success) {
-        toastSuccess(`${modelId} distributed to ${response.distributed_to.length} nodes`)
+        toastSuccess(`Distributing ${modelId} to ${response.distributed_to.length} nodes`)
       } else {
         toastError(response.message)
       }
@@ -2,7 +2,7 @@
 
 import { useState, useCallback } from "react"
 import { useClusterStatus } from "@/hooks/useCluster"
-import { useLocalModels, useDownloadModel, useDeleteModel, useDistributeModel, useDownloadStatus } from "@/hooks/useInventory"
+import { useLocalModels, useDownloadModel, useDeleteModel, useDistributeModel, useDownloadStatus, useDownloadQueue } from "@/hooks/useInventory"
 import { toastSuccess, toastError } from "@/hooks/use-toast"
 import { ErrorBoundary } from "@/components/ui/error-boundary"
 import { ModelStatusCard } from "@/components/model/model-status-card"
@@ -24,6 +24,7 @@ export default function ModelsPage() {
   const { deleting, remove } = useDeleteModel()
   const { distributing, distribute } = useDistributeModel()
   const { status: downloadStatus } = useDownloadStatus()
+  const { jobs: downloadJobs } = useDownloadQueue()
 
   const [showDownloadDialog, setShowDownloadDialog] = useState(false)
 
@@ -62,7 +63,7 @@ export default function ModelsPage() {
     try {
       const result = await distribute(modelId)
       if (result.success) {
-        toastSuccess(`${modelId} distributed to ${result.distributed_to.length} nodes`)
+        toastSuccess(`Distributing ${modelId} to ${result.distributed_to.length} nodes`)
       } else {
         toastError(result.message)
       }
@@ -105,7 +106,7 @@ export default function ModelsPage() {
         totalModels={models.length}
         totalSizeGB={models.reduce((sum, m) => sum + m.size_gb, 0)}
         quantizedModels={models.filter(m => m.quantization).length}
-        downloadingModels={downloadStatus?.status === "downloading" ? 1 : 0}
+        downloadingModels={downloadJobs.filter((job) => job.status === "downloading").length}
       />
 
       <Card>
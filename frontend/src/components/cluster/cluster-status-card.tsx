@@ -1,7 +1,7 @@
 "use client"
 
 import { useState } from "react"
-import { useClusterStatus, useClusterAction } from "@/hooks/useCluster"
+import { useClusterStatus, useClusterAction, useNodesStatus } from "@/hooks/useCluster"
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card"
 import { Badge } from "@/components/ui/badge"
 import { Button } from "@/components/ui/button"
@@ -18,7 +18,17 @@ import {
 } from "@/components/ui/alert-dialog"
 import { Activity, Server, Play, Square, Wifi, WifiOff, Loader2 } from "lucide-react"
 
-function NodeStatusIndicator({ healthy, label, ip }: { healthy: boolean; label: string; ip: string }) {
+function NodeStatusIndicator({
+  healthy,
+  label,
+  ip,
+  latencyMs,
+}: {
+  healthy: boolean
+  label: string
+  ip: string
+  latencyMs?: number | null
+}) {
   return (
     <div className="flex items-center justify-between p-3 rounded-lg bg-muted/50">
       <div className="flex items-center gap-3">
@@ -33,7 +43,10 @@ function NodeStatusIndicator({ healthy, label, ip }: { healthy: boolean; label:
         )}
         <div>
           <p className="font-medium">{label}</p>
-          <p className="text-sm text-muted-foreground">{ip}</p>
+          <p className="text-sm text-muted-foreground">
+            {ip}
+            {latencyMs != null && ` · ${latencyMs.toFixed(1)} ms`}
+          </p>
         </div>
       </div>
       <Badge variant={healthy ? "default" : "destructive"} className={healthy ? "bg-green-600" : undefined}>
@@ -45,6 +58,7 @@ function NodeStatusIndicator({ healthy, label, ip }: { healthy: boolean; label:
 
 export function ClusterStatusCard() {
   const { data: status, isLoading: statusLoading, error: statusError } = useClusterStatus()
+  const { data: nodesStatus } = useNodesStatus()
   const { mutate: performAction, isPending: isActionPending } = useClusterAction()
   const [showConfirmDialog, setShowConfirmDialog] = useState(false)
   const [pendingAction, setPendingAction] = useState<"start" | "stop" | null>(null)
@@ -163,16 +177,21 @@ export function ClusterStatusCard() {
             </div>
 
             <div className="grid gap-3 sm:grid-cols-2">
-              <NodeStatusIndicator
-                label="Head Node"
-                ip="192.168.5.157"
-                healthy={status.head_healthy}
-              />
-              <NodeStatusIndicator
-                label="Worker Node"
-                ip="192.168.5.212"
-                healthy={status.worker_healthy}
-              />
+              {nodesStatus?.nodes.map((node, index) => (
+                <NodeStatusIndicator
+                  key={node.ip}
+                  label={
+                    node.role === "head"
+                      ? "Head Node"
+                      : nodesStatus.total > 2
+                        ? `Worker Node ${index}`
+                        : "Worker Node"
+                  }
+                  ip={node.ip}
+                  healthy={node.healthy}
+                  latencyMs={node.latency_ms}
+                />
+              ))}
             </div>
 
             {status.message && (
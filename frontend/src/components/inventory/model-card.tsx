@@ -48,6 +48,16 @@ export function ModelCard({
     return `${(gb * 1024).toFixed(0)} MB`
   }
 
+  const formatEta = (seconds: number) => {
+    if (seconds >= 3600) {
+      return `${Math.floor(seconds / 3600)}h ${Math.round((seconds % 3600) / 60)}m`
+    }
+    if (seconds >= 60) {
+      return `${Math.floor(seconds / 60)}m ${Math.round(seconds % 60)}s`
+    }
+    return `${Math.round(seconds)}s`
+  }
+
   const formatDate = (dateStr: string | null) => {
     if (!dateStr) return "Unknown"
     try {
@@ -141,6 +151,12 @@ export function ModelCard({
                 {downloadStatus.downloaded_bytes
                   ? `${(downloadStatus.downloaded_bytes / (1024 * 1024)).toFixed(1)} MB`
                   : "0 MB"}
+                {downloadStatus.total_bytes
+                  ? ` of ${(downloadStatus.total_bytes / (1024 * 1024)).toFixed(1)} MB`
+                  : ""}
+                {downloadStatus.eta_seconds != null
+                  ? ` · ${formatEta(downloadStatus.eta_seconds)} left`
+                  : ""}
               </span>
             </div>
           </div>
@@ -5,12 +5,19 @@ import { QueryClient, QueryClientProvider } from "@tanstack/react-query"
 import { ThemeProvider } from "@/components/theme-provider"
 import { Toaster } from "@/components/ui/toaster"
 import { ConnectionStatusProvider } from "@/components/layout/connection-status"
+import { useStateEvents } from "@/hooks/useEvents"
+
+function StateEventsBridge() {
+  useStateEvents()
+  return null
+}
 
 export function Providers({ children }: { children: React.ReactNode }) {
   const [queryClient] = useState(() => new QueryClient())
 
   return (
     <QueryClientProvider client={queryClient}>
+      <StateEventsBridge />
       <ThemeProvider attribute="class" defaultTheme="system" enableSystem>
         <ConnectionStatusProvider>
           {children}
@@ -9,17 +9,125 @@ interface ClusterStatus {
   message: string | null
 }
 
-interface NodeStatus {
-  head: {
-    ip: string
-    healthy: boolean
-    latency_ms: number | null
+export interface PortProbe {
+  name: string
+  port: number
+  open: boolean
+  latency_ms: number | null
+}
+
+export interface NodeHealth {
+  ip: string
+  role: "head" | "worker"
+  healthy: boolean
+  latency_ms: number | null
+  icmp: boolean | null
+  ports: PortProbe[]
+  agent: boolean
+  error: string | null
+}
+
+export interface NodeStatus {
+  nodes: NodeHealth[]
+  healthy: number
+  total: number
+  checked_at: string
+  duration_ms: number
+}
+
+export interface NetworkLinkStats {
+  source: string
+  target: string
+  method: "icmp" | "tcp"
+  window_start: string
+  window_end: string
+  samples: number
+  lost: number
+  loss_pct: number
+  rtt_min_ms: number | null
+  rtt_p50_ms: number | null
+  rtt_p95_ms: number | null
+  rtt_p99_ms: number | null
+  rtt_max_ms: number | null
+  jitter_ms: number | null
+}
+
+export interface NetworkQuality {
+  enabled: boolean
+  window_seconds: number
+  links: NetworkLinkStats[]
+}
+
+export interface ThroughputResult {
+  source: string
+  target: string
+  success: boolean
+  streams: number
+  duration_seconds: number
+  bytes_sent: number
+  bytes_received: number
+  gbps: number | null
+  error: string | null
+}
+
+export interface HostTelemetry {
+  timestamp: string
+  interval_seconds: number
+  cpu: {
+    percent: number
+    iowait_percent: number
+    cores: number
+    per_core_percent: number[]
+  }
+  memory: {
+    total_bytes: number
+    available_bytes: number
+    used_bytes: number
+    free_bytes: number
+    cached_bytes: number
+    swap_total_bytes: number
+    swap_used_bytes: number
+    used_percent: number
   }
-  worker: {
-    ip: string
-    healthy: boolean
-    latency_ms: number | null
+  disk: {
+    read_bytes_per_second: number
+    write_bytes_per_second: number
+    reads_per_second: number
+    writes_per_second: number
+    busy_percent: number
   }
+  network: {
+    name: string
+    rx_bytes_per_second: number
+    rx_packets_per_second: number
+    tx_bytes_per_second: number
+    tx_packets_per_second: number
+    errors: number
+    drops: number
+  }[]
+}
+
+export interface NodeTelemetry {
+  node: string
+  role: "head" | "worker" | null
+  connected: boolean
+  stale: boolean
+  hostname: string | null
+  agent_version: string | null
+  commands: boolean
+  connected_at: string | null
+  last_seen: string | null
+  latest: HostTelemetry | null
+}
+
+export interface AgentCommandResult {
+  node: string
+  argv: string[]
+  returncode: number | null
+  stdout: string
+  stderr: string
+  duration_seconds: number | null
+  error: string | null
 }
 
 async function fetchClusterStatus(): Promise<ClusterStatus> {
@@ -56,6 +164,59 @@ export function useNodesStatus() {
   })
 }
 
+export function useNodeTelemetry() {
+  return useQuery({
+    queryKey: ["node-telemetry"],
+    queryFn: () => api.get<NodeTelemetry[]>("/api/cluster/telemetry"),
+    refetchInterval: 2000,
+  })
+}
+
+export function useNodeTelemetryHistory(node: string | null, minutes?: number) {
+  return useQuery({
+    queryKey: ["node-telemetry-history", node, minutes],
+    queryFn: () =>
+      api.get<HostTelemetry[]>(
+        `/api/cluster/telemetry/${node}/history`,
+        minutes ? { minutes: String(minutes) } : undefined
+      ),
+    enabled: !!node,
+    refetchInterval: 5000,
+  })
+}
+
+export function useNetworkQuality() {
+  return useQuery({
+    queryKey: ["network-quality"],
+    queryFn: () => api.get<NetworkQuality>("/api/cluster/network"),
+    refetchInterval: 15000,
+  })
+}
+
+export function useThroughputTest() {
+  return useMutation({
+    mutationFn: (request: {
+      source: string
+      target: string
+      duration_seconds?: number
+      streams?: number
+    }) => api.post<ThroughputResult>("/api/cluster/network/throughput", request),
+  })
+}
+
+export function useRunOnNode() {
+  return useMutation({
+    mutationFn: ({
+      node,
+      ...request
+    }: {
+      node: string
+      argv: string[]
+      timeout_seconds?: number
+    }) => api.post<AgentCommandResult>(`/api/cluster/nodes/${node}/run`, request),
+  })
+}
+
 export function useClusterAction() {
   const queryClient = useQueryClient()
 
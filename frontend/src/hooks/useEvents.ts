@@ -0,0 +1,157 @@
+import { useEffect, useRef } from "react"
+import { useQueryClient } from "@tanstack/react-query"
+import {
+  DISTRIBUTIONS_QUERY_KEY,
+  DOWNLOAD_QUEUE_QUERY_KEY,
+  MODELS_QUERY_KEY,
+} from "@/hooks/useInventory"
+import type { LocalModel, ModelListResponse } from "@/hooks/useInventory"
+
+type StatePart = "cluster" | "model" | "nodes" | "download" | "downloads" | "distributions"
+
+interface SnapshotEvent {
+  type: "snapshot"
+  state: Partial<Record<StatePart, Record<string, unknown> | null>>
+  timestamp: string
+}
+
+interface DiffEvent {
+  type: "diff"
+  part: StatePart
+  changes: Record<string, unknown>
+  removed: string[]
+  timestamp: string
+}
+
+interface HeartbeatEvent {
+  type: "heartbeat"
+}
+
+interface InventoryEvent {
+  type: "inventory"
+  event: "added" | "removed" | "size_changed" | "updated"
+  model_id: string
+  model: LocalModel | null
+  timestamp: string
+}
+
+type StateEvent = SnapshotEvent | DiffEvent | HeartbeatEvent | InventoryEvent
+
+function applyInventoryEvent(
+  previous: ModelListResponse | undefined,
+  event: InventoryEvent
+): ModelListResponse | undefined {
+  if (!previous) {
+    return previous
+  }
+  const models = previous.models.filter((model) => model.id !== event.model_id)
+  if (event.model) {
+    models.push(event.model)
+    models.sort((a, b) => a.id.localeCompare(b.id))
+  }
+  const totalBytes = models.reduce((total, model) => total + model.size_bytes, 0)
+  return {
+    models,
+    total_count: models.length,
+    total_size_gb: Math.round((totalBytes / 1024 ** 3) * 100) / 100,
+  }
+}
+
+const QUERY_KEYS: Record<StatePart, string[]> = {
+  cluster: ["cluster-status"],
+  model: ["model-status"],
+  nodes: ["nodes-status"],
+  download: ["download-status"],
+  downloads: DOWNLOAD_QUEUE_QUERY_KEY,
+  distributions: DISTRIBUTIONS_QUERY_KEY,
+}
+
+// The model part is keyed by instance id; the default instance keeps the plain key
+function modelStatusKey(instanceId: string): string[] {
+  return instanceId === "default" ? ["model-status"] : ["model-status", instanceId]
+}
+
+export function useStateEvents() {
+  const queryClient = useQueryClient()
+  const wsRef = useRef<WebSocket | null>(null)
+  const reconnectTimeoutRef = useRef<NodeJS.Timeout | null>(null)
+  const reconnectAttemptsRef = useRef(0)
+
+  useEffect(() => {
+    let closed = false
+
+    const connect = () => {
+      const wsUrl = process.env.NEXT_PUBLIC_WS_URL || "ws://192.168.5.157:8080"
+      const ws = new WebSocket(`${wsUrl}/api/events`)
+
+      ws.onopen = () => {
+        reconnectAttemptsRef.current = 0
+      }
+
+      const setModelStatuses = (statuses: Record<string, unknown>) => {
+        Object.entries(statuses).forEach(([instanceId, status]) => {
+          queryClient.setQueryData(modelStatusKey(instanceId), status)
+        })
+      }
+
+      ws.onmessage = (event) => {
+        try {
+          const data: StateEvent = JSON.parse(event.data)
+
+          if (data.type === "snapshot") {
+            Object.entries(data.state).forEach(([part, value]) => {
+              if (part === "model" && value) {
+                setModelStatuses(value)
+              } else if (value) {
+                queryClient.setQueryData(QUERY_KEYS[part as StatePart], value)
+              }
+            })
+          } else if (data.type === "inventory") {
+            queryClient.setQueryData(
+              MODELS_QUERY_KEY,
+              (previous: ModelListResponse | undefined) => applyInventoryEvent(previous, data)
+            )
+          } else if (data.type === "diff" && data.part === "model") {
+            setModelStatuses(data.changes)
+            data.removed.forEach((instanceId) =>
+              queryClient.removeQueries({ queryKey: modelStatusKey(instanceId), exact: true })
+            )
+          } else if (data.type === "diff") {
+            queryClient.setQueryData(
+              QUERY_KEYS[data.part],
+              (previous: Record<string, unknown> | undefined) => {
+                const next = { ...(previous ?? {}), ...data.changes }
+                data.removed.forEach((key) => delete next[key])
+                return next
+              }
+            )
+          }
+        } catch (e) {
+          console.error("Failed to parse state event:", e)
+        }
+      }
+
+      ws.onclose = () => {
+        if (closed) {
+          return
+        }
+        const delay = Math.min(1000 * Math.pow(2, reconnectAttemptsRef.current), 30000)
+        reconnectAttemptsRef.current++
+        reconnectTimeoutRef.current = setTimeout(connect, delay)
+      }
+
+      wsRef.current = ws
+    }
+
+    connect()
+
+    return () => {
+      closed = true
+      if (reconnectTimeoutRef.current) {
+        clearTimeout(reconnectTimeoutRef.current)
+      }
+      wsRef.current?.close()
+      wsRef.current = null
+    }
+  }, [queryClient])
+}
@@ -1,6 +1,44 @@
-import { useState, useEffect, useCallback } from "react"
+import { useState, useCallback } from "react"
+import { useQuery } from "@tanstack/react-query"
 import { api } from "@/lib/api"
 
+export interface CachedRevision {
+  commit: string
+  refs: string[]
+  size_bytes: number
+  files: number
+  last_modified: string | null
+}
+
+export interface IncompleteBlob {
+  name: string
+  size_bytes: number
+  modified_at: string | null
+}
+
+export interface WeightMetadata {
+  parameters: number
+  weight_bytes: number
+  dtypes: Record<string, number>
+  quantization: string | null
+  quant_bits: number | null
+  torch_dtype: string | null
+  shards: number
+}
+
+export interface ModelVerification {
+  status: "verifying" | "verified" | "corrupt" | "incomplete" | "failed"
+  blobs_total: number
+  blobs_checked: number
+  blobs_cached: number
+  blobs_unverifiable: number
+  bytes_hashed: number
+  corrupt: string[]
+  throughput_mbps: number | null
+  error: string | null
+  verified_at: string | null
+}
+
 export interface LocalModel {
   id: string
   name: string
@@ -11,20 +49,50 @@ export interface LocalModel {
   downloaded_at: string | null
   download_status: string | null
   local_path: string | null
+  size_bytes: number
+  refs: Record<string, string>
+  revisions: CachedRevision[]
+  incomplete: IncompleteBlob[]
+  weights: WeightMetadata | null
+  verification: ModelVerification | null
 }
 
 export interface DownloadStatus {
   model_id: string
   progress: number
-  status: "idle" | "downloading" | "completed" | "failed" | "cancelled"
+  status: "idle" | "queued" | "downloading" | "completed" | "failed" | "cancelled"
   downloaded_bytes: number
   total_bytes: number | null
   speed_mbps: number | null
+  eta_seconds: number | null
+  files_done: number
+  files_total: number | null
+  revision: string | null
   error_message: string | null
   started_at: string | null
   updated_at: string | null
 }
 
+export interface DownloadJob extends DownloadStatus {
+  job_id: string
+  priority: number
+  distribute: boolean
+  created_at: string
+  finished_at: string | null
+}
+
+export interface DownloadQueueStatus {
+  jobs: DownloadJob[]
+  active: number
+  max_concurrent: number
+  bandwidth_limit_mbps: number
+}
+
+export interface DownloadLimits {
+  max_concurrent?: number
+  bandwidth_limit_mbps?: number
+}
+
 export interface ModelListResponse {
   models: LocalModel[]
   total_count: number
@@ -35,12 +103,14 @@ interface DownloadRequest {
   model_id: string
   revision?: string
   distribute?: boolean
+  priority?: number
 }
 
 interface DownloadResponse {
   success: boolean
   message: string
   model_id: string
+  job_id: string | null
 }
 
 interface DeleteResponse {
@@ -53,6 +123,61 @@ interface DistributeResponse {
   success: boolean
   message: string
   distributed_to: string[]
+  job_id: string | null
+}
+
+export interface DistributeOptions {
+  nodes?: string[]
+  fanout?: number
+}
+
+export interface NodeDistribution {
+  node: string
+  source: string
+  status: "pending" | "comparing" | "copying" | "completed" | "failed" | "cancelled"
+  files_total: number
+  files_done: number
+  bytes_total: number
+  bytes_done: number
+  bytes_skipped: number
+  throughput_mbps: number | null
+  error: string | null
+  started_at: string | null
+  finished_at: string | null
+}
+
+export interface DistributionJob {
+  job_id: string
+  model_id: string
+  status: "running" | "completed" | "failed" | "cancelled"
+  fanout: number
+  bytes_total: number
+  nodes: NodeDistribution[]
+  error: string | null
+  created_at: string
+  finished_at: string | null
+}
+
+export interface DistributionStatus {
+  jobs: DistributionJob[]
+}
+
+export interface NodeWarmResult {
+  node: string
+  success: boolean
+  files: number
+  bytes_warmed: number
+  duration_seconds: number
+  throughput_mbps: number | null
+  error: string | null
+}
+
+export interface WarmResponse {
+  success: boolean
+  message: string
+  model_id: string
+  bytes_warmed: number
+  nodes: NodeWarmResult[]
 }
 
 async function fetchModels(): Promise<ModelListResponse> {
@@ -82,8 +207,46 @@ async function fetchDownloadStatus(): Promise<DownloadStatus> {
   return api.get<DownloadStatus>("/api/models/download/status")
 }
 
-async function distributeModel(modelId: string): Promise<DistributeResponse> {
-  return api.post<DistributeResponse>(`/api/models/${encodeURIComponent(modelId)}/distribute`)
+async function fetchDownloadQueue(): Promise<DownloadQueueStatus> {
+  return api.get<DownloadQueueStatus>("/api/models/downloads")
+}
+
+async function cancelDownloadJob(jobId: string): Promise<DownloadJob> {
+  return api.post<DownloadJob>(`/api/models/downloads/${jobId}/cancel`)
+}
+
+async function setDownloadPriority(jobId: string, priority: number): Promise<DownloadJob> {
+  return api.patch<DownloadJob>(`/api/models/downloads/${jobId}`, { priority })
+}
+
+async function setDownloadLimits(limits: DownloadLimits): Promise<DownloadQueueStatus> {
+  return api.put<DownloadQueueStatus>("/api/models/downloads/limits", limits)
+}
+
+async function distributeModel(
+  modelId: string,
+  options?: DistributeOptions
+): Promise<DistributeResponse> {
+  return api.post<DistributeResponse>(
+    `/api/models/${encodeURIComponent(modelId)}/distribute`,
+    options
+  )
+}
+
+async function fetchDistributions(): Promise<DistributionStatus> {
+  return api.get<DistributionStatus>("/api/models/distributions")
+}
+
+async function cancelDistribution(jobId: string): Promise<DistributionJob> {
+  return api.post<DistributionJob>(`/api/models/distributions/${jobId}/cancel`)
+}
+
+async function warmModel(modelId: string): Promise<WarmResponse> {
+  return api.post<WarmResponse>(`/api/models/${encodeURIComponent(modelId)}/warm`)
+}
+
+async function verifyModel(modelId: string): Promise<ModelVerification> {
+  return api.post<ModelVerification>(`/api/models/${encodeURIComponent(modelId)}/verify`)
 }
 
 async function cancelDownload(modelId: string): Promise<{ success: boolean; message: string }> {
@@ -92,36 +255,31 @@ async function cancelDownload(modelId: string): Promise<{ success: boolean; mess
   )
 }
 
-export function useLocalModels() {
-  const [models, setModels] = useState<LocalModel[]>([])
-  const [loading, setLoading] = useState(true)
-  const [error, setError] = useState<string | null>(null)
+export const MODELS_QUERY_KEY = ["models"]
 
-  const refresh = useCallback(async () => {
-    setLoading(true)
-    setError(null)
-    try {
-      const response = await fetchModels()
-      setModels(response.models)
-    } catch (e) {
-      setError(e instanceof Error ? e.message : "Failed to fetch models")
-    } finally {
-      setLoading(false)
-    }
-  }, [])
+function useModelsQuery() {
+  const query = useQuery({
+    queryKey: MODELS_QUERY_KEY,
+    queryFn: fetchModels,
+  })
+  const { refetch } = query
 
-  useEffect(() => {
-    refresh()
-  }, [refresh])
+  const refresh = useCallback(async () => {
+    await refetch()
+  }, [refetch])
 
   return {
-    models,
-    loading,
-    error,
+    models: query.data?.models ?? [],
+    loading: query.isFetching,
+    error: query.error ? query.error.message || "Failed to fetch models" : null,
     refresh,
   }
 }
 
+export function useLocalModels() {
+  return useModelsQuery()
+}
+
 export function useDownloadModel() {
   const [downloading, setDownloading] = useState(false)
   const [error, setError] = useState<string | null>(null)
@@ -176,11 +334,11 @@ export function useDistributeModel() {
   const [distributing, setDistributing] = useState(false)
   const [error, setError] = useState<string | null>(null)
 
-  const distribute = useCallback(async (modelId: string) => {
+  const distribute = useCallback(async (modelId: string, options?: DistributeOptions) => {
     setDistributing(true)
     setError(null)
     try {
-      const result = await distributeModel(modelId)
+      const result = await distributeModel(modelId, options)
       if (!result.success) {
         throw new Error(result.message)
       }
@@ -198,76 +356,88 @@ export function useDistributeModel() {
 }
 
 export function useDownloadStatus() {
-  const [status, setStatus] = useState<DownloadStatus | null>(null)
-  const [loading, setLoading] = useState(false)
-  const [error, setError] = useState<string | null>(null)
+  // Progress updates are pushed over /api/events into this query by useStateEvents
+  const query = useQuery({
+    queryKey: ["download-status"],
+    queryFn: fetchDownloadStatus,
+  })
+  const { refetch } = query
 
   const refresh = useCallback(async () => {
-    setLoading(true)
-    setError(null)
-    try {
-      const result = await fetchDownloadStatus()
-      setStatus(result)
-    } catch (e) {
-      setError(e instanceof Error ? e.message : "Failed to fetch download status")
-    } finally {
-      setLoading(false)
-    }
-  }, [])
-
-  useEffect(() => {
-    refresh()
-    const interval = setInterval(refresh, 2000)
-    return () => {
-      clearInterval(interval)
-      setStatus(null)
-    }
-  }, [refresh])
+    await refetch()
+  }, [refetch])
 
   return {
-    status,
-    loading,
-    error,
+    status: query.data ?? null,
+    loading: query.isFetching,
+    error: query.error ? query.error.message || "Failed to fetch download status" : null,
     refresh,
   }
 }
 
-export function useInventory() {
-  const [models, setModels] = useState<LocalModel[]>([])
-  const [loading, setLoading] = useState(true)
-  const [error, setError] = useState<string | null>(null)
+export const DOWNLOAD_QUEUE_QUERY_KEY = ["download-queue"]
+
+export function useDownloadQueue() {
+  // Job changes are pushed over /api/events into this query by useStateEvents
+  const query = useQuery({
+    queryKey: DOWNLOAD_QUEUE_QUERY_KEY,
+    queryFn: fetchDownloadQueue,
+  })
+  const { refetch } = query
 
   const refresh = useCallback(async () => {
-    setLoading(true)
-    setError(null)
-    try {
-      const response = await fetchModels()
-      setModels(response.models)
-    } catch (e) {
-      setError(e instanceof Error ? e.message : "Failed to fetch models")
-    } finally {
-      setLoading(false)
-    }
-  }, [])
+    await refetch()
+  }, [refetch])
 
-  useEffect(() => {
-    refresh()
-  }, [refresh])
+  return {
+    queue: query.data ?? null,
+    jobs: query.data?.jobs ?? [],
+    loading: query.isFetching,
+    error: query.error ? query.error.message || "Failed to fetch download queue" : null,
+    refresh,
+  }
+}
+
+export const DISTRIBUTIONS_QUERY_KEY = ["distributions"]
+
+export function useDistributions() {
+  // Per-node progress is pushed over /api/events into this query by useStateEvents
+  const query = useQuery({
+    queryKey: DISTRIBUTIONS_QUERY_KEY,
+    queryFn: fetchDistributions,
+  })
+  const { refetch } = query
+
+  const refresh = useCallback(async () => {
+    await refetch()
+  }, [refetch])
 
   return {
-    models,
-    loading,
-    error,
+    jobs: query.data?.jobs ?? [],
+    loading: query.isFetching,
+    error: query.error ? query.error.message || "Failed to fetch distributions" : null,
     refresh,
   }
 }
 
+export function useInventory() {
+  return useModelsQuery()
+}
+
 export const inventoryApi = {
   fetchModels,
   fetchModel,
   downloadModel,
   deleteModel,
   fetchDownloadStatus,
+  fetchDownloadQueue,
+  cancelDownloadJob,
+  setDownloadPriority,
+  setDownloadLimits,
   distributeModel,
+  fetchDistributions,
+  cancelDistribution,
+  warmModel,
+  verifyModel,
   cancelDownload,
 }
\ No newline at end of file
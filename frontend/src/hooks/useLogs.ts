@@ -5,6 +5,8 @@ export interface LogEntry {
   level: "DEBUG" | "INFO" | "WARNING" | "ERROR" | "CRITICAL"
   message: string
   raw_line: string
+  node?: string | null
+  source?: string | null
 }
 
 export interface LogHistoryResponse {
@@ -15,6 +17,9 @@ export interface LogHistoryResponse {
 
 interface UseLogStreamOptions {
   maxBufferSize?: number
+  sources?: string[]
+  nodes?: string[]
+  instanceId?: string
   onError?: (error: string) => void
 }
 
@@ -30,7 +35,9 @@ interface UseLogStreamReturn {
 export function useLogStream(
   options: UseLogStreamOptions = {}
 ): UseLogStreamReturn {
-  const { maxBufferSize = 1000, onError } = options
+  const { maxBufferSize = 1000, sources, nodes, instanceId, onError } = options
+  const sourcesParam = sources?.join(",") ?? ""
+  const nodesParam = nodes?.join(",") ?? ""
 
   const [current, setCurrent] = useState<LogEntry | null>(null)
   const [history, setHistory] = useState<LogEntry[]>([])
@@ -49,7 +56,18 @@ export function useLogStream(
     }
 
     const wsUrl = process.env.NEXT_PUBLIC_WS_URL || "ws://192.168.5.157:8080"
-    const ws = new WebSocket(`${wsUrl}/api/logs/stream`)
+    const params = new URLSearchParams()
+    if (sourcesParam) {
+      params.append("sources", sourcesParam)
+    }
+    if (nodesParam) {
+      params.append("nodes", nodesParam)
+    }
+    if (instanceId) {
+      params.append("instance_id", instanceId)
+    }
+    const query = params.toString()
+    const ws = new WebSocket(`${wsUrl}/api/logs/stream${query ? `?${query}` : ""}`)
 
     ws.onopen = () => {
       setIsConnected(true)
@@ -75,6 +93,8 @@ export function useLogStream(
           level: data.level,
           message: data.message,
           raw_line: data.raw_line,
+          node: data.node ?? null,
+          source: data.source ?? null,
         }
         setCurrent(logEntry)
 
@@ -115,7 +135,7 @@ export function useLogStream(
     }
 
     wsRef.current = ws
-  }, [maxBufferSize, onError])
+  }, [maxBufferSize, sourcesParam, nodesParam, instanceId, onError])
 
   useEffect(() => {
     connectRef.current = connect
@@ -162,13 +182,21 @@ export function useLogStream(
 
 export async function fetchLogHistory(
   lines: number = 100,
-  level?: string
+  level?: string,
+  sources?: string[],
+  instanceId?: string
 ): Promise<LogHistoryResponse> {
   const baseUrl = process.env.NEXT_PUBLIC_API_URL || "http://192.168.5.157:8080"
   const params = new URLSearchParams({ lines: lines.toString() })
   if (level) {
     params.append("level", level)
   }
+  if (sources && sources.length > 0) {
+    params.append("sources", sources.join(","))
+  }
+  if (instanceId) {
+    params.append("instance_id", instanceId)
+  }
 
   const response = await fetch(`${baseUrl}/api/logs/history?${params.toString()}`)
   if (!response.ok) {
@@ -45,6 +45,7 @@ export interface MetricsMessage {
 interface UseMetricsStreamOptions {
   maxDataPoints?: number
   intervalMs?: number
+  instanceId?: string
   onError?: (error: string) => void
 }
 
@@ -63,6 +64,7 @@ export function useMetricsStream(
   const {
     maxDataPoints = 300,
     intervalMs = 1000,
+    instanceId,
     onError,
   } = options
 
@@ -83,7 +85,8 @@ export function useMetricsStream(
     }
 
     const wsUrl = process.env.NEXT_PUBLIC_WS_URL || "ws://192.168.5.157:8080"
-    const ws = new WebSocket(`${wsUrl}/api/metrics/stream`)
+    const query = instanceId ? `?instance_id=${encodeURIComponent(instanceId)}` : ""
+    const ws = new WebSocket(`${wsUrl}/api/metrics/stream${query}`)
 
     ws.onopen = () => {
       setIsConnected(true)
@@ -133,7 +136,7 @@ export function useMetricsStream(
     }
 
     wsRef.current = ws
-  }, [maxDataPoints, onError])
+  }, [maxDataPoints, instanceId, onError])
 
   useEffect(() => {
     connectRef.current = connect
@@ -178,12 +181,13 @@ export function useMetricsStream(
   }
 }
 
-export function useCurrentMetrics() {
+export function useCurrentMetrics(instanceId?: string) {
   return useQuery({
-    queryKey: ["current-metrics"],
+    queryKey: ["current-metrics", instanceId],
     queryFn: async () => {
+      const query = instanceId ? `?instance_id=${encodeURIComponent(instanceId)}` : ""
       const response = await fetch(
-        `${process.env.NEXT_PUBLIC_API_URL || "http://192.168.5.157:8080"}/api/metrics/current`
+        `${process.env.NEXT_PUBLIC_API_URL || "http://192.168.5.157:8080"}/api/metrics/current${query}`
       )
       if (!response.ok) {
         throw new Error("Failed to fetch metrics")
@@ -192,4 +196,129 @@ export function useCurrentMetrics() {
     },
     refetchInterval: 5000,
   })
-}
\ No newline at end of file
+}
+
+export interface GatewayRequestRecord {
+  request_id: string
+  instance_id: string
+  method: string
+  path: string
+  model: string | null
+  stream: boolean
+  status_code: number | null
+  started_at: string
+  ttft_ms: number | null
+  total_ms: number
+  chunks: number
+  prompt_tokens: number | null
+  completion_tokens: number | null
+  itl_mean_ms: number | null
+  itl_p95_ms: number | null
+  itl_max_ms: number | null
+  priority_class: string | null
+  queue_wait_ms: number | null
+  cache: "hit" | "miss" | null
+  error: string | null
+}
+
+export interface GatewaySummary {
+  requests: number
+  errors: number
+  ttft_p50_ms: number | null
+  ttft_p95_ms: number | null
+  total_p50_ms: number | null
+  total_p95_ms: number | null
+  itl_mean_ms: number | null
+  completion_tokens: number
+  output_tokens_per_second: number | null
+}
+
+export interface GatewayMetricsResponse {
+  summary: GatewaySummary
+  recent: GatewayRequestRecord[]
+}
+
+export function useGatewayMetrics(instanceId?: string) {
+  return useQuery<GatewayMetricsResponse>({
+    queryKey: ["gateway-metrics", instanceId],
+    queryFn: async () => {
+      const query = instanceId ? `?instance_id=${encodeURIComponent(instanceId)}` : ""
+      const response = await fetch(
+        `${process.env.NEXT_PUBLIC_API_URL || "http://192.168.5.157:8080"}/api/metrics/gateway${query}`
+      )
+      if (!response.ok) {
+        throw new Error("Failed to fetch gateway metrics")
+      }
+      return response.json()
+    },
+    refetchInterval: 5000,
+  })
+}
+
+export interface AdmissionClassMetrics {
+  priority_class: string
+  queue_depth: number
+  in_flight: number
+  admitted: number
+  rejected: number
+  wait_p50_ms: number | null
+  wait_p95_ms: number | null
+}
+
+export interface AdmissionMetrics {
+  instance_id: string
+  in_flight: number
+  max_in_flight: number
+  upstream: { num_requests_waiting: number; kv_cache_usage: number | null } | null
+  classes: AdmissionClassMetrics[]
+}
+
+export function useAdmissionMetrics() {
+  return useQuery<AdmissionMetrics[]>({
+    queryKey: ["admission-metrics"],
+    queryFn: async () => {
+      const response = await fetch(
+        `${process.env.NEXT_PUBLIC_API_URL || "http://192.168.5.157:8080"}/api/metrics/admission`
+      )
+      if (!response.ok) {
+        throw new Error("Failed to fetch admission metrics")
+      }
+      return response.json()
+    },
+    refetchInterval: 2000,
+  })
+}
+
+export interface ResponseCacheMetrics {
+  enabled: boolean
+  entries: number
+  bytes: number
+  max_bytes: number
+  disk_entries: number
+  disk_bytes: number
+  disk_max_bytes: number
+  hits: number
+  disk_hits: number
+  misses: number
+  stores: number
+  evictions: number
+  hit_rate: number | null
+  bytes_saved: number
+  upstream_seconds_saved: number
+}
+
+export function useResponseCacheMetrics() {
+  return useQuery<ResponseCacheMetrics>({
+    queryKey: ["response-cache-metrics"],
+    queryFn: async () => {
+      const response = await fetch(
+        `${process.env.NEXT_PUBLIC_API_URL || "http://192.168.5.157:8080"}/api/metrics/cache`
+      )
+      if (!response.ok) {
+        throw new Error("Failed to fetch response cache metrics")
+      }
+      return response.json()
+    },
+    refetchInterval: 5000,
+  })
+}
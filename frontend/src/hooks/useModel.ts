@@ -14,7 +14,8 @@ interface ModelLaunchConfig {
   port: number
 }
 
-interface ModelStatus {
+export interface ModelStatus {
+  instance_id: string
   running: boolean
   model_id: string | null
   uptime: string | null
@@ -23,10 +24,89 @@ interface ModelStatus {
 }
 
 interface LaunchResult {
+  instance_id: string
   success: boolean
   message: string
   model_id?: string
   port?: number
+  launch_id?: string
+}
+
+export interface LaunchPhase {
+  name: string
+  started_at: string
+  duration_seconds: number | null
+}
+
+export interface LaunchState {
+  launch_id: string
+  instance_id: string
+  model_id: string
+  config_hash: string
+  port: number
+  state: "starting" | "ready" | "failed" | "stopped"
+  phase: string
+  started_at: string
+  ready_at: string | null
+  time_to_ready_seconds: number | null
+  phases: LaunchPhase[]
+  error: string | null
+  profile_id: string | null
+  stopped_at: string | null
+  exit_reason: "stopped" | "replaced" | "exited" | "failed" | "timeout" | null
+}
+
+export interface LaunchRecord extends LaunchState {
+  peak_tokens_per_second: number | null
+  median_tokens_per_second: number | null
+  p95_latency_seconds: number | null
+  p95_ttft_seconds: number | null
+  max_kv_cache_usage: number | null
+  requests: number | null
+  generation_tokens: number | null
+  samples: number
+}
+
+export interface LaunchMetricComparison {
+  metric: string
+  higher_is_better: boolean
+  latest: number | null
+  baseline: number | null
+  change_pct: number | null
+  regression: boolean
+}
+
+export interface LaunchComparison {
+  profile_id: string | null
+  config_hash: string | null
+  latest: LaunchRecord | null
+  baseline_runs: number
+  metrics: LaunchMetricComparison[]
+  regressions: string[]
+  runs: LaunchRecord[]
+}
+
+export interface SwitchStep {
+  name: string
+  status: "running" | "completed" | "failed" | "skipped"
+  started_at: string
+  finished_at: string | null
+  message: string | null
+}
+
+export interface SwitchState {
+  switch_id: string
+  instance_id: string
+  model_id: string
+  from_port: number
+  to_port: number
+  state: "running" | "completed" | "rolled_back" | "failed"
+  step: string | null
+  launch_id: string | null
+  started_at: string
+  finished_at: string | null
+  steps: SwitchStep[]
+  error: string | null
 }
 
 interface RunningConfig {
@@ -54,8 +134,8 @@ interface ModelListResponse {
   models: AvailableModel[]
 }
 
-async function fetchModelStatus(): Promise<ModelStatus> {
-  return api.get<ModelStatus>("/api/model/status")
+async function fetchModelStatus(instanceId: string): Promise<ModelStatus> {
+  return api.get<ModelStatus>("/api/model/status", { instance_id: instanceId })
 }
 
 async function fetchRunningConfig(): Promise<RunningConfig | null> {
@@ -66,6 +146,31 @@ async function fetchRunningConfig(): Promise<RunningConfig | null> {
   }
 }
 
+async function fetchLaunchState(): Promise<LaunchState | null> {
+  try {
+    return await api.get<LaunchState>("/api/model/launch-state")
+  } catch {
+    return null
+  }
+}
+
+async function fetchLaunchHistory(configHash?: string): Promise<LaunchRecord[]> {
+  return api.get<LaunchRecord[]>(
+    "/api/model/launches",
+    configHash ? { config_hash: configHash } : undefined
+  )
+}
+
+async function fetchLaunchComparison(profileId: string): Promise<LaunchComparison> {
+  return api.get<LaunchComparison>("/api/model/launches/compare", {
+    profile_id: profileId,
+  })
+}
+
+async function fetchInstances(): Promise<ModelStatus[]> {
+  return api.get<ModelStatus[]>("/api/model/instances")
+}
+
 async function fetchModelList(): Promise<ModelListResponse> {
   return api.get<ModelListResponse>("/api/model/list")
 }
@@ -78,10 +183,22 @@ async function stopModel(): Promise<LaunchResult> {
   return api.post<LaunchResult>("/api/model/stop")
 }
 
-export function useModelStatus() {
+async function switchModel(config: ModelLaunchConfig): Promise<SwitchState> {
+  return api.post<SwitchState>("/api/model/switch", config)
+}
+
+async function fetchSwitchState(): Promise<SwitchState | null> {
+  try {
+    return await api.get<SwitchState>("/api/model/switch")
+  } catch {
+    return null
+  }
+}
+
+export function useModelStatus(instanceId = "default") {
   return useQuery({
-    queryKey: ["model-status"],
-    queryFn: fetchModelStatus,
+    queryKey: instanceId === "default" ? ["model-status"] : ["model-status", instanceId],
+    queryFn: () => fetchModelStatus(instanceId),
     refetchInterval: 5000,
     gcTime: 10000,
   })
@@ -96,6 +213,61 @@ export function useRunningConfig() {
   })
 }
 
+export function useLaunchState() {
+  return useQuery({
+    queryKey: ["launch-state"],
+    queryFn: fetchLaunchState,
+    refetchInterval: (query) =>
+      query.state.data?.state === "starting" ? 2000 : 15000,
+  })
+}
+
+export function useSwitchState() {
+  return useQuery({
+    queryKey: ["switch-state"],
+    queryFn: fetchSwitchState,
+    refetchInterval: (query) =>
+      query.state.data?.state === "running" ? 2000 : 15000,
+  })
+}
+
+export function useSwitchModel() {
+  const queryClient = useQueryClient()
+
+  return useMutation({
+    mutationFn: switchModel,
+    onSuccess: () => {
+      queryClient.invalidateQueries({ queryKey: ["switch-state"] })
+      queryClient.invalidateQueries({ queryKey: ["launch-state"] })
+    },
+  })
+}
+
+export function useLaunchHistory(configHash?: string) {
+  return useQuery({
+    queryKey: ["launch-history", configHash],
+    queryFn: () => fetchLaunchHistory(configHash),
+    gcTime: 60000,
+  })
+}
+
+export function useLaunchComparison(profileId?: string) {
+  return useQuery({
+    queryKey: ["launch-comparison", profileId],
+    queryFn: () => fetchLaunchComparison(profileId as string),
+    enabled: !!profileId,
+    gcTime: 60000,
+  })
+}
+
+export function useInstances() {
+  return useQuery({
+    queryKey: ["model-instances"],
+    queryFn: fetchInstances,
+    refetchInterval: 5000,
+  })
+}
+
 export function useModelList() {
   return useQuery({
     queryKey: ["model-list"],
@@ -112,6 +284,7 @@ export function useLaunchModel() {
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ["model-status"] })
       queryClient.invalidateQueries({ queryKey: ["running-config"] })
+      queryClient.invalidateQueries({ queryKey: ["launch-state"] })
     },
   })
 }